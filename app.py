@@ -7,23 +7,43 @@ import random
 import plotly.graph_objects as go
 import openai
 import time
+import uuid
 
 import os
 print("✅ app.py running in:", os.getcwd())
 
 from reddit_scraper import fetch_reddit_posts
+from post_store import count_posts, query_posts
 from wattpad_scraper import fetch_wattpad_stories
-from content_analyzer import evaluate_adaptation_potential
+from wattpad_crawler import sweep_wattpad_stories
+from content_analyzer import (evaluate_adaptation_potential, evaluate_adaptation_potential_batch,
+                              estimate_radar_scores, build_pre_score_analysis, build_engagement_analysis,
+                              RADAR_CATEGORIES)
+from pre_scorer import get_pre_scorer
+from candidate_selection import select_candidates
+from results_index import ResultsIndex, ENGAGEMENT_METRICS
+from corpus_store import count_corpus, load_corpus, get_corpus_item, save_corpus, TEXT_COLUMNS
+from artifact_store import SessionArtifacts, get_artifact_store
+from session_snapshots import autosave, restore_snapshot, list_projects, new_project_id
 from content_generator import (generate_plot_summary, generate_poster_concept,
                                generate_story_outline, generate_book_chapter,
                                generate_pitch_deck, generate_character_profiles,
                                generate_plot_synopsis, generate_audience_analysis,
-                               generate_radar_chart_values, generate_teaser_trailer_script,
+                               generate_teaser_trailer_script,
                                generate_alternate_endings, generate_cast_suggestions)
-from utils import get_default_subreddits, format_reddit_url, format_wattpad_url, get_default_wattpad_categories
+from book_generator import generate_book, parse_outline_chapters, BookStore, DEFAULT_TOTAL_CHAPTERS
+from utils import get_default_subreddits, format_reddit_url, format_wattpad_url, get_default_wattpad_categories, get_content_text
 from dotenv import load_dotenv
 from pitch_exporter import generate_pitch_pdf
+from llm_client import chat_completion, generate_image
+from model_cascade import get_premium_model, get_cascade_settings
+from llm_metrics import get_feature_summary, get_model_summary, get_cascade_summary
+from rerun_profiler import profiling_enabled, start_rerun_profile, stop_rerun_profile, profile_mark, get_last_profile
+from prefetcher import get_prefetcher
+from io_replay import install_from_env
 load_dotenv(override=True)
+# Records or replays OpenAI, Reddit and Wattpad I/O when IO_REPLAY is set
+install_from_env()
 
 # Set page config
 st.set_page_config(page_title="IP Pitch Builder",
@@ -31,6 +51,18 @@ st.set_page_config(page_title="IP Pitch Builder",
                    layout="wide",
                    initial_sidebar_state="expanded")
 
+if 'session_owner' not in st.session_state:
+    st.session_state.session_owner = uuid.uuid4().hex
+
+# Opt-in profile of this rerun (PROFILE_RERUNS=1, or the switch in the Ops panel), split by page section
+start_rerun_profile(st.session_state.session_owner, __file__,
+                    enabled=profiling_enabled(st.session_state.get('profile_reruns', False)))
+
+# Frames, generated texts, PDFs and image URLs live in the shared artifact store; session state keeps handles.
+# Touched before the defaults below, so keys whose artifacts were released while idle get them again
+artifacts = SessionArtifacts(st.session_state, f"session:{st.session_state.session_owner}")
+artifacts.touch()
+
 # Initialize session state variables
 if 'plot_summary' not in st.session_state:
     st.session_state.plot_summary = ""
@@ -73,7 +105,23 @@ if 'teaser_script' not in st.session_state:
 if 'market_analysis' not in st.session_state:
     st.session_state.market_analysis = None
 
+profile_mark("session_setup")
+
+# The working set is autosaved to a project named in the URL (?project=<id>), so a refresh or restart resumes it
+requested_project = st.query_params.get("project")
+if 'project_id' not in st.session_state or (requested_project and requested_project != st.session_state.project_id):
+    st.session_state.project_id = requested_project or new_project_id()
+    st.query_params["project"] = st.session_state.project_id
+    if requested_project:
+        # Rerun so defaults are set for whatever the snapshot does not have
+        restore_snapshot(requested_project, st.session_state, artifacts.holder, store=artifacts.store)
+        st.rerun()
+else:
+    # Changes made by the previous run, including runs cut short by st.rerun()
+    autosave(st.session_state.project_id, artifacts)
+
 # Custom CSS for improved UI
+profile_mark("css")
 st.markdown("""
 <style>
     /* Main theme colors */
@@ -211,6 +259,7 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # App title and description
+profile_mark("sidebar")
 st.title("IP Pitch Builder")
 st.subheader(
     "Transform viral content into billion-dollar streaming adaptations"
@@ -229,6 +278,17 @@ if not api_key:
             "⚠️ OpenAI API key is missing! Content will be scored using a simple algorithm based on engagement metrics rather than detailed content analysis."
         )
 
+# Opt-in speculative generation of the materials most likely to be requested next
+prefetch_enabled = st.sidebar.checkbox(
+    "Prefetch materials on selection",
+    value=False,
+    help="When a story is selected, start generating its plot synopsis, pitch deck and character "
+         "profiles in the background so the first click returns instantly. Uses API credits even "
+         "if the materials are never opened."
+)
+if not prefetch_enabled:
+    get_prefetcher().cancel(st.session_state.session_owner)
+
 # Platform selection
 st.sidebar.subheader("Content Source Selection")
 platform = st.sidebar.radio("Select platform", ["Reddit", "Wattpad"])
@@ -281,28 +341,161 @@ if platform == "Reddit":
     min_score = st.sidebar.slider("Minimum upvotes", 100, 10000, 1000, step=100)
     min_comments = st.sidebar.slider("Minimum comments", 10, 1000, 100, step=10)
     reddit_limit = st.sidebar.slider("Number of posts per subreddit", 5, 50, 10)
+    
+    # Posts backfilled from Reddit dumps with reddit_dump_ingest.py
+    archived_posts = count_posts()
+    use_post_archive = st.sidebar.checkbox(
+        f"Use local post archive ({archived_posts:,} posts)",
+        value=False,
+        disabled=archived_posts == 0,
+        help="Search posts ingested from Reddit data dumps instead of the Reddit API. "
+             "The time period filter does not apply to archived posts."
+    )
 
 # Wattpad filters (only show if Wattpad is selected)
 elif platform == "Wattpad":
     st.sidebar.subheader("Wattpad Content Filtering")
     
-    # Category selection
-    wattpad_categories = ["None"] + get_default_wattpad_categories()
-    category = st.sidebar.selectbox(
-        "Select category",
-        options=wattpad_categories,
-        index=0  # Default to None
-    )
-    category = None if category == "None" else category
+    # Category selection (several categories are swept concurrently in one run)
+    sweep_all_categories = st.sidebar.checkbox("Sweep all default categories", value=False)
+    if sweep_all_categories:
+        wattpad_categories = get_default_wattpad_categories()
+    else:
+        wattpad_categories = st.sidebar.multiselect(
+            "Select categories",
+            options=get_default_wattpad_categories()
+        )
     
     # Tag input
-    tag = st.sidebar.text_input("Search by tag (e.g., 'lovestory', 'fantasy')")
+    tag_input = st.sidebar.text_input("Search by tags, comma separated (e.g., 'lovestory, fantasy')")
+    wattpad_tags = [tag.strip() for tag in tag_input.split(",") if tag.strip()]
     
     # Filtering parameters in sidebar
     wattpad_limit = st.sidebar.slider("Number of stories to fetch", 5, 30, 10)
     min_reads = st.sidebar.slider("Minimum reads", 1000, 1000000, 10000, step=1000)
     min_votes = st.sidebar.slider("Minimum votes", 100, 100000, 5000, step=100)
     min_parts = st.sidebar.slider("Minimum chapters/parts", 1, 50, 1)
+    
+    # Deep crawl follows listing pagination and related stories instead of reading one page
+    wattpad_deep_crawl = st.sidebar.checkbox(
+        "Deep crawl (follow pages and related stories)",
+        value=False,
+        help="Collects many more stories per run. Progress is checkpointed, so an interrupted "
+             "crawl with the same filters continues where it stopped."
+    )
+    wattpad_resume = False
+    if wattpad_deep_crawl:
+        wattpad_limit = st.sidebar.slider("Stories to collect", 10, 500, 100, step=10)
+        wattpad_resume = st.sidebar.checkbox("Resume previous crawl", value=True,
+                                             help="Continues an interrupted crawl with the same filters. "
+                                                  "A finished crawl always starts afresh.")
+
+# Saved projects: the working set of each is autosaved and reopened without refetching or regenerating
+with st.sidebar.expander("💾 Projects", expanded=False):
+    st.caption(f"Autosaving to project `{st.session_state.project_id}`. "
+               "Reloading this page or bookmarking its URL resumes it.")
+    saved_projects = [project for project in list_projects() if project['project'] != st.session_state.project_id]
+    if saved_projects:
+        open_project = st.selectbox(
+            "Saved projects",
+            options=[project['project'] for project in saved_projects],
+            format_func=lambda project_id: next(
+                f"{project['title'] or 'Untitled'} ({time.strftime('%b %d, %H:%M', time.localtime(project['updated_at']))})"
+                for project in saved_projects if project['project'] == project_id))
+        if st.button("Open project", use_container_width=True):
+            st.query_params["project"] = open_project
+            st.rerun()
+    if st.button("New project", use_container_width=True):
+        st.query_params["project"] = new_project_id()
+        st.rerun()
+
+# Ops panel with per-feature latency and spend from the local metrics store
+with st.sidebar.expander("📈 Ops", expanded=False):
+    ops_window = st.selectbox("Window", options=["Last hour", "Last 24 hours", "All time"], index=1)
+    ops_since = {"Last hour": time.time() - 3600,
+                 "Last 24 hours": time.time() - 86400,
+                 "All time": None}[ops_window]
+    ops_summary = get_feature_summary(since=ops_since)
+    if ops_summary:
+        ops_df = pd.DataFrame(ops_summary)[[
+            'feature', 'calls', 'errors', 'cache_hits', 'coalesced', 'p50_ms', 'p95_ms',
+            'prompt_tokens', 'cached_tokens', 'completion_tokens', 'spend_usd'
+        ]]
+        st.metric("Total spend", f"${ops_df['spend_usd'].sum():.2f}")
+        st.dataframe(ops_df,
+                     column_config={
+                         "p50_ms": st.column_config.NumberColumn("p50 (ms)", format="%.0f"),
+                         "p95_ms": st.column_config.NumberColumn("p95 (ms)", format="%.0f"),
+                         "cached_tokens": st.column_config.NumberColumn(
+                             "Cached tokens", help="Prompt tokens served from OpenAI's prompt cache"),
+                         "spend_usd": st.column_config.NumberColumn("Spend", format="$%.4f")
+                     },
+                     hide_index=True,
+                     use_container_width=True)
+    else:
+        st.caption("No OpenAI calls recorded yet.")
+    
+    # Per-tier latency, cost and agreement when the model cascade is enabled (MODEL_CASCADE=1)
+    cascade_settings = get_cascade_settings()
+    if cascade_settings["enabled"]:
+        st.caption(f"Model cascade: {cascade_settings['draft_model']} → {cascade_settings['premium_model']}")
+        cascade_summary = get_cascade_summary(since=ops_since)
+        if cascade_summary:
+            cascade_df = pd.DataFrame(cascade_summary)[[
+                'feature', 'items', 'escalation_rate', 'draft_p50_ms', 'premium_p50_ms',
+                'mean_abs_diff', 'agreement_rate'
+            ]]
+            cascade_df[['escalation_rate', 'agreement_rate']] = cascade_df[['escalation_rate', 'agreement_rate']].astype(float) * 100
+            st.dataframe(cascade_df,
+                         column_config={
+                             "escalation_rate": st.column_config.NumberColumn("Escalated", format="%.0f%%"),
+                             "draft_p50_ms": st.column_config.NumberColumn("Draft p50 (ms)", format="%.0f"),
+                             "premium_p50_ms": st.column_config.NumberColumn("Premium p50 (ms)", format="%.0f"),
+                             "mean_abs_diff": st.column_config.NumberColumn("Mean score diff", format="%.2f"),
+                             "agreement_rate": st.column_config.NumberColumn("Within 1 point", format="%.0f%%")
+                         },
+                         hide_index=True,
+                         use_container_width=True)
+        model_summary = get_model_summary(since=ops_since)
+        if model_summary:
+            st.dataframe(pd.DataFrame(model_summary)[[
+                'feature', 'model', 'calls', 'p50_ms', 'p95_ms', 'cost_per_call_usd', 'spend_usd'
+            ]],
+                         column_config={
+                             "p50_ms": st.column_config.NumberColumn("p50 (ms)", format="%.0f"),
+                             "p95_ms": st.column_config.NumberColumn("p95 (ms)", format="%.0f"),
+                             "cost_per_call_usd": st.column_config.NumberColumn("Per call", format="$%.4f"),
+                             "spend_usd": st.column_config.NumberColumn("Spend", format="$%.4f")
+                         },
+                         hide_index=True,
+                         use_container_width=True)
+
+    # Memory held by this session, and by the artifact store shared by all sessions
+    session_memory = artifacts.memory_report()
+    artifact_stats = get_artifact_store().stats()
+    st.caption(f"This session: {session_memory['inline_bytes'] / 1e6:.1f} MB in session state, "
+               f"{session_memory['artifact_bytes'] / 1e6:.1f} MB in {session_memory['artifacts']} stored artifact(s) "
+               f"({session_memory['shared_bytes'] / 1e6:.1f} MB shared with other sessions)")
+    st.caption(f"Artifact store: {artifact_stats['artifacts']} artifact(s), {artifact_stats['bytes'] / 1e6:.1f} MB "
+               f"on disk for {artifact_stats['holders']} session(s) and project(s), "
+               f"{artifact_stats['cached_bytes'] / 1e6:.1f} MB in memory")
+
+    # Rerun profiles: sampled flamegraphs and section timings written to the profile directory
+    st.checkbox("Profile reruns", key="profile_reruns",
+                help="Profile each rerun of this session; results are written to the profiles data directory")
+    last_profile = get_last_profile(st.session_state.session_owner)
+    if last_profile:
+        st.caption(f"Last profiled rerun: {last_profile['duration_ms']:.0f} ms ({last_profile['ended']}), "
+                   f"flamegraph at {last_profile['files']['flamegraph']}")
+        st.dataframe(pd.DataFrame(last_profile['sections']),
+                     column_config={
+                         "wall_ms": st.column_config.NumberColumn("Wall (ms)", format="%.0f"),
+                         "cpu_ms": st.column_config.NumberColumn("CPU (ms)", format="%.0f")
+                     },
+                     hide_index=True,
+                     use_container_width=True)
+
+profile_mark("header")
 
 # Loading screen
 if st.session_state.show_loading:
@@ -363,16 +556,34 @@ tab1, tab2, tab3 = st.tabs([
 ])
 
 with tab1:
+    profile_mark("tab:discover")
     st.subheader("Discover Content")
     
     # Step 1: Let user fetch content
     st.markdown("### Step 1: Fetch Content")
     
+    # Reopen everything analyzed before from the local Parquet corpus
+    corpus_source = "reddit" if platform == "Reddit" else "wattpad"
+    corpus_rows = count_corpus(corpus_source)
+    if corpus_rows and st.button(f"📂 Open saved corpus ({corpus_rows:,} analyzed "
+                                 f"{'posts' if corpus_source == 'reddit' else 'stories'})",
+                                 use_container_width=True):
+        with st.spinner("Loading saved corpus..."):
+            # Long texts are read per item when one is selected
+            corpus_df = load_corpus(corpus_source, include_text=False)
+        if corpus_source == "reddit":
+            artifacts.put('posts_df', corpus_df)
+        else:  # wattpad
+            artifacts.put('stories_df', corpus_df)
+        st.session_state.content_source = corpus_source
+        st.session_state.show_results_step = True
+        st.rerun()
+    
     if platform == "Reddit":
         if st.button("🔍 Discover Reddit Content", use_container_width=True):
             # Show spinner with custom message
             with st.spinner("Searching for hidden gems across Reddit..."):
-                if not reddit_client_id or not reddit_client_secret:
+                if not use_post_archive and (not reddit_client_id or not reddit_client_secret):
                     st.error("Reddit API credentials are required to proceed.")
                 elif not selected_subreddits:
                     st.error("Please select at least one subreddit.")
@@ -383,6 +594,14 @@ with tab1:
                         all_posts_data = []
 
                         for subreddit in selected_subreddits:
+                            if use_post_archive:
+                                all_posts_data.extend(query_posts(
+                                    subreddit=subreddit,
+                                    min_score=min_score,
+                                    min_comments=min_comments,
+                                    limit=reddit_limit))
+                                continue
+                            
                             posts = fetch_reddit_posts(
                                 subreddit=subreddit,
                                 time_filter=time_filter,
@@ -403,8 +622,9 @@ with tab1:
                             df = pd.DataFrame(all_posts_data)
                             
                             # Store raw data for later analysis
-                            st.session_state.content_raw_df = df
+                            artifacts.put('content_raw_df', df)
                             st.session_state.content_source = "reddit"
+                            st.session_state.fetch_thresholds = {'min_score': min_score, 'min_comments': min_comments}
                             
                             # Move to Step 2: Analyze Content
                             st.session_state.show_analysis_step = True
@@ -418,19 +638,39 @@ with tab1:
         if st.button("🔍 Discover Wattpad Stories", use_container_width=True):
             # Show spinner with custom message
             with st.spinner("Uncovering popular stories from Wattpad..."):
-                if not category and not tag:
+                wattpad_listing_count = len(wattpad_categories) + len(wattpad_tags)
+                if not wattpad_listing_count:
                     st.error("Please select a category or enter a tag to search for stories.")
                 else:
                     # Show loading spinner while fetching data
                     with st.spinner("Fetching stories from Wattpad..."):
-                        stories = fetch_wattpad_stories(
-                            category=category,
-                            tag=tag,
-                            limit=wattpad_limit,
-                            min_reads=100,     # Reduced threshold since read detection is spotty
-                            min_votes=min_votes,
-                            min_parts=min_parts
-                        )
+                        if wattpad_listing_count > 1 or wattpad_deep_crawl:
+                            # Sweep all listings concurrently; stories found under several are fetched once
+                            sweep_limit = wattpad_limit if wattpad_deep_crawl else wattpad_limit * wattpad_listing_count
+                            crawl_progress = st.progress(0.0, text="Crawling Wattpad...")
+                            stories = sweep_wattpad_stories(
+                                categories=wattpad_categories,
+                                tags=wattpad_tags,
+                                limit=sweep_limit,
+                                min_reads=100,     # Reduced threshold since read detection is spotty
+                                min_votes=min_votes,
+                                min_parts=min_parts,
+                                deep=wattpad_deep_crawl,
+                                resume=wattpad_resume,
+                                progress_callback=lambda found, stats: crawl_progress.progress(
+                                    min(found / sweep_limit, 1.0),
+                                    text=f"{found} stories found, {stats['pages']} pages and "
+                                         f"{stats['stories_checked']} stories checked"))
+                            crawl_progress.empty()
+                        else:
+                            stories = fetch_wattpad_stories(
+                                category=wattpad_categories[0] if wattpad_categories else None,
+                                tag=wattpad_tags[0] if wattpad_tags else None,
+                                limit=wattpad_limit,
+                                min_reads=100,     # Reduced threshold since read detection is spotty
+                                min_votes=min_votes,
+                                min_parts=min_parts
+                            )
                         
                         if isinstance(stories, str):  # Error message
                             st.error(stories)
@@ -441,8 +681,9 @@ with tab1:
                             df = pd.DataFrame(stories)
                             
                             # Store raw data for later analysis
-                            st.session_state.content_raw_df = df
+                            artifacts.put('content_raw_df', df)
                             st.session_state.content_source = "wattpad"
+                            st.session_state.fetch_thresholds = {'min_votes': min_votes}
                             
                             # Move to Step 2: Analyze Content
                             st.session_state.show_analysis_step = True
@@ -452,110 +693,184 @@ with tab1:
     if st.session_state.get('show_analysis_step', False) and 'content_raw_df' in st.session_state:
         st.markdown("### Step 2: Analyze Content")
         
-        df = st.session_state.content_raw_df
         content_source = st.session_state.content_source
         
+        def prepare_scoring(df):
+            """Scoring items and local pre-scores of a fetched frame, plus the plans computed for it"""
+            scoring_items = []
+            for i, row in df.iterrows():
+                if content_source == "reddit":
+                    scoring_items.append({
+                        'title': row['title'],
+                        'content': row['selftext'],
+                        'score': row['score'],
+                        'num_comments': row['num_comments'],
+                        'source': content_source
+                    })
+                else:  # wattpad
+                    scoring_items.append({
+                        'title': row['title'],
+                        'content': f"{row['description']}\n\n{row['content_sample']}",
+                        'score': row['votes'],
+                        'num_comments': row['reads'],
+                        'source': content_source
+                    })
+            pre_scores = pre_confidence = None
+            if pre_scorer is not None:
+                pre_scores, pre_confidence = pre_scorer.predict(scoring_items)
+            return {'items': scoring_items, 'pre_scores': pre_scores, 'pre_confidence': pre_confidence, 'plans': {}}
+        
+        # Local pre-scorer trained on earlier GPT scores (python pre_scorer.py train)
+        pre_scorer = get_pre_scorer()
+        # Streamlit reruns this step on every click anywhere on the page, so the items, pre-scores
+        # and plans are computed once per fetched frame, pre-scorer and budget, not on every rerun
+        pre_scorer_version = pre_scorer.meta.get('trained_at') if pre_scorer is not None else None
+        scoring = artifacts.derive('content_raw_df', f"scoring:{content_source}:{pre_scorer_version}",
+                                   prepare_scoring)
+        scoring_items = scoring['items']
+        pre_scores, pre_confidence = scoring['pre_scores'], scoring['pre_confidence']
+        if pre_scorer is not None:
+            st.caption(f"Local pre-scorer trained on {pre_scorer.meta.get('examples', 0):,} GPT-scored posts "
+                       "ranks every item instantly.")
+        
+        # Pick which items to send to GPT-4o and show the expected spend before running
+        scoring_plan = None
+        if api_key:
+            budget_mode = st.radio("GPT-4o scoring budget", ["Score everything", "Dollar budget", "Token budget"],
+                                   horizontal=True)
+            budget_usd = budget_tokens = None
+            if budget_mode == "Dollar budget":
+                budget_usd = st.number_input("Budget (USD)", min_value=0.0, value=0.10, step=0.05, format="%.2f")
+            elif budget_mode == "Token budget":
+                budget_tokens = st.number_input("Budget (tokens)", min_value=0, value=20000, step=1000)
+            plan_key = (budget_mode, budget_usd, budget_tokens)
+            if plan_key not in scoring['plans']:
+                scoring_plan = select_candidates(scoring_items, budget_usd=budget_usd, budget_tokens=budget_tokens,
+                                                 pre_scores=pre_scores, confidence=pre_confidence)
+                if budget_mode == "Score everything":
+                    scoring_plan.update(selected=list(range(len(scoring_items))), duplicates={}, skipped=0,
+                                        expected_tokens=scoring_plan['full_tokens'],
+                                        expected_cost_usd=scoring_plan['full_cost_usd'])
+                if len(scoring['plans']) >= 16:
+                    scoring['plans'].clear()
+                scoring['plans'][plan_key] = scoring_plan
+            scoring_plan = scoring['plans'][plan_key]
+            plan_message = (f"Expected spend: **${scoring_plan['expected_cost_usd']:.3f}** "
+                            f"(~{scoring_plan['expected_tokens']:,} tokens) to score "
+                            f"{len(scoring_plan['selected'])} of {len(scoring_items)} items with GPT-4o.")
+            shared = sum(1 for rep in scoring_plan['duplicates'].values() if rep in set(scoring_plan['selected']))
+            if shared:
+                plan_message += f" {shared} near-duplicate(s) reuse a score."
+            if scoring_plan['skipped']:
+                plan_message += (f" {scoring_plan['skipped']} item(s) keep a local estimate "
+                                 f"(scoring everything: ${scoring_plan['full_cost_usd']:.3f}).")
+            st.info(plan_message)
+        
         if st.button("Analyze Adaptation Potential"):
             with st.spinner("Analyzing adaptation potential..."):
-                # Calculate adaptation score based on content source type
-                if api_key:
-                    for i, row in df.iterrows():
-                        # Prepare content based on source
-                        if content_source == "reddit":
-                            content_text = row['selftext']
-                            engagement_score = row['score']
-                            engagement_comments = row['num_comments']
-                        else:  # wattpad
-                            content_text = f"{row['description']}\n\n{row['content_sample']}"
-                            engagement_score = row['votes']
-                            engagement_comments = row['reads']
-                            
-                        adaptation_analysis = evaluate_adaptation_potential(
-                            title=row['title'],
-                            content=content_text,
-                            score=engagement_score,
-                            num_comments=engagement_comments,
-                            api_key=api_key)
-
-                        # First, ensure all columns exist in the dataframe
-                        if 'adaptation_score' not in df.columns:
-                            df['adaptation_score'] = None
-                        if 'justification' not in df.columns:
-                            df['justification'] = None
-                        if 'recommended_genres' not in df.columns:
-                            df['recommended_genres'] = None
-                        if 'similar_works' not in df.columns:
-                            df['similar_works'] = None
-                        if 'recommended_adaptation_type' not in df.columns:
-                            df['recommended_adaptation_type'] = None
-                        if 'key_elements' not in df.columns:
-                            df['key_elements'] = None
-                        if 'target_audience' not in df.columns:
-                            df['target_audience'] = None
-
-                        # Now assign values
-                        df.at[i, 'adaptation_score'] = adaptation_analysis['score']
-                        df.at[i, 'justification'] = adaptation_analysis['justification']
-                        df.at[i, 'recommended_genres'] = adaptation_analysis['recommended_genres']
-                        df.at[i, 'similar_works'] = adaptation_analysis['similar_works']
-                        df.at[i, 'recommended_adaptation_type'] = adaptation_analysis['adaptation_type']
-                        df.at[i, 'key_elements'] = adaptation_analysis['key_elements']
-                        df.at[i, 'target_audience'] = adaptation_analysis['target_audience']
+                # A copy, since analysis adds columns and stored frames are shared between sessions
+                df = artifacts.get('content_raw_df').copy()
+                
+                # Local estimates for every item: the pre-score if trained, else engagement metrics
+                if pre_scorer is not None:
+                    df['pre_score'] = pre_scores.round(1)
+                    analyses = [build_pre_score_analysis(score, confidence)
+                                for score, confidence in zip(pre_scores, pre_confidence)]
                 else:
-                    # Simple scoring algorithm if no API key
+                    # Simple scoring algorithm relative to the thresholds the content was fetched with
+                    # (the sidebar may show the other platform's by now; defaults for older projects)
+                    thresholds = st.session_state.get('fetch_thresholds') or {}
                     if content_source == "reddit":
-                        df['adaptation_score'] = df.apply(
+                        fetched_min_score = thresholds.get('min_score', 1000)
+                        fetched_min_comments = thresholds.get('min_comments', 100)
+                        engagement_scores = df.apply(
                             lambda row: min(10, (
-                                (row['score'] / min_score) * 5 +
-                                (row['num_comments'] / min_comments) * 5) / 2),
+                                (row['score'] / fetched_min_score) * 5 +
+                                (row['num_comments'] / fetched_min_comments) * 5) / 2),
                             axis=1)
                     else:  # wattpad
-                        df['adaptation_score'] = df.apply(
+                        fetched_min_votes = thresholds.get('min_votes', 5000)
+                        engagement_scores = df.apply(
                             lambda row: min(10, (
-                                (row['votes'] / min_votes) * 7.5 +    # Higher weight on votes (75%)
+                                (row['votes'] / fetched_min_votes) * 7.5 +    # Higher weight on votes (75%)
                                 (row['reads'] / 10000) * 2.5  # Lower weight on reads (25%)
                             ) / 1),
                             axis=1)
+                    analyses = [build_engagement_analysis(score) for score in engagement_scores]
+                
+                # Calculate adaptation score with GPT-4o for the items in the scoring plan
+                if scoring_plan is not None:
+                    gpt_indices = scoring_plan['selected']
+                    
+                    # Score all items concurrently through the shared request scheduler
+                    scoring_progress = st.progress(0.0, text="Scoring content...")
+                    gpt_analyses = evaluate_adaptation_potential_batch(
+                        [scoring_items[i] for i in gpt_indices],
+                        api_key=api_key,
+                        progress_callback=lambda done, total: scoring_progress.progress(
+                            done / total, text=f"Scored {done}/{total} items"))
+                    scoring_progress.empty()
+                    for index, analysis in zip(gpt_indices, gpt_analyses):
+                        analyses[index] = analysis
+                    
+                    # Near-duplicates reuse the analysis of the post that was scored
+                    for index, representative in scoring_plan['duplicates'].items():
+                        if representative in gpt_indices and not analyses[representative].get('error'):
+                            analyses[index] = dict(
+                                analyses[representative],
+                                justification=f"Near-duplicate of \"{scoring_items[representative]['title']}\". "
+                                              f"{analyses[representative]['justification']}")
                     
-                    df['justification'] = "Simple scoring based on engagement metrics."
-                    df['recommended_genres'] = [["Drama"]] * len(df)
-                    df['similar_works'] = [["N/A"]] * len(df)
-                    df['recommended_adaptation_type'] = ["Movie"] * len(df)
-                    df['key_elements'] = [["Story structure"]] * len(df)
-                    df['target_audience'] = ["General audience"] * len(df)
+                    failed_count = sum(1 for analysis in gpt_analyses if analysis.get('error'))
+                    if failed_count:
+                        st.warning(f"{failed_count} item(s) could not be scored: {next(a['justification'] for a in gpt_analyses if a.get('error'))}")
+                
+                df['adaptation_score'] = [analysis['score'] for analysis in analyses]
+                df['justification'] = [analysis['justification'] for analysis in analyses]
+                df['recommended_genres'] = [analysis['recommended_genres'] for analysis in analyses]
+                df['similar_works'] = [analysis['similar_works'] for analysis in analyses]
+                df['recommended_adaptation_type'] = [analysis['adaptation_type'] for analysis in analyses]
+                df['key_elements'] = [analysis['key_elements'] for analysis in analyses]
+                df['target_audience'] = [analysis['target_audience'] for analysis in analyses]
+                df['radar_scores'] = [analysis['radar_scores'] for analysis in analyses]
 
                 # Sort by adaptation score
                 df = df.sort_values(by='adaptation_score', ascending=False)
 
                 # Store analyzed dataframe in session state
                 if content_source == "reddit":
-                    st.session_state.posts_df = df
+                    artifacts.put('posts_df', df)
                 else:  # wattpad
-                    st.session_state.stories_df = df
+                    artifacts.put('stories_df', df)
+                
+                # Persist the analysis to the local corpus; a failed write must not lose the results
+                try:
+                    save_corpus(df, content_source)
+                except Exception as e:
+                    print(f"Error saving analyzed corpus: {e}")
                     
                 # Show results step
                 st.session_state.show_results_step = True
                 st.rerun()
         
     # Step 3: Display results (only show if analysis has been done)
-    if st.session_state.get('show_results_step', False):
+    results_key = 'posts_df' if st.session_state.get('content_source') == "reddit" else 'stories_df'
+    if st.session_state.get('show_results_step', False) and results_key in st.session_state:
         st.markdown("### Step 3: Review Results")
         
         content_source = st.session_state.content_source
         
-        if content_source == "reddit":
-            df = st.session_state.posts_df
-        else:  # wattpad
-            df = st.session_state.stories_df
-            
-        # Add numeric version of adaptation_score for charts
-        df['adaptation_score_numeric'] = pd.to_numeric(df['adaptation_score'], errors='coerce')
+        # Sort orders, ids and the scatter sample are indexed once per analysis, not on every rerun,
+        # and shared by every session showing the same results
+        results_index = artifacts.derive(results_key,
+                                         f"results_index:{content_source}",
+                                         lambda frame: ResultsIndex(frame, content_source))
             
         # Display visualizations
         st.subheader("Top Content by Adaptation Potential")
         
         # Bar chart of top 10 items by adaptation score
-        top_items = df.head(10).copy()
+        top_items = results_index.top(10).copy()
         top_items['title_short'] = top_items['title'].str.slice(0, 40) + '...'
         
         # Make sure adaptation_score is numeric for the chart
@@ -578,16 +893,20 @@ with tab1:
         fig.update_layout(yaxis={'categoryorder': 'total ascending'})
         st.plotly_chart(fig, use_container_width=True)
         
-        # Scatter plot with appropriate metrics
+        # Scatter plot with appropriate metrics, sampled for large result sets
+        x_metric, y_metric = ENGAGEMENT_METRICS[content_source]
         if content_source == "reddit":
-            x_metric, y_metric = 'score', 'num_comments'
             x_label, y_label = 'Upvotes', 'Comments'
         else:  # wattpad
-            x_metric, y_metric = 'votes', 'reads'
             x_label, y_label = 'Votes', 'Reads'
+        
+        scatter_df, scatter_total = results_index.scatter_sample(color_column)
+        scatter_title = 'Content Engagement Metrics'
+        if len(scatter_df) < scatter_total:
+            scatter_title += f' (top-scoring and sampled {len(scatter_df):,} of {scatter_total:,})'
             
         fig2 = px.scatter(
-            df,
+            scatter_df,
             x=x_metric,
             y=y_metric,
             size='adaptation_score_numeric',
@@ -598,46 +917,69 @@ with tab1:
                 y_metric: y_label,
                 'adaptation_score_numeric': 'Adaptation Score'
             },
-            title='Content Engagement Metrics')
+            title=scatter_title)
         st.plotly_chart(fig2, use_container_width=True)
         
         # Display results in a dataframe
         st.subheader("All Analyzed Content")
         
-        # Create a display dataframe with selected columns based on content type
-        df_sorted = df.sort_values('adaptation_score', ascending=False)
+        sort_options = {"Adaptation Score": 'adaptation_score', x_label: x_metric, y_label: y_metric, "Title": 'title'}
+        filter_col1, filter_col2, filter_col3 = st.columns([2, 1, 1])
+        with filter_col1:
+            title_search = st.text_input("Search titles", placeholder="Filter by words in the title")
+        with filter_col2:
+            sort_label = st.selectbox("Sort by", options=list(sort_options))
+        with filter_col3:
+            page_size = st.selectbox("Rows per page", options=[25, 50, 100], index=1)
         
-        if content_source == "reddit":
-            display_df = df_sorted[['title', 'subreddit', 'score', 'num_comments', 'adaptation_score']].copy()
-            url_column = 'View Post'
-            url_formatter = lambda row: f"[Link]({format_reddit_url(row['permalink'])})"
-        else:  # wattpad
-            display_df = df_sorted[['title', 'author', 'votes', 'reads', 'parts', 'adaptation_score']].copy()
-            url_column = 'View Story'
-            url_formatter = lambda row: f"[Link]({format_wattpad_url(row['url'])})"
-            
-        display_df = display_df.reset_index(drop=True)
-        display_df.index = display_df.index + 1  # 1-based indexing
-        
-        # Add clickable URLs
-        display_df[url_column] = df_sorted.apply(url_formatter, axis=1)
+        # Facet filters served from the facet index, with the number of items per value
+        facet_labels = {"genre": "Genres", "adaptation_type": "Best format", "key_element": "Key elements",
+                        "tag": "Tags", "audience": "Target audience"}
+        if content_source != "wattpad":
+            del facet_labels["tag"]
+        facet_filters = {}
+        with st.expander("Filter by genre, format, tags and more", expanded=False):
+            facet_cols = st.columns(2)
+            for i, (facet, label) in enumerate(facet_labels.items()):
+                facet_counts = dict(results_index.facets.counts(facet, limit=100))
+                with facet_cols[i % 2]:
+                    facet_filters[facet] = st.multiselect(
+                        label, options=list(facet_counts),
+                        format_func=lambda value, counts=facet_counts: f"{value} ({counts[value]})")
+            facet_match = st.radio("Items must have", ["any selected value", "all selected values"],
+                                   horizontal=True, help="Filters on different facets always combine with AND")
         
         # Add filtering option for high-potential content
-        show_high_potential = st.checkbox("Show only high-potential content (score ≥ 7.0)")
+        min_score = st.select_slider("Minimum adaptation score", options=[0.0, 5.0, 6.0, 7.0, 8.0, 9.0], value=0.0,
+                                     format_func=lambda score: "Any" if not score else f"{score:.0f}+")
         
-        if show_high_potential:
-            # Convert to numeric for comparison
-            display_df['adaptation_score_numeric'] = pd.to_numeric(
-                display_df['adaptation_score'], errors='coerce')
-            filtered_df = display_df[display_df['adaptation_score_numeric'] >= 7.0]
-            if len(filtered_df) > 0:
-                st.success(f"Found {len(filtered_df)} high-potential items!")
-                current_df = filtered_df
+        positions = results_index.query(sort_by=sort_options[sort_label],
+                                        descending=sort_label != "Title",
+                                        min_score=min_score or None,
+                                        search=title_search.strip(),
+                                        facets=facet_filters,
+                                        facet_match="all" if facet_match.startswith("all") else "any")
+        active_filters = [value for values in facet_filters.values() for value in values]
+        if min_score or active_filters:
+            if len(positions) > 0:
+                top_genres = results_index.facet_counts("genre", positions, limit=5)
+                st.success(f"Found {len(positions):,} matching items. Top genres: "
+                           + ", ".join(f"{genre} ({count})" for genre, count in top_genres))
             else:
-                st.warning("No content with adaptation scores of 7.0 or higher was found.")
-                current_df = display_df
-        else:
-            current_df = display_df
+                st.warning("No analyzed content matches these filters.")
+        
+        # Only the visible page is formatted for display
+        page_count = max(1, -(-len(positions) // page_size))
+        # Changing the query starts again at the first page
+        results_query = (sort_label, min_score, title_search, page_size, facet_match, tuple(active_filters))
+        if st.session_state.get('results_query') != results_query:
+            st.session_state.results_query = results_query
+            st.session_state.results_page = 1
+        page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, step=1,
+                               key="results_page")
+        current_df = results_index.page(positions, page, page_size)
+        url_column = 'View Post' if content_source == "reddit" else 'View Story'
+        st.caption(f"Showing {len(current_df)} of {len(positions):,} matching items ({len(results_index):,} analyzed)")
             
         st.dataframe(current_df,
                     column_config={
@@ -648,20 +990,55 @@ with tab1:
                         )
                     },
                     use_container_width=True,
-                    hide_index=False)
+                    hide_index=True)
         
         # Add detailed view of selected content
         st.subheader("Detailed Analysis")
-        selected_index = st.selectbox(
+        selected_id = st.selectbox(
             f"Select {'a post' if content_source == 'reddit' else 'a story'} to view detailed analysis",
             options=current_df.index.tolist(),
-            format_func=lambda x: current_df.loc[x, 'title'])
+            format_func=results_index.title_of)
         
-        if selected_index:
-            # Get the title of the selected item
-            selected_title = current_df.loc[selected_index, 'title']
-            # Find this item in the original sorted dataframe
-            selected_item = df_sorted[df_sorted['title'] == selected_title].iloc[0]
+        if selected_id:
+            # Look the item up by id in the indexed results
+            selected_item = results_index.get(selected_id)
+            
+            # Items opened from the saved corpus were loaded without their long texts
+            if any(column not in selected_item.index for column in TEXT_COLUMNS[content_source]):
+                cached_item = artifacts.get('corpus_item')
+                if cached_item is None or cached_item[0] != selected_id:
+                    full_item = get_corpus_item(content_source, selected_item['id'])
+                    cached_item = (selected_id, full_item if full_item is not None else selected_item)
+                    artifacts.put('corpus_item', cached_item)
+                selected_item = cached_item[1]
+            
+            # Speculatively generate the materials usually requested next; a new selection cancels these
+            if prefetch_enabled and api_key and pd.notna(pd.to_numeric(selected_item['adaptation_score'], errors='coerce')):
+                prefetch_format = selected_item['recommended_adaptation_type']
+                prefetch_text = get_content_text(selected_item, content_source)
+                get_prefetcher().prefetch(
+                    st.session_state.session_owner,
+                    f"{content_source}:{selected_item['id'] or selected_item['title']}:{prefetch_format}",
+                    {
+                        "plot_synopsis": lambda item=selected_item, text=prefetch_text, fmt=prefetch_format: generate_plot_synopsis(
+                            title=item['title'],
+                            original_content=text,
+                            adaptation_type=fmt,
+                            api_key=api_key),
+                        "pitch_deck": lambda item=selected_item, text=prefetch_text, fmt=prefetch_format: generate_pitch_deck(
+                            title=item['title'],
+                            original_content=text,
+                            adaptation_type=fmt,
+                            target_audience=item['target_audience'],
+                            key_elements=item['key_elements'],
+                            genres=item['recommended_genres'],
+                            api_key=api_key),
+                        "character_profiles": lambda item=selected_item, text=prefetch_text, fmt=prefetch_format: generate_character_profiles(
+                            title=item['title'],
+                            original_content=text,
+                            adaptation_type=fmt,
+                            api_key=api_key)
+                    })
             
             # Create columns for the detailed view
             col1, col2 = st.columns([2, 1])
@@ -685,10 +1062,13 @@ with tab1:
                     content_preview_label = "View Story Description"
                     content_preview = selected_item['description']
                     
-                st.markdown(f"**Adaptation Score: {selected_item['adaptation_score']:.1f}/10**")
-                
                 # Display the justification with appropriate framing
                 adaptation_score = pd.to_numeric(selected_item['adaptation_score'], errors='coerce')
+                if pd.isna(adaptation_score):
+                    st.markdown("**Adaptation Score: not scored**")
+                else:
+                    st.markdown(f"**Adaptation Score: {adaptation_score:.1f}/10**")
+                
                 if adaptation_score >= 7.0:
                     st.markdown("#### Why this would make a good adaptation")
                 else:
@@ -715,6 +1095,10 @@ with tab1:
                     for tag in selected_item['tags']:
                         st.markdown(f"- {tag}")
                 
+                # Show which swept categories/tags listed the story
+                if content_source == "wattpad" and isinstance(selected_item.get('found_in'), list) and selected_item['found_in']:
+                    st.caption("Found in: " + ", ".join(selected_item['found_in']))
+                
                 # Display recommended genres
                 st.markdown("#### Recommended Genres")
                 for genre in selected_item['recommended_genres']:
@@ -737,17 +1121,18 @@ with tab1:
         # Add a button to proceed to adaptation materials generation
         if st.button("Proceed to Generate Adaptation Materials"):
             # Store the selected content for use in the adaptation tab
-            st.session_state.current_content = selected_item
+            artifacts.put('current_content', selected_item)
             st.session_state.content_type = content_source
             # Switch to the adaptation tab
             st.session_state.active_tab = "🎬 Develop Adaptation"
             st.rerun()
 
 with tab2:
+    profile_mark("tab:develop")
     st.subheader("Generate Adaptation Materials")
 
     # Check if we have a selected content to work with
-    if 'current_content' not in st.session_state or st.session_state.current_content is None:
+    if 'current_content' not in st.session_state or artifacts.get('current_content') is None:
         # Create a more attractive prompt to select content
         st.markdown("""
         <div style="background-color: #1E293B; border-radius: 10px; padding: 2rem; text-align: center; margin: 2rem 0;">
@@ -762,12 +1147,13 @@ with tab2:
             st.rerun()
     else:
         # Make the content overview more attractive
-        content = st.session_state.current_content
+        content = artifacts.get('current_content')
         content_type = st.session_state.content_type
         
         # Calculate score color
         score = pd.to_numeric(content['adaptation_score'], errors='coerce')
         score_color = "#4CAF50" if score >= 7.0 else "#FF9800" if score >= 5.0 else "#F44336"
+        score_label = "Not scored" if pd.isna(score) else f"{score:.1f}/10"
         
         # Create a more attractive content header
         st.markdown(f"""
@@ -775,7 +1161,7 @@ with tab2:
             <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 1rem;">
                 <h2 style="margin: 0;">{content['title']}</h2>
                 <div style="background-color: {score_color}; color: white; padding: 0.5rem 1rem; border-radius: 20px; font-weight: bold;">
-                    {score:.1f}/10
+                    {score_label}
                 </div>
             </div>
             <p style="color: #A0AEC0; margin-bottom: 0.5rem;">
@@ -795,12 +1181,14 @@ with tab2:
         """, unsafe_allow_html=True)
         
         # Prepare content text
-        if content_type == "reddit":
-            content_text = content['selftext']
-        else:  # wattpad
-            content_text = content['description']
-            if 'content_sample' in content:
-                content_text += "\n\n" + content['content_sample']
+        content_text = get_content_text(content, content_type)
+        
+        # Show which materials the prefetcher has already prepared for this content
+        prefetch_status = get_prefetcher().status(st.session_state.session_owner)
+        if prefetch_status:
+            st.caption("⚡ Prefetch: " + " • ".join(
+                f"{name.replace('_', ' ')} {'✓' if status == 'done' else '…' if status in ('pending', 'running') else '✗'}"
+                for name, status in prefetch_status.items()))
                 
         # Show content excerpt in an expander
         with st.expander("📄 View Original Content", expanded=False):
@@ -830,47 +1218,39 @@ with tab2:
             
         # Visualization section - moved to the top level
         st.markdown("### Adaptation Potential")
-        if st.button("📊 Generate Adaptation Visualization", use_container_width=True):
-            with st.spinner("Creating visualization..."):
-                # Create radar chart for adaptation potential
-                categories = ['Narrative Strength', 'Visual Potential', 'Character Development', 
-                            'Market Appeal', 'Target Audience Match']
-                
-                # Generate scores based on actual content or random if no API
-                if api_key:
-                    radar_values = generate_radar_chart_values(
-                        content=content_text,
-                        adaptation_type=selected_format,
-                        api_key=api_key
-                    )
-                else:
-                    # Random values between 60-90 for demo purposes
-                    radar_values = [random.randint(60, 90) for _ in range(len(categories))]
-                
-                fig = go.Figure()
-                
-                fig.add_trace(go.Scatterpolar(
-                    r=radar_values,
-                    theta=categories,
-                    fill='toself',
-                    name='Adaptation Potential'
-                ))
-                
-                fig.update_layout(
-                    polar=dict(
-                        radialaxis=dict(
-                            visible=True,
-                            range=[0, 100]
-                        )),
-                    showlegend=True,
-                    title="Adaptation Potential Analysis"
-                )
-                
-                st.plotly_chart(fig, use_container_width=True)
-                
-                # Store radar values in session state
-                st.session_state.radar_values = radar_values
-                st.session_state.radar_categories = categories
+        
+        # Radar values are produced by the adaptation analysis itself, so rendering needs no API call
+        radar_values = content['radar_scores'] if 'radar_scores' in content else None
+        if not isinstance(radar_values, list):
+            radar_values = estimate_radar_scores(content['adaptation_score'])
+        
+        if radar_values:
+            fig = go.Figure()
+            
+            fig.add_trace(go.Scatterpolar(
+                r=radar_values,
+                theta=RADAR_CATEGORIES,
+                fill='toself',
+                name='Adaptation Potential'
+            ))
+            
+            fig.update_layout(
+                polar=dict(
+                    radialaxis=dict(
+                        visible=True,
+                        range=[0, 100]
+                    )),
+                showlegend=True,
+                title="Adaptation Potential Analysis"
+            )
+            
+            st.plotly_chart(fig, use_container_width=True)
+            
+            # Store radar values in session state
+            st.session_state.radar_values = radar_values
+            st.session_state.radar_categories = RADAR_CATEGORIES
+        else:
+            st.info("This item could not be scored, so no adaptation breakdown is available.")
         
         # Generate adaptation materials
         st.markdown("### Generate Adaptation Materials")
@@ -921,9 +1301,9 @@ with tab2:
                             api_key=api_key
                         )
                         
-                        st.session_state.pitch_content = pitch_content
+                        artifacts.put('pitch_content', pitch_content)
                     else:
-                        st.session_state.pitch_content = {
+                        artifacts.put('pitch_content', {
                             "high_concept": f"Adaptation of '{content['title']}' as a {selected_format}",
                             "logline": f"A compelling {selected_format.lower()} based on the original work that captures the essence of the source material.",
                             "unique_selling_points": [
@@ -933,11 +1313,11 @@ with tab2:
                             ],
                             "visual_style": f"The visual style will match the tone of the original content, with a focus on creating an engaging {selected_format.lower()} experience.",
                             "comp_titles": content['similar_works']
-                        }
+                        })
             
             # Display pitch content if available
             if 'pitch_content' in st.session_state:
-                pitch = st.session_state.pitch_content
+                pitch = artifacts.get('pitch_content')
                 
                 # Create a more structured pitch deck display
                 # First row: high concept and logline
@@ -1003,9 +1383,9 @@ with tab2:
                             api_key=api_key
                         )
                         
-                        st.session_state.character_profiles = character_profiles
+                        artifacts.put('character_profiles', character_profiles)
                     else:
-                        st.session_state.character_profiles = [
+                        artifacts.put('character_profiles', [
                             {
                                 "name": "Main Character",
                                 "role": "Protagonist",
@@ -1020,11 +1400,11 @@ with tab2:
                                 "arc": "Growth alongside the main character",
                                 "key_traits": ["Loyal", "Resourceful", "Witty"]
                             }
-                        ]
+                        ])
             
             # Display character profiles if available
-            if 'character_profiles' in st.session_state and st.session_state.character_profiles:
-                profiles = st.session_state.character_profiles
+            if 'character_profiles' in st.session_state and artifacts.get('character_profiles'):
+                profiles = artifacts.get('character_profiles')
                 
                 # Create a grid layout for character profiles
                 if profiles:  # Add this check to prevent NoneType error
@@ -1054,7 +1434,7 @@ with tab2:
             
             # Initialize plot_synopsis in session state if not already present
             if 'plot_synopsis' not in st.session_state:
-                st.session_state.plot_synopsis = None
+                artifacts.put('plot_synopsis', None)
                 
             if st.button("Generate Plot Synopsis", use_container_width=True):
                 with st.spinner("Creating plot synopsis..."):
@@ -1066,12 +1446,12 @@ with tab2:
                             api_key=api_key
                         )
                         
-                        st.session_state.plot_synopsis = plot_synopsis
+                        artifacts.put('plot_synopsis', plot_synopsis)
                         # Also set plot_summary if not already set
-                        if not st.session_state.plot_summary:
-                            st.session_state.plot_summary = plot_synopsis.get("short_synopsis", "")
+                        if not artifacts.get('plot_summary'):
+                            artifacts.put('plot_summary', plot_synopsis.get("short_synopsis", ""))
                     else:
-                        st.session_state.plot_synopsis = {
+                        artifacts.put('plot_synopsis', {
                             "short_synopsis": f"A {selected_format.lower()} adaptation of '{content['title']}' that captures the essence of the original content.",
                             "detailed_synopsis": f"This {selected_format.lower()} follows the story presented in the original content, adapted to fit the medium of {selected_format.lower()}. The narrative maintains the key elements that made the original compelling while enhancing aspects that will work well in the new format.",
                             "act_structure": [
@@ -1079,14 +1459,14 @@ with tab2:
                                 "Act 2: Development of the core conflict",
                                 "Act 3: Resolution and conclusion"
                             ]
-                        }
+                        })
                         # Also set plot_summary if not already set
-                        if not st.session_state.plot_summary:
-                            st.session_state.plot_summary = st.session_state.plot_synopsis["short_synopsis"]
+                        if not artifacts.get('plot_summary'):
+                            artifacts.put('plot_summary', artifacts.get('plot_synopsis')["short_synopsis"])
             
             # Display plot synopsis if available
-            if st.session_state.plot_synopsis:
-                synopsis = st.session_state.plot_synopsis
+            if artifacts.get('plot_synopsis'):
+                synopsis = artifacts.get('plot_synopsis')
                 
                 st.markdown("##### Short Synopsis")
                 st.markdown(synopsis["short_synopsis"])
@@ -1114,9 +1494,9 @@ with tab2:
                             api_key=api_key
                         )
                         
-                        st.session_state.audience_analysis = audience_analysis
+                        artifacts.put('audience_analysis', audience_analysis)
                     else:
-                        st.session_state.audience_analysis = {
+                        artifacts.put('audience_analysis', {
                             "primary_audience": content['target_audience'],
                             "demographics": [
                                 "Age range: 18-34",
@@ -1133,11 +1513,11 @@ with tab2:
                                 "Engage with online communities",
                                 "Use social media campaigns"
                             ]
-                        }
+                        })
             
             # Display audience analysis if available
             if 'audience_analysis' in st.session_state:
-                analysis = st.session_state.audience_analysis
+                analysis = artifacts.get('audience_analysis')
                 
                 st.markdown("##### Primary Audience")
                 st.markdown(analysis["primary_audience"])
@@ -1246,15 +1626,17 @@ with tab2:
                             """
                             
                             client = openai.OpenAI(api_key=api_key.strip())
-                            response = client.chat.completions.create(
-                                model="gpt-4o",
+                            response = chat_completion(
+                                client,
+                                feature="poster_description",
+                                model=get_premium_model(),
                                 messages=[{"role": "user", "content": poster_prompt}],
                                 temperature=0.7,
                                 max_tokens=1200
                             )
                             
                             poster_description = response.choices[0].message.content
-                            st.session_state.poster_description = poster_description
+                            artifacts.put('poster_description', poster_description)
                             
                             # If image generation is requested, use DALL-E
                             if generation_type == "Generate DALL-E Image":
@@ -1271,7 +1653,9 @@ with tab2:
                                 """
                                 
                                 # Generate the image with DALL-E
-                                dalle_response = client.images.generate(
+                                dalle_response = generate_image(
+                                    client,
+                                    feature="poster_image",
                                     model="dall-e-3",
                                     prompt=dalle_prompt,
                                     size="1024x1792",  # Movie poster aspect ratio
@@ -1280,9 +1664,9 @@ with tab2:
                                 )
                                 
                                 # Store image URL in session state
-                                st.session_state.poster_image_url = dalle_response.data[0].url
+                                artifacts.put('poster_image_url', dalle_response.data[0].url)
                         else:
-                            st.session_state.poster_description = f"A professional movie poster for {content['title']} with a {poster_style.lower()} style and {poster_mood.lower()} mood. The poster would feature imagery reflecting key themes from the story, with typography that captures the essence of the narrative."
+                            artifacts.put('poster_description', f"A professional movie poster for {content['title']} with a {poster_style.lower()} style and {poster_mood.lower()} mood. The poster would feature imagery reflecting key themes from the story, with typography that captures the essence of the narrative.")
                     
                     # Create a two-column layout for showing the results
                     if generation_type == "Generate DALL-E Image" and 'poster_image_url' in st.session_state:
@@ -1290,7 +1674,7 @@ with tab2:
                         
                         with result_col1:
                             st.markdown("##### Generated Movie Poster")
-                            st.image(st.session_state.poster_image_url, caption=f"Movie Poster for {content['title']}")
+                            st.image(artifacts.get('poster_image_url'), caption=f"Movie Poster for {content['title']}")
                             
                             # Add action buttons
                             poster_actions = st.columns(3)
@@ -1306,22 +1690,22 @@ with tab2:
                         
                         with result_col2:
                             st.markdown("##### Poster Concept")
-                            st.markdown(st.session_state.poster_description)
+                            st.markdown(artifacts.get('poster_description'))
                     else:
                         st.markdown("##### Movie Poster Concept")
-                        st.markdown(st.session_state.poster_description)
+                        st.markdown(artifacts.get('poster_description'))
             
             elif visual_type == "Character Concept Art":
                 # Character concept art settings
                 st.markdown("##### Character Concept Art Settings")
                 
                 # Let user select a character if profiles have been generated
-                if 'character_profiles' in st.session_state and st.session_state.character_profiles:
-                    characters = [char["name"] for char in st.session_state.character_profiles]
+                if 'character_profiles' in st.session_state and artifacts.get('character_profiles'):
+                    characters = [char["name"] for char in artifacts.get('character_profiles')]
                     selected_character = st.selectbox("Select character", options=characters)
                     
                     # Find the character data
-                    character_data = next((char for char in st.session_state.character_profiles if char["name"] == selected_character), None)
+                    character_data = next((char for char in artifacts.get('character_profiles') if char["name"] == selected_character), None)
                     
                     if character_data:
                         art_style = st.select_slider(
@@ -1365,15 +1749,17 @@ with tab2:
                                     """
                                     
                                     client = openai.OpenAI(api_key=api_key.strip())
-                                    response = client.chat.completions.create(
-                                        model="gpt-4o",
+                                    response = chat_completion(
+                                        client,
+                                        feature="character_concept",
+                                        model=get_premium_model(),
                                         messages=[{"role": "user", "content": char_prompt}],
                                         temperature=0.7,
                                         max_tokens=1200
                                     )
                                     
                                     character_art_description = response.choices[0].message.content
-                                    st.session_state.character_art_description = character_art_description
+                                    artifacts.put('character_art_description', character_art_description)
                                     
                                     # If image generation is requested, use DALL-E
                                     if generation_type == "Generate DALL-E Image":
@@ -1387,7 +1773,9 @@ with tab2:
                                         """
                                         
                                         # Generate the image with DALL-E
-                                        dalle_response = client.images.generate(
+                                        dalle_response = generate_image(
+                                            client,
+                                            feature="character_image",
                                             model="dall-e-3",
                                             prompt=dalle_prompt,
                                             size="1024x1024",
@@ -1397,18 +1785,18 @@ with tab2:
                                         
                                         # Store image URL in session state with character name to allow multiple characters
                                         key_name = f"character_image_url_{selected_character.replace(' ', '_')}"
-                                        st.session_state[key_name] = dalle_response.data[0].url
+                                        artifacts.put(key_name, dalle_response.data[0].url)
                                 else:
-                                    st.session_state.character_art_description = f"A detailed concept art for {selected_character} in a {art_style.lower()} style. The character would be depicted with key visual elements that reflect their role as {character_data['role']} and personality traits including {', '.join(character_data['key_traits'])}."
+                                    artifacts.put('character_art_description', f"A detailed concept art for {selected_character} in a {art_style.lower()} style. The character would be depicted with key visual elements that reflect their role as {character_data['role']} and personality traits including {', '.join(character_data['key_traits'])}.")
                             
                             st.markdown(f"##### Concept Art for {selected_character}")
-                            st.markdown(st.session_state.character_art_description)
+                            st.markdown(artifacts.get('character_art_description'))
                             
                             # Display the generated image if available
                             key_name = f"character_image_url_{selected_character.replace(' ', '_')}"
                             if generation_type == "Generate DALL-E Image" and key_name in st.session_state:
                                 st.markdown(f"##### Generated Character Art for {selected_character}")
-                                st.image(st.session_state[key_name], caption=f"Character Art for {selected_character}")
+                                st.image(artifacts.get(key_name), caption=f"Character Art for {selected_character}")
                     else:
                         st.warning("Please select a valid character.")
                 else:
@@ -1418,7 +1806,7 @@ with tab2:
                 # Alternate endings settings
                 st.markdown("##### Alternate Endings")
                 
-                if 'plot_synopsis' not in st.session_state or not st.session_state.plot_synopsis:
+                if 'plot_synopsis' not in st.session_state or not artifacts.get('plot_synopsis'):
                     st.info("Please generate a Plot Synopsis first before creating alternate endings.")
                 else:
                     # Number of endings to generate
@@ -1430,16 +1818,16 @@ with tab2:
                                 alternate_endings = generate_alternate_endings(
                                     title=content['title'],
                                     original_content=content_text,
-                                    plot_synopsis=st.session_state.plot_synopsis,
+                                    plot_synopsis=artifacts.get('plot_synopsis'),
                                     adaptation_type=selected_format,
                                     api_key=api_key,
                                     num_endings=num_endings
                                 )
                                 
-                                st.session_state.alternate_endings = alternate_endings
+                                artifacts.put('alternate_endings', alternate_endings)
                             else:
                                 # Fallback endings without API
-                                st.session_state.alternate_endings = [
+                                artifacts.put('alternate_endings', [
                                     {
                                         "title": "Happy Ending",
                                         "description": "A more uplifting version where the protagonist achieves their goal and finds resolution.",
@@ -1450,11 +1838,11 @@ with tab2:
                                         "description": "A darker conclusion that subverts expectations and leaves the audience with questions.",
                                         "implications": "Creates a more profound emotional impact but might alienate viewers seeking escapism."
                                     }
-                                ]
+                                ])
                     
                     # Display alternate endings if available
-                    if 'alternate_endings' in st.session_state and st.session_state.alternate_endings:
-                        endings = st.session_state.alternate_endings
+                    if 'alternate_endings' in st.session_state and artifacts.get('alternate_endings'):
+                        endings = artifacts.get('alternate_endings')
                         
                         for i, ending in enumerate(endings):
                             st.markdown(f"""
@@ -1497,10 +1885,12 @@ with tab2:
                                 )
                                 
                                 if st.button("Update Ending"):
-                                    endings[selected_ending]['title'] = ending_title
-                                    endings[selected_ending]['description'] = ending_description
-                                    endings[selected_ending]['implications'] = ending_implications
-                                    st.session_state.alternate_endings = endings
+                                    # Stored values are shared, so edit a copy
+                                    endings = [dict(ending) for ending in endings]
+                                    endings[selected_ending].update(title=ending_title,
+                                                                    description=ending_description,
+                                                                    implications=ending_implications)
+                                    artifacts.put('alternate_endings', endings)
                                     st.success("Ending updated successfully!")
                                     st.rerun()
             
@@ -1517,8 +1907,8 @@ with tab2:
             
             # Get visual style from pitch if available
             visual_style = ""
-            if 'pitch_content' in st.session_state and 'visual_style' in st.session_state.pitch_content:
-                visual_style = st.session_state.pitch_content['visual_style']
+            if 'pitch_content' in st.session_state and 'visual_style' in artifacts.get('pitch_content'):
+                visual_style = artifacts.get('pitch_content')['visual_style']
             
             # Get genre
             primary_genre = content['recommended_genres'][0] if content['recommended_genres'] else "Drama"
@@ -1566,10 +1956,10 @@ with tab2:
                             api_key=api_key
                         )
                         
-                        st.session_state.teaser_script = teaser_script
+                        artifacts.put('teaser_script', teaser_script)
                     else:
                         # Fallback without API
-                        st.session_state.teaser_script = {
+                        artifacts.put('teaser_script', {
                             "duration": selected_duration,
                             "voiceover": f"In a world where nothing is as it seems... {content['title']}. Coming soon.",
                             "scenes": [
@@ -1581,11 +1971,11 @@ with tab2:
                             "music_suggestion": f"{teaser_style} music that builds tension and atmosphere",
                             "sound_effects": "Deep bass, heartbeat, dramatic stings",
                             "title_treatment": "Minimalist text animation revealing the title"
-                        }
+                        })
                 
                 # Display teaser script in a visually appealing way
                 if 'teaser_script' in st.session_state:
-                    script = st.session_state.teaser_script
+                    script = artifacts.get('teaser_script')
                     
                     # Teaser details in a styled box
                     st.markdown(f"""
@@ -1671,17 +2061,19 @@ with tab2:
                         """
                         
                         client = openai.OpenAI(api_key=api_key.strip())
-                        response = client.chat.completions.create(
-                            model="gpt-4o",
+                        response = chat_completion(
+                            client,
+                            feature="market_analysis",
+                            model=get_premium_model(),
                             messages=[{"role": "user", "content": market_prompt}],
                             temperature=0.7,
                             max_tokens=1500
                         )
                         
                         market_analysis = response.choices[0].message.content
-                        st.session_state.market_analysis = market_analysis
+                        artifacts.put('market_analysis', market_analysis)
                     else:
-                        st.session_state.market_analysis = f"""
+                        artifacts.put('market_analysis', f"""
                         # Market Prediction for "{content['title']}" as a {selected_format}
                         
                         ## Box Office/Revenue Prediction
@@ -1702,23 +2094,23 @@ with tab2:
                         ## ROI Estimate
                         - Conservative: {random.randint(100, 200)}%
                         - Optimistic: {random.randint(200, 500)}%
-                        """
+                        """)
                 
                 st.markdown("##### Market Analysis Results")
-                st.markdown(st.session_state.market_analysis)
+                st.markdown(artifacts.get('market_analysis'))
             
             # Ideal cast suggestions
             st.markdown("##### Ideal Cast Suggestions")
             
             if st.button("Generate Cast Suggestions", use_container_width=True):
                 with st.spinner("Creating ideal cast lineup..."):
-                    if 'character_profiles' in st.session_state and st.session_state.character_profiles:
+                    if 'character_profiles' in st.session_state and artifacts.get('character_profiles'):
                         if api_key:
                             primary_genre = content['recommended_genres'][0] if content['recommended_genres'] else "Drama"
                             
                             # Generate cast suggestions using the new function
                             cast_data = generate_cast_suggestions(
-                                character_profiles=st.session_state.character_profiles,
+                                character_profiles=artifacts.get('character_profiles'),
                                 adaptation_type=selected_format,
                                 genre=primary_genre,
                                 api_key=api_key
@@ -1746,37 +2138,37 @@ with tab2:
                                         cast_suggestions_text += f"- {alt.get('name', 'Unknown')}: {alt.get('rationale', '')}\n"
                                     cast_suggestions_text += "\n"
                             
-                            st.session_state.cast_suggestions = cast_suggestions_text
+                            artifacts.put('cast_suggestions', cast_suggestions_text)
                         else:
                             # Generate placeholder cast suggestions
                             cast_suggestions = "# Ideal Cast Suggestions\n\n"
-                            for char in st.session_state.character_profiles[:5]:
+                            for char in artifacts.get('character_profiles')[:5]:
                                 cast_suggestions += f"## {char['name']} ({char['role']})\n"
                                 cast_suggestions += f"- **First Choice:** [Famous Actor Name]\n"
                                 cast_suggestions += f"- **Alternative:** [Alternative Actor Name]\n"
                                 cast_suggestions += f"- **Why:** Would perfectly embody the {', '.join(char['key_traits'])} traits essential to this character.\n\n"
                             
-                            st.session_state.cast_suggestions = cast_suggestions
+                            artifacts.put('cast_suggestions', cast_suggestions)
                     else:
-                        st.session_state.cast_suggestions = "Please generate character profiles first to get cast suggestions."
+                        artifacts.put('cast_suggestions', "Please generate character profiles first to get cast suggestions.")
                 
                 st.session_state.show_cast = True
                 st.rerun()
             
             # Display cast suggestions if available
             if st.session_state.get('show_cast', False) and 'cast_suggestions' in st.session_state:
-                st.markdown(st.session_state.cast_suggestions)
+                st.markdown(artifacts.get('cast_suggestions'))
                 
                 # Allow editing of cast suggestions
                 with st.expander("Edit Cast Suggestions", expanded=False):
                     edited_cast = st.text_area(
                         "Edit cast suggestions",
-                        value=st.session_state.cast_suggestions,
+                        value=artifacts.get('cast_suggestions'),
                         height=300
                     )
                     
                     if st.button("Update Cast"):
-                        st.session_state.cast_suggestions = edited_cast
+                        artifacts.put('cast_suggestions', edited_cast)
                         st.success("Cast suggestions updated!")
                         st.rerun()
         
@@ -1815,14 +2207,14 @@ with tab2:
                 # Get all necessary components
                 poster_url = None
                 if 'poster_image_url' in st.session_state:
-                    poster_url = st.session_state.poster_image_url
+                    poster_url = artifacts.get('poster_image_url')
                 
-                pitch_content = st.session_state.pitch_content if 'pitch_content' in st.session_state else None
-                plot_synopsis = st.session_state.plot_synopsis if 'plot_synopsis' in st.session_state else None
-                character_profiles = st.session_state.character_profiles if 'character_profiles' in st.session_state else None
-                teaser_script = st.session_state.teaser_script if 'teaser_script' in st.session_state else None
-                market_analysis = st.session_state.market_analysis if 'market_analysis' in st.session_state else None
-                cast_suggestions = st.session_state.cast_suggestions if 'cast_suggestions' in st.session_state else None
+                pitch_content = artifacts.get('pitch_content') if 'pitch_content' in st.session_state else None
+                plot_synopsis = artifacts.get('plot_synopsis') if 'plot_synopsis' in st.session_state else None
+                character_profiles = artifacts.get('character_profiles') if 'character_profiles' in st.session_state else None
+                teaser_script = artifacts.get('teaser_script') if 'teaser_script' in st.session_state else None
+                market_analysis = artifacts.get('market_analysis') if 'market_analysis' in st.session_state else None
+                cast_suggestions = artifacts.get('cast_suggestions') if 'cast_suggestions' in st.session_state else None
                 
                 # Create a temporary directory for the PDF
                 import tempfile
@@ -1850,7 +2242,7 @@ with tab2:
                         pdf_bytes = f.read()
                     
                     # Store the PDF in the session state
-                    st.session_state.pitch_pdf = pdf_bytes
+                    artifacts.put('pitch_pdf', pdf_bytes)
                     st.session_state.pitch_pdf_name = pdf_filename
                     
                 st.success("Your pitch deck is ready to download!")
@@ -1861,7 +2253,7 @@ with tab2:
         if st.session_state.get('show_download', False) and 'pitch_pdf' in st.session_state:
             st.download_button(
                 label="📥 Download Pitch Deck",
-                data=st.session_state.pitch_pdf,
+                data=artifacts.get('pitch_pdf'),
                 file_name=st.session_state.pitch_pdf_name,
                 mime="application/pdf",
                 use_container_width=True
@@ -1885,6 +2277,7 @@ with tab2:
             st.info("Generate all the creative materials in the sections above, then click 'Generate Complete Pitch Deck' to compile everything into a professional PDF.")
 
 with tab3:
+    profile_mark("tab:market")
     st.subheader("Create Content")
 
     # Create a styled container for the content creation section
@@ -1912,9 +2305,9 @@ with tab3:
 
     # Initialize plot_summary in session state if not present
     if 'plot_summary' not in st.session_state:
-        st.session_state.plot_summary = ""
+        artifacts.put('plot_summary', "")
     
-    if not st.session_state.plot_summary and 'plot_synopsis' not in st.session_state:
+    if not artifacts.get('plot_summary') and 'plot_synopsis' not in st.session_state:
         # Create an attractive prompt card
         st.markdown("""
         <div style="background-color: #1E293B; border-radius: 10px; padding: 2rem; text-align: center; margin: 1rem 0;">
@@ -1927,7 +2320,7 @@ with tab3:
         if st.button("📝 Go to Plot Synopsis Generator", use_container_width=True):
             st.session_state.active_tab = "🎬 Develop Adaptation"
             st.rerun()
-    elif not st.session_state.plot_summary and 'plot_synopsis' in st.session_state:
+    elif not artifacts.get('plot_summary') and 'plot_synopsis' in st.session_state:
         # Create an attractive prompt card
         st.markdown("""
         <div style="background-color: #1E293B; border-radius: 10px; padding: 2rem; text-align: center; margin: 1rem 0;">
@@ -1945,8 +2338,8 @@ with tab3:
         
         # Extract adaptation title from plot summary
         title_match = None
-        if st.session_state.plot_summary:
-            for line in st.session_state.plot_summary.split('\n')[:5]:
+        if artifacts.get('plot_summary'):
+            for line in artifacts.get('plot_summary').split('\n')[:5]:
                 if line.strip() and len(line) < 100:  # likely to be a title
                     title_match = line.strip()
                     break
@@ -1960,7 +2353,7 @@ with tab3:
                                            placeholder="Enter your adaptation title")
         else:
             # Default to the original content title if no title found in summary
-            default_title = st.session_state.current_content['title'] if st.session_state.current_content else ""
+            default_title = artifacts.get('current_content')['title'] if artifacts.get('current_content') is not None else ""
             adaptation_title = st.text_input("Title", 
                                            value=default_title,
                                            placeholder="Enter your adaptation title")
@@ -1972,7 +2365,7 @@ with tab3:
         with st.expander("📄 View Plot Summary", expanded=False):
             st.markdown(f"""
             <div style="background-color: #2C3E50; padding: 1.5rem; border-radius: 8px;">
-                {st.session_state.plot_summary}
+                {artifacts.get('plot_summary')}
             </div>
             """, unsafe_allow_html=True)
 
@@ -1987,9 +2380,9 @@ with tab3:
                         # Get the appropriate content text based on content type
                         if 'current_content' in st.session_state:
                             if st.session_state.content_type == "reddit":
-                                content_text = st.session_state.current_content['selftext']
+                                content_text = artifacts.get('current_content')['selftext']
                             else:  # wattpad
-                                content = st.session_state.current_content
+                                content = artifacts.get('current_content')
                                 content_text = f"{content['description']}\n\n{content['content_sample'] if 'content_sample' in content else ''}"
                         else:
                             content_text = ""
@@ -1997,16 +2390,16 @@ with tab3:
                         story_outline = generate_story_outline(
                             title=adaptation_title,
                             original_content=content_text,
-                            plot_summary=st.session_state.plot_summary if 'plot_summary' in st.session_state else "",
+                            plot_summary=artifacts.get('plot_summary') if 'plot_summary' in st.session_state else "",
                             adaptation_type=st.session_state.current_adaptation_type if 'current_adaptation_type' in st.session_state else "Movie",
                             genre=st.session_state.current_genre if 'current_genre' in st.session_state else "Drama",
                             api_key=api_key)
                             
-                        st.session_state.story_outline = story_outline
+                        artifacts.put('story_outline', story_outline)
         
         with col2:
             # Display generated outlines counter
-            if 'story_outline' in st.session_state and st.session_state.story_outline:
+            if 'story_outline' in st.session_state and artifacts.get('story_outline'):
                 st.markdown("""
                 <div style="background-color: #2C3E50; border-radius: 8px; padding: 1rem; text-align: center;">
                     <h4 style="margin: 0; font-size: 1rem;">Story Outline</h4>
@@ -2016,16 +2409,16 @@ with tab3:
                 """, unsafe_allow_html=True)
         
         # Display story outline if available
-        if 'story_outline' in st.session_state and st.session_state.story_outline:
+        if 'story_outline' in st.session_state and artifacts.get('story_outline'):
             st.markdown("<h4 style='margin-top: 2rem;'>Story Outline</h4>", unsafe_allow_html=True)
             st.markdown(f"""
             <div style="background-color: #2C3E50; padding: 1.5rem; border-radius: 8px; margin-bottom: 1.5rem;">
-                {st.session_state.story_outline}
+                {artifacts.get('story_outline')}
             </div>
             """, unsafe_allow_html=True)
 
         # Chapter generation with improved styling
-        if 'story_outline' in st.session_state and st.session_state.story_outline:
+        if 'story_outline' in st.session_state and artifacts.get('story_outline'):
             st.markdown("<h3>Generate Chapters</h3>", unsafe_allow_html=True)
             
             col1, col2, col3 = st.columns([2, 2, 1])
@@ -2040,7 +2433,7 @@ with tab3:
                     st.markdown(f"""
                     <div style="background-color: #2C3E50; border-radius: 8px; padding: 1rem; text-align: center; height: 100%;">
                         <h4 style="margin: 0; font-size: 1rem;">Chapters</h4>
-                        <p style="font-size: 2rem; margin: 0.5rem 0; color: #FF3D00;">{len(st.session_state.chapters)}</p>
+                        <p style="font-size: 2rem; margin: 0.5rem 0; color: #FF3D00;">{len(artifacts.get('chapters'))}</p>
                         <p style="margin: 0; font-size: 0.9rem;">Generated</p>
                     </div>
                     """, unsafe_allow_html=True)
@@ -2052,8 +2445,8 @@ with tab3:
                     with st.spinner(f"Writing chapter {chapter_num}..."):
                         chapter_content = generate_book_chapter(
                             title=adaptation_title,
-                            plot_summary=st.session_state.plot_summary,
-                            story_outline=st.session_state.story_outline,
+                            plot_summary=artifacts.get('plot_summary'),
+                            story_outline=artifacts.get('story_outline'),
                             chapter_num=chapter_num,
                             pov_character=chapter_pov,
                             genre=st.session_state.current_genre if 'current_genre' in st.session_state else "Drama",
@@ -2061,9 +2454,9 @@ with tab3:
                             
                         # Store the chapter in session state
                         if 'chapters' not in st.session_state:
-                            st.session_state.chapters = {}
+                            artifacts.put('chapters', {})
                             
-                        st.session_state.chapters[chapter_num] = chapter_content
+                        artifacts.put('chapters', {**artifacts.get('chapters'), chapter_num: chapter_content})
                     
                     st.markdown(f"<h4>Chapter {chapter_num}</h4>", unsafe_allow_html=True)
                     st.markdown(f"""
@@ -2072,19 +2465,75 @@ with tab3:
                     </div>
                     """, unsafe_allow_html=True)
             
+            # Whole-book generation: all outline chapters in parallel, resumable from the book store
+            st.markdown("<h4>Generate All Chapters</h4>", unsafe_allow_html=True)
+            book_genre = st.session_state.current_genre if 'current_genre' in st.session_state else "Drama"
+            book_store = BookStore()
+            book_id = BookStore.book_id(adaptation_title, artifacts.get('story_outline'), book_genre, chapter_pov)
+            outline_chapters = parse_outline_chapters(artifacts.get('story_outline'))
+            saved_chapters = book_store.load(book_id)
+            total_chapters = len(outline_chapters) or DEFAULT_TOTAL_CHAPTERS
+            
+            if saved_chapters:
+                st.caption(f"{len(saved_chapters)} of {total_chapters} chapters of this book are saved; "
+                           "generating the book resumes from where it stopped.")
+            else:
+                st.caption(f"{total_chapters} chapters found in the outline.")
+            
+            col1, col2 = st.columns([3, 1])
+            with col2:
+                book_concurrency = st.number_input("Parallel chapters", min_value=1, max_value=8, value=4)
+            with col1:
+                generate_all = st.button("📚 Generate All Chapters", use_container_width=True)
+            
+            if generate_all:
+                if not api_key:
+                    st.error("OpenAI API key is required for chapter generation.")
+                else:
+                    book_progress = st.progress(0.0, text="Writing chapters...")
+                    chapter_log = st.empty()
+                    chapter_events = []
+                    
+                    def update_book_progress(chapter_number, status, completed, total):
+                        chapter_events.append(f"Chapter {chapter_number}: {status}")
+                        book_progress.progress(completed / total, text=f"{completed} of {total} chapters")
+                        chapter_log.markdown(" · ".join(chapter_events))
+                    
+                    book = generate_book(
+                        title=adaptation_title,
+                        plot_summary=artifacts.get('plot_summary'),
+                        story_outline=artifacts.get('story_outline'),
+                        genre=book_genre,
+                        pov_character=chapter_pov,
+                        api_key=api_key,
+                        max_concurrency=book_concurrency,
+                        progress_callback=update_book_progress,
+                        store=book_store)
+                    
+                    artifacts.put('chapters', {**artifacts.get('chapters'), **book["chapters"]})
+                    if book["error"]:
+                        st.error(book["error"])
+                    elif book["failed"]:
+                        st.warning(f"{len(book['failed'])} chapter(s) failed and will be retried the next time "
+                                   "you generate the book: " + ", ".join(str(n) for n in sorted(book["failed"])))
+                    else:
+                        st.success(f"All {book['total']} chapters are ready.")
+            elif saved_chapters and not artifacts.get('chapters'):
+                artifacts.put('chapters', {n: chapter["content"] for n, chapter in saved_chapters.items()})
+            
             # Display previously generated chapters with improved styling
-            if 'chapters' in st.session_state and st.session_state.chapters:
+            if 'chapters' in st.session_state and artifacts.get('chapters'):
                 st.markdown("<h3>Previously Generated Chapters</h3>", unsafe_allow_html=True)
                 
                 # Create a chapter selection mechanism
-                chapter_numbers = list(sorted(st.session_state.chapters.keys()))
+                chapter_numbers = list(sorted(artifacts.get('chapters').keys()))
                 selected_chapter = st.selectbox("Select chapter to view", options=chapter_numbers, format_func=lambda x: f"Chapter {x}")
                 
                 if selected_chapter:
                     st.markdown(f"<h4>Chapter {selected_chapter}</h4>", unsafe_allow_html=True)
                     st.markdown(f"""
                     <div class="chapter-card">
-                        {st.session_state.chapters[selected_chapter]}
+                        {artifacts.get('chapters')[selected_chapter]}
                     </div>
                     """, unsafe_allow_html=True)
                 
@@ -2095,6 +2544,10 @@ with tab3:
         st.markdown("</div>", unsafe_allow_html=True)
 
 
+# Save what this run changed to the current project
+profile_mark("autosave")
+autosave(st.session_state.project_id, artifacts)
+
 # Add footer after all tab content
 st.markdown("""
 <footer style="margin-top: 5rem; padding-top: 1.5rem; border-top: 1px solid #334155; text-align: center;">
@@ -2105,3 +2558,5 @@ st.markdown("""
 </footer>
 """, unsafe_allow_html=True)
 
+stop_rerun_profile()
+
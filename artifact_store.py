@@ -0,0 +1,533 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import pandas as pd
+
+from utils import get_data_dir
+
+_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS artifacts (
+        digest TEXT PRIMARY KEY,
+        kind TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        created_at REAL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS artifact_refs (
+        holder TEXT NOT NULL,
+        name TEXT NOT NULL,
+        digest TEXT NOT NULL,
+        PRIMARY KEY (holder, name)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS holders (
+        holder TEXT PRIMARY KEY,
+        touched_at REAL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_artifact_refs_digest ON artifact_refs (digest)",
+]
+
+# Session state keys whose values are kept in the artifact store, plus the prefix of per-character art URLs
+ARTIFACT_KEYS = [
+    "posts_df", "stories_df", "content_raw_df", "current_content", "corpus_item",
+    "plot_summary", "plot_synopsis", "poster_description", "poster_image_url", "character_profiles",
+    "character_art_description", "story_outline", "chapters", "pitch_content", "audience_analysis",
+    "teaser_script", "alternate_endings", "cast_suggestions", "market_analysis", "pitch_pdf",
+]
+ARTIFACT_KEY_PREFIXES = ["character_image_url_"]
+
+# Values that serialize to fewer bytes than this stay inline in session state
+INLINE_MAX_BYTES = 2048
+
+# Handle stored in session state in place of a large value
+ArtifactRef = namedtuple("ArtifactRef", ["digest", "size"])
+
+
+def _serialize(value):
+    """Returns (kind, payload bytes) for a value"""
+    if isinstance(value, bytes):
+        return "bytes", value
+    if isinstance(value, str):
+        return "text", value.encode("utf-8")
+    return "pickle", pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _deserialize(kind, payload):
+    """Inverse of _serialize"""
+    if kind == "bytes":
+        return payload
+    if kind == "text":
+        return payload.decode("utf-8")
+    return pickle.loads(payload)
+
+
+def estimate_size(value):
+    """
+    Estimates the memory held by a session state value
+
+    Args:
+        value: Any value stored in session state
+
+    Returns:
+        int: Approximate size in bytes
+    """
+    if isinstance(value, ArtifactRef):
+        return sys.getsizeof(value)
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class ArtifactStore:
+    """
+    Shared, content-addressed store for large session artifacts
+
+    Artifacts (frames, generated texts, PDF bytes, chapter dicts, image URLs)
+    are written once per distinct content under <data dir>/artifacts/, named
+    by the BLAKE2 digest of their serialized bytes. Each (holder, name) pair
+    referencing an artifact is one row in a SQLite table, so an artifact's
+    reference count is the number of sessions (or saved projects) currently
+    pointing at it, and it is deleted when the last reference goes away.
+    Decoded values are kept in a process-wide LRU cache bounded by bytes, so
+    sessions holding the same content share one in-memory copy. Values
+    returned by get are shared and must not be mutated in place.
+    """
+
+    def __init__(self, directory=None, cache_bytes=None, session_ttl=None):
+        self.directory = directory or get_data_dir("artifacts")
+        self.cache_bytes = cache_bytes or int(float(os.getenv("ARTIFACT_CACHE_MB", "512")) * 1024 * 1024)
+        self.session_ttl = session_ttl or float(os.getenv("ARTIFACT_SESSION_TTL_HOURS", "12")) * 3600
+        self._collected_at = 0.0
+        self._lock = threading.RLock()
+        self._connection = None
+        self._cache = OrderedDict()
+        self._cached_bytes = 0
+        self._derived = OrderedDict()
+
+    def _get_connection(self):
+        """Opens (once per store) the SQLite database holding the reference counts"""
+        if self._connection is None:
+            self._connection = sqlite3.connect(os.path.join(self.directory, "artifacts.db"),
+                                               check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            for statement in _SCHEMA:
+                self._connection.execute(statement)
+            self._connection.commit()
+        return self._connection
+
+    def _path(self, digest):
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def _cache_put(self, digest, value, size):
+        """Adds a decoded value to the LRU cache, evicting the least recently used ones"""
+        if digest in self._cache:
+            self._cache.move_to_end(digest)
+            return
+        self._cache[digest] = (value, size)
+        self._cached_bytes += size
+        while self._cached_bytes > self.cache_bytes and len(self._cache) > 1:
+            _, (_, evicted_size) = self._cache.popitem(last=False)
+            self._cached_bytes -= evicted_size
+
+    def put(self, holder, name, value, serialized=None):
+        """
+        Stores a value and points a holder's named reference at it
+
+        Args:
+            holder (str): Session or project holding the reference
+            name (str): Reference name within the holder (e.g. the session state key)
+            value: bytes, str or any picklable value
+            serialized (tuple): (kind, payload) of the value if the caller already serialized it
+
+        Returns:
+            ArtifactRef: Handle of the stored artifact
+        """
+        kind, payload = serialized or _serialize(value)
+        digest = hashlib.blake2b(kind.encode() + b"\0" + payload, digest_size=20).hexdigest()
+        with self._lock:
+            connection = self._get_connection()
+            known = connection.execute("SELECT 1 FROM artifacts WHERE digest = ?", (digest,)).fetchone()
+            if not known:
+                path = self._path(digest)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path + ".tmp", "wb") as f:
+                    f.write(payload)
+                os.replace(path + ".tmp", path)
+                connection.execute("INSERT INTO artifacts (digest, kind, size, created_at) VALUES (?, ?, ?, ?)",
+                                   (digest, kind, len(payload), time.time()))
+            previous = self._set_ref(connection, holder, name, digest)
+            connection.commit()
+            self._cache_put(digest, value, len(payload))
+            if previous and previous != digest:
+                self._delete_unreferenced([previous])
+        return ArtifactRef(digest, len(payload))
+
+    def _set_ref(self, connection, holder, name, digest):
+        """Points a reference at a digest and returns the digest it pointed at before"""
+        row = connection.execute("SELECT digest FROM artifact_refs WHERE holder = ? AND name = ?",
+                                 (holder, name)).fetchone()
+        connection.execute("INSERT OR REPLACE INTO artifact_refs (holder, name, digest) VALUES (?, ?, ?)",
+                           (holder, name, digest))
+        return row[0] if row else None
+
+    def link(self, holder, name, digest):
+        """Points a holder's named reference at an already stored artifact (e.g. when copying a session)"""
+        with self._lock:
+            connection = self._get_connection()
+            previous = self._set_ref(connection, holder, name, digest)
+            connection.commit()
+            if previous and previous != digest:
+                self._delete_unreferenced([previous])
+
+    def get(self, digest):
+        """
+        Returns the value of an artifact
+
+        Args:
+            digest (str): Artifact digest (ArtifactRef.digest)
+
+        Returns:
+            The stored value, or None if the artifact no longer exists
+        """
+        with self._lock:
+            cached = self._cache.get(digest)
+            if cached is not None:
+                self._cache.move_to_end(digest)
+                return cached[0]
+            row = self._get_connection().execute("SELECT kind FROM artifacts WHERE digest = ?",
+                                                 (digest,)).fetchone()
+        if row is None:
+            return None
+        try:
+            with open(self._path(digest), "rb") as f:
+                payload = f.read()
+        except OSError as e:
+            print(f"Error reading artifact {digest}: {e}")
+            return None
+        value = _deserialize(row[0], payload)
+        with self._lock:
+            # Another session may have loaded it meanwhile; keep a single shared copy
+            cached = self._cache.get(digest)
+            if cached is not None:
+                return cached[0]
+            self._cache_put(digest, value, len(payload))
+        return value
+
+    def derive(self, digest, name, build, max_entries=8):
+        """
+        Returns a structure derived from an artifact (e.g. a results index), built once per process
+
+        Args:
+            digest (str): Artifact the structure is derived from
+            name (str): Kind of derived structure
+            build (callable): Builds the structure from the artifact's value
+            max_entries (int): Most derived structures kept
+
+        Returns:
+            The derived structure
+        """
+        key = (digest, name)
+        with self._lock:
+            if key in self._derived:
+                self._derived.move_to_end(key)
+                return self._derived[key]
+        derived = build(self.get(digest))
+        with self._lock:
+            self._derived[key] = derived
+            while len(self._derived) > max_entries:
+                self._derived.popitem(last=False)
+        return derived
+
+    def release(self, holder, name=None):
+        """
+        Drops a holder's reference (or all of its references) and deletes artifacts nobody references
+
+        Args:
+            holder (str): Session or project holding the references
+            name (str): Reference to drop, or None for all of them
+        """
+        with self._lock:
+            connection = self._get_connection()
+            if name is None:
+                digests = [row[0] for row in connection.execute(
+                    "SELECT digest FROM artifact_refs WHERE holder = ?", (holder,))]
+                connection.execute("DELETE FROM artifact_refs WHERE holder = ?", (holder,))
+                connection.execute("DELETE FROM holders WHERE holder = ?", (holder,))
+            else:
+                digests = [row[0] for row in connection.execute(
+                    "SELECT digest FROM artifact_refs WHERE holder = ? AND name = ?", (holder, name))]
+                connection.execute("DELETE FROM artifact_refs WHERE holder = ? AND name = ?", (holder, name))
+            connection.commit()
+            self._delete_unreferenced(digests)
+
+    def _delete_unreferenced(self, digests):
+        """Deletes the given artifacts that no reference points at any more"""
+        connection = self._get_connection()
+        for digest in set(digests):
+            if connection.execute("SELECT 1 FROM artifact_refs WHERE digest = ? LIMIT 1", (digest,)).fetchone():
+                continue
+            connection.execute("DELETE FROM artifacts WHERE digest = ?", (digest,))
+            cached = self._cache.pop(digest, None)
+            if cached is not None:
+                self._cached_bytes -= cached[1]
+            for key in [key for key in self._derived if key[0] == digest]:
+                del self._derived[key]
+            try:
+                os.remove(self._path(digest))
+            except OSError:
+                pass
+        connection.commit()
+
+    def touch(self, holder):
+        """
+        Records that a holder is still alive, sweeping idle sessions at most once an hour (see collect)
+
+        Returns:
+            bool: False if the holder was not known, i.e. is new or was released as idle
+        """
+        now = time.time()
+        with self._lock:
+            connection = self._get_connection()
+            known = connection.execute("SELECT 1 FROM holders WHERE holder = ?", (holder,)).fetchone() is not None
+            connection.execute("INSERT OR REPLACE INTO holders (holder, touched_at) VALUES (?, ?)", (holder, now))
+            connection.commit()
+            due = now - self._collected_at > 3600
+            if due:
+                self._collected_at = now
+        if due:
+            released = self.collect(self.session_ttl)
+            if released:
+                print(f"Released the artifacts of {released} idle session(s)")
+        return known
+
+    def has(self, digest):
+        """Returns whether an artifact is still stored"""
+        with self._lock:
+            if digest in self._cache:
+                return True
+            return self._get_connection().execute("SELECT 1 FROM artifacts WHERE digest = ?",
+                                                  (digest,)).fetchone() is not None
+
+    def relink(self, holder, refs):
+        """
+        Points a holder's references back at the artifacts that are still stored
+
+        Args:
+            holder (str): Session or project holding the references
+            refs (dict): Reference name -> artifact digest
+
+        Returns:
+            list: Names whose artifacts no longer exist
+        """
+        missing = []
+        with self._lock:
+            connection = self._get_connection()
+            for name, digest in refs.items():
+                if connection.execute("SELECT 1 FROM artifacts WHERE digest = ?", (digest,)).fetchone():
+                    connection.execute("INSERT OR REPLACE INTO artifact_refs (holder, name, digest) VALUES (?, ?, ?)",
+                                       (holder, name, digest))
+                else:
+                    missing.append(name)
+            connection.commit()
+        return missing
+
+    def collect(self, max_idle_seconds, prefix="session:"):
+        """
+        Releases the references of holders that have not been touched for a while
+
+        Streamlit does not report closed browser sessions, so session holders are
+        touched on every rerun and swept once idle.
+
+        Args:
+            max_idle_seconds (float): Idle time after which a holder is released
+            prefix (str): Only sweep holders whose name starts with this
+
+        Returns:
+            int: Number of holders released
+        """
+        with self._lock:
+            stale = [row[0] for row in self._get_connection().execute(
+                "SELECT holder FROM holders WHERE touched_at < ? AND holder LIKE ?",
+                (time.time() - max_idle_seconds, prefix + "%"))]
+        for holder in stale:
+            self.release(holder)
+        return len(stale)
+
+    def holder_usage(self, holder):
+        """
+        Reports the artifacts referenced by a holder
+
+        Returns:
+            dict: artifacts, bytes, and shared_bytes (artifacts that other holders reference too)
+        """
+        with self._lock:
+            rows = self._get_connection().execute(
+                "SELECT a.size, (SELECT COUNT(*) FROM artifact_refs r2 WHERE r2.digest = a.digest "
+                "AND r2.holder != ?) FROM artifacts a WHERE a.digest IN "
+                "(SELECT digest FROM artifact_refs WHERE holder = ?)", (holder, holder)).fetchall()
+        return {
+            "artifacts": len(rows),
+            "bytes": sum(size for size, _ in rows),
+            "shared_bytes": sum(size for size, others in rows if others),
+        }
+
+    def stats(self):
+        """
+        Reports the store as a whole
+
+        Returns:
+            dict: artifacts, bytes on disk, references, holders, and cached_bytes held in memory
+        """
+        with self._lock:
+            connection = self._get_connection()
+            artifacts, size = connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM artifacts").fetchone()
+            references, holders = connection.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT holder) FROM artifact_refs").fetchone()
+            return {
+                "artifacts": artifacts,
+                "bytes": size,
+                "references": references,
+                "holders": holders,
+                "cached_bytes": self._cached_bytes,
+            }
+
+
+class SessionArtifacts:
+    """
+    Session state accessor that keeps large values in the shared artifact store
+
+    Values of ARTIFACT_KEYS (and keys starting with ARTIFACT_KEY_PREFIXES)
+    larger than INLINE_MAX_BYTES are replaced in session state by an
+    ArtifactRef; everything else is stored inline as before. Reading a key
+    returns the value either way.
+    """
+
+    def __init__(self, state, holder, store=None):
+        """
+        Args:
+            state: st.session_state (or any mutable mapping)
+            holder (str): Reference holder of this session, e.g. 'session:<id>'
+            store (ArtifactStore): Store to use (the process-wide one by default)
+        """
+        self.state = state
+        self.holder = holder
+        self.store = store or get_artifact_store()
+
+    @staticmethod
+    def is_artifact_key(key):
+        return key in ARTIFACT_KEYS or any(key.startswith(prefix) for prefix in ARTIFACT_KEY_PREFIXES)
+
+    def __contains__(self, key):
+        value = self.state.get(key)
+        if isinstance(value, ArtifactRef):
+            return self.store.has(value.digest)
+        return key in self.state
+
+    def get(self, key, default=None):
+        """Returns the value of a session state key, loading it from the store if needed"""
+        value = self.state.get(key, default)
+        if isinstance(value, ArtifactRef):
+            stored = self.store.get(value.digest)
+            if stored is None:
+                # Released while the session was idle (see ArtifactStore.collect)
+                self.state.pop(key, None)
+                return default
+            return stored
+        return value
+
+    def put(self, key, value):
+        """
+        Sets a session state key
+
+        Args:
+            key (str): Session state key
+            value: New value; large values of artifact keys go to the shared store
+        """
+        if self.is_artifact_key(key) and value is not None and not isinstance(value, (bool, int, float)):
+            serialized = _serialize(value)
+            if len(serialized[1]) > INLINE_MAX_BYTES:
+                self.state[key] = self.store.put(self.holder, key, value, serialized=serialized)
+                return
+        if isinstance(self.state.get(key), ArtifactRef):
+            self.store.release(self.holder, key)
+        self.state[key] = value
+
+    def delete(self, key):
+        """Removes a session state key and drops its artifact reference"""
+        if isinstance(self.state.get(key), ArtifactRef):
+            self.store.release(self.holder, key)
+        self.state.pop(key, None)
+
+    def touch(self):
+        """
+        Marks this session as alive, at most once a minute
+
+        A tab left open past ARTIFACT_SESSION_TTL_HOURS has had its references
+        released by the sweep. On its next rerun, references to artifacts that
+        are still stored (e.g. shared with a project) are restored, and keys
+        whose artifacts are gone are dropped, so the page sees them as unset
+        rather than as None.
+        """
+        now = time.time()
+        if now - self.state.get("_artifacts_touched_at", 0) > 60:
+            self.state["_artifacts_touched_at"] = now
+            if not self.store.touch(self.holder):
+                refs = {key: value.digest for key, value in list(self.state.items())
+                        if isinstance(value, ArtifactRef)}
+                for key in self.store.relink(self.holder, refs) if refs else []:
+                    self.state.pop(key, None)
+
+    def derive(self, key, name, build):
+        """Returns a structure derived from a key's value, shared by sessions holding the same value"""
+        value = self.state.get(key)
+        if isinstance(value, ArtifactRef):
+            return self.store.derive(value.digest, name, build)
+        return build(value)
+
+    def memory_report(self):
+        """
+        Reports the memory this session holds
+
+        Returns:
+            dict: inline_bytes (estimated, values kept in session state), artifact_bytes
+                  (referenced in the shared store), shared_bytes (of those, also referenced
+                  by other sessions or projects) and artifacts (count)
+        """
+        inline = sum(estimate_size(value) for key, value in self.state.items()
+                     if not isinstance(value, ArtifactRef))
+        usage = self.store.holder_usage(self.holder)
+        return {
+            "inline_bytes": inline,
+            "artifact_bytes": usage["bytes"],
+            "shared_bytes": usage["shared_bytes"],
+            "artifacts": usage["artifacts"],
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_artifact_store():
+    """Returns the process-wide artifact store"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ArtifactStore()
+        return _store
@@ -0,0 +1,155 @@
+import asyncio
+import concurrent.futures
+import inspect
+import threading
+
+
+class DeadlineExceeded(Exception):
+    """Raised for (or returned in place of) work cancelled because its deadline passed"""
+
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_event_loop():
+    """
+    Returns the process-wide event loop for async generation started from sync code
+
+    The loop runs in a background daemon thread, so every session and script
+    that hands work to it shares one loop, and with it one AsyncOpenAI client
+    per API key and one connection pool.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="async-generation", daemon=True).start()
+        return _loop
+
+
+def run_async(coro, timeout=None):
+    """
+    Runs a coroutine on the shared event loop and waits for its result
+
+    Args:
+        coro (coroutine): Coroutine to run, e.g. generate_pitch_deck_async(...)
+        timeout (float): Seconds after which the coroutine is cancelled (None for no deadline)
+
+    Returns:
+        The coroutine's result
+
+    Raises:
+        DeadlineExceeded: If the coroutine did not finish within the timeout
+    """
+    loop = get_event_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("run_async() cannot wait on the shared event loop from a task running on it; await instead")
+    future = asyncio.run_coroutine_threadsafe(coro, loop)
+    try:
+        return future.result(timeout)
+    except concurrent.futures.TimeoutError:
+        if future.done():
+            # Raised by the coroutine itself (or it finished just as the deadline passed), not the deadline
+            return future.result()
+        future.cancel()
+        raise DeadlineExceeded(f"Not finished within {timeout:g}s") from None
+
+
+async def with_deadline(awaitable, timeout):
+    """
+    Awaits an awaitable, cancelling it when the deadline passes
+
+    Args:
+        awaitable: Coroutine or other awaitable
+        timeout (float): Seconds until the deadline (None for no deadline)
+
+    Returns:
+        The awaitable's result
+
+    Raises:
+        DeadlineExceeded: If it did not finish within the timeout
+    """
+    # Waits on the task rather than wait_for, so a TimeoutError raised inside the awaitable stays that error
+    task = asyncio.ensure_future(awaitable)
+    try:
+        await asyncio.wait([task], timeout=timeout)
+    finally:
+        # Also reached when the caller itself is cancelled
+        if not task.done():
+            task.cancel()
+            await asyncio.wait([task])
+    if task.cancelled() and timeout is not None:
+        raise DeadlineExceeded(f"Not finished within {timeout:g}s")
+    return task.result()
+
+
+async def gather_with_deadline(awaitables, timeout=None, limit=None, return_exceptions=False):
+    """
+    Runs awaitables concurrently, cancelling those still unfinished at the deadline
+
+    Unlike asyncio.gather with wait_for, a deadline keeps the results that did
+    finish: only the unfinished awaitables are cancelled, and each gets a
+    DeadlineExceeded instance in its place.
+
+    Args:
+        awaitables (list): Coroutines or other awaitables
+        timeout (float): Seconds until the deadline (None for no deadline)
+        limit (int): Maximum number running at once (None to start all at once)
+        return_exceptions (bool): Put errors in the results instead of cancelling the
+                                  rest and raising the first one
+
+    Returns:
+        list: Results in the order of awaitables
+
+    Raises:
+        Exception: The first error raised by an awaitable, unless return_exceptions is set
+    """
+    awaitables = list(awaitables)
+    if not awaitables:
+        return []
+    semaphore = asyncio.Semaphore(limit) if limit else None
+
+    async def run(awaitable):
+        if semaphore is None:
+            return await awaitable
+        async with semaphore:
+            return await awaitable
+
+    tasks = [asyncio.ensure_future(run(awaitable)) for awaitable in awaitables]
+    try:
+        done, pending = await asyncio.wait(
+            tasks, timeout=timeout,
+            return_when=asyncio.ALL_COMPLETED if return_exceptions else asyncio.FIRST_EXCEPTION
+        )
+    finally:
+        # Also reached when the caller itself is cancelled
+        unfinished = [task for task in tasks if not task.done()]
+        for task in unfinished:
+            task.cancel()
+        if unfinished:
+            await asyncio.wait(unfinished)
+        for awaitable in awaitables:
+            # Coroutines cancelled before they were started would otherwise warn that they were never awaited
+            if inspect.iscoroutine(awaitable) and inspect.getcoroutinestate(awaitable) == inspect.CORO_CREATED:
+                awaitable.close()
+
+    if not return_exceptions:
+        for task in tasks:
+            if task in done and not task.cancelled() and task.exception() is not None:
+                raise task.exception()
+
+    results = []
+    for task in tasks:
+        if task not in done:
+            results.append(DeadlineExceeded(f"Not finished within {timeout:g}s"))
+        elif task.cancelled():
+            results.append(asyncio.CancelledError())
+        else:
+            results.append(task.exception() or task.result())
+    return results
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Load test of the Streamlit app with many concurrent sessions
+
+Drives N simulated browser sessions through Discover -> Analyze -> Develop ->
+Export with Streamlit's AppTest, all in this process so they share the app's
+caches, scheduler and stores like sessions of one server do. OpenAI, Reddit and
+Wattpad are replaced by the stand-ins in benchmarks/standins.py.
+
+Reports as JSON:
+    - per-interaction latency percentiles (each click is one script rerun)
+    - error counts
+    - server CPU time and utilization, resident memory, thread count
+    - stand-in service call counts
+
+Usage:
+    python benchmarks/bench_app_load.py --sessions 8 --output load.json
+    python benchmarks/bench_app_load.py --sessions 32 --ramp-up 20 --latency-scale 0.5
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import standins
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+# Develop and Export buttons clicked in order, after a story is selected
+DEVELOP_STEPS = [
+    ("develop_pitch_deck", "Generate Pitch Deck"),
+    ("develop_character_profiles", "Generate Character Profiles"),
+    ("develop_plot_synopsis", "Generate Plot Synopsis"),
+    ("develop_audience_analysis", "Generate Audience Analysis"),
+    ("develop_teaser_script", "Generate Teaser Trailer Script"),
+    ("develop_market_prediction", "Generate Market Prediction"),
+    ("develop_cast_suggestions", "Generate Cast Suggestions"),
+    ("export_pitch_pdf", "Generate Complete Pitch Deck"),
+]
+
+
+def _percentiles(values):
+    from llm_metrics import percentile
+    if not values:
+        return None
+    return {name: round(percentile(values, pct) * 1000, 1)
+            for name, pct in (("p50", 50), ("p90", 90), ("p95", 95), ("p99", 99), ("max", 100))}
+
+
+def _rss_mb():
+    """Current resident memory of this process (peak memory where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+def _cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _share_test_runtime():
+    """
+    Lets AppTest sessions run concurrently, sharing what a server shares
+
+    Each AppTest run installs a mock runtime and removes it when the run ends,
+    which would pull the runtime from under the other sessions' runs; the last
+    installed runtime is kept available to them instead. Each run also compiles
+    app.py again (which is not thread-safe on every Python version), while a
+    server compiles it once; the compiled script is shared instead.
+    """
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    last, compiled = {}, {}
+    compile_lock = threading.Lock()
+    get_bytecode = ScriptCache.get_bytecode
+
+    def shared_bytecode(self, script_path):
+        with compile_lock:
+            if script_path not in compiled:
+                compiled[script_path] = get_bytecode(self, script_path)
+            return compiled[script_path]
+
+    def instance(cls):
+        if cls._instance is not None:
+            last["runtime"] = cls._instance
+            return cls._instance
+        if "runtime" in last:
+            return last["runtime"]
+        raise RuntimeError("Runtime hasn't been created!")
+
+    ScriptCache.get_bytecode = shared_bytecode
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: cls._instance is not None or "runtime" in last)
+
+
+class ResourceSampler(threading.Thread):
+    """Samples CPU utilization, resident memory and thread count of the process"""
+
+    def __init__(self, interval=0.25):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.samples = []
+        self._stopped = threading.Event()
+
+    def run(self):
+        last_cpu, last_time = _cpu_seconds(), time.perf_counter()
+        while not self._stopped.wait(self.interval):
+            cpu, now = _cpu_seconds(), time.perf_counter()
+            self.samples.append({"cpu_percent": 100 * (cpu - last_cpu) / (now - last_time),
+                                 "rss_mb": _rss_mb(), "threads": threading.active_count()})
+            last_cpu, last_time = cpu, now
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+class Session:
+    """One simulated user walking through the app, recording the latency of every interaction"""
+
+    def __init__(self, index, subreddits, think_seconds, timeout):
+        self.index = index
+        self.subreddits = subreddits
+        self.think_seconds = think_seconds
+        self.timeout = timeout
+        self.timings = []
+        self.errors = []
+        self.completed = False
+
+    def _interact(self, name, action):
+        start = time.perf_counter()
+        action()
+        elapsed = time.perf_counter() - start
+        exceptions = [e.value for e in self.app.exception]
+        self.timings.append((name, elapsed))
+        if exceptions:
+            self.errors.append(f"{name}: {exceptions[0]}")
+            raise RuntimeError(exceptions[0])
+        if self.think_seconds:
+            time.sleep(self.think_seconds)
+
+    def _click(self, label):
+        buttons = [button for button in self.app.button if button.label.strip().endswith(label)]
+        if not buttons:
+            raise LookupError(f"Button not shown: {label}")
+        return buttons[0].click().run()
+
+    def run(self):
+        from streamlit.testing.v1 import AppTest
+        self.app = AppTest.from_file(APP_PATH, default_timeout=self.timeout)
+        try:
+            # First load includes the app's two-second splash screen and its rerun
+            self._interact("open_app", self.app.run)
+            self.app.sidebar.multiselect[0].set_value(self.subreddits)
+            self._interact("discover_reddit", lambda: self._click("Discover Reddit Content"))
+            self._interact("analyze", lambda: self._click("Analyze Adaptation Potential"))
+            self._interact("select_story", lambda: self._click("Proceed to Generate Adaptation Materials"))
+            for name, label in DEVELOP_STEPS:
+                self._interact(name, lambda label=label: self._click(label))
+            self.completed = True
+        except Exception as e:
+            if not self.errors:
+                self.errors.append(f"{type(e).__name__}: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the app with concurrent simulated sessions")
+    parser.add_argument("--sessions", type=int, default=8, help="Number of concurrent sessions")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="Seconds over which session starts are spread")
+    parser.add_argument("--think-ms", type=float, default=250, help="Pause after each interaction")
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="Multiplier for the simulated service latencies (0 for local work alone)")
+    parser.add_argument("--timeout", type=float, default=300, help="Seconds one interaction may take")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+    output_path = os.path.abspath(args.output) if args.output else None
+
+    workdir = tempfile.mkdtemp(prefix="app_load_")
+    os.environ["IP_PITCH_DATA_DIR"] = os.path.join(workdir, "data")
+    os.environ["OPENAI_API_KEY"] = "sk-standin-000000000000000000000000"
+    os.environ["REDDIT_CLIENT_ID"] = os.environ["REDDIT_CLIENT_SECRET"] = "standin"
+    os.environ.pop("IO_REPLAY", None)
+    os.chdir(workdir)
+    counter = standins.install(standins.Latency(scale=args.latency_scale))
+    _share_test_runtime()
+
+    from utils import get_default_subreddits
+    subreddits = get_default_subreddits()
+    # Sessions look at overlapping but not identical subreddits, as a team would
+    sessions = [Session(i, [subreddits[(i + k) % len(subreddits)] for k in range(2)],
+                        args.think_ms / 1000, args.timeout) for i in range(args.sessions)]
+
+    sampler = ResourceSampler()
+    rss_start, cpu_start = _rss_mb(), _cpu_seconds()
+    start = time.perf_counter()
+    sampler.start()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        threads = []
+        for session in sessions:
+            thread = threading.Thread(target=session.run, daemon=True)
+            thread.start()
+            threads.append(thread)
+            time.sleep(args.ramp_up / max(1, args.sessions))
+        for thread in threads:
+            thread.join()
+    wall_seconds = time.perf_counter() - start
+    sampler.stop()
+    cpu_seconds = _cpu_seconds() - cpu_start
+
+    by_interaction = {}
+    for session in sessions:
+        for name, elapsed in session.timings:
+            by_interaction.setdefault(name, []).append(elapsed)
+    errors = [f"session {session.index}: {error}" for session in sessions for error in session.errors]
+    samples = sampler.samples or [{"cpu_percent": 0.0, "rss_mb": _rss_mb(), "threads": threading.active_count()}]
+    report = {
+        "benchmark": "app_load",
+        "settings": vars(args),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                        "cpus": os.cpu_count()},
+        "wall_seconds": round(wall_seconds, 2),
+        "sessions": {"started": len(sessions), "completed": sum(session.completed for session in sessions),
+                     "failed": sum(not session.completed for session in sessions)},
+        "interactions_per_s": round(sum(len(v) for v in by_interaction.values()) / wall_seconds, 2),
+        "latency_ms": {name: dict(_percentiles(values), count=len(values)) for name, values in by_interaction.items()},
+        "latency_ms_all": _percentiles([elapsed for values in by_interaction.values() for elapsed in values]),
+        "server": {
+            "cpu_seconds": round(cpu_seconds, 2),
+            "cpu_percent_avg": round(100 * cpu_seconds / wall_seconds, 1),
+            "cpu_percent_peak": round(max(sample["cpu_percent"] for sample in samples), 1),
+            "rss_mb_start": round(rss_start, 1),
+            "rss_mb_peak": round(max(sample["rss_mb"] for sample in samples), 1),
+            "rss_mb_end": round(_rss_mb(), 1),
+            "threads_peak": max(sample["threads"] for sample in samples),
+        },
+        "service_calls": dict(counter.calls),
+        "service_max_in_flight": counter.max_in_flight,
+        "errors": errors[:20],
+    }
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if output_path:
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
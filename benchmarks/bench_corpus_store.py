@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmarks saving and reopening a large analyzed corpus
+
+Builds a synthetic analyzed Reddit frame, writes it to a temporary corpus
+directory in several batches and compares the time and memory of reopening it
+for browsing (no long text columns, plus the results index and scatter sample
+the app builds) with the in-memory object frame. The posts span more
+subreddits than the scatter plot has colors, as a long-running corpus does.
+
+Usage:
+    python benchmarks/bench_corpus_store.py --items 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_GENRES = ["Thriller", "Horror", "Drama", "Comedy", "Sci-Fi", "Romance", "Mystery", "Fantasy"]
+_FORMATS = ["Movie", "TV Series", "Novel", "Short Story"]
+_SUBREDDITS = ["nosleep", "LetsNotMeet", "tifu", "relationships", "WritingPrompts", "shortscarystories"] + [
+    f"stories{i}" for i in range(24)]
+
+
+def make_frame(count, start=0, seed=0):
+    """Builds an analyzed Reddit frame shaped like posts_df"""
+    rng = random.Random(seed)
+    ids = range(start, start + count)
+    return pd.DataFrame({
+        "id": [f"p{i}" for i in ids],
+        "title": [f"Post {i} about {rng.choice(['a door', 'the lake', 'my boss', 'a ghost'])}" for i in ids],
+        "selftext": [" ".join(rng.choice(["the", "night", "door", "lake", "I", "saw"]) for _ in range(200))
+                     for _ in ids],
+        "score": [rng.randint(100, 50000) for _ in ids],
+        "num_comments": [rng.randint(10, 5000) for _ in ids],
+        "subreddit": [rng.choice(_SUBREDDITS) for _ in ids],
+        "permalink": [f"/r/nosleep/comments/p{i}/" for i in ids],
+        "adaptation_score": [round(rng.uniform(1, 10), 1) for _ in ids],
+        "justification": ["Strong hook and a clear antagonist." for _ in ids],
+        "recommended_genres": [rng.sample(_GENRES, 3) for _ in ids],
+        "recommended_adaptation_type": [rng.choice(_FORMATS) for _ in ids],
+        "key_elements": [[f"element {rng.randint(0, 1000)}" for _ in range(4)] for _ in ids],
+        "similar_works": [["Work A", "Work B", "Work C"] for _ in ids],
+        "target_audience": ["Young adults who enjoy horror" for _ in ids],
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Parquet corpus store")
+    parser.add_argument("--items", type=int, default=200000, help="Number of analyzed items")
+    parser.add_argument("--batches", type=int, default=4, help="Number of analysis runs the items are saved in")
+    args = parser.parse_args()
+
+    os.environ["IP_PITCH_DATA_DIR"] = tempfile.mkdtemp(prefix="corpus_bench_")
+    import corpus_store
+    from results_index import MAX_SCATTER_COLORS, ResultsIndex
+
+    batch = args.items // args.batches
+    frames = [make_frame(batch, start=i * batch, seed=i) for i in range(args.batches)]
+    object_bytes = sum(frame.memory_usage(deep=True).sum() for frame in frames)
+    start = time.perf_counter()
+    for frame in frames:
+        corpus_store.save_corpus(frame, "reddit")
+    print(f"Save: {time.perf_counter() - start:.1f} s for {batch * args.batches:,} items "
+          f"({sum(os.path.getsize(p) for p in corpus_store._corpus_files('reddit')) / 1e6:.0f} MB on disk)")
+
+    start = time.perf_counter()
+    browse = corpus_store.load_corpus("reddit", include_text=False)
+    print(f"Open for browsing: {time.perf_counter() - start:.2f} s, "
+          f"{browse.memory_usage(deep=True).sum() / len(browse):.0f} bytes/row "
+          f"(object frames in session state: {object_bytes / (batch * args.batches):.0f} bytes/row)")
+
+    start = time.perf_counter()
+    index = ResultsIndex(browse, "reddit")
+    print(f"Results index: {time.perf_counter() - start:.2f} s")
+
+    start = time.perf_counter()
+    sample, _ = index.scatter_sample("subreddit")
+    colors = sample["subreddit"].nunique()
+    print(f"Scatter sample: {time.perf_counter() - start:.2f} s, {colors} colors "
+          f"for {browse['subreddit'].nunique()} subreddits")
+    if browse["subreddit"].nunique() > MAX_SCATTER_COLORS and (
+            colors != MAX_SCATTER_COLORS + 1 or "Other" not in set(sample["subreddit"])):
+        raise SystemExit("Scatter sample did not group the rare subreddits under 'Other'")
+
+    start = time.perf_counter()
+    corpus_store.get_corpus_item("reddit", f"p{batch // 2}")
+    print(f"Detail lookup by id: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of the scrape -> score -> generate -> export pipeline
+
+Runs the app's own functions against the local stand-ins in
+benchmarks/standins.py (simulated OpenAI, Reddit and Wattpad services with a
+fixed latency), in a temporary data directory, and reports throughput and
+latency percentiles per stage as JSON:
+
+    reddit_fetch     fetch_reddit_posts per subreddit (listing, filtering, text cleaning)
+    wattpad_fetch    fetch_wattpad_stories per category (listing and story detail pages)
+    wattpad_sweep    sweep_wattpad_stories over all categories at once (the crawler)
+    wattpad_parse    listing card and story page parsing alone, without service latency
+    batch_scoring    evaluate_adaptation_potential_batch at several thread pool sizes
+    async_scoring    evaluate_adaptation_potential_batch_async with hundreds of requests
+                     in flight on the shared event loop
+    pitch_package    every Develop and Export material for one story, one step at a
+                     time and with independent steps run concurrently
+    pdf_export       generate_pitch_pdf with a full package and a poster image
+
+Compare the JSON of two runs to spot regressions in concurrency, caching or
+parsing; use --latency-scale 0 to measure local work alone.
+
+Usage:
+    python benchmarks/bench_pipeline.py --output pipeline.json
+    python benchmarks/bench_pipeline.py --concurrency 1 8 32 --latency-scale 0.5
+    python benchmarks/bench_pipeline.py --async-items 1000 --async-in-flight 500
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import standins
+
+API_KEY = "sk-standin-000000000000000000000000"
+_SUBREDDITS = ["nosleep", "LetsNotMeet", "tifu", "relationships", "WritingPrompts", "shortscarystories"]
+_CATEGORIES = ["horror", "mystery-thriller", "fantasy", "romance", "science-fiction", "paranormal"]
+
+
+@contextlib.contextmanager
+def _quiet(verbose):
+    """Keeps the pipeline's progress prints off stdout, which carries the JSON report"""
+    if verbose:
+        with contextlib.redirect_stdout(sys.stderr):
+            yield
+    else:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            yield
+
+
+def _latency_summary(latencies_ms):
+    from llm_metrics import percentile
+    return {"p50": round(percentile(latencies_ms, 50), 1), "p95": round(percentile(latencies_ms, 95), 1),
+            "max": round(max(latencies_ms), 1)} if latencies_ms else None
+
+
+def _stage(items, seconds, latencies_ms, counter):
+    return {
+        "items": items,
+        "seconds": round(seconds, 3),
+        "items_per_s": round(items / seconds, 1) if seconds else None,
+        "latency_ms": _latency_summary(latencies_ms),
+        "service_calls": dict(counter.calls),
+        "max_in_flight": counter.max_in_flight,
+    }
+
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def bench_reddit(counter, subreddits, limit):
+    from reddit_scraper import fetch_reddit_posts
+    counter.reset()
+    latencies, posts = [], []
+    start = time.perf_counter()
+    for subreddit in subreddits:
+        result, ms = _timed(fetch_reddit_posts, subreddit, "week", limit, "standin-id", "standin-secret", None)
+        if isinstance(result, str):
+            raise RuntimeError(result)
+        latencies.append(ms)
+        posts.extend(result)
+    return _stage(len(posts), time.perf_counter() - start, latencies, counter), posts
+
+
+def bench_wattpad(counter, categories, limit):
+    from wattpad_scraper import fetch_wattpad_stories
+    counter.reset()
+    latencies, stories = [], []
+    start = time.perf_counter()
+    for category in categories:
+        result, ms = _timed(fetch_wattpad_stories, category=category, limit=limit)
+        if isinstance(result, str):
+            raise RuntimeError(result)
+        latencies.append(ms)
+        stories.extend(result)
+    return _stage(len(stories), time.perf_counter() - start, latencies, counter), stories
+
+
+def bench_wattpad_sweep(counter, categories, limit):
+    from wattpad_crawler import sweep_wattpad_stories
+    counter.reset()
+    result, ms = _timed(sweep_wattpad_stories, categories=categories, limit=limit, min_reads=100, resume=False)
+    if isinstance(result, str):
+        raise RuntimeError(result)
+    return _stage(len(result), ms / 1000, [ms], counter)
+
+
+def bench_wattpad_parse(counter, stories):
+    from bs4 import BeautifulSoup
+    from wattpad_scraper import WATTPAD_HEADERS, find_story_elements, get_story_details, parse_story_element
+    counter.reset()
+    fetch = standins.make_get(standins.Latency(scale=0), counter)
+    latencies = []
+    start = time.perf_counter()
+    for page in range(1, 4):
+        html, ms = _timed(standins.listing_html, "horror", page)
+        cards, ms = _timed(lambda: [parse_story_element(element)
+                                    for element in find_story_elements(BeautifulSoup(html, "html.parser"))])
+        latencies.append(ms / max(1, len(cards)))
+    for i in range(stories):
+        _, ms = _timed(get_story_details, f"https://www.wattpad.com/story/{1000 + i}-parse", WATTPAD_HEADERS, fetch)
+        latencies.append(ms)
+    return _stage(len(latencies), time.perf_counter() - start, latencies, counter)
+
+
+def bench_scoring(counter, posts, levels):
+    import request_scheduler
+    from content_analyzer import evaluate_adaptation_potential_batch
+    results = []
+    for level, max_workers in enumerate(levels):
+        # Fresh scheduler per level, so the adaptive limit starts from its configured value each time
+        request_scheduler._scheduler = None
+        # Distinct titles per level, so identical requests are not coalesced across levels
+        items = [{"title": f"{post['title']} [{level}]", "content": post["selftext"], "score": post["score"],
+                  "num_comments": post["num_comments"]} for post in posts]
+        counter.reset()
+        start = time.perf_counter()
+        analyses = evaluate_adaptation_potential_batch(items, API_KEY, max_workers=max_workers)
+        seconds = time.perf_counter() - start
+        results.append(dict(_stage(len(items), seconds, [], counter), max_workers=max_workers,
+                            errors=sum(1 for analysis in analyses if analysis.get("error")),
+                            concurrency_limit=request_scheduler.get_scheduler().concurrency_limit))
+    return {"levels": results}
+
+
+def bench_async_scoring(counter, posts, in_flight):
+    import request_scheduler
+    from async_runner import run_async
+    from content_analyzer import evaluate_adaptation_potential_batch_async
+    # Fixed limit, so the run measures the event loop at that many requests in flight rather than the ramp-up
+    request_scheduler._scheduler = request_scheduler.RequestScheduler(initial_concurrency=in_flight,
+                                                                      max_concurrency=in_flight)
+    items = [{"title": f"{post['title']} [async {i}]", "content": post["selftext"], "score": post["score"],
+              "num_comments": post["num_comments"]} for i, post in enumerate(posts)]
+    counter.reset()
+    start = time.perf_counter()
+    analyses = run_async(evaluate_adaptation_potential_batch_async(items, API_KEY))
+    seconds = time.perf_counter() - start
+    request_scheduler._scheduler = None
+    return dict(_stage(len(items), seconds, [], counter), in_flight_limit=in_flight,
+                errors=sum(1 for analysis in analyses if analysis.get("error")),
+                threads=threading.active_count())
+
+
+def _package_steps(post):
+    """Generation steps of a full pitch package as (name, dependencies, function of earlier results)"""
+    import content_generator as cg
+    import openai
+    from llm_client import chat_completion, generate_image
+    from model_cascade import get_premium_model
+
+    title, text, fmt, genre = post["title"], post["selftext"], "Movie", "Horror"
+    return [
+        ("plot_summary", [], lambda r: cg.generate_plot_summary(title, text, fmt, genre, API_KEY)),
+        ("pitch_deck", [], lambda r: cg.generate_pitch_deck(title, text, fmt, "Young adults", ["A lake"], [genre], API_KEY)),
+        ("character_profiles", [], lambda r: cg.generate_character_profiles(title, text, fmt, API_KEY)),
+        ("plot_synopsis", [], lambda r: cg.generate_plot_synopsis(title, text, fmt, API_KEY)),
+        ("audience_analysis", [], lambda r: cg.generate_audience_analysis(title, text, fmt, "Young adults", API_KEY)),
+        ("market_analysis", [], lambda r: chat_completion(
+            openai.OpenAI(api_key=API_KEY), feature="market_analysis", model=get_premium_model(),
+            messages=[{"role": "user", "content": f"Market analysis for {title} as a {fmt}"}],
+            temperature=0.7, max_tokens=1500).choices[0].message.content),
+        ("poster_concept", ["plot_summary"], lambda r: cg.generate_poster_concept(
+            title, r["plot_summary"], fmt, genre, "Dark", API_KEY)),
+        ("poster_image", ["poster_concept"], lambda r: generate_image(
+            openai.OpenAI(api_key=API_KEY), feature="poster_image", model="dall-e-3",
+            prompt=f"Poster for {title}: {r['poster_concept'][:500]}", size="1024x1792", quality="hd", n=1).data[0].url),
+        ("teaser_trailer_script", ["pitch_deck"], lambda r: cg.generate_teaser_trailer_script(
+            title, text, fmt, r["pitch_deck"]["visual_style"], genre, API_KEY)),
+        ("alternate_endings", ["plot_synopsis"], lambda r: cg.generate_alternate_endings(
+            title, text, r["plot_synopsis"], fmt, API_KEY)),
+        ("cast_suggestions", ["character_profiles"], lambda r: cg.generate_cast_suggestions(
+            r["character_profiles"], fmt, genre, API_KEY)),
+    ]
+
+
+def _run_package(post, parallel):
+    """Generates every material for a post; returns (results, per-step ms)"""
+    steps = _package_steps(post)
+    results, step_ms = {}, {}
+    if not parallel:
+        for name, _, fn in steps:
+            results[name], step_ms[name] = _timed(fn, results)
+        return results, step_ms
+    # Steps run as soon as everything they depend on is done
+    pending = list(steps)
+    with ThreadPoolExecutor(max_workers=len(steps)) as executor:
+        while pending:
+            ready = [step for step in pending if all(dep in results for dep in step[1])]
+            futures = {name: executor.submit(_timed, fn, dict(results)) for name, _, fn in ready}
+            for name, future in futures.items():
+                results[name], step_ms[name] = future.result()
+            pending = [step for step in pending if step[0] not in results]
+    return results, step_ms
+
+
+def bench_packages(counter, posts, parallel):
+    import request_scheduler
+    request_scheduler._scheduler = None
+    counter.reset()
+    latencies, steps, package = [], {}, None
+    start = time.perf_counter()
+    for i, post in enumerate(posts):
+        post = dict(post, title=f"{post['title']} [{'parallel' if parallel else 'sequential'} {i}]")
+        (package, step_ms), ms = _timed(_run_package, post, parallel)
+        latencies.append(ms)
+        for name, value in step_ms.items():
+            steps.setdefault(name, []).append(value)
+    stage = _stage(len(posts), time.perf_counter() - start, latencies, counter)
+    stage["steps_ms_p50"] = {name: _latency_summary(values)["p50"] for name, values in steps.items()}
+    return stage, package
+
+
+def bench_pdf(counter, package, title, runs, directory):
+    from pitch_exporter import generate_pitch_pdf
+    cast_text = "\n".join(f"{s['character']}: {s['primary_suggestion']['name']}"
+                          for s in package["cast_suggestions"]["suggestions"])
+    counter.reset()
+    latencies, size = [], 0
+    start = time.perf_counter()
+    for i in range(runs):
+        path = os.path.join(directory, f"pitch_{i}.pdf")
+        _, ms = _timed(generate_pitch_pdf, title=title, adaptation_type="Movie",
+                       pitch_content=package["pitch_deck"], plot_synopsis=package["plot_synopsis"],
+                       character_profiles=package["character_profiles"], poster_image_url=package["poster_image"],
+                       teaser_script=package["teaser_trailer_script"], market_analysis=package["market_analysis"],
+                       cast_suggestions=cast_text, output_path=path)
+        latencies.append(ms)
+        size = os.path.getsize(path)
+    return dict(_stage(runs, time.perf_counter() - start, latencies, counter), pdf_bytes=size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline against local service stand-ins")
+    parser.add_argument("--subreddits", type=int, default=4, help="Number of subreddits fetched")
+    parser.add_argument("--posts", type=int, default=25, help="Posts requested per subreddit")
+    parser.add_argument("--categories", type=int, default=2, help="Number of Wattpad categories fetched")
+    parser.add_argument("--stories", type=int, default=5, help="Stories requested per Wattpad category")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32],
+                        help="Thread pool sizes for batch scoring")
+    parser.add_argument("--score-items", type=int, default=32, help="Posts scored at each concurrency level")
+    parser.add_argument("--async-items", type=int, default=512, help="Posts scored by the async batch")
+    parser.add_argument("--async-in-flight", type=int, default=256,
+                        help="Requests the async batch may have in flight at once")
+    parser.add_argument("--packages", type=int, default=2, help="Pitch packages generated per mode")
+    parser.add_argument("--pdfs", type=int, default=5, help="PDF exports timed")
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="Multiplier for the simulated service latencies (0 for local work alone)")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's progress output on stderr")
+    args = parser.parse_args()
+    output_path = os.path.abspath(args.output) if args.output else None
+
+    workdir = tempfile.mkdtemp(prefix="pipeline_bench_")
+    os.environ["IP_PITCH_DATA_DIR"] = os.path.join(workdir, "data")
+    # The Wattpad scraper writes a debug copy of each listing to the working directory
+    os.chdir(workdir)
+    latency = standins.Latency(scale=args.latency_scale)
+    counter = standins.install(latency)
+
+    report = {
+        "benchmark": "pipeline",
+        "settings": dict(vars(args), latency_ms={"chat": latency.chat_ms, "chat_per_token": latency.per_token_ms,
+                                                 "image": latency.image_ms, "reddit": latency.reddit_ms,
+                                                 "http": latency.http_ms}),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                        "cpus": os.cpu_count()},
+        "stages": {},
+    }
+    stages = report["stages"]
+    with _quiet(args.verbose):
+        stages["reddit_fetch"], posts = bench_reddit(counter, (_SUBREDDITS * 10)[:args.subreddits], args.posts)
+        stages["wattpad_fetch"], _ = bench_wattpad(counter, (_CATEGORIES * 10)[:args.categories], args.stories)
+        stages["wattpad_sweep"] = bench_wattpad_sweep(counter, (_CATEGORIES * 10)[:args.categories],
+                                                      args.categories * args.stories)
+        stages["wattpad_parse"] = bench_wattpad_parse(counter, args.stories * 4)
+        score_posts = (posts * (args.score_items // max(1, len(posts)) + 1))[:args.score_items]
+        stages["batch_scoring"] = bench_scoring(counter, score_posts, args.concurrency)
+        async_posts = (posts * (args.async_items // max(1, len(posts)) + 1))[:args.async_items]
+        stages["async_scoring"] = bench_async_scoring(counter, async_posts, args.async_in_flight)
+        stages["pitch_package"] = {}
+        stages["pitch_package"]["sequential"], _ = bench_packages(counter, posts[:args.packages], parallel=False)
+        stages["pitch_package"]["parallel"], package = bench_packages(counter, posts[:args.packages], parallel=True)
+        stages["pdf_export"] = bench_pdf(counter, package, posts[0]["title"], args.pdfs, workdir)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if output_path:
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmarks training and scoring throughput of the local pre-scorer
+
+Uses synthetic posts, so no recorded GPT scores or saved model are touched.
+
+Usage:
+    python benchmarks/bench_pre_scorer.py --train 2000 --posts 20000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pre_scorer import PreScorer
+
+_GOOD = ["haunted", "ghost", "revenge", "twist", "secret", "betrayal", "missing", "cabin"]
+_BAD = ["update", "edit", "thanks", "lol", "recipe", "homework", "karma", "repost"]
+_FILLER = ["the", "a", "of", "my", "was", "and", "then", "i", "he", "she", "it", "they", "night", "door"]
+
+
+def make_items(count, seed=0):
+    """Builds synthetic posts whose target score depends on their vocabulary"""
+    rng = random.Random(seed)
+    items = []
+    for i in range(count):
+        quality = rng.random()
+        words = [rng.choice(_GOOD if rng.random() < quality else _BAD) if rng.random() < 0.2 else rng.choice(_FILLER)
+                 for _ in range(rng.randint(50, 600))]
+        items.append({
+            "title": f"Post {i}",
+            "content": " ".join(words),
+            "score": rng.randint(1000, 50000),
+            "num_comments": rng.randint(100, 5000),
+            "source": "reddit",
+            "adaptation_score": 1 + 9 * quality,
+        })
+    return items
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the local pre-scorer")
+    parser.add_argument("--train", type=int, default=2000, help="Number of synthetic training examples")
+    parser.add_argument("--posts", type=int, default=20000, help="Number of synthetic posts to score")
+    args = parser.parse_args()
+
+    examples = make_items(args.train, seed=0)
+    start = time.perf_counter()
+    model = PreScorer.train(examples)
+    train_seconds = time.perf_counter() - start
+
+    items = make_items(args.posts, seed=1)
+    start = time.perf_counter()
+    scores, _ = model.predict(items)
+    score_seconds = time.perf_counter() - start
+
+    targets = [item["adaptation_score"] for item in items]
+    rmse = (sum((s - t) ** 2 for s, t in zip(scores, targets)) / len(items)) ** 0.5
+    print(f"trained on {args.train:,} examples in {train_seconds:.2f}s; "
+          f"scored {args.posts:,} posts at {args.posts / score_seconds:,.0f}/s (RMSE {rmse:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmarks the per-rerun work of the results explorer on a large synthetic corpus
+
+Builds a ResultsIndex once, then times what a rerun of the results section
+does: the top-10 chart rows, the scatter sample, facet counts, a filtered and
+sorted query (e.g. "Thriller + TV Series + score >= 8"), one page of display
+rows and an id lookup.
+
+Usage:
+    python benchmarks/bench_results_index.py --items 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from results_index import ResultsIndex
+
+_SUBREDDITS = ["nosleep", "LetsNotMeet", "tifu", "relationships", "WritingPrompts", "shortscarystories"]
+_GENRES = ["Thriller", "Horror", "Drama", "Comedy", "Sci-Fi", "Romance", "Mystery", "Fantasy"]
+_FORMATS = ["Movie", "TV Series", "Novel", "Short Story"]
+
+
+def make_frame(count, seed=0):
+    """Builds an analyzed Reddit frame with random engagement and scores"""
+    rng = random.Random(seed)
+    return pd.DataFrame({
+        "id": [f"p{i}" for i in range(count)],
+        "title": [f"Post {rng.randint(0, count)} about {rng.choice(['a door', 'the lake', 'my boss', 'a ghost'])}"
+                  for _ in range(count)],
+        "subreddit": [rng.choice(_SUBREDDITS) for _ in range(count)],
+        "score": [rng.randint(100, 50000) for _ in range(count)],
+        "num_comments": [rng.randint(10, 5000) for _ in range(count)],
+        "permalink": [f"/r/nosleep/comments/p{i}/" for i in range(count)],
+        "adaptation_score": [round(rng.uniform(1, 10), 1) if rng.random() > 0.05 else None for _ in range(count)],
+        "recommended_genres": [rng.sample(_GENRES, 3) for _ in range(count)],
+        "recommended_adaptation_type": [rng.choice(_FORMATS) for _ in range(count)],
+        "key_elements": [[f"element {rng.randint(0, count)}" for _ in range(4)] for _ in range(count)],
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the results explorer index")
+    parser.add_argument("--items", type=int, default=100000, help="Number of analyzed items")
+    parser.add_argument("--reruns", type=int, default=20, help="Number of simulated reruns")
+    args = parser.parse_args()
+
+    df = make_frame(args.items)
+    start = time.perf_counter()
+    index = ResultsIndex(df, "reddit")
+    index.scatter_sample("subreddit")
+    print(f"Index build: {(time.perf_counter() - start) * 1000:.0f} ms for {args.items:,} items")
+
+    timings = []
+    for rerun in range(args.reruns):
+        start = time.perf_counter()
+        index.top(10)
+        index.scatter_sample("subreddit")
+        for facet in ("genre", "adaptation_type", "key_element"):
+            index.facets.counts(facet, limit=100)
+        positions = index.query(sort_by=["adaptation_score", "score", "num_comments"][rerun % 3],
+                                min_score=8.0 if rerun % 2 else None,
+                                search="ghost" if rerun % 4 == 0 else None,
+                                facets={"genre": ["Thriller"], "adaptation_type": ["TV Series"]} if rerun % 2 else None)
+        page = index.page(positions, 1 + rerun % 5, 50)
+        index.get(page.index[0])
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    print(f"Rerun work: p50 {timings[len(timings) // 2]:.1f} ms, max {timings[-1]:.1f} ms "
+          f"over {args.reruns} reruns (first use of each sort order included)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmarks batch text normalization against the per-post clean_text functions
+
+Usage:
+    python benchmarks/bench_text_normalizer.py --posts 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reddit_scraper import clean_text as clean_reddit_text
+from text_normalizer import normalize_texts
+from wattpad_scraper import clean_text as clean_wattpad_text
+
+_WORDS = ["the", "night", "door", "my", "sister", "never", "told", "anyone", "about", "it", "was",
+          "there", "again", "&amp;", "&lt;3", "[link](https://example.com)", "\n\n", "  ", "update:", "TL;DR"]
+
+
+def make_posts(count, seed=0):
+    """Builds synthetic post bodies with Reddit formatting, mixed whitespace and a few very long posts"""
+    rng = random.Random(seed)
+    posts = []
+    for i in range(count):
+        length = 3000 if i % 50 == 0 else rng.randint(20, 400)
+        posts.append(" ".join(rng.choice(_WORDS) for _ in range(length)))
+    return posts
+
+
+def run(posts, source, clean_fn):
+    start = time.perf_counter()
+    expected = [clean_fn(text) for text in posts]
+    loop_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = normalize_texts(posts, source=source)
+    batch_seconds = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b in zip(expected, result["text"]) if a != b)
+    return {
+        "source": source,
+        "posts": len(posts),
+        "loop_posts_per_sec": len(posts) / loop_seconds,
+        "batch_posts_per_sec": len(posts) / batch_seconds,
+        "speedup": loop_seconds / batch_seconds,
+        "mismatches": mismatches,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batch text normalization")
+    parser.add_argument("--posts", type=int, default=100000, help="Number of synthetic posts")
+    args = parser.parse_args()
+
+    posts = make_posts(args.posts)
+    for source, clean_fn in (("reddit", clean_reddit_text), ("wattpad", clean_wattpad_text)):
+        stats = run(posts, source, clean_fn)
+        print(f"{stats['source']:8} {stats['posts']:,} posts: loop {stats['loop_posts_per_sec']:,.0f}/s, "
+              f"batch {stats['batch_posts_per_sec']:,.0f}/s ({stats['speedup']:.1f}x), "
+              f"{stats['mismatches']} mismatches")
+
+
+if __name__ == "__main__":
+    main()
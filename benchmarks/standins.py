@@ -0,0 +1,377 @@
+"""
+Local stand-ins for the OpenAI, Reddit and Wattpad services used by the benchmarks
+
+install() replaces openai.OpenAI, openai.AsyncOpenAI, praw.Reddit and
+requests.get for the whole process with deterministic, offline versions that sleep for a configurable
+latency, so benchmarks measure this app's own work (parsing, concurrency,
+caching, rendering) plus a known, stable service time.
+
+Chat completions answer any JSON request with one object holding the fields
+of every structured generator and the scoring response, and other requests
+with prose; images are small PNGs served by the requests.get stand-in.
+"""
+import asyncio
+import hashlib
+import json
+import re
+import struct
+import threading
+import time
+import zlib
+from types import SimpleNamespace
+
+from content_analyzer import RADAR_CATEGORIES
+
+STANDIN_IMAGE_URL = "https://images.standin.local/poster.png"
+
+_GENRES = ["Thriller", "Horror", "Drama", "Comedy", "Sci-Fi", "Romance", "Mystery", "Fantasy"]
+_WORDS = ["the", "night", "door", "lake", "house", "I", "saw", "never", "again", "my", "sister", "called",
+          "after", "midnight", "and", "nobody", "answered", "when", "we", "opened", "it"]
+
+
+class Latency:
+    """Simulated service times in milliseconds, scaled by one factor"""
+
+    def __init__(self, chat_ms=250, per_token_ms=0.2, image_ms=800, reddit_ms=150, http_ms=40, scale=1.0):
+        self.chat_ms = chat_ms
+        self.per_token_ms = per_token_ms
+        self.image_ms = image_ms
+        self.reddit_ms = reddit_ms
+        self.http_ms = http_ms
+        self.scale = scale
+
+    def sleep(self, ms):
+        if ms * self.scale > 0:
+            time.sleep(ms * self.scale / 1000)
+
+    async def sleep_async(self, ms):
+        if ms * self.scale > 0:
+            await asyncio.sleep(ms * self.scale / 1000)
+
+
+class CallCounter:
+    """Counts stand-in calls per service and the most that were in flight at once"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def __enter__(self):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        return self
+
+    def __exit__(self, *exc):
+        with self._lock:
+            self.in_flight -= 1
+
+    def count(self, service):
+        with self._lock:
+            self.calls[service] = self.calls.get(service, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self.calls = {}
+            self.max_in_flight = self.in_flight
+
+
+def _seed(*parts):
+    return int(hashlib.sha256(json.dumps(parts, default=str).encode("utf-8")).hexdigest()[:8], 16)
+
+
+def _sentence(seed, words=12):
+    return " ".join(_WORDS[(seed + i * 7) % len(_WORDS)] for i in range(words)).capitalize() + "."
+
+
+def _structured_response(seed):
+    """One JSON object with the fields of every structured response the app parses"""
+    def text(offset, words=16):
+        return _sentence(seed + offset, words)
+
+    characters = [{"name": f"Character {i + 1}", "role": ["Protagonist", "Antagonist", "Mentor"][i],
+                   "description": text(i), "arc": text(i + 10), "key_traits": ["brave", "curious", "stubborn"]}
+                  for i in range(3)]
+    return {
+        "score": round(1 + (seed % 90) / 10, 1),
+        "justification": text(1, 40),
+        "recommended_genres": [_GENRES[seed % len(_GENRES)], _GENRES[(seed // 7) % len(_GENRES)]],
+        "similar_works": ["Work A", "Work B", "Work C"],
+        "adaptation_type": ["Movie", "TV Series", "Novel"][seed % 3],
+        "key_elements": ["A haunted lake", "An unreliable narrator", "A ticking clock"],
+        "target_audience": "Young adults who enjoy horror",
+        "radar_scores": [40 + (seed // (i + 1)) % 60 for i in range(len(RADAR_CATEGORIES))],
+        "high_concept": text(2),
+        "logline": text(3, 24),
+        "unique_selling_points": [text(4), text(5), text(6)],
+        "visual_style": text(7),
+        "comp_titles": ["Title A meets Title B", "Title C"],
+        "franchise_potential": text(8),
+        "characters": characters,
+        "short_synopsis": text(9, 40),
+        "detailed_synopsis": " ".join(text(20 + i, 30) for i in range(10)),
+        "act_structure": [text(30 + i, 30) for i in range(3)],
+        "primary_audience": text(11),
+        "demographics": [text(12), text(13)],
+        "psychographics": [text(14), text(15)],
+        "marketing_strategies": [text(16), text(17), text(18)],
+        "duration": "90 seconds",
+        "voiceover": text(19, 30),
+        "scenes": [text(40 + i) for i in range(6)],
+        "music_suggestion": text(21),
+        "sound_effects": text(22),
+        "title_treatment": text(23),
+        "alternate_endings": [{"title": f"Ending {i + 1}", "description": text(50 + i, 40),
+                               "implications": text(60 + i)} for i in range(2)],
+        "suggestions": [{"character": character["name"],
+                         "primary_suggestion": {"name": f"Actor {i + 1}", "rationale": text(70 + i)},
+                         "alternatives": [{"name": f"Actor {i + 10}", "rationale": text(80 + i)}]}
+                        for i, character in enumerate(characters)],
+    }
+
+
+def _prose_response(seed, max_tokens):
+    """Prose with chapter headings, long enough to fill most of max_tokens"""
+    paragraphs = [f"Chapter {i + 1}: {_sentence(seed + i, 6)}\n{_sentence(seed + i, 40)}" for i in range(5)]
+    text = "\n\n".join(paragraphs)
+    while len(text) // 4 < min(max_tokens or 800, 1500) * 0.6:
+        text += "\n\n" + _sentence(seed + len(text), 40)
+    return text
+
+
+def _chat_completion(kwargs):
+    from openai.types.chat import ChatCompletion
+    prompt = json.dumps(kwargs.get("messages", []), default=str)
+    seed = _seed(prompt, kwargs.get("model"))
+    if (kwargs.get("response_format") or {}).get("type") == "json_object":
+        content = json.dumps(_structured_response(seed))
+    else:
+        content = _prose_response(seed, kwargs.get("max_tokens"))
+    completion_tokens = len(content) // 4
+    return ChatCompletion.model_validate({
+        "id": f"standin-{seed}", "object": "chat.completion", "created": int(time.time()),
+        "model": kwargs.get("model") or "gpt-4o",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": completion_tokens,
+                  "total_tokens": len(prompt) // 4 + completion_tokens},
+    }), completion_tokens
+
+
+class _RawResponse:
+    def __init__(self, parsed, processing_ms):
+        self._parsed = parsed
+        self.headers = {"openai-processing-ms": str(int(processing_ms))}
+
+    def parse(self):
+        return self._parsed
+
+
+class _Endpoint:
+    def __init__(self, owner, raw=False):
+        self._owner = owner
+        self._raw = raw
+
+    @property
+    def with_raw_response(self):
+        return type(self)(self._owner, raw=True)
+
+    def create(self, **kwargs):
+        latency, counter = self._owner.latency, self._owner.counter
+        counter.count("openai_chat")
+        with counter:
+            parsed, tokens = _chat_completion(kwargs)
+            service_ms = latency.chat_ms + latency.per_token_ms * tokens
+            latency.sleep(service_ms)
+        return _RawResponse(parsed, service_ms) if self._raw else parsed
+
+    def generate(self, **kwargs):
+        latency, counter = self._owner.latency, self._owner.counter
+        counter.count("openai_image")
+        with counter:
+            latency.sleep(latency.image_ms)
+        return self._image_response(kwargs)
+
+    def _image_response(self, kwargs):
+        from openai.types import ImagesResponse
+        parsed = ImagesResponse.model_validate({"created": int(time.time()),
+                                                "data": [{"url": STANDIN_IMAGE_URL}] * kwargs.get("n", 1)})
+        return _RawResponse(parsed, self._owner.latency.image_ms) if self._raw else parsed
+
+
+class _AsyncEndpoint(_Endpoint):
+    async def create(self, **kwargs):
+        latency, counter = self._owner.latency, self._owner.counter
+        counter.count("openai_chat")
+        with counter:
+            parsed, tokens = _chat_completion(kwargs)
+            service_ms = latency.chat_ms + latency.per_token_ms * tokens
+            await latency.sleep_async(service_ms)
+        return _RawResponse(parsed, service_ms) if self._raw else parsed
+
+    async def generate(self, **kwargs):
+        latency, counter = self._owner.latency, self._owner.counter
+        counter.count("openai_image")
+        with counter:
+            await latency.sleep_async(latency.image_ms)
+        return self._image_response(kwargs)
+
+
+class StandInOpenAI:
+    """openai.OpenAI stand-in covering the calls made through llm_client"""
+
+    _endpoint = _Endpoint
+
+    def __init__(self, latency, counter, **client_kwargs):
+        self.latency = latency
+        self.counter = counter
+        self.chat = SimpleNamespace(completions=self._endpoint(self))
+        self.images = self._endpoint(self)
+
+    def with_options(self, **options):
+        return self
+
+
+class StandInAsyncOpenAI(StandInOpenAI):
+    """openai.AsyncOpenAI stand-in; waits without blocking the event loop"""
+
+    _endpoint = _AsyncEndpoint
+
+
+class _Subreddit:
+    def __init__(self, name, latency, counter):
+        self._name = name
+        self._latency = latency
+        self._counter = counter
+
+    def _listing(self, method, limit=100, **kwargs):
+        self._counter.count("reddit")
+        with self._counter:
+            self._latency.sleep(self._latency.reddit_ms)
+        for i in range(limit or 100):
+            seed = _seed(self._name, method, i)
+            # Every tenth post is a link post and every seventh was removed, as in real listings
+            selftext = "[removed]" if i % 7 == 6 else " ".join(
+                _sentence(seed + j, 20) for j in range(10 + seed % 30))
+            yield SimpleNamespace(
+                id=f"{self._name[:3]}{i}", title=f"{_sentence(seed, 8)[:-1]} ({self._name} #{i})",
+                selftext=selftext, score=200 + seed % 40000, num_comments=20 + seed % 3000,
+                created_utc=1.7e9 - i * 3600, permalink=f"/r/{self._name}/comments/{self._name[:3]}{i}/",
+                url=f"https://www.reddit.com/r/{self._name}/comments/{self._name[:3]}{i}/",
+                is_self=i % 10 != 9, over_18=False)
+
+    def top(self, **kwargs):
+        return self._listing("top", **kwargs)
+
+    def hot(self, **kwargs):
+        return self._listing("hot", **kwargs)
+
+
+class StandInReddit:
+    """praw.Reddit stand-in whose listings yield synthetic text posts"""
+
+    def __init__(self, latency, counter, **reddit_kwargs):
+        self._latency = latency
+        self._counter = counter
+
+    def subreddit(self, name):
+        return _Subreddit(name, self._latency, self._counter)
+
+
+def listing_html(category, page=1, per_page=40):
+    """Wattpad listing page with per_page story cards"""
+    cards = []
+    for i in range((page - 1) * per_page, page * per_page):
+        story_id = _seed(category, i) % 10 ** 8
+        cards.append(
+            f'<li><a class="title" href="/story/{story_id}-{category}-{i}">{category.title()} story {i}</a>'
+            f'<a class="username" href="/user/a{i}">author{i}</a> '
+            f'<span class="reads">{10 + story_id % 900}.5K reads</span> <span class="votes">{2 + story_id % 90}K votes</span> '
+            f'<span class="parts">{5 + story_id % 40} parts</span>'
+            f'<p class="description">{_sentence(story_id, 30)}</p>'
+            f'<div class="tag-items"><a>{category}</a><a>{_GENRES[story_id % len(_GENRES)].lower()}</a></div></li>')
+    return f'<html><body><ul class="story-list">{"".join(cards)}</ul></body></html>'
+
+
+def story_html(story_id):
+    """Wattpad story page with stats, tags, related stories and a first-part link"""
+    related = "".join(f'<a href="/story/{(story_id + j) % 10 ** 8}-related">Related</a>' for j in range(1, 4))
+    return (f'<html><head><meta property="og:title" content="Story {story_id}"></head><body>'
+            f'<a class="username" href="/user/x">author{story_id % 97}</a>'
+            f'<pre class="description">{" ".join(_sentence(story_id + j, 25) for j in range(6))}</pre>'
+            f'<div class="tag-items"><a>horror</a><a>mystery</a><a>ghost</a></div>'
+            f'<div class="stats-value">{story_id % 900}.1K Reads</div><div class="stats-value">{story_id % 90}K Votes</div>'
+            f'<div class="stats-value">{5 + story_id % 40} Parts</div><span class="story-status">Completed</span>'
+            f'{related}<a href="/page/{story_id}1">Part 1</a></body></html>')
+
+
+def part_html(seed):
+    """Wattpad story part with a few paragraphs"""
+    return "<html><body>" + "".join(f'<p class="paragraph">{_sentence(seed + j, 40)}</p>' for j in range(8)) + "</body></html>"
+
+
+def _png(width=64, height=96):
+    """A small solid-color PNG"""
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+    rows = b"".join(b"\x00" + b"\x30\x20\x60" * width for _ in range(height))
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(rows)) + chunk(b"IEND", b""))
+
+
+_PNG = _png()
+
+
+def make_get(latency, counter):
+    """Returns a requests.get stand-in serving Wattpad pages and stand-in images"""
+    import requests
+
+    def get(url, params=None, **kwargs):
+        counter.count("http")
+        with counter:
+            latency.sleep(latency.http_ms)
+        response = requests.Response()
+        response.url = url
+        response.status_code = 200
+        response.encoding = "utf-8"
+        listing = re.search(r"/stories/([\w-]+)(?:\?.*?page=(\d+))?", url)
+        story = re.search(r"/story/(\d+)", url)
+        if url == STANDIN_IMAGE_URL:
+            response.headers["Content-Type"] = "image/png"
+            response._content = _PNG
+        elif listing:
+            response._content = listing_html(listing.group(1), int(listing.group(2) or 1)).encode("utf-8")
+        elif story:
+            response._content = story_html(int(story.group(1))).encode("utf-8")
+        elif "/page/" in url:
+            response._content = part_html(_seed(url)).encode("utf-8")
+        else:
+            response.status_code = 404
+            response._content = b""
+        return response
+
+    return get
+
+
+def install(latency=None):
+    """
+    Replaces openai.OpenAI, openai.AsyncOpenAI, praw.Reddit and requests.get with the stand-ins
+
+    Args:
+        latency (Latency): Simulated service times (defaults if None)
+
+    Returns:
+        CallCounter: Counts of the calls answered by the stand-ins
+    """
+    import openai
+    import praw
+    import requests
+
+    latency = latency or Latency()
+    counter = CallCounter()
+    openai.OpenAI = lambda *args, **kwargs: StandInOpenAI(latency, counter, **kwargs)
+    openai.AsyncOpenAI = lambda *args, **kwargs: StandInAsyncOpenAI(latency, counter, **kwargs)
+    praw.Reddit = lambda *args, **kwargs: StandInReddit(latency, counter, **kwargs)
+    requests.get = make_get(latency, counter)
+    return counter
@@ -0,0 +1,414 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import openai
+
+from async_runner import gather_with_deadline
+from llm_client import chat_completion, chat_completion_async, get_async_client
+from model_cascade import get_premium_model
+from prompt_layout import build_messages
+from utils import get_data_dir
+
+DEFAULT_TOTAL_CHAPTERS = 12
+
+# Chapter-writing instructions, identical for every chapter of every book
+CHAPTER_INSTRUCTIONS = """Write the requested chapter of the novel described by the user.
+
+Guidelines:
+1. Write in a polished, literary style appropriate for the novel's genre
+2. Include rich descriptions, realistic dialogue, and character development
+3. Stay consistent with the story so far and follow the chapter plan
+4. End the chapter with an appropriate hook for this story position
+5. Chapter length should be 1000-1500 words
+
+Format your response as a well-structured novel chapter with a chapter title.
+After the chapter, on a new line, write "CHAPTER SUMMARY:" followed by 2-3 sentences
+summarizing what happened, for continuity with the other chapters."""
+
+_NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13,
+    "fourteen": 14, "fifteen": 15, "sixteen": 16, "seventeen": 17, "eighteen": 18,
+    "nineteen": 19, "twenty": 20,
+}
+
+_CHAPTER_HEADING = re.compile(
+    r'^[\s#*_>\-]*chapter\s+(\d+|' + '|'.join(_NUMBER_WORDS) + r')\b[\s*_]*[:.\-–—]?\s*(.*)$',
+    re.IGNORECASE
+)
+
+_SUMMARY_MARKER = re.compile(r'\n\s*[*_#]*\s*CHAPTER SUMMARY\s*[*_]*\s*:\s*[*_]*', re.IGNORECASE)
+
+
+def parse_outline_chapters(story_outline):
+    """
+    Parses a generated story outline into chapter specs
+
+    Args:
+        story_outline (str): Outline with chapter markers such as "Chapter 3: Title"
+
+    Returns:
+        list: Dicts with number, title and brief keys, ordered by chapter number
+              (empty if the outline has no recognizable chapter markers)
+    """
+    chapters = {}
+    current = None
+    for line in (story_outline or "").splitlines():
+        match = _CHAPTER_HEADING.match(line)
+        if match:
+            number = match.group(1).lower()
+            number = int(number) if number.isdigit() else _NUMBER_WORDS[number]
+            current = None
+            if number not in chapters:
+                current = {"number": number, "title": match.group(2).strip(" *_#:-"), "lines": []}
+                chapters[number] = current
+        elif current is not None and line.strip():
+            current["lines"].append(line.strip(" *_#-•\t"))
+
+    specs = []
+    for number in sorted(chapters):
+        chapter = chapters[number]
+        brief = re.sub(r'\s+', ' ', " ".join(chapter["lines"])).strip()
+        specs.append({"number": number, "title": chapter["title"], "brief": brief[:600]})
+    return specs
+
+
+def get_story_position(chapter_num, total_chapters):
+    """Returns where a chapter sits in the story arc (beginning, early, middle, late or conclusion)"""
+    if chapter_num == 1:
+        return "beginning"
+    if chapter_num >= total_chapters:
+        return "conclusion"
+    if chapter_num < total_chapters / 3:
+        return "early"
+    if chapter_num < (total_chapters * 2) / 3:
+        return "middle"
+    return "late"
+
+
+def split_chapter_summary(text):
+    """
+    Splits the continuity summary the model appends to a chapter
+
+    Args:
+        text (str): Model response containing the chapter and a "CHAPTER SUMMARY:" line
+
+    Returns:
+        tuple: (chapter, summary); the summary falls back to the chapter's opening if missing
+    """
+    matches = list(_SUMMARY_MARKER.finditer(text or ""))
+    if matches:
+        last = matches[-1]
+        return text[:last.start()].rstrip(), re.sub(r'\s+', ' ', text[last.end():]).strip()
+    return (text or "").strip(), re.sub(r'\s+', ' ', (text or "")[:400]).strip()
+
+
+class BookStore:
+    """
+    Saves generated chapters on disk so partially generated books can be resumed
+
+    Each book is a JSON file keyed by a hash of its title, outline, genre and POV
+    character. Chapters are written as soon as they finish.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or get_data_dir("books")
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def book_id(title, story_outline, genre, pov_character):
+        """Returns a stable identifier for a book"""
+        payload = json.dumps([title, story_outline, genre, pov_character or ""])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+    def _path(self, book_id):
+        return os.path.join(self.directory, f"{book_id}.json")
+
+    def load(self, book_id):
+        """
+        Loads the saved chapters of a book
+
+        Returns:
+            dict: Mapping of chapter number to dict with content and summary keys
+        """
+        with self._lock:
+            try:
+                with open(self._path(book_id), "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                return {}
+        return {int(number): chapter for number, chapter in data.get("chapters", {}).items()}
+
+    def save_chapter(self, book_id, title, chapter_num, content, summary):
+        """Adds or replaces a chapter of a book"""
+        with self._lock:
+            path = self._path(book_id)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {"title": title, "chapters": {}}
+            data["chapters"][str(chapter_num)] = {"content": content, "summary": summary}
+            temp_path = f"{path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(temp_path, path)
+
+    def delete(self, book_id):
+        """Removes all saved chapters of a book"""
+        with self._lock:
+            try:
+                os.remove(self._path(book_id))
+            except OSError:
+                pass
+
+
+def _build_shared_context(title, plot_summary, specs, genre, pov_character):
+    """Builds the compact book context sent with every chapter request"""
+    chapter_list = "\n".join(
+        f"{spec['number']}. {spec['title'] or 'Untitled'}" for spec in specs
+    )
+    pov_info = f"The book is written from {pov_character}'s point of view." if pov_character else ""
+    return f"""BOOK: "{title}", a {genre} novel in {len(specs)} chapters. {pov_info}
+
+PLOT SUMMARY: {(plot_summary or "")[:1200]}
+
+CHAPTERS:
+{chapter_list}"""
+
+
+def _build_story_so_far(spec, specs, summaries):
+    """Describes the preceding chapters, using summaries of chapters already written"""
+    lines = []
+    for previous in specs:
+        if previous["number"] >= spec["number"]:
+            break
+        if previous["number"] in summaries:
+            lines.append(f"Chapter {previous['number']} (written): {summaries[previous['number']]}")
+        else:
+            lines.append(f"Chapter {previous['number']} (planned): {previous['brief'][:200]}")
+    return "\n".join(lines) if lines else "This is the first chapter."
+
+
+def _chapter_request(shared_context, spec, specs, summaries):
+    """Builds the chat completion arguments of one chapter"""
+    total_chapters = len(specs)
+    position = get_story_position(spec["number"], total_chapters)
+    story_so_far = _build_story_so_far(spec, specs, summaries)
+    next_specs = [s for s in specs if s["number"] > spec["number"]]
+    next_info = (f"NEXT CHAPTER (for the closing hook): {next_specs[0]['title']}. {next_specs[0]['brief'][:200]}"
+                 if next_specs else "This is the final chapter; resolve the story.")
+
+    # The shared context is identical for every chapter of the book, so it follows the
+    # instructions directly and the two form a prefix the API can cache across chapters
+    payload = f"""{shared_context}
+
+STORY SO FAR:
+{story_so_far}
+
+Write Chapter {spec['number']}: {spec['title'] or 'Untitled'}
+CHAPTER PLAN: {spec['brief'] or 'Continue the story according to the plot summary.'}
+{next_info}
+
+This is the {position} part of the story."""
+
+    # Premium tier model (gpt-4o unless PREMIUM_MODEL is set)
+    return dict(
+        feature="book_chapter",
+        model=get_premium_model(),
+        messages=build_messages(CHAPTER_INSTRUCTIONS, payload),
+        temperature=0.8,
+        max_tokens=2300
+    )
+
+
+def _generate_chapter(client, shared_context, spec, specs, summaries):
+    """Generates one chapter of a book and returns (chapter, summary)"""
+    response = chat_completion(client, **_chapter_request(shared_context, spec, specs, summaries))
+    return split_chapter_summary(response.choices[0].message.content)
+
+
+async def _generate_chapter_async(client, shared_context, spec, specs, summaries):
+    """Async counterpart of _generate_chapter"""
+    response = await chat_completion_async(client, **_chapter_request(shared_context, spec, specs, summaries))
+    return split_chapter_summary(response.choices[0].message.content)
+
+
+def _resume_book(title, story_outline, genre, pov_character, store, progress_callback):
+    """Loads the chapters of a book saved so far, returning (book_id, specs, result, summaries, pending)"""
+    book_id = BookStore.book_id(title, story_outline, genre, pov_character)
+    specs = parse_outline_chapters(story_outline) or [
+        {"number": number, "title": "", "brief": ""} for number in range(1, DEFAULT_TOTAL_CHAPTERS + 1)
+    ]
+    result = {"book_id": book_id, "total": len(specs), "chapters": {}, "failed": {}, "error": None}
+
+    saved = store.load(book_id)
+    summaries = {}
+    completed = 0
+    for spec in specs:
+        if spec["number"] in saved:
+            result["chapters"][spec["number"]] = saved[spec["number"]]["content"]
+            summaries[spec["number"]] = saved[spec["number"]]["summary"]
+            completed += 1
+            if progress_callback:
+                progress_callback(spec["number"], "resumed", completed, len(specs))
+
+    pending = [spec for spec in specs if spec["number"] not in saved]
+    return book_id, specs, result, summaries, pending
+
+
+def generate_book(title, plot_summary, story_outline, genre, pov_character, api_key,
+                  max_concurrency=4, progress_callback=None, store=None):
+    """
+    Generates every chapter of a book concurrently
+
+    Chapters are parsed from the story outline and started in order, at most
+    `max_concurrency` at a time. Every request carries a compact shared context
+    (title, plot summary and chapter list) plus the summaries of chapters that
+    have already finished, falling back to the outline's plan for the rest.
+    Finished chapters are saved to the store immediately, so calling this again
+    for the same book only generates the chapters that are still missing.
+
+    Args:
+        title (str): Adaptation title
+        plot_summary (str): Generated plot summary
+        story_outline (str): Outline of the story
+        genre (str): Selected genre
+        pov_character (str): Point of view character, if applicable
+        api_key (str): OpenAI API key
+        max_concurrency (int): Maximum number of chapters generated at the same time
+        progress_callback (callable): Optional function called as
+                                      (chapter_num, status, completed, total) where
+                                      status is 'resumed', 'done' or 'failed'
+        store (BookStore): Chapter store, defaults to the on-disk store
+
+    Returns:
+        dict: book_id, total, chapters (chapter number -> content) and failed
+              (chapter number -> error message); error is set if nothing could be generated
+    """
+    store = store or BookStore()
+    book_id, specs, result, summaries, pending = _resume_book(title, story_outline, genre, pov_character,
+                                                              store, progress_callback)
+    completed = len(result["chapters"])
+    if not pending:
+        return result
+
+    # Check if API key is provided and valid (basic check)
+    if not api_key or len(api_key) < 20:
+        result["error"] = "Unable to generate book chapters: Invalid OpenAI API key. Please provide a valid key to use this feature."
+        return result
+
+    api_key = api_key.strip()
+    client = openai.OpenAI(api_key=api_key)
+    shared_context = _build_shared_context(title, plot_summary, specs, genre, pov_character)
+
+    # Summaries are read when a chapter starts; chapters are submitted in order so
+    # earlier chapters are more likely to have finished
+    summaries_lock = threading.Lock()
+
+    def run_chapter(spec):
+        with summaries_lock:
+            known_summaries = dict(summaries)
+        chapter, summary = _generate_chapter(client, shared_context, spec, specs, known_summaries)
+        with summaries_lock:
+            summaries[spec["number"]] = summary
+        store.save_chapter(book_id, title, spec["number"], chapter, summary)
+        return chapter
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(pending)))) as executor:
+        futures = {executor.submit(run_chapter, spec): spec["number"] for spec in pending}
+
+        for future in as_completed(futures):
+            chapter_num = futures[future]
+            completed += 1
+            try:
+                result["chapters"][chapter_num] = future.result()
+                status = "done"
+            except Exception as e:
+                result["failed"][chapter_num] = str(e)
+                status = "failed"
+                print(f"Error generating chapter {chapter_num}: {e}")
+            if progress_callback:
+                progress_callback(chapter_num, status, completed, len(specs))
+
+    if not result["chapters"]:
+        result["error"] = "Error generating chapters: " + next(iter(result["failed"].values()), "unknown error")
+    return result
+
+
+async def generate_book_async(title, plot_summary, story_outline, genre, pov_character, api_key,
+                              max_concurrency=None, progress_callback=None, store=None, timeout=None):
+    """
+    Async counterpart of generate_book, on the shared AsyncOpenAI client
+
+    Every chapter is a task rather than a thread, so by default all missing
+    chapters are requested at once and the shared request scheduler decides
+    how many reach the API. Chapters not finished when the timeout expires are
+    cancelled and reported as failed; finished ones are saved as usual, so a
+    later call picks up where this one stopped.
+
+    Args:
+        title (str): Adaptation title
+        plot_summary (str): Generated plot summary
+        story_outline (str): Outline of the story
+        genre (str): Selected genre
+        pov_character (str): Point of view character, if applicable
+        api_key (str): OpenAI API key
+        max_concurrency (int): Maximum number of chapters generated at the same time (None for all)
+        progress_callback (callable): Optional function called on the event loop as
+                                      (chapter_num, status, completed, total)
+        store (BookStore): Chapter store, defaults to the on-disk store
+        timeout (float): Seconds after which unfinished chapters are cancelled (None for no deadline)
+
+    Returns:
+        dict: The same result as generate_book
+    """
+    store = store or BookStore()
+    book_id, specs, result, summaries, pending = _resume_book(title, story_outline, genre, pov_character,
+                                                              store, progress_callback)
+    completed = len(result["chapters"])
+    if not pending:
+        return result
+
+    # Check if API key is provided and valid (basic check)
+    if not api_key or len(api_key) < 20:
+        result["error"] = "Unable to generate book chapters: Invalid OpenAI API key. Please provide a valid key to use this feature."
+        return result
+
+    client = get_async_client(api_key.strip())
+    shared_context = _build_shared_context(title, plot_summary, specs, genre, pov_character)
+
+    async def run_chapter(spec):
+        nonlocal completed
+        # Summaries are read when a chapter starts; tasks start in chapter order
+        chapter, summary = await _generate_chapter_async(client, shared_context, spec, specs, dict(summaries))
+        summaries[spec["number"]] = summary
+        await asyncio.to_thread(store.save_chapter, book_id, title, spec["number"], chapter, summary)
+        completed += 1
+        if progress_callback:
+            progress_callback(spec["number"], "done", completed, len(specs))
+        return chapter
+
+    outcomes = await gather_with_deadline([run_chapter(spec) for spec in pending], timeout=timeout,
+                                          limit=max_concurrency, return_exceptions=True)
+    for spec, outcome in zip(pending, outcomes):
+        if isinstance(outcome, BaseException):
+            # Cancellations (and some other errors) carry no message of their own
+            reason = str(outcome) or ("Cancelled before it finished" if isinstance(outcome, asyncio.CancelledError)
+                                      else type(outcome).__name__)
+            result["failed"][spec["number"]] = reason
+            print(f"Error generating chapter {spec['number']}: {reason}")
+            completed += 1
+            if progress_callback:
+                progress_callback(spec["number"], "failed", completed, len(specs))
+        else:
+            result["chapters"][spec["number"]] = outcome
+
+    if not result["chapters"]:
+        result["error"] = "Error generating chapters: " + next(iter(result["failed"].values()), "unknown error")
+    return result
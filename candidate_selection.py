@@ -0,0 +1,215 @@
+import re
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from content_analyzer import build_adaptation_messages
+from llm_metrics import estimate_chat_cost, get_average_tokens, get_cascade_summary
+from model_cascade import get_cascade_settings, get_premium_model
+from text_normalizer import CHARS_PER_TOKEN
+
+SCORING_FEATURE = "adaptation_score"
+
+# Typical JSON analysis length, used until enough calls have been recorded
+DEFAULT_COMPLETION_TOKENS = 450
+
+# Share of draft scores assumed to escalate before any cascade outcomes were recorded
+DEFAULT_ESCALATION_RATE = 0.5
+
+# MinHash signature over word 5-gram shingles, used to find near-duplicate posts
+# (e.g. crossposts and reposts)
+_SHINGLE_WORDS = 5
+_MINHASH_BANDS = 6
+_MINHASH_ROWS = 5
+_MINHASH_PRIME = (1 << 31) - 1
+_MIN_SHINGLES_FOR_DEDUPE = 20
+
+_TOKEN = re.compile(r"[a-z0-9']+")
+
+_rng = np.random.default_rng(20240513)
+_MINHASH_A = _rng.integers(1, _MINHASH_PRIME, _MINHASH_BANDS * _MINHASH_ROWS, dtype=np.int64)
+_MINHASH_B = _rng.integers(0, _MINHASH_PRIME, _MINHASH_BANDS * _MINHASH_ROWS, dtype=np.int64)
+
+
+def estimate_scoring_costs(prompt_tokens, completion_tokens, model=None):
+    """
+    Estimates the USD cost of scoring each item
+
+    With the model cascade enabled (and no model given), every item pays for
+    the draft call plus the premium call weighted by the recorded escalation
+    rate.
+
+    Args:
+        prompt_tokens (np.ndarray): Estimated prompt tokens per item
+        completion_tokens (np.ndarray): Estimated completion tokens per item
+        model (str): Model the items will be scored with, or None for the configured tiers
+
+    Returns:
+        np.ndarray: Estimated cost per item
+    """
+    def costs_for(name):
+        return np.array([estimate_chat_cost(name, p, c) for p, c in zip(prompt_tokens, completion_tokens)])
+
+    settings = get_cascade_settings()
+    if model is not None or not settings["enabled"]:
+        return costs_for(model or get_premium_model())
+    summary = next((s for s in get_cascade_summary() if s["feature"] == SCORING_FEATURE), None)
+    escalation_rate = summary["escalation_rate"] if summary else DEFAULT_ESCALATION_RATE
+    return costs_for(settings["draft_model"]) + escalation_rate * costs_for(settings["premium_model"])
+
+
+def estimate_scoring_tokens(items):
+    """
+    Estimates the prompt and completion tokens of scoring each item with the LLM
+
+    Prompt tokens come from the actual analysis messages at about four
+    characters per token. Completion tokens are the recorded average of earlier scoring
+    calls, or a typical analysis length before any were recorded.
+
+    Args:
+        items (list): Dicts with title, content, score and num_comments keys
+
+    Returns:
+        tuple: (prompt_tokens, completion_tokens) integer arrays, one entry per item
+    """
+    prompt_tokens = np.array([
+        -(-sum(len(message["content"]) for message in build_adaptation_messages(
+            item['title'], item['content'] or "", item['score'], item['num_comments'])) // CHARS_PER_TOKEN)
+        for item in items
+    ], dtype=np.int64)
+    averages = get_average_tokens(SCORING_FEATURE)
+    completion = int(round(averages[1])) if averages else DEFAULT_COMPLETION_TOKENS
+    return prompt_tokens, np.full(len(items), completion, dtype=np.int64)
+
+
+def engagement_percentiles(items):
+    """Returns each item's engagement (log upvotes plus log comments) as a 0-1 percentile within the batch"""
+    engagement = pd.Series([np.log1p(max(0, item['score'] or 0)) + np.log1p(max(0, item['num_comments'] or 0))
+                            for item in items], dtype=float)
+    return engagement.rank(pct=True).to_numpy() if len(items) else np.zeros(0)
+
+
+def _shingles(text):
+    """Returns the hashed word 5-grams of a text"""
+    tokens = _TOKEN.findall((text or "").lower())
+    if len(tokens) < _SHINGLE_WORDS:
+        return np.zeros(0, dtype=np.int64)
+    words = np.fromiter((zlib.crc32(token.encode("utf-8")) for token in tokens), dtype=np.int64, count=len(tokens))
+    shingles = np.zeros(len(tokens) - _SHINGLE_WORDS + 1, dtype=np.int64)
+    for offset in range(_SHINGLE_WORDS):
+        shingles = (shingles * 1000003 + words[offset:len(words) - _SHINGLE_WORDS + 1 + offset]) % _MINHASH_PRIME
+    return np.unique(shingles)
+
+
+def find_duplicate_clusters(items):
+    """
+    Groups near-duplicate items with MinHash locality-sensitive hashing
+
+    Items whose word 5-gram signatures agree on every row of any band (roughly
+    70% or more Jaccard similarity) share a cluster. Very short items are
+    never clustered.
+
+    Args:
+        items (list): Dicts with title and content keys
+
+    Returns:
+        np.ndarray: Cluster id of each item (the index of its first member)
+    """
+    parent = list(range(len(items)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    buckets = {}
+    for index, item in enumerate(items):
+        shingles = _shingles(item['content'])
+        if len(shingles) < _MIN_SHINGLES_FOR_DEDUPE:
+            continue
+        signature = ((np.outer(shingles, _MINHASH_A) + _MINHASH_B) % _MINHASH_PRIME).min(axis=0)
+        for band in range(_MINHASH_BANDS):
+            key = (band, signature[band * _MINHASH_ROWS:(band + 1) * _MINHASH_ROWS].tobytes())
+            if key in buckets:
+                root, other = find(index), find(buckets[key])
+                parent[max(root, other)] = min(root, other)
+            else:
+                buckets[key] = index
+    return np.array([find(i) for i in range(len(items))], dtype=np.int64)
+
+
+def select_candidates(items, budget_usd=None, budget_tokens=None, pre_scores=None, confidence=None,
+                      model=None):
+    """
+    Picks which items to score with the LLM within a budget
+
+    Each item gets a value from cheap local signals: its pre-score (when a
+    pre-scorer is trained), its engagement percentile in the batch and the
+    pre-scorer's uncertainty about it, so unfamiliar posts are still sampled.
+    Only the most valuable member of each near-duplicate cluster is a
+    candidate; the others reuse its analysis. Candidates are then taken in
+    order of value per dollar until the budget is spent.
+
+    Args:
+        items (list): Dicts with title, content, score and num_comments keys
+        budget_usd (float): Maximum expected spend in USD, or None
+        budget_tokens (int): Maximum expected prompt plus completion tokens, or None
+        pre_scores (np.ndarray): Pre-scorer scores (1-10) of the items, if available
+        confidence (np.ndarray): Pre-scorer confidence (0-1) of the items, if available
+        model (str): Model the selected items will be scored with, or None for the configured tiers
+
+    Returns:
+        dict: selected (item indices to score, most valuable first), duplicates (item index ->
+              index of the selected or candidate item it duplicates), expected_tokens,
+              expected_cost_usd, full_tokens and full_cost_usd (scoring every item) and
+              skipped (items left unscored)
+    """
+    if not items:
+        return {"selected": [], "duplicates": {}, "expected_tokens": 0, "expected_cost_usd": 0.0,
+                "full_tokens": 0, "full_cost_usd": 0.0, "skipped": 0}
+
+    prompt_tokens, completion_tokens = estimate_scoring_tokens(items)
+    costs = estimate_scoring_costs(prompt_tokens, completion_tokens, model=model)
+    tokens = prompt_tokens + completion_tokens
+
+    engagement = engagement_percentiles(items)
+    if pre_scores is not None:
+        expected = (np.asarray(pre_scores, dtype=float) - 1) / 9
+        uncertainty = 1 - np.asarray(confidence, dtype=float) if confidence is not None else np.zeros(len(items))
+        value = 0.6 * expected + 0.2 * engagement + 0.2 * uncertainty
+    else:
+        value = engagement
+
+    # Keep the most valuable member of each near-duplicate cluster
+    clusters = find_duplicate_clusters(items)
+    representative = {}
+    for index in np.argsort(-value, kind="stable"):
+        representative.setdefault(int(clusters[index]), int(index))
+    duplicates = {index: representative[int(clusters[index])] for index in range(len(items))
+                  if representative[int(clusters[index])] != index}
+
+    candidates = sorted(representative.values(), key=lambda i: -value[i] / max(costs[i], 1e-9))
+    selected, spent_usd, spent_tokens = [], 0.0, 0
+    for index in candidates:
+        if budget_usd is not None and spent_usd + costs[index] > budget_usd:
+            continue
+        if budget_tokens is not None and spent_tokens + tokens[index] > budget_tokens:
+            continue
+        selected.append(index)
+        spent_usd += costs[index]
+        spent_tokens += int(tokens[index])
+
+    selected.sort(key=lambda i: -value[i])
+    selected_set = set(selected)
+    covered = len(selected) + sum(1 for rep in duplicates.values() if rep in selected_set)
+    return {
+        "selected": selected,
+        "duplicates": duplicates,
+        "expected_tokens": spent_tokens,
+        "expected_cost_usd": spent_usd,
+        "full_tokens": int(tokens.sum()),
+        "full_cost_usd": float(costs.sum()),
+        "skipped": len(items) - covered,
+    }
@@ -1,8 +1,44 @@
 import openai
 import re
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-def evaluate_adaptation_potential(title, content, score, num_comments, api_key):
+from async_runner import gather_with_deadline, DeadlineExceeded
+from llm_client import chat_completion, chat_completion_async, get_async_client
+from model_cascade import run_cascade, run_cascade_async, get_cascade_settings
+from pre_scorer import record_adaptation_score
+from prompt_layout import build_messages, format_payload
+
+# Dimensions of the adaptation radar chart, scored 0-100 by the adaptation analysis
+RADAR_CATEGORIES = [
+    "Narrative Strength",
+    "Visual Potential",
+    "Character Development",
+    "Market Appeal",
+    "Target Audience Match"
+]
+
+# Scoring instructions shared by every post; the post follows in the user message
+ADAPTATION_INSTRUCTIONS = """Analyze the Reddit post provided by the user for its potential to be adapted into a movie, TV show, or book.
+
+Score this post's adaptation potential on a scale of 1-10, where:
+1 = Not adaptable at all
+10 = Exceptional adaptation potential
+
+Provide your analysis in JSON format with these fields:
+- score: (number between 1-10, can use decimals)
+- justification: (detailed explanation of why this would make a good adaptation)
+- recommended_genres: (array of 3-5 genres that would work well for this adaptation)
+- similar_works: (array of 3-5 similar movies, TV shows, or books that share thematic elements)
+- adaptation_type: (string, either "Movie", "TV Series", "Novel", or "Short Story" - which format would work best)
+- key_elements: (array of 3-5 narrative elements that make this story compelling)
+- target_audience: (string describing the ideal audience for this adaptation)
+- radar_scores: (object scoring each of these categories from 0-100: "Narrative Strength" (how compelling is the core story),
+  "Visual Potential" (how well it translates to visual storytelling), "Character Development" (how interesting and
+  well-developed the characters are), "Market Appeal" (how appealing it is to the target market),
+  "Target Audience Match" (how well it matches current audience interests))"""
+
+def evaluate_adaptation_potential(title, content, score, num_comments, api_key, source=None):
     """
     Evaluates the adaptation potential of a Reddit post using OpenAI
     
@@ -12,21 +48,15 @@ def evaluate_adaptation_potential(title, content, score, num_comments, api_key):
         score (int): Post upvotes
         num_comments (int): Number of comments
         api_key (str): OpenAI API key
+        source (str): 'reddit' or 'wattpad', recorded with the score as pre-scorer training data
         
     Returns:
-        dict: Adaptation analysis including score, justification, recommended genres, and similar works
+        dict: Adaptation analysis including score, justification, recommended genres, similar works
+              and radar chart scores (one 0-100 value per RADAR_CATEGORIES entry)
     """
     # Check if API key is provided and valid (basic check)
     if not api_key or len(api_key) < 20:
-        return {
-            "score": 5.0,
-            "justification": "API key is missing or appears to be invalid. Please provide a valid OpenAI API key to get detailed analysis.",
-            "recommended_genres": ["Drama"],
-            "similar_works": ["Analysis not available without valid API key"],
-            "adaptation_type": "Movie",
-            "key_elements": ["Character development", "Plot", "Setting"],
-            "target_audience": "General audience"
-        }
+        return _missing_key_analysis()
     
     try:
         # Initialize OpenAI client
@@ -35,82 +65,367 @@ def evaluate_adaptation_potential(title, content, score, num_comments, api_key):
         openai.api_key = api_key
         client = openai.OpenAI(api_key=api_key)
         
-        # Prepare content (limit length)
-        content_preview = content[:3000] + ("..." if len(content) > 3000 else "")
-        
-        # Construct prompt
-        prompt = f"""
-        Analyze this Reddit post for its potential to be adapted into a movie, TV show, or book.
-        
-        TITLE: {title}
+        messages = build_adaptation_messages(title, content, score, num_comments)
         
-        CONTENT: {content_preview}
+        # A cheaper draft model scores first when the model cascade is enabled; promising
+        # or inconsistent drafts are re-scored by the premium model
+        escalate_above = get_cascade_settings()["escalate_above"]
+        (adaptation_data, _), model = run_cascade(
+            "adaptation_score",
+            lambda model: _request_adaptation_analysis(client, messages, model),
+            escalation_reason=lambda result: adaptation_escalation_reason(*result, escalate_above),
+            score_fn=lambda result: result[0]["score"]
+        )
         
-        ENGAGEMENT: {score} upvotes, {num_comments} comments
+        # Every GPT score becomes a training example for the local pre-scorer
+        record_adaptation_score(title, content, score, num_comments, adaptation_data["score"],
+                                model=model, source=source)
         
-        Score this post's adaptation potential on a scale of 1-10, where:
-        1 = Not adaptable at all
-        10 = Exceptional adaptation potential
+        return adaptation_data
+    
+    except Exception as e:
+        # Print the error to the console for debugging
+        print(f"OpenAI API Error: {e}")
         
-        Provide your analysis in JSON format with these fields:
-        - score: (number between 1-10, can use decimals)
-        - justification: (detailed explanation of why this would make a good adaptation)
-        - recommended_genres: (array of 3-5 genres that would work well for this adaptation)
-        - similar_works: (array of 3-5 similar movies, TV shows, or books that share thematic elements)
-        - adaptation_type: (string, either "Movie", "TV Series", "Novel", or "Short Story" - which format would work best)
-        - key_elements: (array of 3-5 narrative elements that make this story compelling)
-        - target_audience: (string describing the ideal audience for this adaptation)
-        """
+        return _failed_analysis(describe_openai_error(e))
+
+async def evaluate_adaptation_potential_async(title, content, score, num_comments, api_key, source=None):
+    """
+    Async counterpart of evaluate_adaptation_potential, on the shared AsyncOpenAI client
+    
+    Takes the same arguments and returns the same analysis. Cancelling the
+    task (e.g. on a deadline) abandons the request and records nothing.
+    """
+    if not api_key or len(api_key) < 20:
+        return _missing_key_analysis()
+    
+    try:
+        client = get_async_client(api_key.strip())
+        messages = build_adaptation_messages(title, content, score, num_comments)
         
-        # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
-        # do not change this unless explicitly requested by the user
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"},
-            temperature=0.7
+        escalate_above = get_cascade_settings()["escalate_above"]
+        (adaptation_data, _), model = await run_cascade_async(
+            "adaptation_score",
+            lambda model: _request_adaptation_analysis_async(client, messages, model),
+            escalation_reason=lambda result: adaptation_escalation_reason(*result, escalate_above),
+            score_fn=lambda result: result[0]["score"]
         )
         
-        # Parse the response
-        result = json.loads(response.choices[0].message.content)
-        
-        # Extract the data with defaults for missing fields
-        adaptation_data = {
-            "score": float(result.get("score", 5.0)),
-            "justification": result.get("justification", "No justification provided"),
-            "recommended_genres": result.get("recommended_genres", ["Drama"]),
-            "similar_works": result.get("similar_works", ["No similar works identified"]),
-            "adaptation_type": result.get("adaptation_type", "Movie"),
-            "key_elements": result.get("key_elements", ["Character development", "Plot", "Setting"]),
-            "target_audience": result.get("target_audience", "General audience")
-        }
+        record_adaptation_score(title, content, score, num_comments, adaptation_data["score"],
+                                model=model, source=source)
         
         return adaptation_data
     
     except Exception as e:
-        error_message = str(e)
-        # Check for common API errors
-        if "invalid_api_key" in error_message or "Invalid API key" in error_message:
-            error_details = "The OpenAI API key provided is invalid. Please check your API key and try again."
-        elif "rate_limit_exceeded" in error_message:
-            error_details = "OpenAI API rate limit exceeded. Please try again later."
-        elif "insufficient_quota" in error_message:
-            error_details = "Your OpenAI API account has insufficient quota. Please check your usage or billing information."
-        elif "invalid auth" in error_message.lower() or "authentication" in error_message.lower():
-            error_details = "Authentication error with OpenAI API. Your key may be expired or invalid."
-        else:
-            error_details = f"Error connecting to OpenAI API: {error_message}"
+        print(f"OpenAI API Error: {e}")
+        return _failed_analysis(describe_openai_error(e))
+
+def _missing_key_analysis():
+    """Analysis returned when no valid API key is available"""
+    return {
+        "score": 5.0,
+        "justification": "API key is missing or appears to be invalid. Please provide a valid OpenAI API key to get detailed analysis.",
+        "recommended_genres": ["Drama"],
+        "similar_works": ["Analysis not available without valid API key"],
+        "adaptation_type": "Movie",
+        "key_elements": ["Character development", "Plot", "Setting"],
+        "target_audience": "General audience",
+        "radar_scores": estimate_radar_scores(5.0)
+    }
+
+def _failed_analysis(error_details):
+    """
+    Analysis of a post that could not be scored
+    
+    Rate limits are retried by the shared scheduler, so reaching this point means the
+    post could not be scored at all. Report that instead of a fake default score.
+    """
+    return {
+        "score": None,
+        "justification": error_details,
+        "recommended_genres": [],
+        "similar_works": [],
+        "adaptation_type": "Movie",
+        "key_elements": [],
+        "target_audience": "Unknown",
+        "radar_scores": None,
+        "error": True
+    }
+
+def _adaptation_analysis_request(messages, model):
+    """Builds the chat completion arguments of an adaptation analysis"""
+    return dict(
+        feature="adaptation_score",
+        model=model,
+        messages=messages,
+        response_format={"type": "json_object"},
+        temperature=0.7
+    )
+
+def _request_adaptation_analysis(client, messages, model):
+    """Requests and parses an adaptation analysis from one model, returning (analysis, complete)"""
+    response = chat_completion(client, **_adaptation_analysis_request(messages, model))
+    return _parse_adaptation_analysis(response)
+
+async def _request_adaptation_analysis_async(client, messages, model):
+    """Async counterpart of _request_adaptation_analysis"""
+    response = await chat_completion_async(client, **_adaptation_analysis_request(messages, model))
+    return _parse_adaptation_analysis(response)
+
+def _parse_adaptation_analysis(response):
+    """Parses an adaptation analysis response, returning (analysis, complete)"""
+    # Parse the response
+    result = json.loads(response.choices[0].message.content)
+    
+    # Extract the data with defaults for missing fields
+    adaptation_data = {
+        "score": float(result.get("score", 5.0)),
+        "justification": result.get("justification", "No justification provided"),
+        "recommended_genres": result.get("recommended_genres", ["Drama"]),
+        "similar_works": result.get("similar_works", ["No similar works identified"]),
+        "adaptation_type": result.get("adaptation_type", "Movie"),
+        "key_elements": result.get("key_elements", ["Character development", "Plot", "Setting"]),
+        "target_audience": result.get("target_audience", "General audience")
+    }
+    radar_scores = parse_radar_scores(result.get("radar_scores"))
+    adaptation_data["radar_scores"] = radar_scores or estimate_radar_scores(adaptation_data["score"])
+    return adaptation_data, bool(radar_scores) and "score" in result and "justification" in result
+
+def adaptation_escalation_reason(analysis, complete, escalate_above):
+    """
+    Decides whether a draft adaptation analysis needs the premium model
+    
+    Args:
+        analysis (dict): Draft analysis from _request_adaptation_analysis
+        complete (bool): Whether the draft returned a score, justification and radar scores
+        escalate_above (float): Draft scores at or above this are confirmed
         
-        # Print the error to the console for debugging
-        print(f"OpenAI API Error: {error_message}")
-            
-        # In case of API error, return default values with consistent types
-        return {
-            "score": 5.0,
-            "justification": error_details,
-            "recommended_genres": ["Drama"],
-            "similar_works": ["Error retrieving similar works"],
-            "adaptation_type": "Movie",
-            "key_elements": ["Unknown due to error"],
-            "target_audience": "General audience"
+    Returns:
+        str: 'above_threshold', 'incomplete' or 'inconsistent', or None to keep the draft
+    """
+    if not complete:
+        return "incomplete"
+    if analysis["score"] >= escalate_above:
+        return "above_threshold"
+    # Radar categories far from the overall score suggest the draft is unreliable
+    radar_mean = sum(analysis["radar_scores"]) / len(analysis["radar_scores"]) / 10
+    if abs(radar_mean - analysis["score"]) > 2.5:
+        return "inconsistent"
+    return None
+
+def build_adaptation_messages(title, content, score, num_comments):
+    """
+    Builds the adaptation analysis messages for a post
+    
+    The scoring instructions are the same for every post and come first, so
+    batch scoring reuses them as a cached prompt prefix; the post itself
+    follows in the user message.
+    
+    Args:
+        title (str): Post title
+        content (str): Post content
+        score (int): Post upvotes
+        num_comments (int): Number of comments
+        
+    Returns:
+        list: Messages sent to the model by evaluate_adaptation_potential
+    """
+    # Prepare content (limit length)
+    content_preview = content[:3000] + ("..." if len(content) > 3000 else "")
+    
+    return build_messages(ADAPTATION_INSTRUCTIONS, format_payload([
+        ("TITLE", title),
+        ("CONTENT", content_preview),
+        ("ENGAGEMENT", f"{score} upvotes, {num_comments} comments")
+    ]))
+
+def parse_radar_scores(radar_scores):
+    """
+    Normalizes radar chart scores returned by the model
+    
+    Args:
+        radar_scores (dict or list): Scores keyed by category name, or a list in RADAR_CATEGORIES order
+        
+    Returns:
+        list: One integer between 0 and 100 per radar category, or None if the scores are unusable
+    """
+    if isinstance(radar_scores, dict):
+        lookup = {str(key).strip().lower(): value for key, value in radar_scores.items()}
+        values = [lookup.get(category.lower()) for category in RADAR_CATEGORIES]
+    elif isinstance(radar_scores, list):
+        values = radar_scores
+    else:
+        return None
+    
+    if len(values) != len(RADAR_CATEGORIES):
+        return None
+    try:
+        return [int(max(0, min(100, round(float(value))))) for value in values]
+    except (TypeError, ValueError):
+        return None
+
+def estimate_radar_scores(adaptation_score):
+    """
+    Derives deterministic radar chart scores from an overall adaptation score, for
+    analyses that did not produce per-category scores (e.g. engagement-only scoring)
+    
+    Args:
+        adaptation_score (float): Adaptation score between 0 and 10
+        
+    Returns:
+        list: One integer between 0 and 100 per radar category, or None if there is no score
+    """
+    try:
+        value = float(adaptation_score)
+    except (TypeError, ValueError):
+        return None
+    if value != value:  # NaN
+        return None
+    return [int(max(0, min(100, round(value * 10))))] * len(RADAR_CATEGORIES)
+
+def build_pre_score_analysis(pre_score, confidence):
+    """
+    Builds an adaptation analysis for a post ranked only by the local pre-scorer
+    
+    Args:
+        pre_score (float): Score between 1 and 10 predicted by the pre-scorer
+        confidence (float): Share of the post's n-grams seen in the pre-scorer's training data
+        
+    Returns:
+        dict: Adaptation analysis with the same keys as evaluate_adaptation_potential
+    """
+    score = round(float(pre_score), 1)
+    return {
+        "score": score,
+        "justification": f"Estimated by the local pre-scorer ({confidence:.0%} vocabulary coverage); not reviewed by GPT-4o.",
+        "recommended_genres": ["Drama"],
+        "similar_works": ["N/A"],
+        "adaptation_type": "Movie",
+        "key_elements": ["Story structure"],
+        "target_audience": "General audience",
+        "radar_scores": estimate_radar_scores(score)
+    }
+
+def build_engagement_analysis(engagement_score):
+    """
+    Builds an adaptation analysis from the engagement-only scoring formula
+    
+    Args:
+        engagement_score (float): Score between 0 and 10 derived from engagement metrics
+        
+    Returns:
+        dict: Adaptation analysis with the same keys as evaluate_adaptation_potential
+    """
+    return {
+        "score": engagement_score,
+        "justification": "Simple scoring based on engagement metrics.",
+        "recommended_genres": ["Drama"],
+        "similar_works": ["N/A"],
+        "adaptation_type": "Movie",
+        "key_elements": ["Story structure"],
+        "target_audience": "General audience",
+        "radar_scores": estimate_radar_scores(engagement_score)
+    }
+
+def describe_openai_error(error):
+    """
+    Converts an OpenAI exception into a user-facing explanation
+    
+    Args:
+        error (Exception): Exception raised by the OpenAI client
+        
+    Returns:
+        str: Human readable description of the error
+    """
+    if isinstance(error, openai.AuthenticationError):
+        return "The OpenAI API key provided is invalid or expired. Please check your API key and try again."
+    if isinstance(error, openai.RateLimitError):
+        if "insufficient_quota" in str(getattr(error, "code", "") or error):
+            return "Your OpenAI API account has insufficient quota. Please check your usage or billing information."
+        return "OpenAI API rate limit exceeded and retries were exhausted. Please try again later."
+    if isinstance(error, openai.PermissionDeniedError):
+        return "Your OpenAI API key does not have access to the requested model."
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+        return "Could not connect to the OpenAI API. Please check your internet connection."
+    return f"Error connecting to OpenAI API: {error}"
+
+def evaluate_adaptation_potential_batch(items, api_key, max_workers=16, progress_callback=None):
+    """
+    Evaluates the adaptation potential of many posts concurrently
+    
+    Requests are issued from a thread pool and throttled by the shared request
+    scheduler, which adapts concurrency to the account's rate limits and queues
+    work instead of dropping it.
+    
+    Args:
+        items (list): Dicts with title, content, score and num_comments keys (and optionally source)
+        api_key (str): OpenAI API key
+        max_workers (int): Upper bound on threads submitting requests
+        progress_callback (callable): Optional function called as (completed, total)
+        
+    Returns:
+        list: Adaptation analyses in the same order as items
+    """
+    results = [None] * len(items)
+    if not items:
+        return results
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as executor:
+        futures = {
+            executor.submit(
+                evaluate_adaptation_potential,
+                title=item['title'],
+                content=item['content'],
+                score=item['score'],
+                num_comments=item['num_comments'],
+                api_key=api_key,
+                source=item.get('source')
+            ): index
+            for index, item in enumerate(items)
         }
+        
+        for completed, future in enumerate(as_completed(futures), 1):
+            results[futures[future]] = future.result()
+            if progress_callback:
+                progress_callback(completed, len(items))
+    
+    return results
+
+async def evaluate_adaptation_potential_batch_async(items, api_key, timeout=None, progress_callback=None):
+    """
+    Evaluates the adaptation potential of many posts concurrently on one event loop
+    
+    Every post is a task rather than a thread, so hundreds of posts can be
+    queued or in flight at once; the shared request scheduler still decides
+    how many requests reach the API. Posts not scored when the timeout expires
+    are cancelled and reported as failed analyses.
+    
+    Args:
+        items (list): Dicts with title, content, score and num_comments keys (and optionally source)
+        api_key (str): OpenAI API key
+        timeout (float): Seconds after which unfinished posts are cancelled (None for no deadline)
+        progress_callback (callable): Optional function called as (completed, total) on the event loop
+        
+    Returns:
+        list: Adaptation analyses in the same order as items
+    """
+    completed = 0
+    
+    async def evaluate(item):
+        nonlocal completed
+        analysis = await evaluate_adaptation_potential_async(
+            title=item['title'],
+            content=item['content'],
+            score=item['score'],
+            num_comments=item['num_comments'],
+            api_key=api_key,
+            source=item.get('source')
+        )
+        completed += 1
+        if progress_callback:
+            progress_callback(completed, len(items))
+        return analysis
+    
+    results = await gather_with_deadline([evaluate(item) for item in items], timeout=timeout)
+    return [_failed_analysis(f"Scoring did not finish within {timeout:g}s.") if isinstance(result, DeadlineExceeded)
+            else result for result in results]
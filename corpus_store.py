@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Columnar storage for analyzed Reddit posts and Wattpad stories
+
+Every analysis run is appended as a Parquet file under
+<data dir>/corpus/source=<reddit|wattpad>/. Low-cardinality text columns
+(subreddit, author, format) are dictionary-encoded and the analysis lists
+(genres, key elements, tags, ...) are stored as list<string> columns.
+
+Usage:
+    python corpus_store.py info
+    python corpus_store.py compact --source reddit
+"""
+import argparse
+import glob
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pyarrow import fs
+
+from utils import get_data_dir
+
+SOURCES = ["reddit", "wattpad"]
+
+# Columns stored dictionary-encoded, read back as pandas categoricals
+CATEGORICAL_COLUMNS = ["subreddit", "author", "recommended_adaptation_type"]
+
+# List-valued columns and the type of their items
+LIST_COLUMNS = {
+    "recommended_genres": pa.string(),
+    "similar_works": pa.string(),
+    "key_elements": pa.string(),
+    "tags": pa.string(),
+    "found_in": pa.string(),
+    "radar_scores": pa.float64(),
+}
+
+# Long text columns, left out when browsing and read per item for the detail view
+TEXT_COLUMNS = {
+    "reddit": ["selftext"],
+    "wattpad": ["description", "content_sample"],
+}
+
+_ROW_GROUP_SIZE = 65536
+
+# Parquet footers read by count_corpus, keyed by (path, mtime, size)
+_row_counts = {}
+
+
+def get_corpus_dir(source):
+    """Returns the partition directory of a source's corpus files"""
+    return get_data_dir("corpus", f"source={source}")
+
+
+def _corpus_files(source):
+    """Returns the corpus files of a source, oldest first"""
+    return sorted(glob.glob(os.path.join(get_corpus_dir(source), "part-*.parquet")))
+
+
+def _to_arrow_column(name, series):
+    """Converts one frame column to an Arrow array with the corpus storage type"""
+    if name in LIST_COLUMNS:
+        values = [list(value) if isinstance(value, (list, tuple, np.ndarray)) else [] for value in series]
+        return pa.array(values, type=pa.list_(LIST_COLUMNS[name]), from_pandas=True)
+    if name in CATEGORICAL_COLUMNS:
+        values = series.astype(object).where(series.notna(), None)
+        return pa.array(values.map(lambda value: None if value is None else str(value)),
+                        type=pa.string()).dictionary_encode()
+    try:
+        return pa.array(series, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Mixed-type object columns are kept as text
+        return pa.array(series.map(lambda value: None if pd.isna(value) else str(value)), type=pa.string())
+
+
+def save_corpus(df, source):
+    """
+    Appends analyzed items to the corpus of a source
+
+    Args:
+        df (pd.DataFrame): Analyzed posts or stories (the frames stored as posts_df / stories_df)
+        source (str): 'reddit' or 'wattpad'
+
+    Returns:
+        str: Path of the written Parquet file, or None if there was nothing to write
+    """
+    if df is None or df.empty:
+        return None
+    columns = [column for column in df.columns if column != 'adaptation_score_numeric']
+    arrays = [_to_arrow_column(column, df[column]) for column in columns]
+    arrays.append(pa.array(np.full(len(df), time.time())))
+    table = pa.Table.from_arrays(arrays, names=columns + ["analyzed_at"])
+
+    # Zero-padded nanosecond names keep the files in write order
+    path = os.path.join(get_corpus_dir(source), f"part-{time.time_ns():020d}.parquet")
+    temp_path = path + ".tmp"
+    pq.write_table(table, temp_path, compression="zstd", row_group_size=_ROW_GROUP_SIZE)
+    os.replace(temp_path, path)
+    return path
+
+
+def count_corpus(source):
+    """Returns the number of rows stored for a source (re-analyzed items count once per analysis)"""
+    total = 0
+    for path in _corpus_files(source):
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        if key not in _row_counts:
+            _row_counts[key] = pq.ParquetFile(path).metadata.num_rows
+        total += _row_counts[key]
+    return total
+
+
+def _dataset(source):
+    """Opens the corpus files of a source as one memory-mapped dataset, or None if there are none"""
+    files = _corpus_files(source)
+    if not files:
+        return None
+    # Files written before a column existed read it as nulls
+    schema = pa.unify_schemas([pq.read_schema(path) for path in files], promote_options="permissive")
+    return ds.dataset(files, schema=schema, format="parquet", filesystem=fs.LocalFileSystem(use_mmap=True))
+
+
+def _arrow_backed(arrow_type):
+    """Keeps text and list columns in Arrow memory instead of one Python object per cell"""
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type) or pa.types.is_list(arrow_type):
+        return pd.ArrowDtype(arrow_type)
+    return None
+
+
+def _to_frame(table):
+    """Converts a corpus table to pandas, keeping the latest analysis of each item"""
+    df = table.to_pandas(types_mapper=_arrow_backed, self_destruct=True, split_blocks=True)
+    if 'id' in df.columns:
+        df = df.drop_duplicates('id', keep='last')
+    return df.reset_index(drop=True)
+
+
+def load_corpus(source, columns=None, include_text=True):
+    """
+    Loads the analyzed corpus of a source
+
+    Only the requested columns are read from the memory-mapped files. Text and
+    list columns stay Arrow-backed, and categoricals come back as pandas
+    categoricals.
+
+    Args:
+        source (str): 'reddit' or 'wattpad'
+        columns (list): Columns to read (all if None); unknown columns are ignored
+        include_text (bool): Whether to read the long text columns (see TEXT_COLUMNS)
+
+    Returns:
+        pd.DataFrame: One row per item (its latest analysis), or an empty frame if nothing is stored
+    """
+    dataset = _dataset(source)
+    if dataset is None:
+        return pd.DataFrame()
+    names = dataset.schema.names
+    if columns is None:
+        columns = names
+    columns = [column for column in columns if column in names
+               and (include_text or column not in TEXT_COLUMNS[source])]
+    if 'id' in names and 'id' not in columns:
+        columns.append('id')
+    return _to_frame(dataset.to_table(columns=columns))
+
+
+def get_corpus_item(source, item_id):
+    """
+    Reads every stored column of one item
+
+    Args:
+        source (str): 'reddit' or 'wattpad'
+        item_id (str): Post or story id
+
+    Returns:
+        pd.Series: The item's latest analysis, or None if it is not stored
+    """
+    dataset = _dataset(source)
+    if dataset is None:
+        return None
+    df = _to_frame(dataset.to_table(filter=ds.field('id') == str(item_id)))
+    return df.iloc[-1] if len(df) else None
+
+
+def compact_corpus(source):
+    """
+    Rewrites a source's corpus as a single file holding the latest analysis of each item
+
+    Args:
+        source (str): 'reddit' or 'wattpad'
+
+    Returns:
+        tuple: (rows before, rows after)
+    """
+    files = _corpus_files(source)
+    if not files:
+        return 0, 0
+    before = count_corpus(source)
+    table = _dataset(source).to_table()
+    if 'id' in table.column_names:
+        # Keep the last row of each id, in file order
+        ids = table.column('id').to_pandas()
+        keep = ~ids.duplicated(keep='last').to_numpy()
+        table = table.filter(pa.array(keep))
+    path = os.path.join(get_corpus_dir(source), f"part-{time.time_ns():020d}.parquet")
+    pq.write_table(table, path + ".tmp", compression="zstd", row_group_size=_ROW_GROUP_SIZE)
+    os.replace(path + ".tmp", path)
+    for old_path in files:
+        os.remove(old_path)
+    return before, table.num_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or compact the analyzed corpus")
+    parser.add_argument("command", choices=["info", "compact"])
+    parser.add_argument("--source", choices=SOURCES, action="append",
+                        help="Source to act on (repeatable, default: all)")
+    args = parser.parse_args()
+
+    for source in args.source or SOURCES:
+        if args.command == "info":
+            files = _corpus_files(source)
+            size = sum(os.path.getsize(path) for path in files)
+            print(f"{source}: {count_corpus(source):,} rows in {len(files)} file(s), {size / 1e6:.1f} MB")
+        else:
+            before, after = compact_corpus(source)
+            print(f"{source}: compacted {before:,} rows into {after:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+from array import array
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Facets indexed for filtering, mapped to the analysis field holding their value(s)
+FACET_FIELDS = {
+    "genre": "recommended_genres",
+    "adaptation_type": "recommended_adaptation_type",
+    "key_element": "key_elements",
+    "similar_work": "similar_works",
+    "tag": "tags",
+    "audience": "target_audience",
+}
+
+
+def _facet_values(value):
+    """Returns the distinct non-empty strings of a list or scalar field, keyed by their lowercased form"""
+    if isinstance(value, str):
+        value = (value,)
+    elif not isinstance(value, (list, tuple, np.ndarray)):
+        return {}
+    values = {}
+    for item in value:
+        label = item.strip() if isinstance(item, str) else None
+        if label:
+            values.setdefault(label.lower(), label)
+    return values
+
+
+def _arrow_pairs(values):
+    """
+    Extracts the (value, item offset) pairs of a column with Arrow compute kernels
+
+    Used for whole columns (Arrow-backed frames loaded from the corpus,
+    categoricals, or plain lists of string lists), where a Python loop over
+    the cells would dominate the build.
+
+    Args:
+        values (pd.Series or list): One list or scalar value per item
+
+    Returns:
+        tuple: (lowercased keys, stripped labels, item offsets) as Arrow arrays and an
+               int64 array, or None if the column is not made of strings
+    """
+    try:
+        column = pa.array(values, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return None
+    if isinstance(column, pa.ChunkedArray):
+        column = column.combine_chunks()
+    if pa.types.is_dictionary(column.type):
+        column = column.cast(column.type.value_type)
+    if pa.types.is_list(column.type) or pa.types.is_large_list(column.type):
+        offsets = pc.list_parent_indices(column).to_numpy()
+        column = pc.list_flatten(column)
+    else:
+        offsets = np.arange(len(column), dtype=np.int64)
+    if pa.types.is_null(column.type):
+        return pa.array([], pa.string()), pa.array([], pa.string()), offsets[:0]
+    if not (pa.types.is_string(column.type) or pa.types.is_large_string(column.type)):
+        return None
+    labels = pc.utf8_trim_whitespace(column)
+    keep = pc.fill_null(pc.greater(pc.utf8_length(labels), 0), False)
+    labels = labels.filter(keep)
+    offsets = offsets[keep.to_numpy(zero_copy_only=False)]
+    return pc.utf8_lower(labels), labels, offsets
+
+
+class FacetIndex:
+    """
+    Inverted index from facet values (genres, formats, tags, ...) to the items that have them
+
+    Every (value, item position) pair is appended to a per-facet posting list
+    when an item is added, so new analyses are indexed without touching the
+    existing ones. Values are matched case-insensitively and shown with the
+    spelling they were first seen in. Queries combine per-value boolean masks
+    over item positions, and facet counts are a single bincount over the
+    posting list, so neither scans the list cells of the analyzed frame.
+    """
+
+    def __init__(self):
+        self.size = 0
+        self._scores = array('d')
+        self._keys = {facet: {} for facet in FACET_FIELDS}
+        self._labels = {facet: [] for facet in FACET_FIELDS}
+        self._value_ids = {facet: array('i') for facet in FACET_FIELDS}
+        self._positions = {facet: array('i') for facet in FACET_FIELDS}
+        self._compiled = {}
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Builds an index over the rows of an analyzed frame, in positional order
+
+        Args:
+            df (pd.DataFrame): Analyzed items (any FACET_FIELDS columns that are present,
+                               plus adaptation_score)
+
+        Returns:
+            FacetIndex: Index whose item positions are the frame's row positions
+        """
+        index = cls()
+        index.add_many({field: df[field] for field in FACET_FIELDS.values() if field in df.columns},
+                       df['adaptation_score'] if 'adaptation_score' in df.columns else [None] * len(df),
+                       len(df))
+        for facet in FACET_FIELDS:
+            index._compile(facet)
+        return index
+
+    def add(self, item):
+        """
+        Indexes a newly analyzed item
+
+        Args:
+            item (dict): Analysis fields of the item (see FACET_FIELDS) and its adaptation_score
+
+        Returns:
+            int: Position of the item in the index
+        """
+        self.add_many({field: [item.get(field)] for field in FACET_FIELDS.values()},
+                      [item.get('adaptation_score')], 1)
+        return self.size - 1
+
+    def add_many(self, fields, scores, count):
+        """
+        Indexes a batch of newly analyzed items, appended after the existing ones
+
+        Args:
+            fields (dict): Analysis field name (see FACET_FIELDS) -> list or Series with one value per item
+            scores (list): Adaptation score of each item (None or NaN if not scored)
+            count (int): Number of items in the batch
+        """
+        if not isinstance(scores, pd.Series):
+            scores = pd.Series(scores, dtype=object)
+        numeric = pd.to_numeric(scores, errors='coerce').to_numpy(dtype=float)
+        self._scores.frombytes(numeric.tobytes())
+        self._append_pairs(self.size, fields)
+        self.size += count
+
+    def update(self, position, item):
+        """
+        Re-indexes an item whose analysis changed (e.g. a local estimate replaced by a GPT score)
+
+        Args:
+            position (int): Position returned by add
+            item (dict): The item's new analysis fields and adaptation_score
+        """
+        for facet in FACET_FIELDS:
+            positions = np.frombuffer(self._positions[facet], dtype=np.int32).copy()
+            for pair_index in np.flatnonzero(positions == position):
+                self._value_ids[facet][pair_index] = -1
+        score = pd.to_numeric(item.get('adaptation_score'), errors='coerce')
+        self._scores[position] = float(score) if pd.notna(score) else np.nan
+        self._append_pairs(position, {field: [item.get(field)] for field in FACET_FIELDS.values()})
+
+    def _append_pairs(self, start, fields):
+        """Appends the (value, position) posting pairs of consecutive items starting at a position"""
+        for facet, field in FACET_FIELDS.items():
+            if field not in fields:
+                continue
+            pairs = _arrow_pairs(fields[field]) if len(fields[field]) > 1 else None
+            if pairs is not None:
+                keys, labels, offsets = pairs
+                if not len(keys):
+                    continue
+                # Items may repeat a value, and each (value, item) pair is indexed once
+                encoded = pc.dictionary_encode(keys)
+                codes = encoded.indices.to_numpy().astype(np.int64)
+                first = np.flatnonzero(~pd.Series(codes * (offsets.max() + 1) + offsets).duplicated().to_numpy())
+                codes, offsets = codes[first], offsets[first]
+                uniques = encoded.dictionary.to_pylist()
+                # Dictionary codes follow first appearance, so the first pair of each code holds its label
+                first_seen = first[np.flatnonzero(~pd.Series(codes).duplicated().to_numpy())]
+                labels = labels.take(pa.array(first_seen)).to_pylist()
+                positions = start + offsets
+            else:
+                keys, labels, positions = [], [], []
+                for offset, value in enumerate(fields[field]):
+                    values = _facet_values(value)
+                    if values:
+                        keys.extend(values)
+                        labels.extend(values.values())
+                        positions.extend([start + offset] * len(values))
+                if not keys:
+                    continue
+                # Factorize the batch once, then map its distinct values onto the facet's value ids
+                codes, uniques = pd.factorize(pd.Series(keys, dtype=object))
+                labels = [labels[index] for index in np.unique(codes, return_index=True)[1]]
+            vocabulary, facet_labels = self._keys[facet], self._labels[facet]
+            batch_ids = np.empty(len(uniques), dtype=np.int32)
+            for code, key in enumerate(uniques):
+                value_id = vocabulary.get(key)
+                if value_id is None:
+                    value_id = vocabulary[key] = len(facet_labels)
+                    facet_labels.append(labels[code])
+                batch_ids[code] = value_id
+            self._value_ids[facet].frombytes(batch_ids[codes].tobytes())
+            self._positions[facet].frombytes(np.asarray(positions, dtype=np.int32).tobytes())
+        self._compiled.clear()
+
+    def _compile(self, facet):
+        """Returns the live posting pairs of a facet grouped by value, cached until the next change"""
+        if facet not in self._compiled:
+            # Copies, so the posting arrays can keep growing
+            value_ids = np.frombuffer(self._value_ids[facet], dtype=np.int32).copy()
+            positions = np.frombuffer(self._positions[facet], dtype=np.int32).copy()
+            live = value_ids >= 0
+            value_ids, positions = value_ids[live], positions[live]
+            order = np.argsort(value_ids, kind='stable')
+            offsets = np.concatenate([[0], np.cumsum(np.bincount(value_ids, minlength=len(self._labels[facet])))])
+            self._compiled[facet] = (value_ids, positions, positions[order], offsets)
+        return self._compiled[facet]
+
+    def values(self, facet):
+        """Returns every value seen for a facet, in first-seen order"""
+        return list(self._labels[facet])
+
+    def mask(self, facet, value):
+        """
+        Returns which items have a facet value
+
+        Args:
+            facet (str): Facet name (see FACET_FIELDS)
+            value (str): Facet value, matched case-insensitively
+
+        Returns:
+            np.ndarray: Boolean mask over item positions
+        """
+        mask = np.zeros(self.size, dtype=bool)
+        value_id = self._keys[facet].get(value.strip().lower())
+        if value_id is not None:
+            _, _, grouped, offsets = self._compile(facet)
+            mask[grouped[offsets[value_id]:offsets[value_id + 1]]] = True
+        return mask
+
+    def query(self, filters=None, match="any", min_score=None):
+        """
+        Returns which items match facet filters
+
+        Filters on different facets are combined with AND. Within one facet the
+        selected values are combined with OR (match='any') or AND (match='all').
+
+        Args:
+            filters (dict): Facet name -> list of selected values
+            match (str): 'any' or 'all', how values within a facet combine
+            min_score (float): Only keep items with an adaptation score above or equal to this
+
+        Returns:
+            np.ndarray: Boolean mask over item positions
+        """
+        result = np.ones(self.size, dtype=bool)
+        if min_score is not None:
+            result &= np.frombuffer(self._scores, dtype=float).copy() >= min_score
+        for facet, values in (filters or {}).items():
+            if not values:
+                continue
+            masks = [self.mask(facet, value) for value in values]
+            result &= np.logical_or.reduce(masks) if match == "any" else np.logical_and.reduce(masks)
+        return result
+
+    def counts(self, facet, within=None, limit=None):
+        """
+        Counts the items having each value of a facet
+
+        Args:
+            facet (str): Facet name (see FACET_FIELDS)
+            within (np.ndarray): Optional boolean mask restricting the counted items
+            limit (int): Return only the most common values
+
+        Returns:
+            list: (value, count) pairs with a count above zero, most common first
+        """
+        value_ids, positions, _, _ = self._compile(facet)
+        if within is not None:
+            value_ids = value_ids[within[positions]]
+        counts = np.bincount(value_ids, minlength=len(self._labels[facet]))
+        if limit is not None and limit < len(counts):
+            top = np.argpartition(-counts, limit - 1)[:limit]
+            order = top[np.argsort(-counts[top], kind='stable')]
+        else:
+            order = np.argsort(-counts, kind='stable')
+        return [(self._labels[facet][value_id], int(counts[value_id])) for value_id in order if counts[value_id]]
@@ -0,0 +1,61 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class GenerationCache:
+    """
+    In-memory cache of speculatively generated API responses
+
+    Entries are written by the prefetcher and consumed by the first matching
+    request, so pressing a generate button a second time still produces a new
+    generation. Entries expire after `ttl_seconds` and the oldest entries are
+    evicted once `max_entries` is reached.
+    """
+
+    def __init__(self, max_entries=256, ttl_seconds=1800):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def put(self, key, value):
+        """Stores a response under a request key"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key):
+        """Removes and returns the response for a request key (None if missing or expired)"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() > expires_at:
+            return None
+        return value
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry is not None and time.monotonic() <= entry[0]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self):
+        """Removes all entries"""
+        with self._lock:
+            self._entries.clear()
+
+
+_generation_cache = GenerationCache()
+
+
+def get_generation_cache():
+    """Returns the process-wide generation cache"""
+    return _generation_cache
@@ -0,0 +1,510 @@
+#!/usr/bin/env python3
+"""
+Record/replay layer for OpenAI, PRAW and HTTP (Wattpad, image download) I/O
+
+In record mode every OpenAI chat and image call (sync or async), PRAW listing and
+requests.get response is passed through to the live service and saved as a
+JSON fixture. In replay mode the same calls are answered from the fixtures
+without touching the network, optionally sleeping for the recorded (or a
+fixed) latency, so the app, the CLIs and the benchmarks run offline and
+deterministically.
+
+The app installs the layer when IO_REPLAY is set:
+    IO_REPLAY=record streamlit run app.py
+    IO_REPLAY=replay IO_REPLAY_LATENCY_MS=0 streamlit run app.py
+
+Any other script can be run under it:
+    python io_replay.py run --mode replay test_wattpad.py
+    python io_replay.py info
+
+Settings (environment variables):
+    IO_REPLAY: 'record' or 'replay' (unset: live I/O)
+    IO_REPLAY_DIR: Fixture directory (default: <data dir>/fixtures)
+    IO_REPLAY_LATENCY_MS: Fixed simulated latency per call in replay mode (default: the recorded latency)
+    IO_REPLAY_LATENCY_SCALE: Multiplier applied to the simulated latency (default: 1)
+"""
+import argparse
+import asyncio
+import glob
+import hashlib
+import json
+import os
+import runpy
+import sys
+import threading
+import time
+from collections import defaultdict
+
+from single_flight import request_key
+from utils import get_data_dir
+
+MODES = ["record", "replay"]
+
+# Submission fields captured from PRAW listings (everything reddit_scraper reads)
+SUBMISSION_FIELDS = ["id", "title", "selftext", "score", "num_comments", "created_utc",
+                     "permalink", "url", "is_self", "over_18"]
+
+
+class FixtureNotFound(LookupError):
+    """Raised in replay mode for a call that was never recorded"""
+
+
+class FixtureStore:
+    """
+    Recorded responses, one JSON file per distinct request
+
+    A request recorded several times keeps every response; replays return
+    them in recorded order and then cycle, so repeated calls are deterministic.
+    OpenAI chat calls are also indexed by model and system message: the app
+    puts the static instructions first, so a prompt whose content changed can
+    still be answered by a response recorded for the same feature.
+    """
+
+    def __init__(self, directory=None, latency_ms=None, latency_scale=1.0):
+        self.directory = directory or get_data_dir("fixtures")
+        self.latency_ms = latency_ms
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._fixtures = {}
+        self._replayed = defaultdict(int)
+        self._fallbacks = None
+
+    def _path(self, kind, key):
+        return os.path.join(self.directory, kind, f"{key}.json")
+
+    def _load(self, kind, key):
+        """Returns the fixture of a request key (None if it was never recorded)"""
+        if (kind, key) not in self._fixtures:
+            try:
+                with open(self._path(kind, key), "r", encoding="utf-8") as f:
+                    self._fixtures[(kind, key)] = json.load(f)
+            except (OSError, ValueError):
+                self._fixtures[(kind, key)] = None
+        return self._fixtures[(kind, key)]
+
+    def record(self, kind, key, request, response, elapsed_ms, fallback_key=None):
+        """
+        Appends a response to the fixture of a request
+
+        Args:
+            kind (str): 'openai', 'praw' or 'http'
+            key (str): Request key
+            request (dict): JSON-serializable description of the request, kept for inspection
+            response: JSON-serializable response
+            elapsed_ms (float): Measured latency of the live call
+            fallback_key (str): Secondary key the response may also answer (see class docstring)
+        """
+        with self._lock:
+            fixture = self._load(kind, key) or {"request": request, "fallback_key": fallback_key, "responses": []}
+            fixture["responses"].append({"response": response, "elapsed_ms": round(elapsed_ms, 1)})
+            self._fixtures[(kind, key)] = fixture
+            path = self._path(kind, key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(fixture, f)
+            os.replace(path + ".tmp", path)
+            self._fallbacks = None
+
+    def _fallback_index(self, kind):
+        """Maps the fallback keys of all fixtures of a kind to their request keys"""
+        if self._fallbacks is None:
+            self._fallbacks = {}
+            for path in sorted(glob.glob(os.path.join(self.directory, "*", "*.json"))):
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        fallback_key = json.load(f).get("fallback_key")
+                except (OSError, ValueError):
+                    continue
+                if fallback_key:
+                    fixture_kind = os.path.basename(os.path.dirname(path))
+                    key = os.path.splitext(os.path.basename(path))[0]
+                    self._fallbacks.setdefault((fixture_kind, fallback_key), key)
+        return self._fallbacks
+
+    def replay(self, kind, key, fallback_key=None):
+        """
+        Returns the next recorded response of a request, after the simulated latency
+
+        Args:
+            kind (str): 'openai', 'praw' or 'http'
+            key (str): Request key
+            fallback_key (str): Secondary key used when the exact request was never recorded
+
+        Returns:
+            The recorded response
+
+        Raises:
+            FixtureNotFound: If neither key was recorded
+        """
+        response, delay = self._next_response(kind, key, fallback_key)
+        if delay > 0:
+            time.sleep(delay)
+        return response
+
+    async def replay_async(self, kind, key, fallback_key=None):
+        """Async counterpart of replay, waiting out the simulated latency without blocking the event loop"""
+        response, delay = self._next_response(kind, key, fallback_key)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return response
+
+    def _next_response(self, kind, key, fallback_key):
+        """Returns the next recorded response of a request and its simulated latency in seconds"""
+        with self._lock:
+            fixture = self._load(kind, key)
+            if fixture is None and fallback_key:
+                fallback = self._fallback_index(kind).get((kind, fallback_key))
+                if fallback:
+                    key, fixture = fallback, self._load(kind, fallback)
+            if fixture is None:
+                raise FixtureNotFound(f"No recorded {kind} response for request {key[:12]}")
+            index = self._replayed[(kind, key)]
+            self._replayed[(kind, key)] += 1
+            entry = fixture["responses"][index % len(fixture["responses"])]
+        delay_ms = entry["elapsed_ms"] if self.latency_ms is None else self.latency_ms
+        return entry["response"], delay_ms * self.latency_scale / 1000
+
+    def summary(self):
+        """Counts recorded requests and responses per kind"""
+        counts = {}
+        for path in glob.glob(os.path.join(self.directory, "*", "*.json")):
+            kind = os.path.basename(os.path.dirname(path))
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    responses = len(json.load(f)["responses"])
+            except (OSError, ValueError, KeyError):
+                continue
+            requests_count, responses_count = counts.get(kind, (0, 0))
+            counts[kind] = (requests_count + 1, responses_count + responses)
+        return counts
+
+
+def _hash_key(*parts):
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _chat_fallback_key(kwargs):
+    """Keys a chat request by model, response format and system message"""
+    system = next((message.get("content") for message in kwargs.get("messages", [])
+                   if isinstance(message, dict) and message.get("role") == "system"), None)
+    return _hash_key("chat", kwargs.get("model"), kwargs.get("response_format"), system)
+
+
+# OpenAI ------------------------------------------------------------------
+
+class _RawResponse:
+    """Stands in for the SDK's raw response wrapper (parse() and headers)"""
+
+    def __init__(self, parsed, headers):
+        self._parsed = parsed
+        self.headers = headers
+
+    def parse(self):
+        return self._parsed
+
+
+def _parse_openai(kind, data):
+    from openai.types import ImagesResponse
+    from openai.types.chat import ChatCompletion
+    return (ChatCompletion if kind == "chat" else ImagesResponse).model_validate(data)
+
+
+class _Endpoint:
+    """One OpenAI endpoint (chat.completions or images), recording or replaying its calls"""
+
+    def __init__(self, store, mode, kind, method, live=None, raw=False):
+        self._store = store
+        self._mode = mode
+        self._kind = kind
+        self._method = method
+        self._live = live
+        self._raw = raw
+
+    @property
+    def with_raw_response(self):
+        return type(self)(self._store, self._mode, self._kind, self._method, self._live, raw=True)
+
+    def _keys(self, kwargs):
+        return request_key(self._kind, **kwargs), _chat_fallback_key(kwargs) if self._kind == "chat" else None
+
+    def _replayed(self, recorded):
+        parsed = _parse_openai(self._kind, recorded["body"])
+        return _RawResponse(parsed, recorded.get("headers", {})) if self._raw else parsed
+
+    def _record(self, kwargs, result, elapsed_ms):
+        key, fallback_key = self._keys(kwargs)
+        parsed = result.parse() if self._raw else result
+        headers = {}
+        if self._raw and result.headers.get("openai-processing-ms") is not None:
+            headers["openai-processing-ms"] = result.headers.get("openai-processing-ms")
+        self._store.record("openai", key, {"kind": self._kind, "model": kwargs.get("model")},
+                           {"body": parsed.model_dump(mode="json"), "headers": headers},
+                           elapsed_ms, fallback_key)
+
+    def _call(self, **kwargs):
+        if self._mode == "replay":
+            return self._replayed(self._store.replay("openai", *self._keys(kwargs)))
+
+        target = self._live.with_raw_response if self._raw else self._live
+        start = time.perf_counter()
+        result = getattr(target, self._method)(**kwargs)
+        self._record(kwargs, result, (time.perf_counter() - start) * 1000)
+        return result
+
+    def create(self, **kwargs):
+        return self._call(**kwargs)
+
+    def generate(self, **kwargs):
+        return self._call(**kwargs)
+
+
+class _AsyncEndpoint(_Endpoint):
+    """Async counterpart of _Endpoint, for openai.AsyncOpenAI"""
+
+    async def _call(self, **kwargs):
+        if self._mode == "replay":
+            return self._replayed(await self._store.replay_async("openai", *self._keys(kwargs)))
+
+        target = self._live.with_raw_response if self._raw else self._live
+        start = time.perf_counter()
+        result = await getattr(target, self._method)(**kwargs)
+        self._record(kwargs, result, (time.perf_counter() - start) * 1000)
+        return result
+
+
+class _Namespace:
+    def __init__(self, **attributes):
+        self.__dict__.update(attributes)
+
+
+class ReplayOpenAI:
+    """
+    OpenAI client stand-in for record and replay modes
+
+    Covers the calls made through llm_client: chat.completions.create and
+    images.generate, directly or through with_raw_response, and with_options.
+    In record mode other attributes are passed through to the live client.
+    """
+
+    _endpoint = _Endpoint
+
+    def __init__(self, store, mode, live=None):
+        self._store = store
+        self._mode = mode
+        self._live = live
+        self.chat = _Namespace(completions=self._endpoint(store, mode, "chat", "create",
+                                                          live.chat.completions if live else None))
+        self.images = self._endpoint(store, mode, "image", "generate", live.images if live else None)
+
+    def with_options(self, **options):
+        return type(self)(self._store, self._mode, self._live.with_options(**options) if self._live else None)
+
+    def __getattr__(self, name):
+        if self._live is None:
+            raise AttributeError(f"'{name}' is not available in replay mode")
+        return getattr(self._live, name)
+
+
+class ReplayAsyncOpenAI(ReplayOpenAI):
+    """openai.AsyncOpenAI counterpart of ReplayOpenAI, sharing its fixtures"""
+
+    _endpoint = _AsyncEndpoint
+
+
+# PRAW --------------------------------------------------------------------
+
+class _Submission:
+    """Stands in for a praw Submission with the recorded fields"""
+
+    def __init__(self, fields):
+        self.__dict__.update(fields)
+
+
+class _ReplaySubreddit:
+    """Subreddit whose listings (top, hot, new, rising, controversial) are recorded or replayed"""
+
+    def __init__(self, store, mode, name, live=None):
+        self._store = store
+        self._mode = mode
+        self._name = name
+        self._live = live
+        self.display_name = name
+
+    def _listing(self, method, **kwargs):
+        key = _hash_key("praw", self._name.lower(), method, kwargs)
+        if self._mode == "replay":
+            for fields in self._store.replay("praw", key):
+                yield _Submission(fields)
+            return
+
+        # Recorded when the caller stops iterating, since callers often break early
+        posts = []
+        start = time.perf_counter()
+        try:
+            for submission in getattr(self._live, method)(**kwargs):
+                posts.append({field: getattr(submission, field, None) for field in SUBMISSION_FIELDS})
+                yield submission
+        finally:
+            self._store.record("praw", key, {"subreddit": self._name, "method": method, "args": kwargs},
+                               posts, (time.perf_counter() - start) * 1000)
+
+    def top(self, **kwargs):
+        return self._listing("top", **kwargs)
+
+    def hot(self, **kwargs):
+        return self._listing("hot", **kwargs)
+
+    def new(self, **kwargs):
+        return self._listing("new", **kwargs)
+
+    def rising(self, **kwargs):
+        return self._listing("rising", **kwargs)
+
+    def controversial(self, **kwargs):
+        return self._listing("controversial", **kwargs)
+
+
+class ReplayReddit:
+    """praw.Reddit stand-in for record and replay modes"""
+
+    def __init__(self, store, mode, live=None):
+        self._store = store
+        self._mode = mode
+        self._live = live
+
+    def subreddit(self, name):
+        return _ReplaySubreddit(self._store, self._mode, name,
+                                self._live.subreddit(name) if self._live else None)
+
+
+# HTTP --------------------------------------------------------------------
+
+def _build_response(url, recorded):
+    """Rebuilds a requests.Response from a recorded one"""
+    import requests
+    response = requests.Response()
+    response.url = recorded.get("url", url)
+    response.status_code = recorded["status_code"]
+    response.headers.update(recorded.get("headers", {}))
+    response.encoding = recorded.get("encoding")
+    if "text" in recorded:
+        response._content = recorded["text"].encode(response.encoding or "utf-8")
+    else:
+        response._content = bytes.fromhex(recorded.get("content_hex", ""))
+    return response
+
+
+def _replay_get(store, mode, live_get):
+    """Returns a requests.get replacement that records or replays GET responses by URL"""
+
+    def get(url, params=None, **kwargs):
+        key = _hash_key("http", url, params)
+        if mode == "replay":
+            return _build_response(url, store.replay("http", key))
+        start = time.perf_counter()
+        response = live_get(url, params=params, **kwargs)
+        content_type = response.headers.get("Content-Type", "")
+        recorded = {"url": response.url, "status_code": response.status_code,
+                    "headers": {"Content-Type": content_type}, "encoding": response.encoding}
+        if content_type.startswith(("text/", "application/json")) or "html" in content_type:
+            recorded["text"] = response.text
+        else:
+            recorded["content_hex"] = response.content.hex()
+        store.record("http", key, {"url": url, "params": params}, recorded, (time.perf_counter() - start) * 1000)
+        return response
+
+    return get
+
+
+# Installation --------------------------------------------------------------
+
+_installed = None
+
+
+def install(mode, directory=None, latency_ms=None, latency_scale=1.0):
+    """
+    Routes OpenAI, PRAW and requests.get I/O through the fixture store
+
+    Patches openai.OpenAI, openai.AsyncOpenAI, praw.Reddit and requests.get for
+    the whole process, so code that looks them up at call time (all of this app) is covered.
+
+    Args:
+        mode (str): 'record' or 'replay'
+        directory (str): Fixture directory (default: <data dir>/fixtures)
+        latency_ms (float): Fixed simulated latency per replayed call (None: recorded latency)
+        latency_scale (float): Multiplier applied to the simulated latency
+
+    Returns:
+        FixtureStore: The store used
+    """
+    global _installed
+    if mode not in MODES:
+        raise ValueError(f"Unknown replay mode: {mode}")
+    if _installed is not None:
+        return _installed
+
+    import openai
+    import praw
+    import requests
+
+    store = FixtureStore(directory, latency_ms=latency_ms, latency_scale=latency_scale)
+    live_openai, live_async_openai = openai.OpenAI, openai.AsyncOpenAI
+    live_reddit, live_get = praw.Reddit, requests.get
+
+    def make_openai(*args, **kwargs):
+        return ReplayOpenAI(store, mode, live_openai(*args, **kwargs) if mode == "record" else None)
+
+    def make_async_openai(*args, **kwargs):
+        return ReplayAsyncOpenAI(store, mode, live_async_openai(*args, **kwargs) if mode == "record" else None)
+
+    def make_reddit(*args, **kwargs):
+        return ReplayReddit(store, mode, live_reddit(*args, **kwargs) if mode == "record" else None)
+
+    openai.OpenAI = make_openai
+    openai.AsyncOpenAI = make_async_openai
+    praw.Reddit = make_reddit
+    requests.get = _replay_get(store, mode, live_get)
+    _installed = store
+    print(f"I/O {mode} mode: fixtures in {store.directory}")
+    return store
+
+
+def install_from_env():
+    """Installs the layer if IO_REPLAY is set (see the module docstring); returns the store or None"""
+    mode = os.getenv("IO_REPLAY", "").strip().lower()
+    if not mode:
+        return None
+    latency = os.getenv("IO_REPLAY_LATENCY_MS")
+    return install(mode, directory=os.getenv("IO_REPLAY_DIR") or None,
+                   latency_ms=float(latency) if latency else None,
+                   latency_scale=float(os.getenv("IO_REPLAY_LATENCY_SCALE", "1")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record or replay external I/O")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="Run a Python script with I/O recorded or replayed")
+    run_parser.add_argument("--mode", choices=MODES, default="replay")
+    run_parser.add_argument("--dir", help="Fixture directory")
+    run_parser.add_argument("--latency-ms", type=float, help="Fixed simulated latency per call")
+    run_parser.add_argument("script")
+    run_parser.add_argument("args", nargs=argparse.REMAINDER)
+    info_parser = subparsers.add_parser("info", help="Count the recorded fixtures")
+    info_parser.add_argument("--dir", help="Fixture directory")
+    args = parser.parse_args()
+
+    if args.command == "info":
+        summary = FixtureStore(args.dir).summary()
+        if not summary:
+            print("No fixtures recorded yet.")
+        for kind, (requests_count, responses_count) in sorted(summary.items()):
+            print(f"{kind}: {requests_count:,} requests, {responses_count:,} responses")
+        return
+
+    install(args.mode, directory=args.dir, latency_ms=args.latency_ms)
+    sys.argv = [args.script] + args.args
+    runpy.run_path(args.script, run_name="__main__")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+import asyncio
+import hashlib
+import threading
+import time
+import weakref
+
+import openai
+
+from generation_cache import get_generation_cache
+from llm_metrics import record_call, record_cache_hit, estimate_chat_cost, estimate_image_cost
+from prefetcher import is_prefetching, prefetch_cancelled
+from request_scheduler import get_scheduler, RequestCancelled
+from rerun_profiler import profile_section
+from single_flight import get_single_flight, get_async_single_flight, request_key
+
+
+def _scheduled(client):
+    """Returns a copy of the client with SDK retries disabled, since the scheduler owns retries"""
+    try:
+        return client.with_options(max_retries=0)
+    except Exception:
+        return client
+
+
+def _server_ms(raw_response):
+    """Reads the server-side processing time reported by OpenAI, if present"""
+    try:
+        value = raw_response.headers.get("openai-processing-ms")
+        return float(value) if value is not None else None
+    except Exception:
+        return None
+
+
+def _account(client):
+    """Digest of a client's API key and base URL; the key itself is never part of a request key"""
+    credentials = f"{getattr(client, 'api_key', '')}\n{getattr(client, 'base_url', '')}"
+    return hashlib.sha256(credentials.encode("utf-8")).hexdigest()
+
+
+def _coalesced(kind, feature, client, request_fn, **kwargs):
+    """
+    Runs a request through the generation cache and the single-flight group.
+
+    Foreground requests first consume a matching prefetched response, if any.
+    Identical concurrent requests then share one API call; callers that joined
+    another caller's request are recorded as coalesced. Responses produced by a
+    prefetch are stored in the generation cache for the next foreground request.
+    Requests are only shared and cached between callers using the same API key
+    and base URL, so no one is billed for, or handed, another account's call.
+    """
+    key = request_key(kind, account=_account(client), **kwargs)
+    cache = get_generation_cache()
+    prefetching = is_prefetching()
+
+    if not prefetching:
+        cached = cache.pop(key)
+        if cached is not None:
+            record_cache_hit(feature, kind, getattr(cached, "model", None) or kwargs.get("model"))
+            return cached
+
+    def leader_fn():
+        response = request_fn()
+        if prefetching:
+            cache.put(key, response)
+        return response
+
+    start = time.perf_counter()
+    try:
+        response, shared = get_single_flight().do(key, leader_fn)
+    except RequestCancelled:
+        if prefetching:
+            raise
+        # Joined a prefetch that was cancelled before it reached the API; send it ourselves
+        response, shared = get_single_flight().do(key, leader_fn)
+    if shared:
+        record_call(feature, kind, getattr(response, "model", None) or kwargs.get("model"), "ok",
+                    total_ms=(time.perf_counter() - start) * 1000, coalesced=True)
+        if not prefetching:
+            # This caller joined a prefetch that was still in flight and consumed its result
+            cache.pop(key)
+    return response
+
+
+async def _coalesced_async(kind, feature, client, request_fn, **kwargs):
+    """
+    Async counterpart of _coalesced
+
+    Async calls are never prefetches: they consume a matching prefetched
+    response, if any, and otherwise share one API call with identical requests
+    in flight on the same event loop, on the same account.
+    """
+    key = request_key(kind, account=_account(client), **kwargs)
+    cached = get_generation_cache().pop(key)
+    if cached is not None:
+        record_cache_hit(feature, kind, getattr(cached, "model", None) or kwargs.get("model"))
+        return cached
+
+    start = time.perf_counter()
+    response, shared = await get_async_single_flight().do(key, request_fn)
+    if shared:
+        record_call(feature, kind, getattr(response, "model", None) or kwargs.get("model"), "ok",
+                    total_ms=(time.perf_counter() - start) * 1000, coalesced=True)
+    return response
+
+
+def _run_scheduled(request_fn):
+    """Runs a request through the shared scheduler, at low priority for prefetches"""
+    if is_prefetching():
+        return get_scheduler().run(request_fn, low_priority=True, should_cancel=prefetch_cancelled)
+    return get_scheduler().run(request_fn)
+
+
+def chat_completion(client, feature, **kwargs):
+    """
+    Creates a chat completion and records latency, token usage and cost
+
+    Identical requests that are already in flight (e.g. the same generation
+    requested from two sessions with the same API key) wait for and share the
+    running call, and a matching response produced by the prefetcher is
+    returned immediately.
+
+    Args:
+        client (openai.OpenAI): Initialized OpenAI client
+        feature (str): Name of the calling feature, used to group metrics
+        **kwargs: Arguments passed through to client.chat.completions.create
+
+    Returns:
+        ChatCompletion: The parsed completion, exactly as returned by the SDK
+    """
+    with profile_section(f"openai:{feature}"):
+        return _coalesced("chat", feature, client, lambda: _chat_completion(client, feature, **kwargs),
+                          **kwargs)
+
+
+def _chat_completion(client, feature, **kwargs):
+    """Performs a scheduled, instrumented chat completion request"""
+    model = kwargs.get("model")
+    start = time.perf_counter()
+    try:
+        scheduled_client = _scheduled(client)
+        raw_response, info = _run_scheduled(
+            lambda: scheduled_client.chat.completions.with_raw_response.create(**kwargs)
+        )
+        response = raw_response.parse()
+    except RequestCancelled:
+        raise
+    except Exception as e:
+        _record_error(feature, "chat", model, start, e)
+        raise
+
+    _record_chat(feature, model, start, raw_response, response, info)
+    return response
+
+
+def _record_error(feature, kind, model, start, error):
+    """Records a failed call, with the queueing and retries the scheduler attached to the error"""
+    info = getattr(error, "scheduler_info", {})
+    record_call(feature, kind, model, "error",
+                total_ms=(time.perf_counter() - start) * 1000,
+                queue_ms=info.get("queue_ms"),
+                retries=info.get("retries", 0),
+                error=f"{type(error).__name__}: {error}")
+
+
+def _record_chat(feature, model, start, raw_response, response, info):
+    """Records a completed chat call with its token usage and cost"""
+    total_ms = (time.perf_counter() - start) * 1000
+    usage = getattr(response, "usage", None)
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    # Prompt tokens served from OpenAI's prompt cache (shared prefixes of 1,024+ tokens)
+    cached_tokens = getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", 0) or 0
+    response_model = getattr(response, "model", None) or model
+
+    record_call(feature, "chat", response_model, "ok",
+                total_ms=total_ms,
+                queue_ms=info["queue_ms"],
+                server_ms=_server_ms(raw_response),
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                retries=info["retries"],
+                cost_usd=estimate_chat_cost(response_model, prompt_tokens, completion_tokens, cached_tokens),
+                cached_tokens=cached_tokens)
+
+
+def generate_image(client, feature, **kwargs):
+    """
+    Generates an image and records latency and cost
+
+    Identical requests that are already in flight share the running call.
+
+    Args:
+        client (openai.OpenAI): Initialized OpenAI client
+        feature (str): Name of the calling feature, used to group metrics
+        **kwargs: Arguments passed through to client.images.generate
+
+    Returns:
+        ImagesResponse: The parsed response, exactly as returned by the SDK
+    """
+    with profile_section(f"openai:{feature}"):
+        return _coalesced("image", feature, client, lambda: _generate_image(client, feature, **kwargs),
+                          **kwargs)
+
+
+def _generate_image(client, feature, **kwargs):
+    """Performs a scheduled, instrumented image generation request"""
+    model = kwargs.get("model")
+    start = time.perf_counter()
+    try:
+        scheduled_client = _scheduled(client)
+        raw_response, info = _run_scheduled(
+            lambda: scheduled_client.images.with_raw_response.generate(**kwargs)
+        )
+        response = raw_response.parse()
+    except RequestCancelled:
+        raise
+    except Exception as e:
+        _record_error(feature, "image", model, start, e)
+        raise
+
+    _record_image(feature, model, start, raw_response, info, kwargs)
+    return response
+
+
+def _record_image(feature, model, start, raw_response, info, kwargs):
+    """Records a completed image generation with its cost"""
+    record_call(feature, "image", model, "ok",
+                total_ms=(time.perf_counter() - start) * 1000,
+                queue_ms=info["queue_ms"],
+                server_ms=_server_ms(raw_response),
+                retries=info["retries"],
+                cost_usd=estimate_image_cost(model, kwargs.get("quality"),
+                                             kwargs.get("size"), kwargs.get("n")))
+
+
+_async_clients = weakref.WeakKeyDictionary()
+_async_clients_lock = threading.Lock()
+
+
+def get_async_client(api_key):
+    """
+    Returns the AsyncOpenAI client shared by all async calls with an API key on the running event loop
+
+    All tasks on the loop share the client's connection pool, so hundreds of
+    concurrent requests reuse connections instead of each opening a client.
+    SDK retries are disabled since the scheduler owns retries.
+
+    Args:
+        api_key (str): OpenAI API key
+
+    Returns:
+        openai.AsyncOpenAI: The shared client
+    """
+    loop = asyncio.get_running_loop()
+    with _async_clients_lock:
+        clients = _async_clients.setdefault(loop, {})
+        if api_key not in clients:
+            clients[api_key] = openai.AsyncOpenAI(api_key=api_key, max_retries=0)
+        return clients[api_key]
+
+
+async def chat_completion_async(client, feature, **kwargs):
+    """
+    Async counterpart of chat_completion, for an openai.AsyncOpenAI client
+
+    Goes through the same generation cache, scheduler and metrics as
+    chat_completion. The calling task can be cancelled at any point; a request
+    still queued is dropped and one in flight is abandoned.
+
+    Args:
+        client (openai.AsyncOpenAI): Async OpenAI client (see get_async_client)
+        feature (str): Name of the calling feature, used to group metrics
+        **kwargs: Arguments passed through to client.chat.completions.create
+
+    Returns:
+        ChatCompletion: The parsed completion, exactly as returned by the SDK
+    """
+    return await _coalesced_async("chat", feature, client,
+                                  lambda: _chat_completion_async(client, feature, **kwargs), **kwargs)
+
+
+async def _chat_completion_async(client, feature, **kwargs):
+    """Performs a scheduled, instrumented async chat completion request"""
+    model = kwargs.get("model")
+    start = time.perf_counter()
+    try:
+        scheduled_client = _scheduled(client)
+        raw_response, info = await get_scheduler().run_async(
+            lambda: scheduled_client.chat.completions.with_raw_response.create(**kwargs)
+        )
+        response = raw_response.parse()
+    except Exception as e:
+        _record_error(feature, "chat", model, start, e)
+        raise
+
+    _record_chat(feature, model, start, raw_response, response, info)
+    return response
+
+
+async def generate_image_async(client, feature, **kwargs):
+    """
+    Async counterpart of generate_image, for an openai.AsyncOpenAI client
+
+    Args:
+        client (openai.AsyncOpenAI): Async OpenAI client (see get_async_client)
+        feature (str): Name of the calling feature, used to group metrics
+        **kwargs: Arguments passed through to client.images.generate
+
+    Returns:
+        ImagesResponse: The parsed response, exactly as returned by the SDK
+    """
+    return await _coalesced_async("image", feature, client,
+                                  lambda: _generate_image_async(client, feature, **kwargs), **kwargs)
+
+
+async def _generate_image_async(client, feature, **kwargs):
+    """Performs a scheduled, instrumented async image generation request"""
+    model = kwargs.get("model")
+    start = time.perf_counter()
+    try:
+        scheduled_client = _scheduled(client)
+        raw_response, info = await get_scheduler().run_async(
+            lambda: scheduled_client.images.with_raw_response.generate(**kwargs)
+        )
+        response = raw_response.parse()
+    except Exception as e:
+        _record_error(feature, "image", model, start, e)
+        raise
+
+    _record_image(feature, model, start, raw_response, info, kwargs)
+    return response
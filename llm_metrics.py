@@ -0,0 +1,409 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from utils import get_data_dir
+
+# USD prices per 1M tokens as (prompt, completion)
+CHAT_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+
+# USD prices per 1M prompt tokens served from OpenAI's prompt cache
+CACHED_PROMPT_PRICES = {
+    "gpt-4o": 1.25,
+    "gpt-4o-mini": 0.075,
+}
+
+# USD price per generated image keyed by (model, quality, size)
+IMAGE_PRICES = {
+    ("dall-e-3", "standard", "1024x1024"): 0.040,
+    ("dall-e-3", "standard", "1024x1792"): 0.080,
+    ("dall-e-3", "standard", "1792x1024"): 0.080,
+    ("dall-e-3", "hd", "1024x1024"): 0.080,
+    ("dall-e-3", "hd", "1024x1792"): 0.120,
+    ("dall-e-3", "hd", "1792x1024"): 0.120,
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_calls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    feature TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    model TEXT,
+    status TEXT NOT NULL,
+    total_ms REAL,
+    queue_ms REAL,
+    server_ms REAL,
+    prompt_tokens INTEGER DEFAULT 0,
+    completion_tokens INTEGER DEFAULT 0,
+    retries INTEGER DEFAULT 0,
+    cache_hit INTEGER DEFAULT 0,
+    coalesced INTEGER DEFAULT 0,
+    cost_usd REAL DEFAULT 0,
+    error TEXT,
+    cached_tokens INTEGER DEFAULT 0
+)
+"""
+
+_CASCADE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cascade_outcomes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    feature TEXT NOT NULL,
+    draft_model TEXT,
+    premium_model TEXT,
+    escalated INTEGER DEFAULT 0,
+    reason TEXT,
+    draft_score REAL,
+    final_score REAL,
+    draft_ms REAL,
+    premium_ms REAL
+)
+"""
+
+# Columns added after the table was first created, applied to existing stores on open
+_MIGRATIONS = {
+    "queue_ms": "REAL",
+    "coalesced": "INTEGER DEFAULT 0",
+    "cached_tokens": "INTEGER DEFAULT 0",
+}
+
+_lock = threading.Lock()
+_connection = None
+
+
+def _get_connection():
+    """Opens (once per process) the SQLite database backing the metrics store"""
+    global _connection
+    if _connection is None:
+        db_path = os.path.join(get_data_dir(), "llm_metrics.db")
+        _connection = sqlite3.connect(db_path, check_same_thread=False)
+        _connection.execute(_SCHEMA)
+        _connection.execute(_CASCADE_SCHEMA)
+        existing = {row[1] for row in _connection.execute("PRAGMA table_info(llm_calls)")}
+        for column, column_type in _MIGRATIONS.items():
+            if column not in existing:
+                _connection.execute(f"ALTER TABLE llm_calls ADD COLUMN {column} {column_type}")
+        _connection.commit()
+    return _connection
+
+
+def estimate_chat_cost(model, prompt_tokens, completion_tokens, cached_tokens=0):
+    """
+    Estimates the USD cost of a chat completion
+
+    Args:
+        model (str): Model name as reported by the API
+        prompt_tokens (int): Prompt tokens billed, including cached ones
+        completion_tokens (int): Completion tokens billed
+        cached_tokens (int): Prompt tokens served from the prompt cache at the discounted price
+
+    Returns:
+        float: Estimated cost in USD (0.0 for unknown models)
+    """
+    # Dated snapshots such as "gpt-4o-2024-08-06" are priced like their base model
+    prices = None
+    for name in sorted(CHAT_PRICES, key=len, reverse=True):
+        if model and model.startswith(name):
+            prices = CHAT_PRICES[name]
+            cached_price = CACHED_PROMPT_PRICES.get(name, prices[0])
+            break
+    if not prices:
+        return 0.0
+    cached_tokens = min(cached_tokens or 0, prompt_tokens)
+    return ((prompt_tokens - cached_tokens) * prices[0] + cached_tokens * cached_price
+            + completion_tokens * prices[1]) / 1_000_000
+
+
+def estimate_image_cost(model, quality, size, n=1):
+    """Estimates the USD cost of an image generation request"""
+    return IMAGE_PRICES.get((model, quality or "standard", size or "1024x1024"), 0.0) * (n or 1)
+
+
+def record_call(feature, kind, model, status, total_ms=None, queue_ms=None, server_ms=None,
+                prompt_tokens=0, completion_tokens=0, retries=0, cache_hit=False,
+                coalesced=False, cost_usd=0.0, error=None, cached_tokens=0):
+    """
+    Records a single LLM call in the local metrics store
+
+    Args:
+        feature (str): Name of the feature that made the call (e.g. 'pitch_deck')
+        kind (str): 'chat' or 'image'
+        model (str): Model used for the call
+        status (str): 'ok' or 'error'
+        total_ms (float): Wall-clock latency of the call in milliseconds
+        queue_ms (float): Time spent waiting for a scheduler slot or backing off
+        server_ms (float): Server-side processing time reported by the API
+        prompt_tokens (int): Prompt tokens used
+        completion_tokens (int): Completion tokens used
+        retries (int): Number of retries before the call completed
+        cache_hit (bool): Whether the result was served from a local cache
+        coalesced (bool): Whether the result was shared from an identical in-flight call
+        cost_usd (float): Estimated cost of the call
+        error (str): Error type and message if the call failed
+        cached_tokens (int): Prompt tokens the API served from its prompt cache
+    """
+    try:
+        with _lock:
+            connection = _get_connection()
+            connection.execute(
+                "INSERT INTO llm_calls (ts, feature, kind, model, status, total_ms, queue_ms, server_ms, "
+                "prompt_tokens, completion_tokens, retries, cache_hit, coalesced, cost_usd, error, "
+                "cached_tokens) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), feature, kind, model, status, total_ms, queue_ms, server_ms,
+                 prompt_tokens, completion_tokens, retries, int(bool(cache_hit)),
+                 int(bool(coalesced)), cost_usd, error, cached_tokens or 0)
+            )
+            connection.commit()
+    except Exception as e:
+        # Metrics must never break a generation
+        print(f"Error recording LLM metrics: {e}")
+
+
+def record_cache_hit(feature, kind="chat", model=None):
+    """Records a call that was answered from a local cache without reaching the API"""
+    record_call(feature, kind, model, "ok", total_ms=0.0, cache_hit=True)
+
+
+def percentile(values, pct):
+    """Returns the nearest-rank percentile of a list of numbers (None if empty)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def get_feature_summary(since=None):
+    """
+    Summarizes recorded calls per feature
+
+    Args:
+        since (float): Only include calls recorded after this UNIX timestamp
+
+    Returns:
+        list: One dict per feature with call counts, error counts, cache hits,
+              coalesced calls, p50/p95 latency, token totals (including prompt
+              tokens served from OpenAI's prompt cache) and spend
+    """
+    query = ("SELECT feature, status, total_ms, prompt_tokens, completion_tokens, "
+             "cache_hit, coalesced, cost_usd, cached_tokens FROM llm_calls")
+    params = ()
+    if since is not None:
+        query += " WHERE ts >= ?"
+        params = (since,)
+
+    with _lock:
+        rows = _get_connection().execute(query, params).fetchall()
+
+    features = {}
+    for (feature, status, total_ms, prompt_tokens, completion_tokens, cache_hit, coalesced, cost_usd,
+         cached_tokens) in rows:
+        summary = features.setdefault(feature, {
+            "feature": feature,
+            "calls": 0,
+            "errors": 0,
+            "cache_hits": 0,
+            "coalesced": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "cached_tokens": 0,
+            "spend_usd": 0.0,
+            "_latencies": []
+        })
+        summary["calls"] += 1
+        summary["errors"] += 1 if status != "ok" else 0
+        summary["cache_hits"] += cache_hit or 0
+        summary["coalesced"] += coalesced or 0
+        summary["prompt_tokens"] += prompt_tokens or 0
+        summary["completion_tokens"] += completion_tokens or 0
+        summary["cached_tokens"] += cached_tokens or 0
+        summary["spend_usd"] += cost_usd or 0.0
+        # Cache hits and coalesced waits are not API calls, so they stay out of the percentiles
+        if status == "ok" and not cache_hit and not coalesced and total_ms is not None:
+            summary["_latencies"].append(total_ms)
+
+    results = []
+    for summary in features.values():
+        latencies = summary.pop("_latencies")
+        summary["p50_ms"] = percentile(latencies, 50)
+        summary["p95_ms"] = percentile(latencies, 95)
+        results.append(summary)
+
+    return sorted(results, key=lambda s: s["spend_usd"], reverse=True)
+
+
+def get_average_tokens(feature, model=None, min_calls=5):
+    """
+    Returns the average prompt and completion tokens of successful API calls for a feature
+
+    Args:
+        feature (str): Feature name (e.g. 'adaptation_score')
+        model (str): Only include calls to models starting with this name
+        min_calls (int): Minimum number of recorded calls for the averages to be returned
+
+    Returns:
+        tuple: (prompt_tokens, completion_tokens), or None if fewer than min_calls were recorded
+    """
+    query = ("SELECT COUNT(*), AVG(prompt_tokens), AVG(completion_tokens) FROM llm_calls "
+             "WHERE feature = ? AND status = 'ok' AND cache_hit = 0 AND coalesced = 0")
+    params = [feature]
+    if model:
+        query += " AND model LIKE ?"
+        params.append(f"{model}%")
+    with _lock:
+        calls, prompt_tokens, completion_tokens = _get_connection().execute(query, params).fetchone()
+    if calls < min_calls:
+        return None
+    return prompt_tokens, completion_tokens
+
+
+def get_model_summary(since=None):
+    """
+    Summarizes recorded API calls per feature and model, e.g. to compare cascade tiers
+
+    Args:
+        since (float): Only include calls recorded after this UNIX timestamp
+
+    Returns:
+        list: One dict per (feature, model) with calls, errors, p50/p95 latency,
+              spend and average cost per successful call
+    """
+    query = ("SELECT feature, model, status, total_ms, cost_usd FROM llm_calls "
+             "WHERE kind = 'chat' AND cache_hit = 0 AND coalesced = 0")
+    params = ()
+    if since is not None:
+        query += " AND ts >= ?"
+        params = (since,)
+
+    with _lock:
+        rows = _get_connection().execute(query, params).fetchall()
+
+    groups = {}
+    for feature, model, status, total_ms, cost_usd in rows:
+        summary = groups.setdefault((feature, model), {
+            "feature": feature, "model": model, "calls": 0, "errors": 0, "spend_usd": 0.0, "_latencies": []
+        })
+        summary["calls"] += 1
+        summary["errors"] += 1 if status != "ok" else 0
+        summary["spend_usd"] += cost_usd or 0.0
+        if status == "ok" and total_ms is not None:
+            summary["_latencies"].append(total_ms)
+
+    results = []
+    for summary in groups.values():
+        latencies = summary.pop("_latencies")
+        summary["p50_ms"] = percentile(latencies, 50)
+        summary["p95_ms"] = percentile(latencies, 95)
+        successful = summary["calls"] - summary["errors"]
+        summary["cost_per_call_usd"] = summary["spend_usd"] / successful if successful else None
+        results.append(summary)
+    return sorted(results, key=lambda s: (s["feature"], s["model"] or ""))
+
+
+def record_cascade_outcome(feature, draft_model, premium_model, escalated, reason=None,
+                           draft_score=None, final_score=None, draft_ms=None, premium_ms=None):
+    """
+    Records how one item went through the model cascade
+
+    Args:
+        feature (str): Name of the feature that made the calls
+        draft_model (str): Model used for the first pass
+        premium_model (str): Model used when escalating
+        escalated (bool): Whether the premium model was called
+        reason (str): Why the item escalated ('above_threshold', 'invalid_fields', 'audit', ...)
+        draft_score (float): Score of the draft result, for features that produce one
+        final_score (float): Score of the premium result, if escalated
+        draft_ms (float): Latency of the draft pass in milliseconds
+        premium_ms (float): Latency of the premium pass in milliseconds
+    """
+    try:
+        with _lock:
+            connection = _get_connection()
+            connection.execute(
+                "INSERT INTO cascade_outcomes (ts, feature, draft_model, premium_model, escalated, reason, "
+                "draft_score, final_score, draft_ms, premium_ms) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), feature, draft_model, premium_model, int(bool(escalated)), reason,
+                 draft_score, final_score, draft_ms, premium_ms)
+            )
+            connection.commit()
+    except Exception as e:
+        print(f"Error recording cascade outcome: {e}")
+
+
+def get_cascade_summary(since=None):
+    """
+    Summarizes cascade outcomes per feature
+
+    Agreement is measured on items that ran through both tiers and produce a
+    score: the mean absolute difference between the tiers' scores and the share
+    of items where they were within one point.
+
+    Args:
+        since (float): Only include outcomes recorded after this UNIX timestamp
+
+    Returns:
+        list: One dict per feature with items, escalations, escalation_rate,
+              reasons, p50 latency per tier, mean_abs_diff and agreement_rate
+    """
+    query = ("SELECT feature, escalated, reason, draft_score, final_score, draft_ms, premium_ms "
+             "FROM cascade_outcomes")
+    params = ()
+    if since is not None:
+        query += " WHERE ts >= ?"
+        params = (since,)
+
+    with _lock:
+        rows = _get_connection().execute(query, params).fetchall()
+
+    features = {}
+    for feature, escalated, reason, draft_score, final_score, draft_ms, premium_ms in rows:
+        summary = features.setdefault(feature, {
+            "feature": feature, "items": 0, "escalations": 0, "reasons": {},
+            "_draft_ms": [], "_premium_ms": [], "_diffs": []
+        })
+        summary["items"] += 1
+        if escalated:
+            summary["escalations"] += 1
+            summary["reasons"][reason] = summary["reasons"].get(reason, 0) + 1
+        if draft_ms is not None:
+            summary["_draft_ms"].append(draft_ms)
+        if premium_ms is not None:
+            summary["_premium_ms"].append(premium_ms)
+        if draft_score is not None and final_score is not None:
+            summary["_diffs"].append(abs(draft_score - final_score))
+
+    results = []
+    for summary in features.values():
+        diffs = summary.pop("_diffs")
+        summary["escalation_rate"] = summary["escalations"] / summary["items"]
+        summary["draft_p50_ms"] = percentile(summary.pop("_draft_ms"), 50)
+        summary["premium_p50_ms"] = percentile(summary.pop("_premium_ms"), 50)
+        summary["mean_abs_diff"] = sum(diffs) / len(diffs) if diffs else None
+        summary["agreement_rate"] = sum(1 for diff in diffs if diff <= 1.0) / len(diffs) if diffs else None
+        results.append(summary)
+    return sorted(results, key=lambda s: s["items"], reverse=True)
+
+
+def get_recent_calls(limit=50):
+    """Returns the most recent recorded calls as a list of dicts, newest first"""
+    with _lock:
+        cursor = _get_connection().execute(
+            "SELECT * FROM llm_calls ORDER BY id DESC LIMIT ?", (limit,)
+        )
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def clear_metrics():
+    """Deletes all recorded calls"""
+    with _lock:
+        connection = _get_connection()
+        connection.execute("DELETE FROM llm_calls")
+        connection.execute("DELETE FROM cascade_outcomes")
+        connection.commit()
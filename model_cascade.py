@@ -0,0 +1,155 @@
+import os
+import random
+import time
+
+from llm_metrics import record_cascade_outcome
+
+DEFAULT_DRAFT_MODEL = "gpt-4o-mini"
+
+# the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
+# do not change this unless explicitly requested by the user
+DEFAULT_PREMIUM_MODEL = "gpt-4o"
+
+# Draft adaptation scores at or above this are confirmed by the premium model
+DEFAULT_ESCALATE_ABOVE = 6.5
+
+
+def get_premium_model():
+    """Returns the model used for full-quality calls (PREMIUM_MODEL, default gpt-4o)"""
+    return os.environ.get("PREMIUM_MODEL") or DEFAULT_PREMIUM_MODEL
+
+
+def get_cascade_settings():
+    """
+    Reads the model cascade configuration from the environment
+
+    MODEL_CASCADE=1 enables the cascade. DRAFT_MODEL and PREMIUM_MODEL choose
+    the tiers, CASCADE_ESCALATE_ABOVE the draft score from which adaptation
+    scores are confirmed, and CASCADE_AUDIT_RATE the share of non-escalated
+    items that are re-run on the premium model anyway to measure agreement.
+
+    Returns:
+        dict: enabled, draft_model, premium_model, escalate_above and audit_rate
+    """
+    return {
+        "enabled": os.environ.get("MODEL_CASCADE", "").strip().lower() in ("1", "true", "yes", "on"),
+        "draft_model": os.environ.get("DRAFT_MODEL") or DEFAULT_DRAFT_MODEL,
+        "premium_model": get_premium_model(),
+        "escalate_above": float(os.environ.get("CASCADE_ESCALATE_ABOVE", DEFAULT_ESCALATE_ABOVE)),
+        "audit_rate": float(os.environ.get("CASCADE_AUDIT_RATE", "0.05")),
+    }
+
+
+def run_cascade(feature, request_fn, escalation_reason, score_fn=None, default_model=None):
+    """
+    Runs a request on the draft model and escalates to the premium model when needed
+
+    With the cascade disabled the request goes straight to default_model (or
+    the premium model).
+    Otherwise the draft result is returned unless escalation_reason flags it
+    (or the draft call fails), in which case the premium result replaces it.
+    Every item's path through the cascade is recorded for the per-tier stats.
+
+    Args:
+        feature (str): Name of the calling feature, used to group stats
+        request_fn (callable): Function called with a model name, returning a result
+        escalation_reason (callable): Function returning why a draft result needs the
+                                      premium model (e.g. 'above_threshold'), or None
+        score_fn (callable): Optional function returning a comparable score of a result
+        default_model (str): Model to use when the cascade is disabled
+
+    Returns:
+        tuple: (result, model) with the result that was kept and the model that produced it
+    """
+    settings = get_cascade_settings()
+    if not settings["enabled"]:
+        model = default_model or settings["premium_model"]
+        return request_fn(model), model
+
+    draft_model, premium_model = settings["draft_model"], settings["premium_model"]
+    start = time.perf_counter()
+    try:
+        draft = request_fn(draft_model)
+        reason = escalation_reason(draft)
+    except Exception as e:
+        print(f"Draft {feature} call on {draft_model} failed, escalating: {e}")
+        draft, reason = None, "draft_error"
+    draft_ms = (time.perf_counter() - start) * 1000
+    draft_score = score_fn(draft) if score_fn and draft is not None else None
+
+    if reason is None and random.random() >= settings["audit_rate"]:
+        record_cascade_outcome(feature, draft_model, premium_model, False,
+                               draft_score=draft_score, draft_ms=draft_ms)
+        return draft, draft_model
+
+    start = time.perf_counter()
+    try:
+        final = request_fn(premium_model)
+    except Exception as e:
+        if draft is None:
+            raise
+        # Keep the usable draft rather than failing the item
+        print(f"Premium {feature} call on {premium_model} failed, keeping the draft: {e}")
+        record_cascade_outcome(feature, draft_model, premium_model, True, reason="premium_error",
+                               draft_score=draft_score, draft_ms=draft_ms)
+        return draft, draft_model
+    premium_ms = (time.perf_counter() - start) * 1000
+    record_cascade_outcome(feature, draft_model, premium_model, True, reason=reason or "audit",
+                           draft_score=draft_score,
+                           final_score=score_fn(final) if score_fn else None,
+                           draft_ms=draft_ms, premium_ms=premium_ms)
+    return final, premium_model
+
+
+async def run_cascade_async(feature, request_fn, escalation_reason, score_fn=None, default_model=None):
+    """
+    Async counterpart of run_cascade, for a request_fn returning a coroutine
+
+    Args:
+        feature (str): Name of the calling feature, used to group stats
+        request_fn (callable): Function called with a model name, returning a coroutine of a result
+        escalation_reason (callable): Function returning why a draft result needs the
+                                      premium model (e.g. 'above_threshold'), or None
+        score_fn (callable): Optional function returning a comparable score of a result
+        default_model (str): Model to use when the cascade is disabled
+
+    Returns:
+        tuple: (result, model) with the result that was kept and the model that produced it
+    """
+    settings = get_cascade_settings()
+    if not settings["enabled"]:
+        model = default_model or settings["premium_model"]
+        return await request_fn(model), model
+
+    draft_model, premium_model = settings["draft_model"], settings["premium_model"]
+    start = time.perf_counter()
+    try:
+        draft = await request_fn(draft_model)
+        reason = escalation_reason(draft)
+    except Exception as e:
+        print(f"Draft {feature} call on {draft_model} failed, escalating: {e}")
+        draft, reason = None, "draft_error"
+    draft_ms = (time.perf_counter() - start) * 1000
+    draft_score = score_fn(draft) if score_fn and draft is not None else None
+
+    if reason is None and random.random() >= settings["audit_rate"]:
+        record_cascade_outcome(feature, draft_model, premium_model, False,
+                               draft_score=draft_score, draft_ms=draft_ms)
+        return draft, draft_model
+
+    start = time.perf_counter()
+    try:
+        final = await request_fn(premium_model)
+    except Exception as e:
+        if draft is None:
+            raise
+        print(f"Premium {feature} call on {premium_model} failed, keeping the draft: {e}")
+        record_cascade_outcome(feature, draft_model, premium_model, True, reason="premium_error",
+                               draft_score=draft_score, draft_ms=draft_ms)
+        return draft, draft_model
+    premium_ms = (time.perf_counter() - start) * 1000
+    record_cascade_outcome(feature, draft_model, premium_model, True, reason=reason or "audit",
+                           draft_score=draft_score,
+                           final_score=score_fn(final) if score_fn else None,
+                           draft_ms=draft_ms, premium_ms=premium_ms)
+    return final, premium_model
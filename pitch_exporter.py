@@ -20,6 +20,13 @@ def download_image(url):
         print(f"Error downloading image: {e}")
         return None
 
+def _set_style(styles, style):
+    """Adds a paragraph style, replacing the sample stylesheet's style of the same name"""
+    if style.name in styles:
+        styles.byName[style.name] = style
+    else:
+        styles.add(style)
+
 def generate_pitch_pdf(
     title, 
     adaptation_type,
@@ -58,34 +65,34 @@ def generate_pitch_pdf(
     
     # Get styles
     styles = getSampleStyleSheet()
-    styles.add(ParagraphStyle(name='Title',
+    _set_style(styles, ParagraphStyle(name='Title',
                              fontName='Helvetica-Bold',
                              fontSize=24,
                              alignment=1,
                              spaceAfter=12))
     
-    styles.add(ParagraphStyle(name='Subtitle',
+    _set_style(styles, ParagraphStyle(name='Subtitle',
                              fontName='Helvetica-Bold',
                              fontSize=18,
                              alignment=1,
                              spaceAfter=12))
     
-    styles.add(ParagraphStyle(name='Heading1',
+    _set_style(styles, ParagraphStyle(name='Heading1',
                              fontName='Helvetica-Bold',
                              fontSize=16,
                              spaceAfter=10))
     
-    styles.add(ParagraphStyle(name='Heading2',
+    _set_style(styles, ParagraphStyle(name='Heading2',
                              fontName='Helvetica-Bold',
                              fontSize=14,
                              spaceAfter=8))
     
-    styles.add(ParagraphStyle(name='Normal',
+    _set_style(styles, ParagraphStyle(name='Normal',
                              fontName='Helvetica',
                              fontSize=12,
                              spaceAfter=6))
     
-    styles.add(ParagraphStyle(name='Bullet',
+    _set_style(styles, ParagraphStyle(name='Bullet',
                              fontName='Helvetica',
                              fontSize=12,
                              leftIndent=20,
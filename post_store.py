@@ -0,0 +1,105 @@
+import os
+import sqlite3
+import threading
+import time
+
+from utils import get_data_dir
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    selftext TEXT,
+    score INTEGER DEFAULT 0,
+    num_comments INTEGER DEFAULT 0,
+    created_utc TEXT,
+    subreddit TEXT,
+    permalink TEXT,
+    url TEXT,
+    source TEXT,
+    ingested_at REAL
+)
+"""
+
+_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_posts_subreddit_score ON posts (subreddit COLLATE NOCASE, score DESC)",
+]
+
+POST_COLUMNS = ["id", "title", "selftext", "score", "num_comments", "created_utc",
+                "subreddit", "permalink", "url"]
+
+_lock = threading.Lock()
+_connection = None
+
+
+def _get_connection():
+    """Opens (once per process) the SQLite database backing the post store"""
+    global _connection
+    if _connection is None:
+        db_path = os.path.join(get_data_dir(), "posts.db")
+        _connection = sqlite3.connect(db_path, check_same_thread=False)
+        _connection.execute("PRAGMA journal_mode=WAL")
+        _connection.execute(_SCHEMA)
+        for statement in _INDEXES:
+            _connection.execute(statement)
+        _connection.commit()
+    return _connection
+
+
+def upsert_posts(posts, source="reddit"):
+    """
+    Adds posts to the local post store, refreshing score and comment counts of known posts
+
+    Args:
+        posts (list): Post dicts as returned by fetch_reddit_posts
+        source (str): Where the posts came from (e.g. 'reddit' or 'reddit_dump')
+
+    Returns:
+        int: Number of posts written
+    """
+    now = time.time()
+    rows = [tuple(post.get(column) for column in POST_COLUMNS) + (source, now) for post in posts]
+    if not rows:
+        return 0
+    with _lock:
+        connection = _get_connection()
+        connection.executemany(
+            f"INSERT INTO posts ({', '.join(POST_COLUMNS)}, source, ingested_at) "
+            f"VALUES ({', '.join('?' * (len(POST_COLUMNS) + 2))}) "
+            "ON CONFLICT(id) DO UPDATE SET score = excluded.score, num_comments = excluded.num_comments, "
+            "selftext = excluded.selftext, ingested_at = excluded.ingested_at",
+            rows
+        )
+        connection.commit()
+    return len(rows)
+
+
+def query_posts(subreddit=None, min_score=0, min_comments=0, limit=10):
+    """
+    Returns the highest-scoring stored posts matching the same filters as fetch_reddit_posts
+
+    Args:
+        subreddit (str): Subreddit name (case-insensitive), or None for all subreddits
+        min_score (int): Minimum score (upvotes) for posts
+        min_comments (int): Minimum number of comments for posts
+        limit (int): Maximum number of posts to return
+
+    Returns:
+        list: List of posts as dictionaries
+    """
+    query = f"SELECT {', '.join(POST_COLUMNS)} FROM posts WHERE score >= ? AND num_comments >= ?"
+    params = [min_score, min_comments]
+    if subreddit:
+        query += " AND subreddit = ? COLLATE NOCASE"
+        params.append(subreddit)
+    query += " ORDER BY score DESC LIMIT ?"
+    params.append(limit)
+    with _lock:
+        rows = _get_connection().execute(query, params).fetchall()
+    return [dict(zip(POST_COLUMNS, row)) for row in rows]
+
+
+def count_posts():
+    """Returns the number of posts in the local post store"""
+    with _lock:
+        return _get_connection().execute("SELECT COUNT(*) FROM posts").fetchone()[0]
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Local pre-scorer distilled from GPT adaptation scores
+
+Every successful evaluate_adaptation_potential call is recorded as a training
+example. A ridge regression over hashed word n-grams and engagement features
+is fit to those scores, so posts can be ranked on the CPU in bulk and GPT-4o is
+only needed for the most promising ones.
+
+Usage:
+    python pre_scorer.py train
+    python pre_scorer.py info
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from utils import get_data_dir
+
+# Number of hashed n-gram buckets (a power of two)
+HASH_BUCKETS = 2 ** 18
+
+# Same preview length as the GPT prompt, so both see the same text
+CONTENT_PREVIEW_CHARS = 3000
+
+MIN_TRAINING_EXAMPLES = 20
+
+DENSE_FEATURES = ["log_score", "log_comments", "log_length", "comment_ratio"]
+
+_TOKEN = re.compile(r"[a-z0-9']+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS adaptation_scores (
+    id TEXT PRIMARY KEY,
+    title TEXT,
+    content TEXT,
+    score INTEGER DEFAULT 0,
+    num_comments INTEGER DEFAULT 0,
+    source TEXT,
+    adaptation_score REAL NOT NULL,
+    model TEXT,
+    scored_at REAL
+)
+"""
+
+_lock = threading.Lock()
+_connection = None
+
+
+def _get_connection():
+    """Opens (once per process) the SQLite database holding the training examples"""
+    global _connection
+    if _connection is None:
+        db_path = os.path.join(get_data_dir(), "adaptation_scores.db")
+        _connection = sqlite3.connect(db_path, check_same_thread=False)
+        _connection.execute("PRAGMA journal_mode=WAL")
+        _connection.execute(_SCHEMA)
+        _connection.commit()
+    return _connection
+
+
+def record_adaptation_score(title, content, score, num_comments, adaptation_score, model="gpt-4o", source=None):
+    """
+    Stores a GPT adaptation score as a training example for the pre-scorer
+
+    Re-scoring the same post replaces its earlier example.
+
+    Args:
+        title (str): Post title
+        content (str): Post content
+        score (int): Post upvotes (votes for Wattpad stories)
+        num_comments (int): Number of comments (reads for Wattpad stories)
+        adaptation_score (float): Score between 1 and 10 returned by the model
+        model (str): Model that produced the score
+        source (str): 'reddit' or 'wattpad', if known
+    """
+    content = (content or "")[:CONTENT_PREVIEW_CHARS]
+    example_id = hashlib.sha256(f"{title}\n{content}".encode("utf-8")).hexdigest()
+    try:
+        with _lock:
+            connection = _get_connection()
+            connection.execute(
+                "INSERT OR REPLACE INTO adaptation_scores (id, title, content, score, num_comments, source, "
+                "adaptation_score, model, scored_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (example_id, title, content, int(score or 0), int(num_comments or 0), source,
+                 float(adaptation_score), model, time.time())
+            )
+            connection.commit()
+    except Exception as e:
+        # Collecting training data must never break scoring
+        print(f"Error recording adaptation score: {e}")
+
+
+def load_training_examples():
+    """Returns all recorded training examples as item dicts with an adaptation_score key"""
+    with _lock:
+        rows = _get_connection().execute(
+            "SELECT title, content, score, num_comments, source, adaptation_score FROM adaptation_scores"
+        ).fetchall()
+    return [
+        {"title": title, "content": content, "score": score, "num_comments": num_comments,
+         "source": source, "adaptation_score": adaptation_score}
+        for title, content, score, num_comments, source, adaptation_score in rows
+    ]
+
+
+def count_training_examples():
+    """Returns the number of recorded training examples"""
+    with _lock:
+        return _get_connection().execute("SELECT COUNT(*) FROM adaptation_scores").fetchone()[0]
+
+
+def hash_ngrams(item):
+    """Returns the hashed unigram and bigram buckets of an item's title and content"""
+    text = f"{item.get('title') or ''}\n{(item.get('content') or '')[:CONTENT_PREVIEW_CHARS]}".lower()
+    tokens = _TOKEN.findall(text)
+    if item.get("source"):
+        tokens.append(f"__source_{item['source']}")
+    unigrams = np.fromiter((zlib.crc32(token.encode("utf-8")) for token in tokens),
+                           dtype=np.uint64, count=len(tokens))
+    # Bigram buckets are derived from the unigram hashes without hashing strings again
+    bigrams = (unigrams[:-1] * np.uint64(1000003) + unigrams[1:]) if len(unigrams) > 1 else unigrams[:0]
+    return np.unique(np.concatenate([unigrams, bigrams]) % np.uint64(HASH_BUCKETS)).astype(np.int64)
+
+
+def _dense_features(items):
+    """Returns the raw engagement features of each item as an (n, len(DENSE_FEATURES)) array"""
+    score = np.array([max(0, float(item.get("score") or 0)) for item in items])
+    comments = np.array([max(0, float(item.get("num_comments") or 0)) for item in items])
+    length = np.array([len(item.get("content") or "") for item in items], dtype=float)
+    return np.column_stack([
+        np.log1p(score),
+        np.log1p(comments),
+        np.log1p(length),
+        np.log1p(comments) - np.log1p(score),
+    ]).reshape(len(items), len(DENSE_FEATURES))
+
+
+def featurize(items, dense_mean, dense_std):
+    """
+    Builds the sparse feature matrix of a batch of items
+
+    Hashed n-gram features are binary and scaled by 1/sqrt(n) per item; the
+    standardized engagement features follow in columns HASH_BUCKETS and up.
+
+    Args:
+        items (list): Dicts with title, content, score and num_comments keys
+        dense_mean (np.ndarray): Training mean of each engagement feature
+        dense_std (np.ndarray): Training standard deviation of each engagement feature
+
+    Returns:
+        tuple: (rows, cols, vals) coordinate arrays of the non-zero features
+    """
+    buckets = [hash_ngrams(item) for item in items]
+    counts = np.array([len(b) for b in buckets], dtype=np.int64)
+    rows = np.repeat(np.arange(len(items)), counts)
+    cols = np.concatenate(buckets) if buckets else np.zeros(0, dtype=np.int64)
+    vals = np.repeat(1.0 / np.sqrt(np.maximum(counts, 1)), counts)
+
+    dense = (_dense_features(items) - dense_mean) / dense_std
+    dense_rows = np.repeat(np.arange(len(items)), len(DENSE_FEATURES))
+    dense_cols = np.tile(HASH_BUCKETS + np.arange(len(DENSE_FEATURES)), len(items))
+    return (np.concatenate([rows, dense_rows]), np.concatenate([cols, dense_cols]),
+            np.concatenate([vals, dense.ravel()]))
+
+
+def _fit_ridge(rows, cols, vals, targets, n_items, alpha=1.0, iterations=100):
+    """Solves (X'X + alpha I) w = X'y with conjugate gradients on the coordinate matrix"""
+    dims = HASH_BUCKETS + len(DENSE_FEATURES)
+
+    def apply(w):
+        predictions = np.bincount(rows, weights=vals * w[cols], minlength=n_items)
+        return np.bincount(cols, weights=vals * predictions[rows], minlength=dims) + alpha * w
+
+    weights = np.zeros(dims)
+    residual = np.bincount(cols, weights=vals * targets[rows], minlength=dims)
+    direction = residual.copy()
+    residual_norm = residual @ residual
+    for _ in range(iterations):
+        if residual_norm < 1e-10:
+            break
+        step = apply(direction)
+        rate = residual_norm / (direction @ step)
+        weights += rate * direction
+        residual -= rate * step
+        new_norm = residual @ residual
+        direction = residual + (new_norm / residual_norm) * direction
+        residual_norm = new_norm
+    return weights
+
+
+class PreScorer:
+    """Linear adaptation-score model over hashed n-grams and engagement features"""
+
+    def __init__(self, weights, bias, dense_mean, dense_std, seen, meta=None):
+        self.weights = weights
+        self.bias = bias
+        self.dense_mean = dense_mean
+        self.dense_std = dense_std
+        self.seen = seen
+        self.meta = meta or {}
+
+    @classmethod
+    def train(cls, examples, alpha=1.0):
+        """
+        Fits a pre-scorer to recorded GPT scores
+
+        Args:
+            examples (list): Item dicts with an adaptation_score key
+            alpha (float): L2 regularization strength
+
+        Returns:
+            PreScorer: The trained model
+        """
+        targets = np.array([float(example["adaptation_score"]) for example in examples])
+        dense = _dense_features(examples)
+        dense_mean = dense.mean(axis=0)
+        dense_std = np.where(dense.std(axis=0) > 0, dense.std(axis=0), 1.0)
+        rows, cols, vals = featurize(examples, dense_mean, dense_std)
+
+        bias = float(targets.mean())
+        weights = _fit_ridge(rows, cols, vals, targets - bias, len(examples), alpha=alpha)
+        seen = np.zeros(HASH_BUCKETS, dtype=bool)
+        seen[cols[cols < HASH_BUCKETS]] = True
+        return cls(weights, bias, dense_mean, dense_std, seen, meta={
+            "examples": len(examples),
+            "alpha": alpha,
+            "trained_at": time.time(),
+        })
+
+    def predict(self, items):
+        """
+        Scores a batch of items
+
+        Args:
+            items (list): Dicts with title, content, score and num_comments keys
+
+        Returns:
+            tuple: (scores, confidence) arrays. Scores are clipped to 1-10; confidence
+                   is the share of an item's n-grams that occurred in the training data.
+        """
+        if not items:
+            return np.zeros(0), np.zeros(0)
+        rows, cols, vals = featurize(items, self.dense_mean, self.dense_std)
+        raw = self.bias + np.bincount(rows, weights=vals * self.weights[cols], minlength=len(items))
+
+        hashed = cols < HASH_BUCKETS
+        ngram_counts = np.bincount(rows[hashed], minlength=len(items))
+        seen_counts = np.bincount(rows[hashed], weights=self.seen[cols[hashed]], minlength=len(items))
+        confidence = seen_counts / np.maximum(ngram_counts, 1)
+        return np.clip(raw, 1.0, 10.0), confidence
+
+    def save(self, path=None):
+        """Writes the model to disk (defaults to the shared model path)"""
+        path = path or get_model_path()
+        temp_path = f"{path}.tmp.npz"
+        np.savez_compressed(temp_path, weights=self.weights, bias=np.array(self.bias),
+                            dense_mean=self.dense_mean, dense_std=self.dense_std,
+                            seen=self.seen, meta=np.array(json.dumps(self.meta)))
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path=None):
+        """Reads a model written by save(), or returns None if there is none"""
+        path = path or get_model_path()
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                return cls(data["weights"], float(data["bias"]), data["dense_mean"], data["dense_std"],
+                           data["seen"], meta=json.loads(str(data["meta"])))
+        except (OSError, ValueError, KeyError) as e:
+            if os.path.exists(path):
+                print(f"Error loading pre-scorer: {e}")
+            return None
+
+
+def get_model_path():
+    """Returns the path of the shared pre-scorer model file"""
+    return os.path.join(get_data_dir("models"), "pre_scorer.npz")
+
+
+_pre_scorer = None
+_pre_scorer_mtime = None
+_pre_scorer_lock = threading.Lock()
+
+
+def get_pre_scorer():
+    """Returns the trained pre-scorer, reloading it after retraining, or None if none is trained yet"""
+    global _pre_scorer, _pre_scorer_mtime
+    path = get_model_path()
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    with _pre_scorer_lock:
+        if _pre_scorer is None or mtime != _pre_scorer_mtime:
+            _pre_scorer = PreScorer.load(path)
+            _pre_scorer_mtime = mtime
+        return _pre_scorer
+
+
+def train_pre_scorer(alpha=1.0, holdout=0.2, seed=0):
+    """
+    Trains the pre-scorer on all recorded GPT scores and saves it
+
+    A holdout split is scored first to report accuracy, then the model is
+    refit on every example.
+
+    Args:
+        alpha (float): L2 regularization strength
+        holdout (float): Share of examples held out for the accuracy report
+        seed (int): Seed of the holdout split
+
+    Returns:
+        dict: examples, holdout RMSE of the model and of always predicting the mean,
+              or an error message if there are too few examples
+    """
+    examples = load_training_examples()
+    if len(examples) < MIN_TRAINING_EXAMPLES:
+        return {"examples": len(examples),
+                "error": f"Need at least {MIN_TRAINING_EXAMPLES} scored posts to train, found {len(examples)}."}
+
+    order = np.random.default_rng(seed).permutation(len(examples))
+    held_out = max(1, int(len(examples) * holdout))
+    test = [examples[i] for i in order[:held_out]]
+    train = [examples[i] for i in order[held_out:]]
+    model = PreScorer.train(train, alpha=alpha)
+    predictions, _ = model.predict(test)
+    targets = np.array([example["adaptation_score"] for example in test])
+    rmse = float(np.sqrt(np.mean((predictions - targets) ** 2)))
+    baseline_rmse = float(np.sqrt(np.mean((model.bias - targets) ** 2)))
+
+    model = PreScorer.train(examples, alpha=alpha)
+    model.meta.update({"holdout_rmse": rmse, "baseline_rmse": baseline_rmse})
+    model.save()
+    return {"examples": len(examples), "holdout_rmse": rmse, "baseline_rmse": baseline_rmse}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train or inspect the local adaptation pre-scorer")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    train_parser = subparsers.add_parser("train", help="Retrain the pre-scorer on all recorded GPT scores")
+    train_parser.add_argument("--alpha", type=float, default=1.0, help="L2 regularization strength")
+    subparsers.add_parser("info", help="Show the training data and current model")
+    args = parser.parse_args()
+
+    if args.command == "train":
+        start = time.perf_counter()
+        stats = train_pre_scorer(alpha=args.alpha)
+        if stats.get("error"):
+            print(f"❌ {stats['error']}")
+            return
+        print(f"✅ Trained on {stats['examples']:,} scored posts in {time.perf_counter() - start:.1f}s: "
+              f"holdout RMSE {stats['holdout_rmse']:.2f} (always-average baseline {stats['baseline_rmse']:.2f})")
+        print(f"Saved to {get_model_path()}")
+    else:
+        print(f"Recorded GPT scores: {count_training_examples():,}")
+        model = get_pre_scorer()
+        if model is None:
+            print("No pre-scorer trained yet. Run: python pre_scorer.py train")
+            return
+        trained_at = time.strftime("%Y-%m-%d %H:%M", time.localtime(model.meta.get("trained_at", 0)))
+        print(f"Model trained {trained_at} on {model.meta.get('examples', 0):,} posts, "
+              f"holdout RMSE {model.meta.get('holdout_rmse', float('nan')):.2f}")
+
+
+if __name__ == "__main__":
+    main()
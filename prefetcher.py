@@ -0,0 +1,129 @@
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from request_scheduler import RequestCancelled
+
+# Set while a prefetch job runs, so that API calls made by the job are sent with low
+# priority, can be cancelled, and store their responses in the generation cache
+_current_job = contextvars.ContextVar("prefetch_job", default=None)
+
+
+def is_prefetching():
+    """Returns True if the current call is part of a speculative prefetch"""
+    return _current_job.get() is not None
+
+
+def prefetch_cancelled():
+    """Returns True if the current prefetch job has been cancelled"""
+    job = _current_job.get()
+    return job is not None and job.cancelled.is_set()
+
+
+class _PrefetchJob:
+    """A single speculative generation"""
+
+    def __init__(self, name, fn):
+        self.name = name
+        self.fn = fn
+        self.cancelled = threading.Event()
+        self.future = None
+        self.status = "pending"
+
+    def run(self):
+        if self.cancelled.is_set():
+            self.status = "cancelled"
+            return None
+        self.status = "running"
+        token = _current_job.set(self)
+        try:
+            result = self.fn()
+            self.status = "cancelled" if self.cancelled.is_set() else "done"
+            return result
+        except RequestCancelled:
+            self.status = "cancelled"
+            return None
+        except Exception as e:
+            self.status = "failed"
+            print(f"Prefetch '{self.name}' failed: {e}")
+            return None
+        finally:
+            _current_job.reset(token)
+
+    def cancel(self):
+        self.cancelled.set()
+        if self.future is not None and self.future.cancel():
+            self.status = "cancelled"
+
+
+class Prefetcher:
+    """
+    Runs likely-next generations in the background
+
+    Each owner (typically a browser session) has at most one active selection.
+    Prefetching a new selection cancels the jobs of the previous one: jobs that
+    have not started are dropped and queued API requests are abandoned. Requests
+    already sent to the API complete, and their responses expire from the
+    generation cache unused.
+    """
+
+    def __init__(self, max_workers=4):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._selections = {}
+
+    def prefetch(self, owner, selection_key, jobs):
+        """
+        Starts prefetching generations for a selection
+
+        Args:
+            owner (str): Identifier of the session making the selection
+            selection_key (str): Identifier of the selected item and options
+            jobs (dict): Mapping of job name to a zero-argument generation function
+
+        Returns:
+            bool: True if new jobs were started, False if this selection is already being prefetched
+        """
+        with self._lock:
+            current = self._selections.get(owner)
+            if current is not None and current[0] == selection_key:
+                return False
+            if current is not None:
+                for job in current[1]:
+                    job.cancel()
+
+            new_jobs = [_PrefetchJob(name, fn) for name, fn in jobs.items()]
+            for job in new_jobs:
+                job.future = self._executor.submit(job.run)
+            self._selections[owner] = (selection_key, new_jobs)
+            return True
+
+    def cancel(self, owner):
+        """Cancels all prefetch jobs for an owner"""
+        with self._lock:
+            current = self._selections.pop(owner, None)
+        if current is not None:
+            for job in current[1]:
+                job.cancel()
+
+    def status(self, owner):
+        """Returns a mapping of job name to status for an owner's current selection"""
+        with self._lock:
+            current = self._selections.get(owner)
+        if current is None:
+            return {}
+        return {job.name: job.status for job in current[1]}
+
+
+_prefetcher = None
+_prefetcher_lock = threading.Lock()
+
+
+def get_prefetcher():
+    """Returns the process-wide prefetcher"""
+    global _prefetcher
+    with _prefetcher_lock:
+        if _prefetcher is None:
+            _prefetcher = Prefetcher(max_workers=int(os.environ.get("PREFETCH_MAX_WORKERS", 4)))
+        return _prefetcher
@@ -0,0 +1,34 @@
+def format_payload(sections):
+    """
+    Formats the variable part of a prompt as labeled sections
+
+    Args:
+        sections (list): (label, value) pairs in the order they should appear;
+                         pairs with an empty value are left out
+
+    Returns:
+        str: Sections formatted as "LABEL: value", separated by blank lines
+    """
+    return "\n\n".join(f"{label}: {value}" for label, value in sections if value not in (None, ""))
+
+
+def build_messages(instructions, payload):
+    """
+    Builds chat messages with the static instructions ahead of the variable payload
+
+    OpenAI caches the longest previously seen prompt prefix (from 1,024 tokens
+    up), so instructions that never change are sent first, as the system
+    message, and everything that varies per story or per call comes after
+    them in the user message.
+
+    Args:
+        instructions (str): Instruction text that is identical for every call of a feature
+        payload (str): Story-specific content, e.g. from format_payload
+
+    Returns:
+        list: System and user messages
+    """
+    return [
+        {"role": "system", "content": instructions},
+        {"role": "user", "content": payload},
+    ]
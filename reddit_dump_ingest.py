@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Backfills the local post store from Reddit submission dumps
+
+Dumps are newline-delimited JSON submissions, either zstd-compressed (.zst, as
+published by the Pushshift archives) or plain text. They are decompressed as a
+stream and parsed in a process pool, so files with millions of submissions can
+be ingested without loading them into memory or using any API quota.
+
+Usage:
+    python reddit_dump_ingest.py RS_2023-01.zst --subreddit nosleep --subreddit tifu
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+try:
+    import zstandard
+except ImportError:  # Only needed for .zst dumps
+    zstandard = None
+
+from post_store import upsert_posts
+from reddit_scraper import is_adaptable_post, build_post_record
+from text_normalizer import normalize_post_texts
+
+# Pushshift dumps are compressed with a long window and need a matching decompressor limit
+_MAX_WINDOW_SIZE = 2 ** 31
+
+
+def _open_dump(path):
+    """Opens a dump as a binary stream, decompressing .zst files on the fly"""
+    raw = open(path, "rb")
+    if not path.endswith(".zst"):
+        return raw
+    if zstandard is None:
+        raw.close()
+        raise ImportError("Reading .zst dumps requires the zstandard package: pip install zstandard")
+    return zstandard.ZstdDecompressor(max_window_size=_MAX_WINDOW_SIZE).stream_reader(raw, closefd=True)
+
+
+def iter_dump_chunks(path, chunk_bytes=4 * 1024 * 1024):
+    """
+    Streams a dump as chunks of complete lines
+
+    Args:
+        path (str): Path to a .zst or plain NDJSON dump
+        chunk_bytes (int): Approximate decompressed size of each chunk
+
+    Yields:
+        bytes: Chunks that end on a line boundary
+    """
+    remainder = b""
+    with _open_dump(path) as stream:
+        while True:
+            block = stream.read(chunk_bytes)
+            if not block:
+                break
+            block = remainder + block
+            cut = block.rfind(b"\n")
+            if cut == -1:
+                remainder = block
+                continue
+            remainder = block[cut + 1:]
+            yield block[:cut + 1]
+    if remainder.strip():
+        yield remainder
+
+
+def parse_dump_chunk(chunk, min_score=1000, min_comments=100, subreddits=None):
+    """
+    Parses a chunk of dump lines and keeps the submissions that pass the app's filters
+
+    Applies the same filters as fetch_reddit_posts (score, comments, text posts,
+    removed or deleted content) and the same clean_text normalization, applied
+    to the bodies of all kept posts in one batch.
+
+    Args:
+        chunk (bytes): Newline-delimited JSON submissions
+        min_score (int): Minimum score (upvotes) for posts
+        min_comments (int): Minimum number of comments for posts
+        subreddits (set): Lower-case subreddit names to keep, or None for all
+
+    Returns:
+        tuple: (posts, lines, errors) with the matching post dicts, the number of
+               lines read and the number of lines that could not be parsed
+    """
+    posts = []
+    lines = 0
+    errors = 0
+    for line in chunk.splitlines():
+        if not line.strip():
+            continue
+        lines += 1
+        try:
+            submission = json.loads(line)
+            subreddit = submission.get("subreddit") or ""
+            if subreddits and subreddit.lower() not in subreddits:
+                continue
+            if submission.get("removed_by_category"):
+                continue
+            if not is_adaptable_post(submission.get("is_self"), submission.get("selftext"),
+                                     int(submission.get("score") or 0), int(submission.get("num_comments") or 0),
+                                     min_score, min_comments):
+                continue
+            posts.append(build_post_record(
+                post_id=submission["id"],
+                title=submission.get("title", ""),
+                selftext=submission["selftext"],
+                score=int(submission["score"]),
+                num_comments=int(submission["num_comments"]),
+                created_utc=submission.get("created_utc") or 0,
+                subreddit=subreddit,
+                permalink=submission.get("permalink", ""),
+                url=submission.get("url", ""),
+                clean=False
+            ))
+        except (ValueError, KeyError, TypeError):
+            errors += 1
+    return normalize_post_texts(posts), lines, errors
+
+
+def ingest_reddit_dump(path, min_score=1000, min_comments=100, subreddits=None, workers=None,
+                       chunk_bytes=4 * 1024 * 1024, progress_callback=None):
+    """
+    Ingests a Reddit submission dump into the local post store
+
+    Chunks are parsed in a process pool while the next ones are being
+    decompressed; at most two chunks per worker are in flight at a time.
+
+    Args:
+        path (str): Path to a .zst or plain NDJSON dump
+        min_score (int): Minimum score (upvotes) for posts
+        min_comments (int): Minimum number of comments for posts
+        subreddits (list): Subreddit names to keep, or None for all
+        workers (int): Number of parser processes (defaults to the CPU count)
+        chunk_bytes (int): Approximate decompressed size of each chunk
+        progress_callback (callable): Optional function called with the running stats dict
+
+    Returns:
+        dict: lines, stored, errors and seconds for the whole dump
+    """
+    subreddit_filter = {name.lower() for name in subreddits} if subreddits else None
+    workers = workers or os.cpu_count() or 1
+    stats = {"lines": 0, "stored": 0, "errors": 0, "seconds": 0.0}
+    start = time.perf_counter()
+
+    def collect(futures):
+        for future in futures:
+            posts, lines, errors = future.result()
+            stats["lines"] += lines
+            stats["errors"] += errors
+            stats["stored"] += upsert_posts(posts, source="reddit_dump")
+        stats["seconds"] = time.perf_counter() - start
+        if progress_callback:
+            progress_callback(dict(stats))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for chunk in iter_dump_chunks(path, chunk_bytes):
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending.add(executor.submit(parse_dump_chunk, chunk, min_score, min_comments, subreddit_filter))
+        collect(pending)
+
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill the local post store from Reddit submission dumps")
+    parser.add_argument("paths", nargs="+", help="Dump files (.zst or plain NDJSON)")
+    parser.add_argument("--subreddit", action="append", dest="subreddits",
+                        help="Only keep posts from this subreddit (repeatable)")
+    parser.add_argument("--min-score", type=int, default=1000, help="Minimum score (upvotes)")
+    parser.add_argument("--min-comments", type=int, default=100, help="Minimum number of comments")
+    parser.add_argument("--workers", type=int, default=None, help="Number of parser processes")
+    args = parser.parse_args()
+
+    for path in args.paths:
+        print(f"Ingesting {path}...")
+        stats = ingest_reddit_dump(
+            path,
+            min_score=args.min_score,
+            min_comments=args.min_comments,
+            subreddits=args.subreddits,
+            workers=args.workers,
+            progress_callback=lambda s: print(f"  {s['lines']:,} lines, {s['stored']:,} posts stored", end="\r")
+        )
+        rate = stats["lines"] / stats["seconds"] if stats["seconds"] else 0
+        print(f"\n✅ {path}: {stats['stored']:,} posts stored from {stats['lines']:,} lines "
+              f"({stats['errors']:,} unreadable) in {stats['seconds']:.1f}s ({rate:,.0f} lines/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,8 @@ from datetime import datetime
 import time
 import re
 
+from text_normalizer import normalize_post_texts
+
 def fetch_reddit_posts(subreddit, time_filter="week", limit=10, client_id=None, 
                        client_secret=None, user_agent=None, min_score=1000, min_comments=100):
     """
@@ -48,26 +50,24 @@ def fetch_reddit_posts(subreddit, time_filter="week", limit=10, client_id=None,
         # Fetch posts
         posts = []
         for post in sub.top(time_filter=time_filter, limit=limit*2):  # Fetch more to filter
-            # Skip posts that don't meet criteria
-            if post.score < min_score or post.num_comments < min_comments:
-                continue
-                
-            # Skip non-text posts or deleted/removed content
-            if not post.is_self or post.selftext in ['[removed]', '[deleted]', '']:
+            # Skip posts that don't meet criteria, non-text posts and deleted/removed content
+            if not is_adaptable_post(post.is_self, post.selftext, post.score, post.num_comments,
+                                     min_score, min_comments):
                 continue
                 
             # Extract data from the post
-            post_data = {
-                'id': post.id,
-                'title': post.title,
-                'selftext': clean_text(post.selftext),
-                'score': post.score,
-                'num_comments': post.num_comments,
-                'created_utc': datetime.fromtimestamp(post.created_utc).strftime('%Y-%m-%d'),
-                'subreddit': subreddit,
-                'permalink': post.permalink,
-                'url': post.url
-            }
+            post_data = build_post_record(
+                post_id=post.id,
+                title=post.title,
+                selftext=post.selftext,
+                score=post.score,
+                num_comments=post.num_comments,
+                created_utc=post.created_utc,
+                subreddit=subreddit,
+                permalink=post.permalink,
+                url=post.url,
+                clean=False
+            )
             
             posts.append(post_data)
             
@@ -75,7 +75,8 @@ def fetch_reddit_posts(subreddit, time_filter="week", limit=10, client_id=None,
             if len(posts) >= limit:
                 break
                 
-        return posts
+        # Clean all post bodies in one batch
+        return normalize_post_texts(posts)
     
     except Exception as e:
         error_message = str(e)
@@ -93,6 +94,32 @@ def fetch_reddit_posts(subreddit, time_filter="week", limit=10, client_id=None,
         else:
             return f"Error connecting to Reddit: {error_message}"
 
+def is_adaptable_post(is_self, selftext, score, num_comments, min_score, min_comments):
+    """Returns True for text posts that meet the score and comment thresholds and were not removed"""
+    if score < min_score or num_comments < min_comments:
+        return False
+    return bool(is_self) and selftext not in ['[removed]', '[deleted]', '', None]
+
+def build_post_record(post_id, title, selftext, score, num_comments, created_utc, subreddit, permalink, url,
+                      clean=True):
+    """
+    Builds the post dict used throughout the app from raw Reddit submission fields
+
+    Pass clean=False to keep the raw selftext when a whole batch of posts will
+    be cleaned at once with text_normalizer.normalize_post_texts.
+    """
+    return {
+        'id': post_id,
+        'title': title,
+        'selftext': clean_text(selftext) if clean else selftext,
+        'score': score,
+        'num_comments': num_comments,
+        'created_utc': datetime.fromtimestamp(float(created_utc)).strftime('%Y-%m-%d'),
+        'subreddit': subreddit,
+        'permalink': permalink,
+        'url': url
+    }
+
 def clean_text(text):
     """Cleans and formats Reddit post text."""
     # Remove extra whitespace
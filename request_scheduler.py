@@ -0,0 +1,354 @@
+import asyncio
+import os
+import random
+import re
+import threading
+import time
+
+import openai
+
+# Errors that are worth retrying after a pause; everything else fails immediately
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+)
+
+
+class RequestCancelled(Exception):
+    """Raised when a queued request is cancelled before it reaches the API"""
+
+
+def parse_reset_duration(value):
+    """
+    Parses the duration format used by OpenAI rate-limit headers
+
+    Args:
+        value (str): Duration such as '20ms', '1s', '6m0s' or '1h2m3.5s'
+
+    Returns:
+        float: Duration in seconds, or None if the value cannot be parsed
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    total = 0.0
+    matched = False
+    for amount, unit in re.findall(r'(\d+(?:\.\d+)?)(ms|h|m|s)', value):
+        matched = True
+        amount = float(amount)
+        if unit == 'ms':
+            total += amount / 1000
+        elif unit == 'h':
+            total += amount * 3600
+        elif unit == 'm':
+            total += amount * 60
+        else:
+            total += amount
+    return total if matched else None
+
+
+def retry_after_seconds(headers):
+    """Extracts how long the API asked us to wait from response headers (None if absent)"""
+    if not headers:
+        return None
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms is not None:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+    retry_after = parse_reset_duration(headers.get("retry-after"))
+    if retry_after is not None:
+        return retry_after
+    resets = [parse_reset_duration(headers.get(name))
+              for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")]
+    resets = [reset for reset in resets if reset is not None]
+    return max(resets) if resets else None
+
+
+def is_retryable(error):
+    """Returns True if an OpenAI error is transient and the request should be queued again"""
+    if not isinstance(error, RETRYABLE_ERRORS):
+        return False
+    # A 429 caused by an exhausted quota will not clear up by waiting
+    if isinstance(error, openai.RateLimitError) and "insufficient_quota" in str(getattr(error, "code", "") or error):
+        return False
+    return True
+
+
+class RequestScheduler:
+    """
+    Shared scheduler for OpenAI requests with AIMD adaptive concurrency
+
+    Requests wait in a queue for a free slot instead of failing. Every success
+    raises the concurrency limit additively, every rate-limit response halves it
+    and pauses new requests for the period the API asks for. Rate-limit headers
+    on successful responses are used to pause before the limit is hit.
+
+    Low-priority requests (e.g. speculative prefetches) only use up to half of
+    the concurrency limit and yield to any waiting foreground request.
+
+    Threads (run) and asyncio tasks (run_async) share the same slots and limit,
+    so sync and async callers in one process stay within one rate limit.
+    """
+
+    def __init__(self, initial_concurrency=4, min_concurrency=1, max_concurrency=32,
+                 max_retries=6, base_delay=1.0, max_delay=60.0):
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._condition = threading.Condition()
+        self._limit = float(initial_concurrency)
+        self._in_flight = 0
+        self._waiting = 0
+        self._waiting_foreground = 0
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        # (loop, future) pairs of asyncio tasks waiting for a slot
+        self._async_waiters = []
+
+    @property
+    def concurrency_limit(self):
+        """Current number of requests allowed in flight"""
+        return max(self.min_concurrency, int(self._limit))
+
+    def stats(self):
+        """Returns a snapshot of the scheduler state"""
+        with self._condition:
+            return {
+                "concurrency_limit": self.concurrency_limit,
+                "in_flight": self._in_flight,
+                "waiting": self._waiting,
+                "paused_for_s": max(0.0, self._paused_until - time.monotonic())
+            }
+
+    def _admit(self, low_priority):
+        """Takes a slot if one is free (caller holds the lock); returns None then, else how long to pause"""
+        pause = self._paused_until - time.monotonic()
+        limit = self.concurrency_limit
+        if low_priority:
+            limit = max(1, limit // 2)
+        if pause <= 0 and self._in_flight < limit and not (low_priority and self._waiting_foreground):
+            self._in_flight += 1
+            return None
+        return max(pause, 0.0)
+
+    def _enter_queue(self, low_priority):
+        self._waiting += 1
+        if not low_priority:
+            self._waiting_foreground += 1
+
+    def _leave_queue(self, low_priority):
+        self._waiting -= 1
+        if not low_priority:
+            self._waiting_foreground -= 1
+
+    def _acquire(self, low_priority=False, should_cancel=None):
+        with self._condition:
+            self._enter_queue(low_priority)
+            try:
+                while True:
+                    if should_cancel and should_cancel():
+                        raise RequestCancelled()
+                    pause = self._admit(low_priority)
+                    if pause is None:
+                        break
+                    timeout = pause or None
+                    if should_cancel:
+                        # Wake up periodically to notice cancellation
+                        timeout = min(timeout, 0.25) if timeout else 0.25
+                    self._condition.wait(timeout=timeout)
+            finally:
+                self._leave_queue(low_priority)
+
+    async def _acquire_async(self, low_priority=False):
+        loop = asyncio.get_running_loop()
+        with self._condition:
+            self._enter_queue(low_priority)
+        try:
+            while True:
+                with self._condition:
+                    pause = self._admit(low_priority)
+                    if pause is None:
+                        return
+                    waiter = loop.create_future()
+                    self._async_waiters.append((loop, waiter))
+                try:
+                    # Woken by _notify when a slot may have freed up, or when the pause ends
+                    await asyncio.wait([waiter], timeout=pause or None)
+                finally:
+                    with self._condition:
+                        if (loop, waiter) in self._async_waiters:
+                            self._async_waiters.remove((loop, waiter))
+        finally:
+            with self._condition:
+                self._leave_queue(low_priority)
+
+    def _notify(self):
+        """Wakes waiting threads and tasks (caller holds the lock)"""
+        self._condition.notify_all()
+        for loop, waiter in self._async_waiters:
+            try:
+                loop.call_soon_threadsafe(lambda waiter=waiter: waiter.done() or waiter.set_result(None))
+            except RuntimeError:
+                # The waiter's event loop has been closed
+                pass
+        self._async_waiters = []
+
+    def _release(self):
+        with self._condition:
+            self._in_flight -= 1
+            self._notify()
+
+    def _on_success(self, headers):
+        with self._condition:
+            # Additive increase: roughly one extra slot per window of successful requests
+            self._limit = min(self.max_concurrency, self._limit + 1.0 / max(self._limit, 1.0))
+
+            if headers:
+                for kind in ("requests", "tokens"):
+                    remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+                    reset = parse_reset_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                    if remaining is not None and reset is not None and str(remaining).strip() == "0":
+                        self._paused_until = max(self._paused_until, time.monotonic() + reset)
+            self._notify()
+
+    def _on_rate_limited(self, wait_seconds):
+        with self._condition:
+            now = time.monotonic()
+            # Multiplicative decrease, at most once per second so that a burst of
+            # 429s from requests already in flight does not collapse the limit to 1
+            if now - self._last_decrease > 1.0:
+                self._limit = max(float(self.min_concurrency), self._limit / 2)
+                self._last_decrease = now
+            if wait_seconds:
+                self._paused_until = max(self._paused_until, now + wait_seconds)
+
+    def _backoff_delay(self, attempt, retry_after=None):
+        """Full-jitter exponential backoff, never shorter than what the API asked for"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        if retry_after:
+            delay = max(delay, retry_after)
+        return min(delay, self.max_delay)
+
+    def _retry_delay(self, error, attempt, queue_ms):
+        """Returns how long to wait before retrying a failed request, or re-raises the error"""
+        if not is_retryable(error) or attempt >= self.max_retries:
+            error.scheduler_info = {"queue_ms": queue_ms, "retries": attempt}
+            raise error
+        response = getattr(error, "response", None)
+        retry_after = retry_after_seconds(getattr(response, "headers", None))
+        delay = self._backoff_delay(attempt, retry_after)
+        if isinstance(error, openai.RateLimitError):
+            self._on_rate_limited(retry_after)
+        print(f"OpenAI request failed ({type(error).__name__}), retrying in {delay:.1f}s "
+              f"(attempt {attempt + 1}/{self.max_retries})")
+        return delay
+
+    def run(self, request_fn, low_priority=False, should_cancel=None):
+        """
+        Runs a request through the scheduler, retrying transient failures
+
+        Args:
+            request_fn (callable): Zero-argument function performing the request and
+                returning an object with a `headers` mapping (e.g. a raw SDK response)
+            low_priority (bool): Yield to foreground requests and use at most half the slots
+            should_cancel (callable): Optional function returning True once the request
+                is no longer wanted; checked while queued and before each retry
+
+        Returns:
+            tuple: (result, info) where info holds queue_ms and the number of retries
+
+        Raises:
+            RequestCancelled: If should_cancel returned True before the request was sent
+            Exception: The last error once retries are exhausted or the error is not retryable
+        """
+        queue_ms = 0.0
+        attempt = 0
+        while True:
+            wait_start = time.perf_counter()
+            self._acquire(low_priority, should_cancel)
+            queue_ms += (time.perf_counter() - wait_start) * 1000
+            try:
+                result = request_fn()
+            except Exception as e:
+                self._release()
+                delay = self._retry_delay(e, attempt, queue_ms)
+                time.sleep(delay)
+                queue_ms += delay * 1000
+                attempt += 1
+                continue
+
+            self._release()
+            self._on_success(getattr(result, "headers", None))
+            return result, {"queue_ms": queue_ms, "retries": attempt}
+
+    async def run_async(self, request_fn, low_priority=False):
+        """
+        Async counterpart of run for requests made with an async client
+
+        The task waits for a slot without holding a thread, so hundreds of
+        requests can be queued or in flight at once; cancelling the task (e.g.
+        on a deadline) drops it from the queue or releases its slot.
+
+        Args:
+            request_fn (callable): Zero-argument function returning an awaitable that performs
+                the request and resolves to an object with a `headers` mapping
+            low_priority (bool): Yield to foreground requests and use at most half the slots
+
+        Returns:
+            tuple: (result, info) where info holds queue_ms and the number of retries
+
+        Raises:
+            Exception: The last error once retries are exhausted or the error is not retryable
+        """
+        queue_ms = 0.0
+        attempt = 0
+        while True:
+            wait_start = time.perf_counter()
+            await self._acquire_async(low_priority)
+            queue_ms += (time.perf_counter() - wait_start) * 1000
+            try:
+                result = await request_fn()
+            except Exception as e:
+                self._release()
+                delay = self._retry_delay(e, attempt, queue_ms)
+                await asyncio.sleep(delay)
+                queue_ms += delay * 1000
+                attempt += 1
+                continue
+            except BaseException:
+                # Cancelled while the request was in flight
+                self._release()
+                raise
+
+            self._release()
+            self._on_success(getattr(result, "headers", None))
+            return result, {"queue_ms": queue_ms, "retries": attempt}
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Returns the process-wide scheduler shared by all OpenAI calls"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RequestScheduler(
+                initial_concurrency=int(os.environ.get("OPENAI_INITIAL_CONCURRENCY", 4)),
+                max_concurrency=int(os.environ.get("OPENAI_MAX_CONCURRENCY", 32)),
+                max_retries=int(os.environ.get("OPENAI_MAX_RETRIES", 6))
+            )
+        return _scheduler
@@ -0,0 +1,324 @@
+import json
+import os
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from xml.sax.saxutils import escape
+
+from utils import get_data_dir
+
+# Set to 1 to profile every rerun of every session (sessions can also opt in from the sidebar's Ops panel)
+PROFILE_ENV = "PROFILE_RERUNS"
+
+_REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+_STDLIB_DIR = sysconfig.get_paths()["stdlib"]
+
+_local = threading.local()
+_last_summaries = {}
+_sequence = Counter()
+_sequence_lock = threading.Lock()
+
+
+def profiling_enabled(session_switch=False):
+    """Whether reruns are profiled: if PROFILE_RERUNS is set or the session turned it on"""
+    return bool(session_switch) or os.getenv(PROFILE_ENV, "").strip().lower() in ("1", "true", "yes")
+
+
+def _package(filename):
+    """Names the package or app module a source file belongs to"""
+    path = os.path.abspath(filename)
+    if "site-packages" in path:
+        return path.split("site-packages" + os.sep, 1)[1].split(os.sep, 1)[0].removesuffix(".py")
+    if path.startswith(_REPO_DIR + os.sep) and os.sep not in path[len(_REPO_DIR) + 1:]:
+        return os.path.basename(path).removesuffix(".py")
+    if path.startswith(_STDLIB_DIR) or filename.startswith("<"):
+        return None
+    return os.path.basename(path).removesuffix(".py")
+
+
+class RerunProfile:
+    """
+    Sampling profile of one script run, with time attributed to named sections
+
+    A background thread samples the script thread's stack every few
+    milliseconds. Each sample is labelled with the section open at that moment
+    (sidebar, a tab, an OpenAI call, ...), so the flamegraph and the tables show
+    both where the code spent its time and which part of the page caused it.
+    Sections also record their wall and CPU time, which separates blocking
+    waits (API calls) from local work (DataFrame copies, figure construction).
+
+    The profile ends when stop() is called or, for runs cut short by
+    st.rerun(), st.stop() or an error, when the script leaves the stack. The
+    folded stacks, an SVG flamegraph and a summary are then written to the
+    profile directory off the script thread.
+    """
+
+    def __init__(self, session, script_path, directory=None, interval_ms=None):
+        self.session = session
+        self.script_path = os.path.abspath(script_path)
+        self.directory = directory or os.getenv("PROFILE_DIR") or get_data_dir("profiles")
+        self.interval = (interval_ms or float(os.getenv("PROFILE_INTERVAL_MS", "5"))) / 1000
+        self.thread_id = threading.get_ident()
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._end = None
+        self._ended = None
+        self._lock = threading.Lock()
+        self._open = []
+        self._sections = {}
+        self._stacks = Counter()
+        self._leaf_packages = Counter()
+        self._leaf_functions = Counter()
+        self._samples = 0
+        self._last_seen = self._start
+        self._stopped = threading.Event()
+        self._sampler = threading.Thread(target=self._sample_loop, name="rerun-profiler", daemon=True)
+        self._sampler.start()
+
+    def _path(self):
+        return "/".join(name for name, _, _ in self._open)
+
+    def _close(self, depth, end=None, cpu=None):
+        """Closes the open sections deeper than depth"""
+        end = end if end is not None else time.perf_counter()
+        while len(self._open) > depth:
+            path = self._path()
+            _, start, cpu_start = self._open.pop()
+            totals = self._sections.setdefault(path, {"wall_ms": 0.0, "cpu_ms": 0.0, "calls": 0})
+            totals["wall_ms"] += (end - start) * 1000
+            totals["cpu_ms"] = None if cpu is None or totals["cpu_ms"] is None else totals["cpu_ms"] + (cpu - cpu_start) * 1000
+            totals["calls"] += 1
+
+    def mark(self, name):
+        """Starts a top-level section, ending the previous one"""
+        if threading.get_ident() != self.thread_id or self._stopped.is_set():
+            return
+        with self._lock:
+            now, cpu = time.perf_counter(), time.thread_time()
+            self._close(0, now, cpu)
+            self._open.append((name, now, cpu))
+
+    @contextmanager
+    def section(self, name):
+        """Attributes the enclosed block to a section nested in the current one"""
+        if threading.get_ident() != self.thread_id or self._stopped.is_set():
+            yield
+            return
+        with self._lock:
+            depth = len(self._open)
+            self._open.append((name, time.perf_counter(), time.thread_time()))
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._close(depth, cpu=time.thread_time())
+
+    def stop(self):
+        """Ends the profile at the end of the script; the results are written in the background"""
+        if self._stopped.is_set():
+            return
+        with self._lock:
+            self._end = time.perf_counter()
+            self._close(0, self._end, time.thread_time())
+            self._ended = "finished"
+        self._stopped.set()
+
+    def _collapse(self, frame):
+        """Returns the stack below the script's own frame as labels (None once the script has left the stack)"""
+        frames = []
+        while frame is not None:
+            frames.append(frame)
+            if frame.f_code.co_filename == self.script_path:
+                break
+            frame = frame.f_back
+        else:
+            return None
+        labels = []
+        for frame in reversed(frames):
+            code = frame.f_code
+            if code.co_filename == self.script_path:
+                # Lines of the script itself, which is one long module-level function
+                labels.append(f"{os.path.basename(code.co_filename)}:{frame.f_lineno}")
+            else:
+                labels.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        package = next((name for name in (_package(f.f_code.co_filename) for f in frames) if name), "python")
+        return [label.replace(";", ",") for label in labels], package
+
+    def _sample_loop(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            collapsed = self._collapse(frame) if frame is not None else None
+            if collapsed is None:
+                # The run ended without reaching stop(): st.rerun(), st.stop() or an uncaught error
+                with self._lock:
+                    if self._ended is None:
+                        self._end = self._last_seen
+                        self._close(0, self._end)
+                        self._ended = "cut short"
+                break
+            labels, package = collapsed
+            with self._lock:
+                sections = [name for name, _, _ in self._open] or ["(setup)"]
+                self._last_seen = time.perf_counter()
+            self._stacks[";".join(["rerun"] + sections + labels)] += 1
+            self._leaf_packages[package] += 1
+            self._leaf_functions[labels[-1]] += 1
+            self._samples += 1
+        self._stopped.set()
+        try:
+            self._write()
+        except Exception as e:
+            print(f"Error writing rerun profile: {e}")
+
+    def summary(self):
+        """Returns the section, package and function tables of the finished profile"""
+        samples = max(1, self._samples)
+        return {
+            "started_at": self.started_at,
+            "session": self.session,
+            "ended": self._ended,
+            "duration_ms": round(((self._end or self._last_seen) - self._start) * 1000, 1),
+            "samples": self._samples,
+            "interval_ms": self.interval * 1000,
+            "sections": [{"section": path, "wall_ms": round(totals["wall_ms"], 1),
+                          "cpu_ms": round(totals["cpu_ms"], 1) if totals["cpu_ms"] is not None else None,
+                          "calls": totals["calls"]}
+                         for path, totals in sorted(self._sections.items(), key=lambda item: -item[1]["wall_ms"])],
+            "packages": [{"package": name, "samples": count, "share": round(count / samples, 3)}
+                         for name, count in self._leaf_packages.most_common()],
+            "functions": [{"function": name, "samples": count, "share": round(count / samples, 3)}
+                          for name, count in self._leaf_functions.most_common(15)],
+        }
+
+    def _write(self):
+        summary = self.summary()
+        os.makedirs(self.directory, exist_ok=True)
+        with _sequence_lock:
+            _sequence[self.session] += 1
+            sequence = _sequence[self.session]
+        base = os.path.join(self.directory, f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started_at))}"
+                                            f"-{self.session[:8]}-{sequence:04d}")
+        summary["files"] = {"folded": base + ".folded", "flamegraph": base + ".svg", "table": base + ".txt"}
+        with open(base + ".folded", "w", encoding="utf-8") as f:
+            f.writelines(f"{stack} {count}\n" for stack, count in self._stacks.items())
+        with open(base + ".svg", "w", encoding="utf-8") as f:
+            f.write(render_flamegraph(self._stacks, f"Rerun of {os.path.basename(self.script_path)}, "
+                                                    f"{summary['duration_ms']:.0f} ms ({summary['ended']})"))
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            f.write(format_summary(summary))
+        with open(os.path.join(self.directory, "reruns.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps(summary) + "\n")
+        _last_summaries[self.session] = summary
+
+
+def format_summary(summary):
+    """Formats a profile summary as plain-text tables"""
+    lines = [f"Rerun: {summary['duration_ms']:.0f} ms, {summary['samples']} samples every "
+             f"{summary['interval_ms']:.0f} ms ({summary['ended']})", "",
+             f"{'Section':<48} {'Wall ms':>10} {'CPU ms':>10} {'Calls':>6}"]
+    for row in summary["sections"]:
+        cpu = f"{row['cpu_ms']:.1f}" if row["cpu_ms"] is not None else "-"
+        lines.append(f"{row['section'][:48]:<48} {row['wall_ms']:>10.1f} {cpu:>10} {row['calls']:>6}")
+    lines += ["", f"{'Package (innermost non-stdlib frame)':<48} {'Samples':>10} {'Share':>10}"]
+    lines += [f"{row['package'][:48]:<48} {row['samples']:>10} {row['share']:>10.1%}" for row in summary["packages"]]
+    lines += ["", f"{'Function (innermost frame)':<72} {'Samples':>10} {'Share':>10}"]
+    lines += [f"{row['function'][:72]:<72} {row['samples']:>10} {row['share']:>10.1%}" for row in summary["functions"]]
+    return "\n".join(lines) + "\n"
+
+
+def render_flamegraph(stacks, title, width=1200, row_height=16):
+    """
+    Renders folded stacks as a self-contained SVG flamegraph (root at the top)
+
+    Args:
+        stacks (Counter): Sample counts keyed by ';'-joined frames, root first
+        title (str): Title shown above the graph
+        width (int): Width in pixels
+        row_height (int): Height of one frame in pixels
+
+    Returns:
+        str: SVG document; hovering a frame shows its name and sample count
+    """
+    root = {"count": 0, "children": {}}
+    for stack, count in stacks.items():
+        node = root
+        node["count"] += count
+        for name in stack.split(";"):
+            node = node["children"].setdefault(name, {"count": 0, "children": {}})
+            node["count"] += count
+    total = max(1, root["count"])
+    scale = width / total
+    rects, depth_max = [], 0
+    pending = [(root["children"], 0.0, 0)]
+    while pending:
+        children, x, depth = pending.pop()
+        for name, node in sorted(children.items()):
+            frame_width = node["count"] * scale
+            if frame_width >= 0.5:
+                depth_max = max(depth_max, depth)
+                hue = sum(ord(c) for c in name.split(" (")[0]) % 50
+                label = escape(name[:int(frame_width / 7)]) if frame_width > 21 else ""
+                rects.append(
+                    f'<g><title>{escape(name)} ({node["count"]} samples, {100 * node["count"] / total:.1f}%)</title>'
+                    f'<rect x="{x:.1f}" y="{24 + depth * row_height}" width="{frame_width:.1f}" '
+                    f'height="{row_height - 1}" fill="hsl({hue},85%,60%)"/>'
+                    f'<text x="{x + 3:.1f}" y="{24 + depth * row_height + 12}">{label}</text></g>')
+                pending.append((node["children"], x, depth + 1))
+            x += frame_width
+    height = 24 + (depth_max + 1) * row_height + 8
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+            f'font-family="monospace" font-size="11">'
+            f'<text x="4" y="16" font-size="13">{escape(title)}</text>{"".join(rects)}</svg>\n')
+
+
+def start_rerun_profile(session, script_path, enabled=True):
+    """
+    Starts profiling the current script run if enabled
+
+    Args:
+        session (str): Session id, used in file names and to look up the last profile
+        script_path (str): Path of the running script (app.py)
+        enabled (bool): Whether this run is profiled (see profiling_enabled)
+
+    Returns:
+        RerunProfile: The running profile, or None if profiling is off
+    """
+    previous = getattr(_local, "profile", None)
+    if previous is not None:
+        previous.stop()
+    _local.profile = RerunProfile(session, script_path) if enabled else None
+    return _local.profile
+
+
+def stop_rerun_profile():
+    """Ends the current run's profile, if any"""
+    profile = getattr(_local, "profile", None)
+    if profile is not None:
+        profile.stop()
+        _local.profile = None
+
+
+def profile_mark(name):
+    """Starts a top-level section (e.g. 'sidebar', 'tab:develop') of the current run's profile, if any"""
+    profile = getattr(_local, "profile", None)
+    if profile is not None:
+        profile.mark(name)
+
+
+@contextmanager
+def profile_section(name):
+    """Attributes the enclosed block to a nested section of the current run's profile, if any"""
+    profile = getattr(_local, "profile", None)
+    if profile is None:
+        yield
+        return
+    with profile.section(name):
+        yield
+
+
+def get_last_profile(session):
+    """Returns the summary of a session's last written profile (None if there is none yet)"""
+    return _last_summaries.get(session)
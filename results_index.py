@@ -0,0 +1,196 @@
+import numpy as np
+import pandas as pd
+
+from facet_index import FacetIndex
+from utils import format_reddit_url, format_wattpad_url
+
+# Columns shown in the results table, plus the link column built for the visible page only
+DISPLAY_COLUMNS = {
+    "reddit": ['title', 'subreddit', 'score', 'num_comments', 'adaptation_score'],
+    "wattpad": ['title', 'author', 'votes', 'reads', 'parts', 'adaptation_score'],
+}
+
+# Engagement metrics plotted against each other, per source
+ENGAGEMENT_METRICS = {
+    "reddit": ('score', 'num_comments'),
+    "wattpad": ('votes', 'reads'),
+}
+
+# Most points drawn in the engagement scatter; larger corpora are sampled
+MAX_SCATTER_POINTS = 1500
+
+# Most distinct colors in the scatter legend; rarer values are grouped as "Other"
+MAX_SCATTER_COLORS = 12
+
+
+class ResultsIndex:
+    """
+    Indexes analyzed posts or stories for the results explorer
+
+    Built once when an analysis finishes, so reruns of the results section
+    never re-sort, copy or scan the whole frame: sort orders are argsort
+    arrays computed once per sort key, filters are NumPy masks (facets come
+    from a FacetIndex over the same row positions), items are looked up by
+    id, and only the visible page is turned into a display frame.
+    """
+
+    def __init__(self, df, content_source):
+        """
+        Args:
+            df (pd.DataFrame): Analyzed items with an adaptation_score column
+            content_source (str): 'reddit' or 'wattpad'
+        """
+        self.df = df
+        self.content_source = content_source
+        self.scores = pd.to_numeric(df['adaptation_score'], errors='coerce').to_numpy(dtype=float)
+        self.titles = df['title'].fillna("").astype(str).tolist()
+        self._lower_titles = None
+        self._orders = {}
+        self._scatter = {}
+
+        # Item ids (post or story id, else the title), made unique so every row is addressable
+        ids = pd.Series(self.titles, dtype=object)
+        if 'id' in df.columns:
+            raw_ids = df['id'].fillna("").astype(str).to_numpy(dtype=object)
+            present = raw_ids != ""
+            ids[present] = raw_ids[present]
+        for position in np.flatnonzero(ids.duplicated().to_numpy()):
+            ids[position] = f"{ids[position]}#{position}"
+        self.ids = ids.tolist()
+        self._positions = dict(zip(self.ids, range(len(self.ids))))
+
+        self.facets = FacetIndex.from_frame(df)
+        self.order('adaptation_score')
+
+    def __len__(self):
+        return len(self.df)
+
+    def order(self, sort_by, descending=True):
+        """
+        Returns the row positions sorted by a column, computed once per column and direction
+
+        Missing values always sort last.
+
+        Args:
+            sort_by (str): 'adaptation_score', 'title' or a numeric column of the frame
+            descending (bool): Sort from the highest value
+
+        Returns:
+            np.ndarray: Row positions
+        """
+        key = (sort_by, descending)
+        if key not in self._orders:
+            if sort_by == 'title':
+                order = np.argsort(np.array(self.titles, dtype=str), kind='stable')
+                self._orders[key] = order[::-1].copy() if descending else order
+            else:
+                values = (self.scores if sort_by == 'adaptation_score'
+                          else pd.to_numeric(self.df[sort_by], errors='coerce').to_numpy(dtype=float))
+                missing = np.isnan(values)
+                if descending:
+                    self._orders[key] = np.argsort(-np.where(missing, -np.inf, values), kind='stable')
+                else:
+                    self._orders[key] = np.argsort(np.where(missing, np.inf, values), kind='stable')
+        return self._orders[key]
+
+    def query(self, sort_by='adaptation_score', descending=True, min_score=None, search=None,
+              facets=None, facet_match="any"):
+        """
+        Returns the positions of the items matching the filters, in sort order
+
+        Args:
+            sort_by (str): Sort key, see order
+            descending (bool): Sort from the highest value
+            min_score (float): Only keep items with at least this adaptation score
+            search (str): Only keep items whose title contains this text (case-insensitive)
+            facets (dict): Facet name -> selected values, see FacetIndex.query
+            facet_match (str): 'any' or 'all', how selected values within a facet combine
+
+        Returns:
+            np.ndarray: Row positions
+        """
+        mask = self.facets.query(facets, match=facet_match) if facets else np.ones(len(self), dtype=bool)
+        if min_score is not None:
+            mask &= self.scores >= min_score
+        if search:
+            if self._lower_titles is None:
+                self._lower_titles = [title.lower() for title in self.titles]
+            needle = search.lower()
+            mask &= np.fromiter((needle in title for title in self._lower_titles), dtype=bool, count=len(self))
+        order = self.order(sort_by, descending)
+        return order[mask[order]]
+
+    def facet_counts(self, facet, positions, limit=None):
+        """Counts the values of a facet among the items at the given positions, most common first"""
+        within = np.zeros(len(self), dtype=bool)
+        within[positions] = True
+        return self.facets.counts(facet, within=within, limit=limit)
+
+    def page(self, positions, page, page_size):
+        """
+        Builds the display frame for one page of query results
+
+        Args:
+            positions (np.ndarray): Row positions as returned by query
+            page (int): 1-based page number
+            page_size (int): Rows per page
+
+        Returns:
+            pd.DataFrame: Display columns plus a link column, indexed by item id
+        """
+        rows = positions[(page - 1) * page_size:page * page_size]
+        frame = self.df.iloc[rows]
+        display_df = frame[DISPLAY_COLUMNS[self.content_source]].copy()
+        if self.content_source == "reddit":
+            display_df['View Post'] = [f"[Link]({format_reddit_url(permalink)})" for permalink in frame['permalink']]
+        else:  # wattpad
+            display_df['View Story'] = [f"[Link]({format_wattpad_url(url)})" for url in frame['url']]
+        display_df.index = pd.Index([self.ids[row] for row in rows], name='id')
+        return display_df
+
+    def get(self, item_id):
+        """Returns the analyzed row of an item by id, or None if it is not indexed"""
+        position = self._positions.get(item_id)
+        return None if position is None else self.df.iloc[position]
+
+    def title_of(self, item_id):
+        """Returns the title of an item by id"""
+        return self.titles[self._positions[item_id]]
+
+    def top(self, n=10):
+        """Returns the n highest-scoring rows"""
+        return self.df.iloc[self.order('adaptation_score')[:n]]
+
+    def scatter_sample(self, color_column, max_points=MAX_SCATTER_POINTS):
+        """
+        Returns the rows drawn in the engagement scatter
+
+        Small corpora are drawn in full. Larger ones keep the top-scoring fifth
+        of the point budget plus a fixed random sample of the rest, so the plot
+        costs the same on every rerun however many items were analyzed.
+
+        Args:
+            color_column (str): Column the points are colored by
+            max_points (int): Most points to draw
+
+        Returns:
+            tuple: (frame with the engagement metrics, adaptation_score_numeric and
+                   the color column, number of items it represents)
+        """
+        if color_column not in self._scatter:
+            if len(self) <= max_points:
+                rows = np.arange(len(self))
+            else:
+                top = self.order('adaptation_score')[:max_points // 5]
+                rest = np.setdiff1d(np.arange(len(self)), top)
+                sample = np.random.default_rng(0).choice(rest, max_points - len(top), replace=False)
+                rows = np.concatenate([top, np.sort(sample)])
+            x_metric, y_metric = ENGAGEMENT_METRICS[self.content_source]
+            frame = self.df.iloc[rows][['title', x_metric, y_metric, color_column]].copy()
+            frame['adaptation_score_numeric'] = self.scores[rows]
+            # Saved corpora load subreddit and author as categoricals, which cannot take the new "Other" value
+            colors = frame[color_column].astype(object)
+            common = colors.value_counts().index[:MAX_SCATTER_COLORS]
+            frame[color_column] = colors.where(colors.isin(common), "Other")
+            self._scatter[color_column] = frame
+        return self._scatter[color_column], len(self)
@@ -0,0 +1,234 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+
+from artifact_store import ARTIFACT_KEYS, ARTIFACT_KEY_PREFIXES, ArtifactRef, get_artifact_store
+from utils import get_data_dir
+
+_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS projects (
+        project TEXT PRIMARY KEY,
+        title TEXT,
+        updated_at REAL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS snapshot_entries (
+        project TEXT NOT NULL,
+        key TEXT NOT NULL,
+        digest TEXT,
+        size INTEGER,
+        value BLOB,
+        updated_at REAL,
+        PRIMARY KEY (project, key)
+    )
+    """,
+]
+
+# Session state keys saved with a project besides the artifact keys: the workflow position and small settings
+SNAPSHOT_KEYS = ARTIFACT_KEYS + [
+    "content_source", "fetch_thresholds", "content_type", "current_adaptation_type", "current_genre", "active_tab",
+    "show_analysis_step", "show_results_step", "show_cast", "show_download",
+    "pitch_pdf_name", "export_title", "export_filename", "radar_categories", "radar_values", "cast_data",
+]
+
+# Session state key holding the fingerprints of the last saved snapshot
+_FINGERPRINTS_KEY = "_snapshot_fingerprints"
+
+_lock = threading.Lock()
+_connection = None
+
+
+def _get_connection():
+    """Opens (once per process) the SQLite database holding the project snapshots"""
+    global _connection
+    if _connection is None:
+        _connection = sqlite3.connect(os.path.join(get_data_dir(), "snapshots.db"), check_same_thread=False)
+        _connection.execute("PRAGMA journal_mode=WAL")
+        for statement in _SCHEMA:
+            _connection.execute(statement)
+        _connection.commit()
+    return _connection
+
+
+def new_project_id():
+    """Returns a fresh project id"""
+    return uuid.uuid4().hex[:10]
+
+
+def _project_holder(project):
+    return f"project:{project}"
+
+
+def _snapshot_keys(state):
+    """Returns the session state keys that belong in a snapshot"""
+    return [key for key in state.keys()
+            if key in SNAPSHOT_KEYS or any(key.startswith(prefix) for prefix in ARTIFACT_KEY_PREFIXES)]
+
+
+def _fingerprint(value):
+    """Returns (fingerprint, pickled inline value) of a session state value"""
+    if isinstance(value, ArtifactRef):
+        return "ref:" + value.digest, None
+    payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    return hashlib.blake2b(payload, digest_size=16).hexdigest(), payload
+
+
+def _has_content(value):
+    """Whether a session value holds anything (not None, an empty string or an empty collection)"""
+    if isinstance(value, (str, bytes, dict, list, tuple)):
+        return len(value) > 0
+    return value is not None
+
+
+def save_snapshot(project, state, title=None, store=None):
+    """
+    Saves the keys of the working set that changed since the last save
+
+    Large values are not copied: the snapshot references the session's
+    artifacts (see artifact_store), which keeps them alive for the project.
+
+    Args:
+        project (str): Project id
+        state: st.session_state
+        title (str): Title shown in the project list, e.g. of the selected story
+        store (ArtifactStore): Store holding the session's artifacts (the process-wide one by default)
+
+    Returns:
+        int: Number of keys written or removed
+    """
+    store = store or get_artifact_store()
+    previous = state.get(_FINGERPRINTS_KEY) or {}
+    current, changed = {}, []
+    for key in _snapshot_keys(state):
+        value = state[key]
+        try:
+            fingerprint, payload = _fingerprint(value)
+        except Exception as e:
+            print(f"Skipping unpicklable session value {key}: {e}")
+            continue
+        current[key] = fingerprint
+        if previous.get(key) != fingerprint:
+            changed.append((key, value, payload))
+    removed = [key for key in previous if key not in current]
+    if not changed and not removed:
+        return 0
+
+    holder = _project_holder(project)
+    now = time.time()
+    with _lock:
+        connection = _get_connection()
+        for key, value, payload in changed:
+            if isinstance(value, ArtifactRef):
+                store.link(holder, key, value.digest)
+                connection.execute("INSERT OR REPLACE INTO snapshot_entries (project, key, digest, size, value, "
+                                   "updated_at) VALUES (?, ?, ?, ?, NULL, ?)",
+                                   (project, key, value.digest, value.size, now))
+            else:
+                if previous.get(key, "").startswith("ref:"):
+                    store.release(holder, key)
+                connection.execute("INSERT OR REPLACE INTO snapshot_entries (project, key, digest, size, value, "
+                                   "updated_at) VALUES (?, ?, NULL, ?, ?, ?)",
+                                   (project, key, len(payload), payload, now))
+        for key in removed:
+            if previous[key].startswith("ref:"):
+                store.release(holder, key)
+            connection.execute("DELETE FROM snapshot_entries WHERE project = ? AND key = ?", (project, key))
+        connection.execute("INSERT INTO projects (project, title, updated_at) VALUES (?, ?, ?) "
+                           "ON CONFLICT(project) DO UPDATE SET title = COALESCE(excluded.title, title), "
+                           "updated_at = excluded.updated_at", (project, title, now))
+        connection.commit()
+    state[_FINGERPRINTS_KEY] = current
+    return len(changed) + len(removed)
+
+
+def restore_snapshot(project, state, holder, store=None):
+    """
+    Loads a project's saved working set into session state
+
+    Only handles are read: large values load from the artifact store when
+    they are first used.
+
+    Args:
+        project (str): Project id
+        state: st.session_state
+        holder (str): Artifact reference holder of the session (see SessionArtifacts)
+        store (ArtifactStore): Store holding the project's artifacts (the process-wide one by default)
+
+    Returns:
+        int: Number of keys restored (0 if nothing is saved for the project)
+    """
+    store = store or get_artifact_store()
+    with _lock:
+        rows = _get_connection().execute(
+            "SELECT key, digest, size, value FROM snapshot_entries WHERE project = ?", (project,)).fetchall()
+    fingerprints = {}
+    for key, digest, size, payload in rows:
+        if digest is not None:
+            store.link(holder, key, digest)
+            value = ArtifactRef(digest, size)
+        else:
+            if isinstance(state.get(key), ArtifactRef):
+                store.release(holder, key)
+            value = pickle.loads(payload)
+        state[key] = value
+        fingerprints[key] = _fingerprint(value)[0]
+    # Values left from the session's previous project are cleared
+    for key in _snapshot_keys(state):
+        if key not in fingerprints:
+            if isinstance(state[key], ArtifactRef):
+                store.release(holder, key)
+            del state[key]
+    state[_FINGERPRINTS_KEY] = fingerprints
+    return len(rows)
+
+
+def list_projects(limit=50):
+    """
+    Lists the saved projects, most recently updated first
+
+    Args:
+        limit (int): Most projects returned
+
+    Returns:
+        list: Dicts with project, title (None until content is selected) and updated_at
+    """
+    with _lock:
+        rows = _get_connection().execute(
+            "SELECT project, title, updated_at FROM projects ORDER BY updated_at DESC LIMIT ?", (limit,)).fetchall()
+    return [{"project": project, "title": title, "updated_at": updated_at} for project, title, updated_at in rows]
+
+
+def delete_project(project, store=None):
+    """Deletes a project's snapshot and releases its artifacts"""
+    store = store or get_artifact_store()
+    with _lock:
+        connection = _get_connection()
+        connection.execute("DELETE FROM snapshot_entries WHERE project = ?", (project,))
+        connection.execute("DELETE FROM projects WHERE project = ?", (project,))
+        connection.commit()
+    store.release(_project_holder(project))
+
+
+def autosave(project, artifacts):
+    """
+    Saves what changed in a session's working set, titled after its selected content
+
+    Args:
+        project (str): Project id
+        artifacts (SessionArtifacts): Accessor of the session's state
+
+    Returns:
+        int: Number of keys written or removed
+    """
+    # Sessions that never fetched or generated anything are not saved as projects
+    if _FINGERPRINTS_KEY not in artifacts.state and not any(_has_content(artifacts.state.get(key)) for key in ARTIFACT_KEYS):
+        return 0
+    current_content = artifacts.get('current_content')
+    title = str(current_content['title']) if current_content is not None else None
+    return save_snapshot(project, artifacts.state, title=title, store=artifacts.store)
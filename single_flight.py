@@ -0,0 +1,176 @@
+import asyncio
+import hashlib
+import json
+import re
+import threading
+import weakref
+
+
+class _Call:
+    """An in-flight call that concurrent callers with the same key can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls into a single execution
+
+    The first caller for a key runs the function; callers arriving with the same
+    key while it is still running wait for it and receive the same result (or
+    exception). Nothing is cached once the call has finished.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def in_flight(self):
+        """Returns the number of distinct calls currently running"""
+        with self._lock:
+            return len(self._calls)
+
+    def do(self, key, fn):
+        """
+        Runs fn once per key among concurrent callers
+
+        Args:
+            key (str): Key identifying identical requests
+            fn (callable): Zero-argument function to execute
+
+        Returns:
+            tuple: (result, shared) where shared is True if the result came from
+                   another caller's in-flight call
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+
+class AsyncSingleFlight:
+    """
+    Coalesces concurrent identical coroutine calls on one event loop
+
+    The first caller's coroutine runs as a task that later callers with the
+    same key await as well. A caller that is cancelled (e.g. by a deadline)
+    stops waiting without cancelling the call for the others; the call itself
+    is cancelled only once every caller has given up on it.
+    """
+
+    def __init__(self):
+        self._calls = {}
+
+    def in_flight(self):
+        """Returns the number of distinct calls currently running"""
+        return len(self._calls)
+
+    async def do(self, key, fn):
+        """
+        Runs fn once per key among concurrent callers
+
+        Args:
+            key (str): Key identifying identical requests
+            fn (callable): Zero-argument function returning a coroutine
+
+        Returns:
+            tuple: (result, shared) where shared is True if the result came from
+                   another caller's in-flight call
+        """
+        entry = self._calls.get(key)
+        shared = entry is not None
+        if not shared:
+            entry = self._calls[key] = {"task": asyncio.ensure_future(fn()), "waiters": 0}
+            entry["task"].add_done_callback(lambda _: self._forget(key, entry))
+        entry["waiters"] += 1
+        try:
+            return await asyncio.shield(entry["task"]), shared
+        except asyncio.CancelledError:
+            entry["waiters"] -= 1
+            if entry["waiters"] == 0:
+                self._forget(key, entry)
+                entry["task"].cancel()
+            raise
+
+    def _forget(self, key, entry):
+        if self._calls.get(key) is entry:
+            del self._calls[key]
+
+
+def _normalize(value):
+    """Normalizes prompt text so indentation and spacing differences do not split keys"""
+    if isinstance(value, str):
+        return re.sub(r'\s+', ' ', value).strip()
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def request_key(kind, account=None, **kwargs):
+    """
+    Builds a stable key for an API request
+
+    Args:
+        kind (str): Request kind, e.g. 'chat' or 'image'
+        account (str): Digest of the credentials the request is sent with, so requests
+                       billed to different accounts never share a key (None to leave
+                       credentials out, e.g. for replay fixtures)
+        **kwargs: Request arguments as passed to the OpenAI client
+
+    Returns:
+        str: SHA-256 hex digest of the normalized request
+    """
+    request = {"kind": kind, "request": _normalize(kwargs)}
+    if account is not None:
+        request["account"] = account
+    payload = json.dumps(request, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+_single_flight = SingleFlight()
+
+
+def get_single_flight():
+    """Returns the process-wide single-flight group shared by all OpenAI calls"""
+    return _single_flight
+
+
+_async_single_flights = weakref.WeakKeyDictionary()
+_async_single_flights_lock = threading.Lock()
+
+
+def get_async_single_flight():
+    """Returns the single-flight group shared by all async OpenAI calls on the running event loop"""
+    loop = asyncio.get_running_loop()
+    with _async_single_flights_lock:
+        if loop not in _async_single_flights:
+            _async_single_flights[loop] = AsyncSingleFlight()
+        return _async_single_flights[loop]
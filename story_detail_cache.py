@@ -0,0 +1,106 @@
+import json
+import os
+import threading
+import time
+
+from single_flight import SingleFlight
+from utils import get_data_dir
+
+
+class StoryDetailCache:
+    """
+    Caches Wattpad story page details in memory and on disk
+
+    Details are keyed by story id and shared by every scraper, crawler and
+    session in the process, so a story listed under several categories or tags
+    is fetched once. Concurrent lookups of the same story wait for a single
+    fetch. Entries older than `ttl_seconds` are fetched again.
+    """
+
+    def __init__(self, directory=None, ttl_seconds=24 * 3600):
+        self.directory = directory or get_data_dir("wattpad_details")
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._single_flight = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, story_id):
+        return os.path.join(self.directory, f"{story_id}.json")
+
+    def get(self, story_id):
+        """Returns the cached details for a story, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(story_id)
+        if entry is None:
+            try:
+                with open(self._path(story_id), "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                return None
+            with self._lock:
+                self._entries[story_id] = entry
+        if time.time() - entry["fetched_at"] > self.ttl_seconds:
+            return None
+        return entry["details"]
+
+    def put(self, story_id, details):
+        """Stores the details of a story"""
+        entry = {"fetched_at": time.time(), "details": details}
+        with self._lock:
+            self._entries[story_id] = entry
+        temp_path = f"{self._path(story_id)}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(temp_path, self._path(story_id))
+        except OSError as e:
+            print(f"Error caching story details: {e}")
+
+    def get_or_fetch(self, story_id, fetch_fn):
+        """
+        Returns cached details for a story, fetching them once if needed
+
+        Args:
+            story_id (str): Wattpad story id (uncached if empty)
+            fetch_fn (callable): Zero-argument function returning the story's details
+
+        Returns:
+            dict: Story details
+        """
+        if not story_id:
+            return fetch_fn()
+        details = self.get(story_id)
+        if details is not None:
+            with self._lock:
+                self.hits += 1
+            return details
+
+        def fetch_and_store():
+            fetched = fetch_fn()
+            # Failed fetches return the empty defaults; don't keep them
+            if fetched.get("description") or fetched.get("content_sample") or fetched.get("title"):
+                self.put(story_id, fetched)
+            return fetched
+
+        details, shared = self._single_flight.do(story_id, fetch_and_store)
+        with self._lock:
+            if shared:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return details
+
+
+_story_detail_cache = None
+_story_detail_cache_lock = threading.Lock()
+
+
+def get_story_detail_cache():
+    """Returns the process-wide story detail cache"""
+    global _story_detail_cache
+    with _story_detail_cache_lock:
+        if _story_detail_cache is None:
+            _story_detail_cache = StoryDetailCache()
+        return _story_detail_cache
@@ -0,0 +1,383 @@
+import json
+import re
+
+from llm_client import chat_completion, chat_completion_async
+from model_cascade import run_cascade, run_cascade_async
+
+# Schemas are written with plain Python values:
+#   str, int, float      a non-empty string, an integer, any number
+#   [spec]               a non-empty array whose items match spec
+#   {"field": spec}      an object with all of the listed fields
+
+# Characters of the original request (the story payload) repeated in repair prompts as context
+REPAIR_CONTEXT_CHARS = 600
+
+
+def describe_spec(spec):
+    """Returns a short human-readable description of a schema spec, used in repair prompts"""
+    if spec is str:
+        return "string"
+    if spec is int:
+        return "integer"
+    if spec is float:
+        return "number"
+    if isinstance(spec, list):
+        item = describe_spec(spec[0])
+        return f"array of {item}s" if not isinstance(spec[0], (dict, list)) else f"array of ({item})"
+    if isinstance(spec, dict):
+        fields = ", ".join(f"{name}: {describe_spec(value)}" for name, value in spec.items())
+        return f"object with {fields}"
+    return "value"
+
+
+def format_path(path):
+    """Formats a path tuple such as ('characters', 1, 'arc') as 'characters[1].arc'"""
+    text = ""
+    for part in path:
+        if isinstance(part, int):
+            text += f"[{part}]"
+        else:
+            text += f".{part}" if text else part
+    return text
+
+
+def _coerce(value, spec):
+    """Applies cheap local fixes for common shape slips; returns the value unchanged otherwise"""
+    if spec is str:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value)
+        if isinstance(value, list) and value and all(isinstance(v, str) for v in value):
+            return "\n".join(value)
+    elif spec in (int, float):
+        if isinstance(value, str):
+            try:
+                number = float(value.strip())
+                return int(number) if spec is int and number.is_integer() else number
+            except ValueError:
+                return value
+    elif isinstance(spec, list):
+        if isinstance(value, str) and spec[0] is str and value.strip():
+            return [value]
+        if isinstance(value, dict) and isinstance(spec[0], dict):
+            return [value]
+    return value
+
+
+def validate(data, spec, path=()):
+    """
+    Validates data against a schema spec, coercing trivially fixable values in place
+
+    Args:
+        data: Parsed JSON value
+        spec: Schema spec (see module comment)
+        path (tuple): Path of data within the whole response
+
+    Returns:
+        list: (path, spec) tuples for every missing or mistyped field, at the
+              deepest level that can be repaired on its own
+    """
+    problems = []
+    if isinstance(spec, dict):
+        if not isinstance(data, dict):
+            return [(path, spec)]
+        for name, field_spec in spec.items():
+            if name not in data or data[name] in (None, "", [], {}):
+                problems.append((path + (name,), field_spec))
+                continue
+            data[name] = _coerce(data[name], field_spec)
+            problems.extend(validate(data[name], field_spec, path + (name,)))
+        return problems
+
+    if isinstance(spec, list):
+        if not isinstance(data, list) or not data:
+            return [(path, spec)]
+        for index, item in enumerate(data):
+            data[index] = _coerce(item, spec[0])
+            problems.extend(validate(data[index], spec[0], path + (index,)))
+        return problems
+
+    if spec is str:
+        valid = isinstance(data, str) and bool(data.strip())
+    elif spec is int:
+        valid = isinstance(data, int) and not isinstance(data, bool)
+    elif spec is float:
+        valid = isinstance(data, (int, float)) and not isinstance(data, bool)
+    else:
+        valid = True
+    return [] if valid else [(path, spec)]
+
+
+def _set_path(data, path, value):
+    """Sets a value at a path, creating intermediate objects as needed"""
+    target = data
+    for part in path[:-1]:
+        if isinstance(target, dict) and not isinstance(target.get(part), (dict, list)):
+            target[part] = {}
+        target = target[part]
+    target[path[-1]] = value
+
+
+def _empty_value(spec):
+    """Returns an empty placeholder of the spec's type"""
+    if isinstance(spec, list):
+        return []
+    if isinstance(spec, dict):
+        return {name: _empty_value(field_spec) for name, field_spec in spec.items()}
+    if spec in (int, float):
+        return 0
+    return ""
+
+
+def parse_json_response(text):
+    """
+    Parses a JSON response, salvaging what it can from truncated output
+
+    A response cut off by max_tokens is closed at the last complete value, so
+    the fields generated before the cut-off are kept and only the rest need
+    repairing.
+
+    Args:
+        text (str): Raw model output
+
+    Returns:
+        The parsed value, or None if nothing could be recovered
+    """
+    text = (text or "").strip()
+    fence = re.match(r'^```(?:json)?\s*(.*?)\s*```$', text, re.DOTALL)
+    if fence:
+        text = fence.group(1)
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+
+    # Track open containers and the last position where the document could be closed
+    stack = []
+    in_string = False
+    escaped = False
+    cut = None
+    for index, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append(char)
+        elif char in "}]":
+            if stack:
+                stack.pop()
+            cut = (index + 1, list(stack))
+        elif char == ",":
+            cut = (index, list(stack))
+
+    while cut is not None:
+        end, open_containers = cut
+        candidate = text[:end] + "".join("}" if c == "{" else "]" for c in reversed(open_containers))
+        try:
+            return json.loads(candidate)
+        except ValueError:
+            previous = text.rfind(",", 0, end)
+            cut = (previous, open_containers) if previous > 0 else None
+    return None
+
+
+def _normalize_root(data, spec):
+    """Accepts a bare array or a differently named single array for single-array schemas"""
+    if not isinstance(spec, dict) or len(spec) != 1:
+        return data
+    name, field_spec = next(iter(spec.items()))
+    if not isinstance(field_spec, list):
+        return data
+    if isinstance(data, list):
+        return {name: data}
+    if isinstance(data, dict) and name not in data:
+        lists = [value for value in data.values() if isinstance(value, list)]
+        if len(lists) == 1:
+            return {name: lists[0]}
+    return data
+
+
+def _build_repair_prompt(data, problems, context=""):
+    """Builds the follow-up prompt that re-requests only the invalid fields"""
+    fields = "\n    ".join(f"- {format_path(path)}: {describe_spec(spec)}" for path, spec in problems)
+    partial = json.dumps(data)[:3000]
+    context = f"\n    ORIGINAL REQUEST (excerpt): {context}\n" if context else ""
+    return f"""
+    Your previous JSON response was incomplete. Provide only the missing or invalid fields listed below,
+    consistent with the rest of the response.
+{context}
+    PARTIAL RESPONSE: {partial}
+
+    FIELDS TO PROVIDE:
+    {fields}
+
+    Format your response as a JSON object whose keys are exactly these field paths
+    and whose values follow the stated types.
+    """
+
+
+def generate_structured(client, feature, schema, messages, max_repairs=1, **kwargs):
+    """
+    Requests a JSON chat completion and validates it against a schema
+
+    Instead of discarding the whole response when it does not match the schema,
+    missing or mistyped fields are re-requested with a small follow-up prompt
+    (recorded under the feature name plus '_repair') that repeats the
+    instructions but only an excerpt of the story payload. Fields that are still
+    invalid after the repairs are filled with empty values of the expected type.
+
+    When the model cascade is enabled, the draft model answers first and the
+    request is escalated to the premium model only if the draft does not match
+    the schema.
+
+    Args:
+        client (openai.OpenAI): Initialized OpenAI client
+        feature (str): Name of the calling feature, used to group metrics
+        schema (dict): Expected shape of the response (see module comment)
+        messages (list): Chat messages for the initial request
+        max_repairs (int): Maximum number of follow-up requests
+        **kwargs: Arguments passed through to the chat completion (model, temperature, ...)
+
+    Returns:
+        dict: Response data matching the schema
+
+    Raises:
+        ValueError: If none of the schema's fields could be obtained
+    """
+    def request(model):
+        response = chat_completion(client, feature=feature, messages=messages,
+                                   response_format={"type": "json_object"}, **dict(kwargs, model=model))
+        return _parse_structured(response, schema)
+
+    (data, problems), model = run_cascade(
+        feature, request,
+        escalation_reason=lambda result: "invalid_fields" if result[1] else None,
+        default_model=kwargs.get("model")
+    )
+
+    for _ in range(max_repairs):
+        if not problems:
+            break
+        try:
+            repair = chat_completion(client, **_repair_request(feature, messages, data, problems, model, kwargs))
+            values = parse_json_response(repair.choices[0].message.content) or {}
+        except Exception as e:
+            print(f"Error repairing {feature}: {e}")
+            break
+        if not _apply_repair(data, problems, values):
+            break
+        problems = validate(data, schema)
+
+    return _complete(feature, schema, data, problems)
+
+
+async def generate_structured_async(client, feature, schema, messages, max_repairs=1, **kwargs):
+    """
+    Async counterpart of generate_structured, for an openai.AsyncOpenAI client
+
+    Args:
+        client (openai.AsyncOpenAI): Async OpenAI client
+        feature (str): Name of the calling feature, used to group metrics
+        schema (dict): Expected shape of the response (see module comment)
+        messages (list): Chat messages for the initial request
+        max_repairs (int): Maximum number of follow-up requests
+        **kwargs: Arguments passed through to the chat completion (model, temperature, ...)
+
+    Returns:
+        dict: Response data matching the schema
+
+    Raises:
+        ValueError: If none of the schema's fields could be obtained
+    """
+    async def request(model):
+        response = await chat_completion_async(client, feature=feature, messages=messages,
+                                               response_format={"type": "json_object"},
+                                               **dict(kwargs, model=model))
+        return _parse_structured(response, schema)
+
+    (data, problems), model = await run_cascade_async(
+        feature, request,
+        escalation_reason=lambda result: "invalid_fields" if result[1] else None,
+        default_model=kwargs.get("model")
+    )
+
+    for _ in range(max_repairs):
+        if not problems:
+            break
+        try:
+            repair = await chat_completion_async(client, **_repair_request(feature, messages, data, problems,
+                                                                           model, kwargs))
+            values = parse_json_response(repair.choices[0].message.content) or {}
+        except Exception as e:
+            print(f"Error repairing {feature}: {e}")
+            break
+        if not _apply_repair(data, problems, values):
+            break
+        problems = validate(data, schema)
+
+    return _complete(feature, schema, data, problems)
+
+
+def _parse_structured(response, schema):
+    """Parses a JSON completion, returning (data, problems)"""
+    data = _normalize_root(parse_json_response(response.choices[0].message.content), schema)
+    if not isinstance(data, dict):
+        data = {}
+    return data, validate(data, schema)
+
+
+def _repair_request(feature, messages, data, problems, model, kwargs):
+    """Builds the chat completion arguments of a repair request for the invalid fields"""
+    print(f"Repairing {len(problems)} invalid field(s) in {feature}: "
+          + ", ".join(format_path(path) for path, _ in problems))
+    return dict(
+        kwargs,
+        feature=f"{feature}_repair",
+        messages=_repair_messages(messages, data, problems),
+        response_format={"type": "json_object"},
+        model=model,
+        temperature=min(kwargs.get("temperature", 0.7), 0.3),
+        max_tokens=min(kwargs.get("max_tokens", 1000), 200 + 250 * len(problems))
+    )
+
+
+def _repair_messages(messages, data, problems):
+    """
+    Builds the messages of a repair request
+
+    The system instructions (the schema and field guidance, identical on every
+    call of a feature) are kept, while the story payload in the user message is
+    cut to a short excerpt, so a repair costs a fraction of the original input.
+    """
+    instructions = [message for message in messages if message["role"] == "system"]
+    request = "\n\n".join(message["content"] for message in messages
+                           if message["role"] != "system" and isinstance(message["content"], str))
+    context = request[:REPAIR_CONTEXT_CHARS] + ("..." if len(request) > REPAIR_CONTEXT_CHARS else "")
+    prompt = _build_repair_prompt(data, problems, context)
+    return instructions + [{"role": "user", "content": prompt}]
+
+
+def _apply_repair(data, problems, values):
+    """Merges the fields of a parsed repair response into data; returns False if the response was unusable"""
+    if not isinstance(values, dict):
+        return False
+    for path, _ in problems:
+        key = format_path(path)
+        if key in values:
+            _set_path(data, path, values[key])
+    return True
+
+
+def _complete(feature, schema, data, problems):
+    """Fills fields that are still invalid with empty values, or raises if none of the fields were obtained"""
+    if len([path for path, _ in problems if len(path) == 1]) == len(schema):
+        raise ValueError(f"The {feature} response did not match the expected format")
+    for path, spec in problems:
+        _set_path(data, path, _empty_value(spec))
+    return data
@@ -0,0 +1,83 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+MAX_TEXT_LENGTH = 8000
+
+# Roughly four characters per token for English text
+CHARS_PER_TOKEN = 4
+
+# Compiled once; only run on the texts that can contain a match
+_MARKDOWN_LINK = re.compile(r'\[.*?\]\(.*?\)')
+_HTML_ENTITIES = [('&amp;', '&'), ('&lt;', '<'), ('&gt;', '>')]
+
+
+def _clean_reddit_formatting(text):
+    """Removes markdown links and unescapes HTML entities, skipping the work when there are none"""
+    if '](' in text:
+        text = _MARKDOWN_LINK.sub('', text)
+    if '&' in text:
+        for entity, character in _HTML_ENTITIES:
+            text = text.replace(entity, character)
+    return text
+
+
+def normalize_texts(texts, source="reddit", max_length=MAX_TEXT_LENGTH):
+    """
+    Cleans a whole column of scraped texts at once
+
+    Produces the same text as reddit_scraper.clean_text (source='reddit') or
+    wattpad_scraper.clean_text (source='wattpad') for every item. Whitespace
+    is collapsed with str.split (the same characters as the \\s regex), the
+    link and entity passes only run on texts that contain them, and lengths,
+    truncation and token estimates are computed as array operations.
+
+    Args:
+        texts (list or pd.Series): Raw texts; missing values are treated as empty
+        source (str): 'reddit' also removes markdown links and unescapes HTML entities
+        max_length (int): Texts longer than this are truncated and suffixed with '...'
+
+    Returns:
+        pd.DataFrame: text, length and token_estimate columns, in the input order and index
+    """
+    series = texts if isinstance(texts, pd.Series) else pd.Series(texts, dtype=object)
+    raw = series.fillna("").astype(str).tolist()
+
+    # Remove extra whitespace
+    cleaned = [' '.join(text.split()) for text in raw]
+
+    if source == "reddit":
+        # Remove Reddit formatting
+        cleaned = [_clean_reddit_formatting(text) for text in cleaned]
+
+    # Truncate if too long (max ~2000 tokens)
+    lengths = np.fromiter(map(len, cleaned), dtype=np.int64, count=len(cleaned))
+    for i in np.flatnonzero(lengths > max_length):
+        cleaned[i] = cleaned[i][:max_length] + "..."
+    lengths = np.where(lengths > max_length, max_length + 3, lengths)
+
+    return pd.DataFrame({
+        "text": pd.Series(cleaned, index=series.index, dtype=object),
+        "length": lengths,
+        "token_estimate": -(-lengths // CHARS_PER_TOKEN),
+    }, index=series.index)
+
+
+def normalize_post_texts(posts, field="selftext", source="reddit"):
+    """
+    Cleans one text field of a batch of post dicts in place
+
+    Args:
+        posts (list): Post dicts whose field still holds the raw text
+        field (str): Name of the text field to clean
+        source (str): 'reddit' or 'wattpad', as for normalize_texts
+
+    Returns:
+        list: The same post dicts
+    """
+    if posts:
+        cleaned = normalize_texts([post.get(field) for post in posts], source=source)["text"]
+        for post, text in zip(posts, cleaned):
+            post[field] = text
+    return posts
@@ -1,3 +1,5 @@
+import os
+
 def get_default_subreddits():
     """Returns a list of default subreddits that are likely to have good adaptation material"""
     return [
@@ -58,3 +60,25 @@ def format_wattpad_url(url):
         return f"https://www.wattpad.com{url}"
     else:
         return f"https://www.wattpad.com/{url}"
+
+def get_content_text(content, content_type):
+    """Returns the text used to generate adaptation materials for a Reddit post or Wattpad story"""
+    if content_type == "reddit":
+        return content['selftext']
+    content_text = content['description']
+    if 'content_sample' in content:
+        content_text += "\n\n" + content['content_sample']
+    return content_text
+
+def get_data_dir(*parts):
+    """
+    Returns the local data directory used for caches, metrics and stores,
+    creating it (and any requested subdirectory) if needed.
+
+    The location defaults to `.ip_pitch_data` in the working directory and can
+    be overridden with the IP_PITCH_DATA_DIR environment variable.
+    """
+    base_dir = os.environ.get("IP_PITCH_DATA_DIR", ".ip_pitch_data")
+    path = os.path.join(base_dir, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,411 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from urllib.parse import urlparse
+
+import requests
+from bs4 import BeautifulSoup
+
+from story_detail_cache import get_story_detail_cache
+from utils import get_data_dir
+from wattpad_scraper import (WATTPAD_HEADERS, get_listing_url, find_story_elements, parse_story_element,
+                             find_next_page_url, get_story_details, get_story_id, build_story_record)
+
+
+class HostRateLimiter:
+    """
+    Limits concurrent requests and request spacing per host
+
+    Shared by every worker of a crawl, so adding workers speeds up crawls that
+    span several hosts without hammering any single one.
+    """
+
+    def __init__(self, max_concurrency=2, min_interval=0.5, timeout=15):
+        self.max_concurrency = max_concurrency
+        self.min_interval = min_interval
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._semaphores = {}
+        self._next_slot = {}
+
+    def _semaphore(self, host):
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.Semaphore(self.max_concurrency)
+            return self._semaphores[host]
+
+    def get(self, url, headers=None, **kwargs):
+        """Performs a GET request once the host has a free slot; called like requests.get"""
+        host = urlparse(url).netloc
+        with self._semaphore(host):
+            with self._lock:
+                now = time.monotonic()
+                start_at = max(now, self._next_slot.get(host, 0.0))
+                self._next_slot[host] = start_at + self.min_interval
+            if start_at > now:
+                time.sleep(start_at - now)
+            kwargs.setdefault("timeout", self.timeout)
+            return requests.get(url, headers=headers, **kwargs)
+
+
+_host_limiter = None
+_host_limiter_lock = threading.Lock()
+
+
+def get_host_limiter():
+    """Returns the process-wide host limiter shared by all crawls and sessions"""
+    global _host_limiter
+    with _host_limiter_lock:
+        if _host_limiter is None:
+            _host_limiter = HostRateLimiter(
+                max_concurrency=int(os.environ.get("WATTPAD_MAX_CONCURRENCY", 2)),
+                min_interval=float(os.environ.get("WATTPAD_MIN_INTERVAL", 0.5))
+            )
+        return _host_limiter
+
+
+class WattpadCrawler:
+    """
+    Crawls Wattpad listings and story pages through a bounded URL frontier
+
+    Listing pages are followed through their pagination links, and story pages
+    contribute links to related stories. Story ids are deduplicated across all
+    seeds, so a story listed under several categories or tags is fetched once
+    (and records every seed it was found under). Story page details come from
+    the shared detail cache. The crawl state is checkpointed to disk and resumed
+    by the next crawl with the same name.
+    """
+
+    def __init__(self, name, seeds, language="en", min_reads=10000, min_votes=1000, min_parts=1,
+                 max_stories=100, max_pages_per_seed=10, max_frontier=2000, follow_related=True,
+                 workers=8, limiter=None, checkpoint_every=10):
+        """
+        Args:
+            name (str): Checkpoint name
+            seeds (dict): Mapping of seed label (e.g. 'romance') to listing URL
+            max_pages_per_seed (int): Listing pages followed per seed
+            follow_related (bool): Whether to queue stories linked from story pages
+            workers (int): Number of concurrent requests the crawl may have in flight
+            limiter (HostRateLimiter): Per-host limiter, defaults to the shared one
+        """
+        self.name = name
+        self.seeds = dict(seeds)
+        self.language = language
+        self.min_reads = min_reads
+        self.min_votes = min_votes
+        self.min_parts = min_parts
+        self.max_stories = max_stories
+        self.max_pages_per_seed = max_pages_per_seed
+        self.max_frontier = max_frontier
+        self.follow_related = follow_related
+        self.workers = workers
+        self.limiter = limiter or get_host_limiter()
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_path = os.path.join(get_data_dir("crawls"), f"{name}.json")
+
+        # Frontier items are dicts: {"kind": "listing", "url", "seed", "page"}
+        # or {"kind": "story", "url", "listing"} where listing holds the card's stats, if known
+        self.frontier = deque()
+        self.seen_urls = set()
+        self.seen_story_ids = set()
+        self.stories = []
+        self.story_sources = {}
+        self.stats = {"pages": 0, "stories_checked": 0, "duplicates": 0, "dropped": 0, "errors": 0}
+
+    def _enqueue(self, item):
+        story_id = get_story_id(item["url"]) if item["kind"] == "story" else None
+        if story_id and item.get("seed"):
+            sources = self.story_sources.setdefault(story_id, [])
+            if item["seed"] not in sources:
+                sources.append(item["seed"])
+        if item["url"] in self.seen_urls:
+            self.stats["duplicates"] += item["kind"] == "story"
+            return
+        if story_id and story_id in self.seen_story_ids:
+            self.stats["duplicates"] += 1
+            return
+        if len(self.frontier) >= self.max_frontier:
+            self.stats["dropped"] += 1
+            return
+        if story_id:
+            self.seen_story_ids.add(story_id)
+        self.seen_urls.add(item["url"])
+        if item["kind"] == "listing":
+            # Listings first: they are cheap and feed the rest of the crawl
+            self.frontier.appendleft(item)
+        else:
+            self.frontier.append(item)
+
+    def _crawl_listing(self, item):
+        """Fetches a listing page and returns the items it links to"""
+        response = self.limiter.get(item["url"], headers=WATTPAD_HEADERS)
+        if response.status_code != 200:
+            raise RuntimeError(f"Status code {response.status_code} for {item['url']}")
+        soup = BeautifulSoup(response.text, 'html.parser')
+
+        found = []
+        for story_element in find_story_elements(soup):
+            try:
+                listing = parse_story_element(story_element)
+            except Exception as e:
+                print(f"Error processing story: {e}")
+                continue
+            if listing:
+                found.append({"kind": "story", "url": listing["url"], "listing": listing, "seed": item["seed"]})
+
+        # Infinite-scroll listings have no pagination links but still accept a page parameter
+        next_url = find_next_page_url(soup, item["url"])
+        if not next_url and found:
+            next_url = _with_page(item["url"], item["page"] + 1)
+        if next_url and item["page"] < self.max_pages_per_seed:
+            found.append({"kind": "listing", "url": next_url, "seed": item["seed"], "page": item["page"] + 1})
+        return found, None
+
+    def _crawl_story(self, item):
+        """Fetches a story page and returns the related stories it links to and the story, if it qualifies"""
+        details = get_story_detail_cache().get_or_fetch(
+            get_story_id(item["url"]),
+            lambda: get_story_details(item["url"], WATTPAD_HEADERS, fetch=self.limiter.get)
+        )
+        listing = item.get("listing") or {
+            "id": get_story_id(item["url"]), "title": details.get("title", ""), "url": item["url"],
+            "reads": 0, "votes": 0, "parts": 0, "author": details.get("author") or "Unknown Author",
+            "description": "", "tags": [], "cover_url": ""
+        }
+        for key in ("reads", "votes", "parts"):
+            listing[key] = listing[key] or details.get(key, 0)
+
+        found = []
+        if self.follow_related:
+            found = [{"kind": "story", "url": url, "listing": None} for url in details.get("related_urls", [])]
+
+        story = None
+        meets_popularity = listing["reads"] >= self.min_reads or listing["votes"] >= self.min_votes
+        meets_length = not listing["parts"] or listing["parts"] >= self.min_parts
+        if listing["title"] and meets_popularity and meets_length:
+            story = build_story_record(listing, details, self.language)
+        return found, story
+
+    def _process(self, item):
+        if item["kind"] == "listing":
+            return self._crawl_listing(item)
+        return self._crawl_story(item)
+
+    def save_checkpoint(self, in_flight=()):
+        """Writes the crawl state to disk; in-flight items are saved back into the frontier"""
+        state = {
+            "seeds": self.seeds,
+            "frontier": list(in_flight) + list(self.frontier),
+            "seen_urls": sorted(self.seen_urls),
+            "seen_story_ids": sorted(self.seen_story_ids),
+            "stories": self.stories,
+            "story_sources": self.story_sources,
+            "stats": self.stats,
+        }
+        temp_path = f"{self.checkpoint_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(temp_path, self.checkpoint_path)
+
+    def load_checkpoint(self):
+        """Restores the crawl state from disk; returns False if there is no checkpoint"""
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        self.frontier = deque(state["frontier"])
+        self.seen_urls = set(state["seen_urls"])
+        self.seen_story_ids = set(state["seen_story_ids"])
+        self.stories = state["stories"]
+        self.story_sources = state.get("story_sources", {})
+        self.stats.update(state["stats"])
+        return True
+
+    def delete_checkpoint(self):
+        """Removes the checkpoint of a finished crawl, so the next run with the same settings starts afresh"""
+        try:
+            os.remove(self.checkpoint_path)
+        except OSError:
+            pass
+
+    def run(self, resume=True, progress_callback=None):
+        """
+        Runs the crawl until enough stories are found or the frontier is exhausted
+
+        Only an interrupted crawl leaves a checkpoint; a finished one removes it.
+
+        Args:
+            resume (bool): Continue from this crawl's checkpoint if one exists
+            progress_callback (callable): Optional function called as (stories_found, stats)
+
+        Returns:
+            list: Story dicts in the same format as fetch_wattpad_stories
+        """
+        if resume and self.load_checkpoint():
+            # Crawls with different limits share a checkpoint
+            self.stories = self.stories[:self.max_stories]
+        else:
+            for label, url in self.seeds.items():
+                self._enqueue({"kind": "listing", "url": url, "seed": label, "page": 1})
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            in_flight = {}
+            try:
+                self._crawl(executor, in_flight, progress_callback)
+            finally:
+                for future in in_flight:
+                    future.cancel()
+                if len(self.stories) >= self.max_stories or not (self.frontier or in_flight):
+                    self.delete_checkpoint()
+                else:
+                    # Interrupted: unfinished work stays in the frontier for the next run
+                    self.save_checkpoint(in_flight.values())
+
+        for story in self.stories:
+            story['found_in'] = list(self.story_sources.get(story['id'], []))
+        return self.stories
+
+    def _crawl(self, executor, in_flight, progress_callback):
+        """Processes the frontier until enough stories are found or it is exhausted"""
+        since_checkpoint = 0
+        while len(self.stories) < self.max_stories and (self.frontier or in_flight):
+            while self.frontier and len(in_flight) < self.workers:
+                item = self.frontier.popleft()
+                in_flight[executor.submit(self._process, item)] = item
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = in_flight.pop(future)
+                since_checkpoint += 1
+                if item["kind"] == "listing":
+                    self.stats["pages"] += 1
+                else:
+                    self.stats["stories_checked"] += 1
+                try:
+                    found, story = future.result()
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    print(f"Error crawling {item['url']}: {e}")
+                    continue
+                if story and len(self.stories) < self.max_stories:
+                    self.stories.append(story)
+                for found_item in found:
+                    self._enqueue(found_item)
+
+            if since_checkpoint >= self.checkpoint_every:
+                self.save_checkpoint(in_flight.values())
+                since_checkpoint = 0
+            if progress_callback:
+                progress_callback(len(self.stories), dict(self.stats))
+
+
+def _with_page(url, page):
+    """Returns a listing URL with its page parameter set"""
+    base = url.split("&page=")[0].split("?page=")[0]
+    separator = "&" if "?" in base else "?"
+    return f"{base}{separator}page={page}"
+
+
+def get_crawl_name(seeds, language, min_reads, min_votes, min_parts):
+    """Returns a stable checkpoint name for a crawl configuration"""
+    payload = json.dumps([sorted(seeds.items()), language, min_reads, min_votes, min_parts])
+    return "wattpad_" + hashlib.sha256(payload.encode("utf-8")).hexdigest()[:12]
+
+
+def crawl_wattpad_stories(category=None, tag=None, limit=100, language="en", min_reads=10000,
+                          min_votes=1000, min_parts=1, resume=True, progress_callback=None):
+    """
+    Crawls Wattpad for popular stories across listing pages and related stories
+
+    Args:
+        category (str): Category to crawl (e.g., 'romance', 'fantasy')
+        tag (str): Tag to crawl
+        limit (int): Number of stories to collect
+        language (str): Language code for stories
+        min_reads (int): Minimum number of reads for stories
+        min_votes (int): Minimum number of votes for stories
+        min_parts (int): Minimum number of parts/chapters for stories
+        resume (bool): Continue an interrupted crawl with the same settings
+        progress_callback (callable): Optional function called as (stories_found, stats)
+
+    Returns:
+        list: List of stories as dictionaries or error message
+    """
+    try:
+        seeds = {category or tag or "all": get_listing_url(category=category, tag=tag, language=language)}
+        crawler = WattpadCrawler(
+            name=get_crawl_name(seeds, language, min_reads, min_votes, min_parts),
+            seeds=seeds,
+            language=language,
+            min_reads=min_reads,
+            min_votes=min_votes,
+            min_parts=min_parts,
+            max_stories=limit
+        )
+        stories = crawler.run(resume=resume, progress_callback=progress_callback)
+        print(f"Wattpad crawl finished: {len(stories)} stories, {crawler.stats}")
+        return stories
+
+    except Exception as e:
+        error_message = str(e)
+        print(f"Wattpad Crawling Error: {error_message}")
+        return f"Error crawling Wattpad: {error_message}"
+
+
+def sweep_wattpad_stories(categories=None, tags=None, limit=100, language="en", min_reads=10000,
+                          min_votes=1000, min_parts=1, deep=False, resume=True, progress_callback=None):
+    """
+    Discovers stories from several categories and tags in one concurrent run
+
+    All listings are crawled together with the shared host limiter and story
+    detail cache; a story that appears under several categories or tags is
+    fetched once and lists all of them in its 'found_in' field.
+
+    Args:
+        categories (list): Categories to sweep (e.g., 'romance', 'fantasy')
+        tags (list): Tags to sweep
+        limit (int): Total number of stories to collect
+        language (str): Language code for stories
+        min_reads (int): Minimum number of reads for stories
+        min_votes (int): Minimum number of votes for stories
+        min_parts (int): Minimum number of parts/chapters for stories
+        deep (bool): Follow pagination and related stories instead of reading first pages only
+        resume (bool): Continue an interrupted sweep with the same settings
+        progress_callback (callable): Optional function called as (stories_found, stats)
+
+    Returns:
+        list: List of stories as dictionaries or error message
+    """
+    try:
+        seeds = {category: get_listing_url(category=category, language=language) for category in categories or []}
+        for tag in tags or []:
+            seeds[f"#{tag}"] = get_listing_url(tag=tag, language=language)
+        if not seeds:
+            return "Error: Please select at least one category or tag."
+
+        crawler = WattpadCrawler(
+            name=get_crawl_name(seeds, language, min_reads, min_votes, min_parts) + ("_deep" if deep else ""),
+            seeds=seeds,
+            language=language,
+            min_reads=min_reads,
+            min_votes=min_votes,
+            min_parts=min_parts,
+            max_stories=limit,
+            max_pages_per_seed=10 if deep else 1,
+            follow_related=deep
+        )
+        stories = crawler.run(resume=resume, progress_callback=progress_callback)
+        cache = get_story_detail_cache()
+        print(f"Wattpad sweep finished: {len(stories)} stories from {len(seeds)} listings, {crawler.stats}, "
+              f"detail cache hits={cache.hits} misses={cache.misses}")
+        return stories
+
+    except Exception as e:
+        error_message = str(e)
+        print(f"Wattpad Sweep Error: {error_message}")
+        return f"Error sweeping Wattpad: {error_message}"
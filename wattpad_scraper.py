@@ -6,6 +6,19 @@ import time
 import re
 import json
 
+from story_detail_cache import get_story_detail_cache
+
+WATTPAD_BASE_URL = "https://www.wattpad.com"
+
+# Headers to mimic a browser request
+WATTPAD_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8",
+    "Connection": "keep-alive",
+    "Referer": "https://www.wattpad.com/"
+}
+
 def fetch_wattpad_stories(category=None, tag=None, limit=10, language="en", 
                          min_reads=10000, min_votes=1000, min_parts=5):
     """
@@ -25,27 +38,15 @@ def fetch_wattpad_stories(category=None, tag=None, limit=10, language="en",
     """
     try:
         stories = []
-        base_url = "https://www.wattpad.com"
+        base_url = WATTPAD_BASE_URL
         
         # Set up the search URL based on parameters
-        if category:
-            url = f"{base_url}/stories/{category}?language={language}"
-        elif tag:
-            tag_formatted = tag.replace(' ', '+')
-            url = f"{base_url}/search/{tag_formatted}?language={language}"
-        else:
-            url = f"{base_url}/stories?language={language}"
+        url = get_listing_url(category=category, tag=tag, language=language)
             
         print(f"Fetching Wattpad stories from URL: {url}")
             
         # Set headers to mimic a browser request
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Accept-Language": "en-US,en;q=0.9",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8",
-            "Connection": "keep-alive",
-            "Referer": "https://www.wattpad.com/"
-        }
+        headers = WATTPAD_HEADERS
         
         # Make the request
         response = requests.get(url, headers=headers)
@@ -62,26 +63,7 @@ def fetch_wattpad_stories(category=None, tag=None, limit=10, language="en",
         
         print(f"Saving HTML to wattpad_debug.html for analysis")
         
-        # New approach: Extract story cards based on current structure
-        # First, try the most common pattern for story listings
-        story_elements = soup.select('ul.story-list li') or soup.select('ul.story-card-container li')
-        
-        # If no results found with those selectors, try other common patterns
-        if not story_elements:
-            story_elements = soup.select('div.story-card') or soup.select('div.browse-story-item')
-            
-        # If still no results, try more generic approaches
-        if not story_elements:
-            story_elements = soup.select('li[data-story-id]') or soup.select('div[data-story-id]')
-        
-        # Try even more generic selectors
-        if not story_elements:
-            story_elements = soup.select('li.browse-story-item') or soup.select('li.story-item') or soup.select('div.story-item')
-        
-        # Last resort, look for any list items with a link
-        if not story_elements:
-            all_list_items = soup.select('ul li')
-            story_elements = [li for li in all_list_items if li.find('a') and li.find('a').get('href') and ('/story/' in li.find('a').get('href') or '/w/' in li.find('a').get('href'))]
+        story_elements = find_story_elements(soup)
         
         if not story_elements:
             return "Error: Could not identify story elements on page. Wattpad may have changed their HTML structure."
@@ -95,296 +77,33 @@ def fetch_wattpad_stories(category=None, tag=None, limit=10, language="en",
                 break
                 
             try:
-                # Extract title and URL
-                title_element = (
-                    story_element.select_one('.title') or 
-                    story_element.select_one('h3.story-title') or 
-                    story_element.select_one('h3')
-                )
-                
-                # Get the title text
-                title = ""
-                if title_element:
-                    title = title_element.text.strip()
-                else:
-                    # Try to find any text that looks like a title
-                    for element in story_element.select('a'):
-                        if element.text and len(element.text.strip()) > 0 and element.text.strip() != "Community Happenings":
-                            title = element.text.strip()
-                            break
-                
-                if not title:
-                    # Extract title from the full text using a pattern
-                    element_text = story_element.text.strip()
-                    title_match = re.search(r'#\d+\s*(.+?)\s*by\s', element_text)
-                    if title_match:
-                        title = title_match.group(1).strip()
-                
-                # Remove any leading "#X" numbering from title
-                title = re.sub(r'^#\d+\s*', '', title)
-                
-                # If still no title, skip this element
-                if not title:
+                listing = parse_story_element(story_element, base_url)
+                if not listing:
                     continue
                 
-                # Get the URL path
-                url_path = None
-                link_element = title_element if title_element and title_element.name == 'a' else story_element.find('a')
-                
-                if link_element and link_element.get('href'):
-                    url_path = link_element.get('href')
-                
-                if not url_path:
-                    # Try to find any href that has story in it
-                    for a_tag in story_element.select('a'):
-                        href = a_tag.get('href', '')
-                        if '/story/' in href or '/w/' in href:
-                            url_path = href
-                            break
-                
-                if not url_path:
-                    continue
-                
-                # Format the story URL
-                if url_path.startswith('http'):
-                    story_url = url_path
-                else:
-                    story_url = f"{base_url}{url_path}"
-                
-                # Extract the full text for pattern matching
-                element_text = story_element.text.strip().lower()
-                element_text_lines = element_text.split('\n')
-                
-                # Extract stats using pattern matching
-                reads = 0
-                votes = 0
-                parts = 0
-                
-                # Extract vote info if present in vote elements
-                vote_elements = story_element.select('[class*="vote"]')
-                if vote_elements:
-                    for ve in vote_elements:
-                        vote_text = ve.text.strip()
-                        if re.search(r'\d', vote_text): # Check if the text contains numbers
-                            votes = parse_number(vote_text)
-                            break
-                
-                # Get numerical values directly from element text
-                # From our test, we've seen patterns like:
-                # #1ceo's girlby anushka17.8m327k45
-                # This indicates 17.8m reads, 327k votes, 45 parts
-                
-                # Extract a sequence of numbers with suffixes (pattern like 17.8m327k45)
-                combined_stats_match = re.search(r'(\d+\.?\d*[KkMmBb]?)(\d+\.?\d*[KkMmBb]?)(\d+)', element_text)
-                if combined_stats_match:
-                    # First number with suffix is likely reads
-                    if not reads:
-                        reads = parse_number(combined_stats_match.group(1))
-                        print(f"Found reads from combined pattern: {reads}")
-                    
-                    # Second number with suffix is likely votes
-                    if not votes:
-                        votes = parse_number(combined_stats_match.group(2))
-                        print(f"Found votes from combined pattern: {votes}")
-                    
-                    # Third number is likely parts
-                    if not parts:
-                        parts = parse_number(combined_stats_match.group(3))
-                        print(f"Found parts from combined pattern: {parts}")
-                
-                # Look for other patterns from our test output
-                for line in element_text_lines:
-                    line = line.strip().lower()
-                    # Some elements show votes like "327K"
-                    if not votes and re.search(r'\b\d+\.?\d*[KkMmBb]\b', line):
-                        vote_match = re.search(r'\b(\d+\.?\d*[KkMmBb])\b', line)
-                        if vote_match:
-                            votes = parse_number(vote_match.group(1))
-                            print(f"Found votes from standalone K/M number: {votes}")
-                
-                    # Look for reads in lines containing both numbers and "read"
-                    if not reads and 'read' in line and re.search(r'\d+', line):
-                        reads_text = re.search(r'(\d+\.?\d*[KkMmBb]?).*?read', line)
-                        if reads_text:
-                            reads = parse_number(reads_text.group(1))
-                            print(f"Found reads from contextual line: {reads}")
-                    
-                    # Find parts in lines containing "part"
-                    if not parts and 'part' in line and re.search(r'\d+', line):
-                        parts_text = re.search(r'(\d+).*?part', line)
-                        if parts_text:
-                            parts = parse_number(parts_text.group(1))
-                            print(f"Found parts from contextual line: {parts}")
-                
-                # Based on our testing output, story elements often show text like "17.8m" for reads
-                # Let's add a pattern to extract numbers followed by suffixes
-                for line in element_text_lines:
-                    line = line.strip()
-                    if not reads:
-                        # Try to find patterns like "17.8m" that likely represent reads
-                        reads_match = re.search(r'(\d+\.\d+[KkMmBb])', line)
-                        if reads_match:
-                            reads = parse_number(reads_match.group(1))
-                            print(f"Found reads from line pattern: {reads}")
-                
-                # Extract reads from text
-                read_patterns = [
-                    r'(\d+(?:\.\d+)?[KkMmBb]?)\s*(?:read|view|visit)',  # Matches: 25.5k read, 1.2m views
-                    r'reads\s*(\d+(?:\.\d+)?[KkMmBb]?)',  # Matches: reads 25.5k
-                    r'(\d+(?:\.\d+)?[KkMmBb]?)(?:\s*reads)'  # Matches: 25.5k reads
-                ]
-                
-                for pattern in read_patterns:
-                    read_match = re.search(pattern, element_text)
-                    if read_match:
-                        reads = parse_number(read_match.group(1))
-                        print(f"Found reads from standard pattern: {reads}")
-                        break
-                
-                # Look for numbers with m/k suffix at the beginning of lines
-                if not reads:
-                    reads_match = re.search(r'(\d+(?:\.\d+)?[KkMmBb])', element_text)
-                    if reads_match:
-                        reads = parse_number(reads_match.group(1))
-                        print(f"Found reads from general number with suffix: {reads}")
-                
-                # Extract votes from text
-                vote_patterns = [
-                    r'(\d+(?:\.\d+)?[KkMmBb]?)\s*(?:vote|like)',  # Matches: 25.5k votes, 1.2m likes
-                    r'votes\s*(\d+(?:\.\d+)?[KkMmBb]?)',  # Matches: votes 25.5k
-                    r'(\d+(?:\.\d+)?[KkMmBb]?)(?:\s*votes)'  # Matches: 25.5k votes
-                ]
-                
-                for pattern in vote_patterns:
-                    vote_match = re.search(pattern, element_text)
-                    if vote_match:
-                        votes = parse_number(vote_match.group(1))
-                        print(f"Found votes from pattern: {votes}")
-                        break
-                
-                # Extract parts from text
-                part_patterns = [
-                    r'(\d+)\s*(?:part|chapter)',  # Matches: 25 parts, 10 chapters
-                    r'parts\s*(\d+)',  # Matches: parts 25
-                    r'(\d+)(?:\s*parts)'  # Matches: 25 parts
-                ]
-                
-                # If we see numbers like 45 that could be parts count in the element text
-                if not parts:
-                    # Look for isolated 2-3 digit numbers that might be part counts
-                    for line in element_text_lines:
-                        line = line.strip()
-                        # Look for patterns like "45" that likely represent parts
-                        parts_match = re.search(r'\b(\d{1,3})\b', line)
-                        if parts_match and not re.search(r'#\d+', line):  # Avoid matching "#1", "#2", etc.
-                            parts_candidate = int(parts_match.group(1))
-                            # Parts are typically between 1-100
-                            if 1 <= parts_candidate <= 100:
-                                parts = parts_candidate
-                                print(f"Found parts from isolated number: {parts}")
-                                break
-                
-                for pattern in part_patterns:
-                    part_match = re.search(pattern, element_text)
-                    if part_match:
-                        parts = parse_number(part_match.group(1))
-                        print(f"Found parts from pattern: {parts}")
-                        break
-                
-                # Extract author
-                author = "Unknown Author"
-                author_element = (
-                    story_element.select_one('.username') or 
-                    story_element.select_one('.by-author') or
-                    story_element.select_one('span.author')
-                )
-                
-                if author_element:
-                    author = author_element.text.strip()
-                else:
-                    # Try to extract author from text pattern
-                    author_match = re.search(r'by\s+([^\s]+)', element_text)
-                    if author_match:
-                        author = author_match.group(1).strip()
-                
-                # If author element contains "by" prefix, remove it
-                if author.lower().startswith('by '):
-                    author = author[3:].strip()
-                
-                # Extract description
-                description = ""
-                description_element = (
-                    story_element.select_one('.description') or 
-                    story_element.select_one('.story-description') or
-                    story_element.select_one('p.description')
-                )
-                
-                if description_element:
-                    description = description_element.text.strip()
-                
-                # Extract tags
-                tags = []
-                tags_container = (
-                    story_element.select('.tag-items') or 
-                    story_element.select('.tag-list') or
-                    story_element.select('.story-tags')
-                )
-                
-                if tags_container:
-                    tag_elements = tags_container[0].select('a, span.tag')
-                    tags = [tag.text.strip() for tag in tag_elements if tag.text.strip()]
-                
-                # Extract cover image URL if available
-                cover_url = ""
-                cover_img = story_element.select_one('img.cover, img.story-cover')
-                if cover_img:
-                    cover_url = cover_img.get('src', '')
-                
-                # Extract story ID
-                story_id = ""
-                if url_path:
-                    id_match = re.search(r'\/story\/(\d+)', url_path)
-                    if id_match:
-                        story_id = id_match.group(1)
-                
-                # Get more details from the story page
-                story_details = get_story_details(story_url, headers)
+                # Get more details from the story page (shared with other runs through the detail cache)
+                detail_cache = get_story_detail_cache()
+                cached = detail_cache.get(listing['id']) is not None if listing['id'] else False
+                story_details = detail_cache.get_or_fetch(
+                    listing['id'], lambda: get_story_details(listing['url'], headers))
                 
                 # Process results for display
-                print(f"\nProcessed story: {title}")
-                print(f"URL: {story_url}")
-                print(f"Stats: reads={reads}, votes={votes}, parts={parts}")
+                print(f"\nProcessed story: {listing['title']}")
+                print(f"URL: {listing['url']}")
+                print(f"Stats: reads={listing['reads']}, votes={listing['votes']}, parts={listing['parts']}")
                 
                 # Check criteria
-                if reads >= min_reads or votes >= min_votes or processed_count < 5:
+                if listing['reads'] >= min_reads or listing['votes'] >= min_votes or processed_count < 5:
                     # For the first few stories, ignore criteria for debugging
-                    story_data = {
-                        'id': story_id,
-                        'title': title,
-                        'description': description or story_details.get('description', ""),
-                        'author': author,
-                        'reads': reads,
-                        'votes': votes,
-                        'parts': parts,
-                        'tags': tags or story_details.get('tags', []),
-                        'url': story_url,
-                        'cover_url': cover_url,
-                        'language': language,
-                        'completed': story_details.get('completed', False),
-                        'mature': story_details.get('mature', False),
-                        'last_updated': story_details.get('last_updated', ""),
-                        'first_published': story_details.get('first_published', ""),
-                        'content_sample': story_details.get('content_sample', "")
-                    }
-                    
-                    stories.append(story_data)
+                    stories.append(build_story_record(listing, story_details, language))
                     processed_count += 1
-                    print(f"Added story #{processed_count}: {title}")
+                    print(f"Added story #{processed_count}: {listing['title']}")
                 else:
-                    print(f"Story doesn't meet criteria: reads={reads}, votes={votes}, parts={parts}")
+                    print(f"Story doesn't meet criteria: reads={listing['reads']}, votes={listing['votes']}, parts={listing['parts']}")
                 
                 # Add a small delay to avoid rate limiting
-                time.sleep(1)
+                if not cached:
+                    time.sleep(1)
                 
             except Exception as e:
                 print(f"Error processing story: {e}")
@@ -401,30 +120,385 @@ def fetch_wattpad_stories(category=None, tag=None, limit=10, language="en",
         else:
             return f"Error scraping Wattpad: {error_message}"
 
-def get_story_details(story_url, headers):
+def get_listing_url(category=None, tag=None, language="en"):
+    """
+    Builds the Wattpad listing URL for a category, a tag search or the default listing
+    
+    Args:
+        category (str): Category to list stories from (e.g., 'romance', 'fantasy')
+        tag (str): Tag to search for stories
+        language (str): Language code for stories
+        
+    Returns:
+        str: Listing URL
+    """
+    if category:
+        url = f"{WATTPAD_BASE_URL}/stories/{category}?language={language}"
+    elif tag:
+        tag_formatted = tag.replace(' ', '+')
+        url = f"{WATTPAD_BASE_URL}/search/{tag_formatted}?language={language}"
+    else:
+        url = f"{WATTPAD_BASE_URL}/stories?language={language}"
+    return url
+
+def find_story_elements(soup):
+    """Finds the story cards on a Wattpad listing page"""
+    # New approach: Extract story cards based on current structure
+    # First, try the most common pattern for story listings
+    story_elements = soup.select('ul.story-list li') or soup.select('ul.story-card-container li')
+    
+    # If no results found with those selectors, try other common patterns
+    if not story_elements:
+        story_elements = soup.select('div.story-card') or soup.select('div.browse-story-item')
+        
+    # If still no results, try more generic approaches
+    if not story_elements:
+        story_elements = soup.select('li[data-story-id]') or soup.select('div[data-story-id]')
+    
+    # Try even more generic selectors
+    if not story_elements:
+        story_elements = soup.select('li.browse-story-item') or soup.select('li.story-item') or soup.select('div.story-item')
+    
+    # Last resort, look for any list items with a link
+    if not story_elements:
+        all_list_items = soup.select('ul li')
+        story_elements = [li for li in all_list_items if li.find('a') and li.find('a').get('href') and ('/story/' in li.find('a').get('href') or '/w/' in li.find('a').get('href'))]
+    
+    return story_elements
+
+def parse_story_element(story_element, base_url=None):
+    """
+    Extracts listing information from a single story card
+    
+    Args:
+        story_element (bs4.element.Tag): Story card from a listing page
+        base_url (str): Base URL used for relative story links
+        
+    Returns:
+        dict: Story id, title, url, reads, votes, parts, author, description, tags and
+              cover_url, or None if the card has no usable title or link
+    """
+    base_url = base_url or WATTPAD_BASE_URL
+    
+    # Extract title and URL
+    title_element = (
+        story_element.select_one('.title') or 
+        story_element.select_one('h3.story-title') or 
+        story_element.select_one('h3')
+    )
+    
+    # Get the title text
+    title = ""
+    if title_element:
+        title = title_element.text.strip()
+    else:
+        # Try to find any text that looks like a title
+        for element in story_element.select('a'):
+            if element.text and len(element.text.strip()) > 0 and element.text.strip() != "Community Happenings":
+                title = element.text.strip()
+                break
+    
+    if not title:
+        # Extract title from the full text using a pattern
+        element_text = story_element.text.strip()
+        title_match = re.search(r'#\d+\s*(.+?)\s*by\s', element_text)
+        if title_match:
+            title = title_match.group(1).strip()
+    
+    # Remove any leading "#X" numbering from title
+    title = re.sub(r'^#\d+\s*', '', title)
+    
+    # If still no title, skip this element
+    if not title:
+        return None
+    
+    # Get the URL path
+    url_path = None
+    link_element = title_element if title_element and title_element.name == 'a' else story_element.find('a')
+    
+    if link_element and link_element.get('href'):
+        url_path = link_element.get('href')
+    
+    if not url_path:
+        # Try to find any href that has story in it
+        for a_tag in story_element.select('a'):
+            href = a_tag.get('href', '')
+            if '/story/' in href or '/w/' in href:
+                url_path = href
+                break
+    
+    if not url_path:
+        return None
+    
+    # Format the story URL
+    if url_path.startswith('http'):
+        story_url = url_path
+    else:
+        story_url = f"{base_url}{url_path}"
+    
+    # Extract the full text for pattern matching
+    element_text = story_element.text.strip().lower()
+    element_text_lines = element_text.split('\n')
+    
+    # Extract stats using pattern matching
+    reads = 0
+    votes = 0
+    parts = 0
+    
+    # Extract vote info if present in vote elements
+    vote_elements = story_element.select('[class*="vote"]')
+    if vote_elements:
+        for ve in vote_elements:
+            vote_text = ve.text.strip()
+            if re.search(r'\d', vote_text): # Check if the text contains numbers
+                votes = parse_number(vote_text)
+                break
+    
+    # Get numerical values directly from element text
+    # From our test, we've seen patterns like:
+    # #1ceo's girlby anushka17.8m327k45
+    # This indicates 17.8m reads, 327k votes, 45 parts
+    
+    # Extract a sequence of numbers with suffixes (pattern like 17.8m327k45)
+    combined_stats_match = re.search(r'(\d+\.?\d*[KkMmBb]?)(\d+\.?\d*[KkMmBb]?)(\d+)', element_text)
+    if combined_stats_match:
+        # First number with suffix is likely reads
+        if not reads:
+            reads = parse_number(combined_stats_match.group(1))
+            print(f"Found reads from combined pattern: {reads}")
+        
+        # Second number with suffix is likely votes
+        if not votes:
+            votes = parse_number(combined_stats_match.group(2))
+            print(f"Found votes from combined pattern: {votes}")
+        
+        # Third number is likely parts
+        if not parts:
+            parts = parse_number(combined_stats_match.group(3))
+            print(f"Found parts from combined pattern: {parts}")
+    
+    # Look for other patterns from our test output
+    for line in element_text_lines:
+        line = line.strip().lower()
+        # Some elements show votes like "327K"
+        if not votes and re.search(r'\b\d+\.?\d*[KkMmBb]\b', line):
+            vote_match = re.search(r'\b(\d+\.?\d*[KkMmBb])\b', line)
+            if vote_match:
+                votes = parse_number(vote_match.group(1))
+                print(f"Found votes from standalone K/M number: {votes}")
+    
+        # Look for reads in lines containing both numbers and "read"
+        if not reads and 'read' in line and re.search(r'\d+', line):
+            reads_text = re.search(r'(\d+\.?\d*[KkMmBb]?).*?read', line)
+            if reads_text:
+                reads = parse_number(reads_text.group(1))
+                print(f"Found reads from contextual line: {reads}")
+        
+        # Find parts in lines containing "part"
+        if not parts and 'part' in line and re.search(r'\d+', line):
+            parts_text = re.search(r'(\d+).*?part', line)
+            if parts_text:
+                parts = parse_number(parts_text.group(1))
+                print(f"Found parts from contextual line: {parts}")
+    
+    # Based on our testing output, story elements often show text like "17.8m" for reads
+    # Let's add a pattern to extract numbers followed by suffixes
+    for line in element_text_lines:
+        line = line.strip()
+        if not reads:
+            # Try to find patterns like "17.8m" that likely represent reads
+            reads_match = re.search(r'(\d+\.\d+[KkMmBb])', line)
+            if reads_match:
+                reads = parse_number(reads_match.group(1))
+                print(f"Found reads from line pattern: {reads}")
+    
+    # Extract reads from text
+    read_patterns = [
+        r'(\d+(?:\.\d+)?[KkMmBb]?)\s*(?:read|view|visit)',  # Matches: 25.5k read, 1.2m views
+        r'reads\s*(\d+(?:\.\d+)?[KkMmBb]?)',  # Matches: reads 25.5k
+        r'(\d+(?:\.\d+)?[KkMmBb]?)(?:\s*reads)'  # Matches: 25.5k reads
+    ]
+    
+    for pattern in read_patterns:
+        read_match = re.search(pattern, element_text)
+        if read_match:
+            reads = parse_number(read_match.group(1))
+            print(f"Found reads from standard pattern: {reads}")
+            break
+    
+    # Look for numbers with m/k suffix at the beginning of lines
+    if not reads:
+        reads_match = re.search(r'(\d+(?:\.\d+)?[KkMmBb])', element_text)
+        if reads_match:
+            reads = parse_number(reads_match.group(1))
+            print(f"Found reads from general number with suffix: {reads}")
+    
+    # Extract votes from text
+    vote_patterns = [
+        r'(\d+(?:\.\d+)?[KkMmBb]?)\s*(?:vote|like)',  # Matches: 25.5k votes, 1.2m likes
+        r'votes\s*(\d+(?:\.\d+)?[KkMmBb]?)',  # Matches: votes 25.5k
+        r'(\d+(?:\.\d+)?[KkMmBb]?)(?:\s*votes)'  # Matches: 25.5k votes
+    ]
+    
+    for pattern in vote_patterns:
+        vote_match = re.search(pattern, element_text)
+        if vote_match:
+            votes = parse_number(vote_match.group(1))
+            print(f"Found votes from pattern: {votes}")
+            break
+    
+    # Extract parts from text
+    part_patterns = [
+        r'(\d+)\s*(?:part|chapter)',  # Matches: 25 parts, 10 chapters
+        r'parts\s*(\d+)',  # Matches: parts 25
+        r'(\d+)(?:\s*parts)'  # Matches: 25 parts
+    ]
+    
+    # If we see numbers like 45 that could be parts count in the element text
+    if not parts:
+        # Look for isolated 2-3 digit numbers that might be part counts
+        for line in element_text_lines:
+            line = line.strip()
+            # Look for patterns like "45" that likely represent parts
+            parts_match = re.search(r'\b(\d{1,3})\b', line)
+            if parts_match and not re.search(r'#\d+', line):  # Avoid matching "#1", "#2", etc.
+                parts_candidate = int(parts_match.group(1))
+                # Parts are typically between 1-100
+                if 1 <= parts_candidate <= 100:
+                    parts = parts_candidate
+                    print(f"Found parts from isolated number: {parts}")
+                    break
+    
+    for pattern in part_patterns:
+        part_match = re.search(pattern, element_text)
+        if part_match:
+            parts = parse_number(part_match.group(1))
+            print(f"Found parts from pattern: {parts}")
+            break
+    
+    # Extract author
+    author = "Unknown Author"
+    author_element = (
+        story_element.select_one('.username') or 
+        story_element.select_one('.by-author') or
+        story_element.select_one('span.author')
+    )
+    
+    if author_element:
+        author = author_element.text.strip()
+    else:
+        # Try to extract author from text pattern
+        author_match = re.search(r'by\s+([^\s]+)', element_text)
+        if author_match:
+            author = author_match.group(1).strip()
+    
+    # If author element contains "by" prefix, remove it
+    if author.lower().startswith('by '):
+        author = author[3:].strip()
+    
+    # Extract description
+    description = ""
+    description_element = (
+        story_element.select_one('.description') or 
+        story_element.select_one('.story-description') or
+        story_element.select_one('p.description')
+    )
+    
+    if description_element:
+        description = description_element.text.strip()
+    
+    # Extract tags
+    tags = []
+    tags_container = (
+        story_element.select('.tag-items') or 
+        story_element.select('.tag-list') or
+        story_element.select('.story-tags')
+    )
+    
+    if tags_container:
+        tag_elements = tags_container[0].select('a, span.tag')
+        tags = [tag.text.strip() for tag in tag_elements if tag.text.strip()]
+    
+    # Extract cover image URL if available
+    cover_url = ""
+    cover_img = story_element.select_one('img.cover, img.story-cover')
+    if cover_img:
+        cover_url = cover_img.get('src', '')
+    
+    # Extract story ID
+    story_id = ""
+    if url_path:
+        id_match = re.search(r'\/story\/(\d+)', url_path)
+        if id_match:
+            story_id = id_match.group(1)
+    
+    return {
+        'id': story_id,
+        'title': title,
+        'url': story_url,
+        'reads': reads,
+        'votes': votes,
+        'parts': parts,
+        'author': author,
+        'description': description,
+        'tags': tags,
+        'cover_url': cover_url
+    }
+
+def build_story_record(listing, story_details, language="en"):
+    """Combines a story's listing information and page details into the story dict used by the app"""
+    return {
+        'id': listing['id'],
+        'title': listing['title'],
+        'description': listing['description'] or story_details.get('description', ""),
+        'author': listing['author'],
+        'reads': listing['reads'],
+        'votes': listing['votes'],
+        'parts': listing['parts'],
+        'tags': listing['tags'] or story_details.get('tags', []),
+        'url': listing['url'],
+        'cover_url': listing['cover_url'],
+        'language': language,
+        'completed': story_details.get('completed', False),
+        'mature': story_details.get('mature', False),
+        'last_updated': story_details.get('last_updated', ""),
+        'first_published': story_details.get('first_published', ""),
+        'content_sample': story_details.get('content_sample', "")
+    }
+
+def get_story_details(story_url, headers, fetch=None):
     """
     Gets additional details about a story from its page
     
     Args:
         story_url (str): URL of the story page
         headers (dict): Headers for the request
+        fetch (callable): Function used to make requests, called like requests.get
         
     Returns:
-        dict: Additional details about the story
+        dict: Additional details about the story, including any reads/votes/parts
+              shown on the page and links to related stories
     """
+    fetch = fetch or requests.get
     details = {
+        'title': "",
+        'author': "",
         'completed': False,
         'mature': False,
         'last_updated': "",
         'first_published': "",
         'description': "",
         'tags': [],
-        'content_sample': ""
+        'content_sample': "",
+        'reads': 0,
+        'votes': 0,
+        'parts': 0,
+        'related_urls': []
     }
     
     try:
         # Make the request
-        response = requests.get(story_url, headers=headers)
+        response = fetch(story_url, headers=headers)
         
         if response.status_code != 200:
             return details
@@ -492,6 +566,21 @@ def get_story_details(story_url, headers):
             elif 'published' in date_text:
                 details['first_published'] = extract_date(date_text)
                 
+        # Extract the title and author, used for stories discovered through related-story links
+        title_meta = soup.select_one('meta[property="og:title"]')
+        title_element = soup.select_one('h1') or soup.select_one('.story-info__title')
+        if title_meta and title_meta.get('content'):
+            details['title'] = title_meta.get('content').strip()
+        elif title_element:
+            details['title'] = title_element.text.strip()
+        author_element = soup.select_one('.author-info__username') or soup.select_one('a.username')
+        if author_element:
+            details['author'] = author_element.text.strip()
+        
+        # Extract the story's stats and links to other stories (e.g. "You'll also like")
+        details.update(parse_story_stats(soup))
+        details['related_urls'] = find_story_links(soup, exclude_url=story_url)
+        
         # Get a sample of the content from the first chapter
         try:
             # Find the first chapter link
@@ -516,7 +605,7 @@ def get_story_details(story_url, headers):
                 if not chapter_url.startswith('http'):
                     chapter_url = f"https://www.wattpad.com{chapter_url}"
                 
-                chapter_response = requests.get(chapter_url, headers=headers)
+                chapter_response = fetch(chapter_url, headers=headers)
                 
                 if chapter_response.status_code == 200:
                     chapter_soup = BeautifulSoup(chapter_response.text, 'html.parser')
@@ -545,6 +634,94 @@ def get_story_details(story_url, headers):
         print(f"Error getting story details: {e}")
         return details
 
+def parse_story_stats(soup):
+    """
+    Extracts reads, votes and parts counts from a story page
+    
+    Args:
+        soup (BeautifulSoup): Parsed story page
+        
+    Returns:
+        dict: reads, votes and parts (0 when not found)
+    """
+    stats = {'reads': 0, 'votes': 0, 'parts': 0}
+    
+    # Stat items usually pair a label ("Reads") with a value ("17.8M")
+    for stat_element in soup.select('[class*="stats-value"], [class*="story-stats"] li, [data-testid*="stat"]'):
+        stat_text = stat_element.text.strip().lower()
+        for key, label in (('reads', 'read'), ('votes', 'vote'), ('parts', 'part')):
+            if not stats[key] and label in stat_text and re.search(r'\d', stat_text):
+                stats[key] = parse_number(re.search(r'(\d[\d.,]*\s*[kmb]?)', stat_text).group(1))
+    
+    # Fall back to the page text ("17.8M Reads", "327K Votes", "45 Parts")
+    page_text = soup.get_text(" ").lower()
+    for key, label in (('reads', 'reads?'), ('votes', 'votes?'), ('parts', 'parts?')):
+        if not stats[key]:
+            stat_match = re.search(r'(\d[\d.,]*\s*[kmb]?)\s*' + label + r'\b', page_text)
+            if stat_match:
+                stats[key] = parse_number(stat_match.group(1))
+    
+    return stats
+
+def find_story_links(soup, exclude_url=None):
+    """
+    Finds links to story pages
+    
+    Args:
+        soup (BeautifulSoup): Parsed page
+        exclude_url (str): URL of the current story, which is left out
+        
+    Returns:
+        list: Absolute story URLs without duplicates, in page order
+    """
+    exclude_id = get_story_id(exclude_url) if exclude_url else None
+    links = []
+    seen = set()
+    for link in soup.select('a[href*="/story/"]'):
+        href = link.get('href', '').split('?')[0].split('#')[0]
+        story_id = get_story_id(href)
+        if not story_id or story_id == exclude_id or story_id in seen:
+            continue
+        seen.add(story_id)
+        links.append(href if href.startswith('http') else f"{WATTPAD_BASE_URL}{href}")
+    return links
+
+def find_next_page_url(soup, current_url):
+    """
+    Finds the link to the next page of a listing
+    
+    Args:
+        soup (BeautifulSoup): Parsed listing page
+        current_url (str): URL of the listing page
+        
+    Returns:
+        str: Absolute URL of the next page, or None if there is no pagination link
+    """
+    next_link = (
+        soup.select_one('a[rel="next"]') or
+        soup.select_one('.pagination a.next') or
+        soup.select_one('a.next-page') or
+        soup.select_one('a[aria-label*="Next"]')
+    )
+    if next_link and next_link.get('href'):
+        href = next_link.get('href')
+        return href if href.startswith('http') else f"{WATTPAD_BASE_URL}{href}"
+    
+    # Listings may only expose numbered page links; follow the one after the current page
+    page_match = re.search(r'[?&]page=(\d+)', current_url)
+    current_page = int(page_match.group(1)) if page_match else 1
+    for link in soup.select('a[href*="page="]'):
+        href = link.get('href', '')
+        href_match = re.search(r'[?&]page=(\d+)', href)
+        if href_match and int(href_match.group(1)) == current_page + 1:
+            return href if href.startswith('http') else f"{WATTPAD_BASE_URL}{href}"
+    return None
+
+def get_story_id(url):
+    """Extracts the numeric story id from a Wattpad story URL"""
+    id_match = re.search(r'\/story\/(\d+)', url or "")
+    return id_match.group(1) if id_match else ""
+
 def parse_number(text):
     """
     Parses number strings like '10.5k' or '2.3M' to integers